@@ -3,21 +3,32 @@ Fisher钓鱼模块
 智能钓鱼辅助工具的核心钓鱼模块
 
 作者: AutoFish Team
-版本: v1.0
+版本: v1.0.1
 创建时间: 2024-12-28
+更新时间: 2026-10-16
+修复历史: v1.0.1 - 核心组件改为首次访问时导入，导入子模块不再连带加载模型和界面
 """
 
 __version__ = "1.0.0"
 __author__ = "AutoFish Team"
 __description__ = "智能钓鱼辅助模块"
 
-# 导入核心组件
-from .config import FisherConfig
-from .fishing_controller import FishingController
-from .ui import FisherUI
+# 核心组件在首次访问时导入，导入本包（如只使用配置）不会加载模型、输入后端或界面
+_LAZY_EXPORTS = {
+    'FisherConfig': '.config',
+    'FishingController': '.fishing_controller',
+    'SessionOrchestrator': '.multi_session',
+    'FisherUI': '.ui',
+}
 
-__all__ = [
-    'FisherConfig',
-    'FishingController', 
-    'FisherUI'
-] 
\ No newline at end of file
+__all__ = list(_LAZY_EXPORTS)
+
+
+def __getattr__(name: str):
+    module_name = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    from importlib import import_module
+    value = getattr(import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
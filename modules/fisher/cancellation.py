@@ -0,0 +1,67 @@
+"""
+Fisher钓鱼模块取消令牌
+钓鱼控制器和输入控制器共用的可中断等待：所有等待都通过令牌进行，
+停止时取消令牌，正在进行的等待立即返回，并触发注册的取消回调（如取消全部输入任务）
+
+作者: AutoFish Team
+版本: v1.0
+创建时间: 2026-10-16
+"""
+
+import threading
+from typing import Callable, List, Optional
+
+
+class CancelToken:
+    """取消令牌"""
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._callbacks: List[Callable[[], None]] = []
+        self._lock = threading.Lock()
+
+    @property
+    def is_cancelled(self) -> bool:
+        """是否已取消"""
+        return self._event.is_set()
+
+    def cancel(self) -> None:
+        """取消：唤醒所有等待并依次执行取消回调（重复取消时不再执行）"""
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._event.set()
+            callbacks = list(self._callbacks)
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:
+                pass
+
+    def reset(self) -> None:
+        """重置为未取消状态（开始新一次运行前调用）"""
+        self._event.clear()
+
+    def wait(self, timeout: Optional[float]) -> bool:
+        """
+        可中断等待
+
+        Args:
+            timeout: 等待时间(秒)，None表示一直等待到取消
+
+        Returns:
+            bool: 等待期间是否被取消（True表示应停止后续操作）
+        """
+        if timeout is not None and timeout <= 0:
+            return self._event.is_set()
+        return self._event.wait(timeout)
+
+    def add_callback(self, callback: Callable[[], None]) -> None:
+        """
+        注册取消回调（在调用cancel的线程中执行）
+
+        Args:
+            callback: 无参回调函数
+        """
+        with self._lock:
+            self._callbacks.append(callback)
@@ -3,15 +3,21 @@ Fisher钓鱼模块配置管理器
 负责加载和管理所有配置项，包括系统配置、热键配置、模型参数等
 
 作者: AutoFish Team
-版本: v1.0
+版本: v1.0.1
 创建时间: 2024-12-28
+更新时间: 2026-10-16
+修复历史: v1.0.1 - 配置热更新：后台线程按修改时间监视配置文件，校验通过后整体替换配置快照并通知订阅方，
+                   检测间隔、置信度阈值、调度和门控参数无需重启即可生效；程序内修改配置统一通过update()
 """
 
 import os
+import copy
+import threading
+import weakref
 import yaml
 from pathlib import Path
-from typing import Dict, Any, Optional
-from dataclasses import dataclass
+from typing import Dict, Any, Optional, Callable, List, Set, Tuple
+from dataclasses import dataclass, field, replace
 
 @dataclass
 class ModelConfig:
@@ -19,6 +25,13 @@ class ModelConfig:
     model_path: str = "runs/fishing_model_latest.pt"  # 模型文件路径
     confidence_threshold: float = 0.5  # 置信度阈值
     device: str = "auto"  # 设备选择: auto/cpu/cuda
+    backend: str = "ultralytics"  # 推理后端: ultralytics/onnx/openvino
+    imgsz: int = 640  # 模型输入尺寸 (ONNX/OpenVINO导出使用)
+    iou_threshold: float = 0.7  # NMS IoU阈值 (ONNX/OpenVINO后端使用)
+    cpu_threads: int = 0  # CPU推理线程数 (ONNX/OpenVINO后端使用)，0表示自动
+    precision: str = "fp32"  # 模型精度: fp32/int8 (int8使用量化模型，ONNX/OpenVINO后端使用)
+    warmup_runs: int = 3  # 初始化时的预热推理次数，0表示不预热
+    latency_window: int = 500  # 推理耗时统计的滚动窗口大小
     detection_interval: float = 0.1  # 默认检测间隔(秒)
     
     # 动态检测间隔配置
@@ -61,6 +74,112 @@ class RetryConfig:
     mouse_move_pixels: int = 600  # 鼠标移动距离(像素) - Windows API直接移动
     mouse_move_delay: float = 0.2  # 鼠标移动后等待时间(秒)
 
+@dataclass
+class RoiConfig:
+    """ROI区域检测配置类 - 只截取并推理状态指示所在的屏幕区域"""
+    enabled: bool = False  # 是否启用ROI模式
+    # 固定区域配置 {状态编号: [left, top, width, height]}，屏幕坐标，优先于学习到的区域
+    regions: Dict[int, list] = field(default_factory=dict)
+    learn_from_history: bool = True  # 是否根据历史检测框学习区域
+    history_size: int = 200  # 每个状态保留的历史检测框数量
+    min_samples: int = 20  # 学习区域所需的最少检测次数
+    padding: int = 40  # 区域四周扩展像素
+    full_frame_interval: int = 50  # ROI内连续未检测到的次数达到该值时执行一次全屏检测
+
+@dataclass
+class CaptureConfig:
+    """截图配置类"""
+    background_thread: bool = False  # 是否启用后台截图线程
+    target_fps: float = 30.0  # 后台截图目标帧率
+    ring_size: int = 3  # 环形帧缓冲区槽位数 (至少3)
+    max_frame_age: float = 0.2  # 最新帧超过该时长(秒)视为过期，改为同步截图
+
+@dataclass
+class GateConfig:
+    """帧差门控配置类 - 画面无变化时跳过模型推理"""
+    enabled: bool = True  # 是否启用帧差门控
+    diff_threshold: float = 8.0  # 区块灰度差异阈值 (0-255)，低于该值视为画面未变化
+    downsample_width: int = 64  # 比较用缩略图宽度(像素)
+    max_skip_time: float = 1.0  # 最长复用时间(秒)，超过后强制重新推理
+
+@dataclass
+class SchedulerConfig:
+    """检测调度配置类 - 按阶段帧预算自适应安排检测间隔"""
+    enabled: bool = True  # 是否启用自适应调度，关闭时每轮固定等待阶段检测间隔
+    backoff_factor: float = 1.5  # 画面连续未变化时每轮间隔放大倍数
+    max_backoff: float = 4.0  # 最大放大倍数
+    boost_factor: float = 0.5  # 状态转换后的间隔缩小倍数
+    boost_duration: float = 1.0  # 状态转换后加速检测持续时间(秒)
+    min_sleep: float = 0.005  # 每轮最少等待时间(秒)，避免占满CPU
+
+@dataclass
+class SmoothingConfig:
+    """检测结果时间滤波配置类 - 状态在多帧中稳定出现后才交给状态机"""
+    enabled: bool = True  # 是否启用时间滤波，关闭时直接使用单帧检测结果
+    method: str = "vote"  # 滤波方式: vote(k-of-n投票)/ema(置信度指数滑动平均)
+    window: int = 3  # 历史帧数 (投票的n)
+    min_votes: int = 2  # 输出新状态所需的最少出现帧数 (投票的k)
+    release_votes: int = 1  # 已输出状态保持所需的最少出现帧数（滞回）
+    ema_alpha: float = 0.4  # 指数滑动平均系数
+    ema_enter: float = 0.45  # 输出新状态的平均置信度阈值
+    ema_exit: float = 0.2  # 已输出状态保持的平均置信度阈值（滞回）
+    min_confidence: float = 0.0  # 参与滤波的最低单帧置信度，0表示使用检测器输出的全部结果
+
+@dataclass
+class RecordingConfig:
+    """会话录制配置类 - 保存检测帧和检测结果供离线回放"""
+    enabled: bool = False  # 是否在钓鱼时录制会话
+    output_dir: str = "recordings"  # 录制根目录，每次钓鱼新建一个按时间命名的子目录
+    chunk_frames: int = 300  # 每个分块文件的最大帧数
+    jpeg_quality: int = 80  # JPEG压缩质量 (1-100)
+    max_queue: int = 64  # 待写入帧队列长度，写入跟不上时丢弃新帧
+
+@dataclass
+class DiagnosticsConfig:
+    """检测诊断配置类 - 提线阶段在后台线程以低置信度阈值抽样分析检测帧"""
+    enabled: bool = True  # 是否启用诊断采样
+    sample_interval: float = 1.0  # 采样间隔(秒)，诊断线程忙时跳过
+    summary_interval: float = 10.0  # 诊断摘要输出间隔(秒)
+    conf: float = 0.1  # 诊断推理置信度阈值
+    deep_conf: float = 0.01  # 连续未检测到目标状态时使用的更低阈值
+    deep_after_misses: int = 500  # 连续未检测到目标状态多少次后改用deep_conf
+
+@dataclass
+class SessionsConfig:
+    """多会话配置类 - 一个进程驱动多个游戏窗口，共用一份模型"""
+    windows: list = field(default_factory=list)  # 各游戏窗口区域 [left, top, width, height]
+    batch_inference: bool = True  # 是否把各会话同一节拍内的帧合并为一次推理
+    max_batch: int = 8  # 单次合并的最大帧数
+    max_wait: float = 0.005  # 收到首帧后等待其他会话提交的最长时间(秒)
+
+@dataclass
+class ServiceConfig:
+    """检测服务配置类 - 连接常驻检测服务进程，不在本进程加载模型"""
+    enabled: bool = False  # 是否优先使用检测服务，服务未启动时在本进程加载模型
+    host: str = "127.0.0.1"  # 服务地址（仅本机）
+    port: int = 47631  # 服务端口
+    connect_timeout: float = 0.5  # 连接超时时间(秒)
+    request_timeout: float = 2.0  # 单次推理请求超时时间(秒)
+
+@dataclass
+class TelemetryConfig:
+    """遥测配置类 - 与文本日志并行记录结构化事件（检测、阶段转换、输入动作、轮次结果）"""
+    enabled: bool = True  # 是否记录遥测事件
+    output_dir: str = "logs/telemetry"  # 遥测文件目录，每次钓鱼一个 .ftl 文件
+    flush_interval: float = 1.0  # 写入线程写盘周期(秒)
+
+@dataclass
+class HotReloadConfig:
+    """配置热更新配置类 - 监视配置文件，修改保存后自动重新加载"""
+    enabled: bool = True  # 是否监视配置文件
+    poll_interval: float = 1.0  # 检查文件修改时间的间隔(秒)
+    settle_time: float = 0.2  # 发现修改后等待文件写完的时间(秒)，期间再次变化则推迟加载
+
+@dataclass
+class InputConfig:
+    """输入配置类"""
+    backend: str = "windows"  # 输入后端: windows(实际键鼠操作)/recording(只记录不操作，用于测试)
+
 @dataclass
 class HotkeyConfig:
     """热键配置类"""
@@ -76,9 +195,158 @@ class UIConfig:
     status_window_color: str = "blue"  # 状态窗口文字颜色
     main_window_size: tuple = (400, 300)  # 主窗口大小
 
+# 配置节名称 → 配置类（配置文件各节及保存顺序）
+SECTION_TYPES: Dict[str, type] = {
+    'model': ModelConfig,
+    'timing': TimingConfig,
+    'retry': RetryConfig,
+    'roi': RoiConfig,
+    'capture': CaptureConfig,
+    'gate': GateConfig,
+    'scheduler': SchedulerConfig,
+    'smoothing': SmoothingConfig,
+    'recording': RecordingConfig,
+    'diagnostics': DiagnosticsConfig,
+    'sessions': SessionsConfig,
+    'service': ServiceConfig,
+    'telemetry': TelemetryConfig,
+    'hot_reload': HotReloadConfig,
+    'input': InputConfig,
+    'hotkey': HotkeyConfig,
+    'ui': UIConfig,
+}
+
+# 取值范围校验 {(配置节, 配置项): (最小值, 最大值)}，None表示不限
+_VALUE_RANGES: Dict[Tuple[str, str], Tuple[Optional[float], Optional[float]]] = {
+    ('model', 'confidence_threshold'): (0.0, 1.0),
+    ('model', 'iou_threshold'): (0.0, 1.0),
+    ('model', 'imgsz'): (32, None),
+    ('model', 'cpu_threads'): (0, None),
+    ('model', 'warmup_runs'): (0, None),
+    ('model', 'latency_window'): (1, None),
+    ('capture', 'target_fps'): (1.0, None),
+    ('capture', 'ring_size'): (3, None),
+    ('gate', 'diff_threshold'): (0.0, 255.0),
+    ('gate', 'downsample_width'): (8, None),
+    ('gate', 'max_skip_time'): (0.0, None),
+    ('scheduler', 'backoff_factor'): (1.0, None),
+    ('scheduler', 'max_backoff'): (1.0, None),
+    ('scheduler', 'boost_factor'): (0.0, 1.0),
+    ('scheduler', 'boost_duration'): (0.0, None),
+    ('scheduler', 'min_sleep'): (0.0, None),
+    ('smoothing', 'window'): (1, None),
+    ('smoothing', 'min_votes'): (1, None),
+    ('smoothing', 'release_votes'): (1, None),
+    ('smoothing', 'ema_alpha'): (0.0, 1.0),
+    ('smoothing', 'min_confidence'): (0.0, 1.0),
+    ('recording', 'jpeg_quality'): (1, 100),
+    ('diagnostics', 'conf'): (0.0, 1.0),
+    ('diagnostics', 'deep_conf'): (0.0, 1.0),
+    ('hot_reload', 'poll_interval'): (0.1, None),
+    ('hot_reload', 'settle_time'): (0.0, None),
+}
+
+# 必须大于0的配置项
+_POSITIVE_VALUES: Set[Tuple[str, str]] = {
+    ('model', 'detection_interval'),
+    ('model', 'detection_interval_idle'),
+    ('model', 'detection_interval_waiting'),
+    ('model', 'detection_interval_pulling'),
+    ('model', 'detection_interval_success'),
+    ('diagnostics', 'sample_interval'),
+    ('diagnostics', 'summary_interval'),
+    ('telemetry', 'flush_interval'),
+}
+
+# 需重启程序才生效的配置 {配置节: 配置项}，None表示整节
+# （模型和推理后端、截图线程、ROI管理器、检测服务、输入后端和热键在启动时创建；
+#   时间配置中的状态机延时、时间滤波、录制、诊断采样和遥测在下次开始钓鱼时生效，其余配置修改保存后立即生效）
+RESTART_REQUIRED: Dict[str, Optional[Tuple[str, ...]]] = {
+    'model': ('model_path', 'device', 'backend', 'imgsz', 'iou_threshold', 'cpu_threads',
+              'precision', 'warmup_runs', 'latency_window'),
+    'roi': None,
+    'capture': ('background_thread', 'target_fps', 'ring_size'),
+    'sessions': None,
+    'service': None,
+    'input': None,
+    'hotkey': None,
+    'ui': None,
+}
+
+
+@dataclass(frozen=True)
+class ConfigSnapshot:
+    """
+    配置快照：一次加载得到的全部配置节
+
+    快照及其中的配置节创建后不再修改，热更新和update()时创建新的配置节对象和新快照，再整体替换
+    FisherConfig持有的快照引用（单次赋值，读取方不会看到一半新一半旧的配置）。
+    检测循环等热路径直接读取快照，无需加锁；需要多项配置一致时先取一次 fisher_config.snapshot 再读取。
+    """
+    model: ModelConfig
+    timing: TimingConfig
+    retry: RetryConfig
+    roi: RoiConfig
+    capture: CaptureConfig
+    gate: GateConfig
+    scheduler: SchedulerConfig
+    smoothing: SmoothingConfig
+    recording: RecordingConfig
+    diagnostics: DiagnosticsConfig
+    sessions: SessionsConfig
+    service: ServiceConfig
+    telemetry: TelemetryConfig
+    hot_reload: HotReloadConfig
+    input: InputConfig
+    hotkey: HotkeyConfig
+    ui: UIConfig
+    version: int = 0  # 加载序号，每次热更新加1
+
+    @classmethod
+    def defaults(cls) -> 'ConfigSnapshot':
+        """全部使用默认值的快照"""
+        return cls(**{name: config_type() for name, config_type in SECTION_TYPES.items()})
+
+
+class _SnapshotSection:
+    """FisherConfig的配置节属性：读取当前快照中的同名配置节（fisher_config.model 等写法保持不变）"""
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        return getattr(obj._snapshot, self.name)
+
+
+# 配置变化回调：(新快照, 变化的配置节名称集合)
+ConfigListener = Callable[[ConfigSnapshot, Set[str]], None]
+
+
 class FisherConfig:
     """Fisher钓鱼模块配置管理器"""
     
+    # 各配置节（只读，读取当前快照）
+    model = _SnapshotSection()
+    timing = _SnapshotSection()
+    retry = _SnapshotSection()  # v1.0.21新增
+    roi = _SnapshotSection()
+    capture = _SnapshotSection()
+    gate = _SnapshotSection()
+    scheduler = _SnapshotSection()
+    smoothing = _SnapshotSection()
+    recording = _SnapshotSection()
+    diagnostics = _SnapshotSection()
+    sessions = _SnapshotSection()
+    service = _SnapshotSection()
+    telemetry = _SnapshotSection()
+    hot_reload = _SnapshotSection()
+    input = _SnapshotSection()
+    hotkey = _SnapshotSection()
+    ui = _SnapshotSection()
+    # OCR配置已移除 - v1.0.12开始不再使用OCR功能
+    
     def __init__(self, config_path: Optional[str] = None):
         """
         初始化配置管理器
@@ -91,70 +359,310 @@ class FisherConfig:
         
         self.config_path = Path(config_path)
         
-        # 初始化各配置类
-        self.model = ModelConfig()
-        # self.ocr = OCRConfig()  # 已移除OCR功能
-        self.timing = TimingConfig()
-        self.retry = RetryConfig()  # v1.0.21新增
-        self.hotkey = HotkeyConfig()
-        self.ui = UIConfig()
+        # 当前配置快照（热更新时整体替换）
+        self._snapshot = ConfigSnapshot.defaults()
+        self._lock = threading.RLock()  # 串行化加载和保存（读取配置不加锁）
+        self._file_stamp: Optional[Tuple[int, int]] = None  # 最近一次加载或保存时的文件(修改时间, 大小)
+        
+        # 配置变化订阅方（绑定方法保存弱引用，订阅对象销毁后自动移除）
+        self._listeners: List[Callable[[], Optional[ConfigListener]]] = []
+        
+        # 配置文件监视线程
+        self._watch_thread: Optional[threading.Thread] = None
+        self._watch_stop = threading.Event()
         
         # 加载配置文件
         self.load_config()
     
+    @property
+    def snapshot(self) -> ConfigSnapshot:
+        """当前配置快照"""
+        return self._snapshot
+    
     def load_config(self) -> None:
-        """从配置文件加载配置"""
+        """从配置文件加载配置（启动时调用，失败时保持当前配置，不通知订阅方）"""
+        with self._lock:
+            try:
+                if self.config_path.exists():
+                    self._snapshot = self._read_snapshot()
+                    print(f"配置加载成功: {self.config_path}")
+                else:
+                    print(f"配置文件不存在，使用默认配置: {self.config_path}")
+                    self.save_config()  # 保存默认配置
+                    
+            except Exception as e:
+                print(f"配置加载失败，使用默认配置: {e}")
+    
+    def reload(self) -> bool:
+        """
+        重新加载配置文件：校验通过后替换配置快照并通知订阅方，失败时保持当前配置
+        
+        Returns:
+            bool: 配置是否有变化并已生效
+        """
+        with self._lock:
+            old = self._snapshot
+            try:
+                new = self._read_snapshot(version=old.version + 1)
+            except Exception as e:
+                print(f"配置热更新失败，保持当前配置: {e}")
+                return False
+            
+            changed = {name for name in SECTION_TYPES if getattr(new, name) != getattr(old, name)}
+            if not changed:
+                return False
+            self._snapshot = new
+        
+        print(f"配置已热更新 (第{new.version}次): {', '.join(sorted(changed))}")
+        restart = self._restart_required_changes(old, new, changed)
+        if restart:
+            print(f"以下配置需重启程序生效: {', '.join(restart)}")
+        self._notify_listeners(new, changed)
+        return True
+    
+    def update(self, **changes: Dict[str, Any]) -> Set[str]:
+        """
+        修改配置：按当前快照创建新的配置节对象并校验，整体替换快照后通知订阅方
+        （不修改正在使用的配置节对象，也不写入文件，需要保存时再调用save_config）
+        
+        Args:
+            **changes: 配置节名称=要修改的配置项字典，如 update(hotkey={'start_fishing': 'f2'})
+            
+        Returns:
+            Set[str]: 有变化的配置节名称
+            
+        Raises:
+            ValueError: 未知的配置节或配置项，或配置值类型、取值不合法（此时配置不变）
+        """
+        with self._lock:
+            old = self._snapshot
+            errors: List[str] = []
+            sections = {}
+            for name, values in changes.items():
+                if name not in SECTION_TYPES:
+                    raise ValueError(f"未知的配置节: {name}")
+                current = getattr(old, name)
+                unknown = [key for key in values if not hasattr(current, key)]
+                if unknown:
+                    raise ValueError(f"未知的配置项: {', '.join(f'{name}.{key}' for key in unknown)}")
+                data = copy.deepcopy({**self._config_to_dict(current), **values})
+                sections[name] = self._build_section(name, SECTION_TYPES[name], data, errors)
+            if errors:
+                raise ValueError("; ".join(errors))
+            
+            changed = {name for name, section in sections.items() if section != getattr(old, name)}
+            if not changed:
+                return changed
+            new = replace(old, version=old.version + 1, **{name: sections[name] for name in changed})
+            self._snapshot = new
+        
+        self._notify_listeners(new, changed)
+        return changed
+    
+    def _read_snapshot(self, version: int = 0) -> ConfigSnapshot:
+        """
+        读取并校验配置文件
+        
+        Raises:
+            ValueError: 配置项类型或取值不合法
+        """
+        stamp = self._stat_file()  # 先取修改时间再读取，读取期间的修改留给下次检查
+        with open(self.config_path, 'r', encoding='utf-8') as f:
+            config_data = yaml.safe_load(f) or {}
+        if not isinstance(config_data, dict):
+            raise ValueError("配置文件顶层必须是映射")
+        
+        errors: List[str] = []
+        sections = {name: self._build_section(name, config_type, config_data.get(name) or {}, errors)
+                    for name, config_type in SECTION_TYPES.items()}
+        if errors:
+            raise ValueError("; ".join(errors))
+        
+        self._file_stamp = stamp
+        return ConfigSnapshot(version=version, **sections)
+    
+    def _build_section(self, name: str, config_type: type, data: Dict[str, Any], errors: List[str]) -> object:
+        """从字典创建新的配置节对象并校验，错误追加到errors"""
+        section = config_type()
+        if not isinstance(data, dict):
+            errors.append(f"{name}: 必须是映射")
+            return section
+        
+        for key, value in data.items():
+            if not hasattr(section, key):
+                continue  # 忽略未知配置项（如已移除的旧配置）
+            try:
+                value = self._check_type(getattr(section, key), value)
+            except ValueError as e:
+                errors.append(f"{name}.{key}: {e}")
+                continue
+            
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                low, high = _VALUE_RANGES.get((name, key), (None, None))
+                if (low is not None and value < low) or (high is not None and value > high):
+                    errors.append(f"{name}.{key}: {value} 超出范围 [{low}, {'' if high is None else high}]")
+                    continue
+                if (name, key) in _POSITIVE_VALUES and value <= 0:
+                    errors.append(f"{name}.{key}: 必须大于0")
+                    continue
+            setattr(section, key, value)
+        
+        # 成对配置项的大小关系
+        if isinstance(section, TimingConfig):
+            for prefix in ('mouse_press_time', 'mouse_release_time', 'click_interval'):
+                if getattr(section, f"{prefix}_min") > getattr(section, f"{prefix}_max"):
+                    errors.append(f"{name}.{prefix}_min 不能大于 {prefix}_max")
+        elif isinstance(section, SmoothingConfig) and section.min_votes > section.window:
+            errors.append(f"{name}.min_votes 不能大于 window")
+        return section
+    
+    @staticmethod
+    def _check_type(default: Any, value: Any) -> Any:
+        """
+        按默认值的类型检查配置值（整数可用于浮点配置，列表可用于元组配置）
+        
+        Raises:
+            ValueError: 类型不匹配
+        """
+        if isinstance(default, bool):
+            if not isinstance(value, bool):
+                raise ValueError(f"应为布尔值，实际为 {value!r}")
+        elif isinstance(default, int):
+            if isinstance(value, float) and value.is_integer():
+                value = int(value)
+            if isinstance(value, bool) or not isinstance(value, int):
+                raise ValueError(f"应为整数，实际为 {value!r}")
+        elif isinstance(default, float):
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                raise ValueError(f"应为数值，实际为 {value!r}")
+            value = float(value)
+        elif isinstance(default, str):
+            if not isinstance(value, str):
+                raise ValueError(f"应为字符串，实际为 {value!r}")
+        elif isinstance(default, (list, tuple)):
+            if not isinstance(value, (list, tuple)):
+                raise ValueError(f"应为列表，实际为 {value!r}")
+        elif isinstance(default, dict):
+            if not isinstance(value, dict):
+                raise ValueError(f"应为映射，实际为 {value!r}")
+        return value
+    
+    @staticmethod
+    def _restart_required_changes(old: ConfigSnapshot, new: ConfigSnapshot, changed: Set[str]) -> List[str]:
+        """列出本次变化中需重启才生效的配置项"""
+        result = []
+        for name in sorted(changed & RESTART_REQUIRED.keys()):
+            keys = RESTART_REQUIRED[name]
+            if keys is None:
+                result.append(name)
+                continue
+            old_section, new_section = getattr(old, name), getattr(new, name)
+            result.extend(f"{name}.{key}" for key in keys
+                          if getattr(old_section, key) != getattr(new_section, key))
+        return result
+    
+    def add_listener(self, callback: ConfigListener) -> None:
+        """
+        订阅配置变化（热更新成功后在监视线程中调用）
+        
+        Args:
+            callback: 回调函数 callback(新快照, 变化的配置节名称集合)；
+                      绑定方法只保存弱引用，不会因订阅而延长对象生命周期
+        """
+        if hasattr(callback, '__self__'):
+            ref = weakref.WeakMethod(callback)
+        else:
+            ref = lambda: callback
+        with self._lock:
+            self._listeners.append(ref)
+    
+    def _notify_listeners(self, snapshot: ConfigSnapshot, changed: Set[str]) -> None:
+        """通知订阅方，移除已销毁对象的订阅"""
+        with self._lock:
+            self._listeners = [ref for ref in self._listeners if ref() is not None]
+            listeners = [ref() for ref in self._listeners]
+        for callback in listeners:
+            if callback is None:
+                continue
+            try:
+                callback(snapshot, changed)
+            except Exception as e:
+                print(f"配置变化回调失败: {e}")
+    
+    def start_watching(self) -> bool:
+        """
+        启动配置文件监视线程（hot_reload.enabled 关闭时不启动）
+        
+        Returns:
+            bool: 监视线程是否在运行
+        """
+        with self._lock:
+            if self._watch_thread is not None and self._watch_thread.is_alive():
+                return True
+            if not self.hot_reload.enabled:
+                return False
+            if self._file_stamp is None:
+                self._file_stamp = self._stat_file()
+            self._watch_stop.clear()
+            self._watch_thread = threading.Thread(target=self._watch_loop, name="ConfigWatcher", daemon=True)
+            self._watch_thread.start()
+        print(f"配置热更新已启用: {self.config_path}")
+        return True
+    
+    def stop_watching(self) -> None:
+        """停止配置文件监视线程"""
+        self._watch_stop.set()
+        thread = self._watch_thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=2.0)
+        self._watch_thread = None
+    
+    def _watch_loop(self) -> None:
+        """监视线程：轮询文件修改时间，文件写完后重新加载（运行中关闭hot_reload.enabled则退出）"""
+        while not self._watch_stop.wait(self.hot_reload.poll_interval):
+            stamp = self._stat_file()
+            if stamp is None or stamp == self._file_stamp:
+                continue
+            # 编辑器可能分多次写入：等待一段时间文件不再变化后再加载
+            if self._watch_stop.wait(self.hot_reload.settle_time):
+                break
+            if self._stat_file() != stamp:
+                continue
+            if not self.reload():
+                self._file_stamp = stamp  # 内容无变化或加载失败：同一版本文件不再重复加载
+            if not self.hot_reload.enabled:
+                print("配置热更新已关闭")
+                break
+    
+    def _stat_file(self) -> Optional[Tuple[int, int]]:
+        """获取配置文件的(修改时间纳秒, 大小)，文件不存在时返回None"""
         try:
-            if self.config_path.exists():
-                with open(self.config_path, 'r', encoding='utf-8') as f:
-                    config_data = yaml.safe_load(f) or {}
-                
-                # 更新各配置类
-                self._update_config_from_dict(self.model, config_data.get('model', {}))
-                # self._update_config_from_dict(self.ocr, config_data.get('ocr', {}))  # 已移除OCR功能
-                self._update_config_from_dict(self.timing, config_data.get('timing', {}))
-                self._update_config_from_dict(self.retry, config_data.get('retry', {}))  # v1.0.21新增
-                self._update_config_from_dict(self.hotkey, config_data.get('hotkey', {}))
-                self._update_config_from_dict(self.ui, config_data.get('ui', {}))
-                
-                print(f"配置加载成功: {self.config_path}")
-            else:
-                print(f"配置文件不存在，使用默认配置: {self.config_path}")
-                self.save_config()  # 保存默认配置
-                
-        except Exception as e:
-            print(f"配置加载失败，使用默认配置: {e}")
+            stat = os.stat(self.config_path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
     
     def save_config(self) -> None:
         """保存配置到文件"""
         try:
-            # 确保配置目录存在
-            self.config_path.parent.mkdir(parents=True, exist_ok=True)
-            
-            config_data = {
-                'model': self._config_to_dict(self.model),
-                # 'ocr': self._config_to_dict(self.ocr),  # 已移除OCR功能
-                'timing': self._config_to_dict(self.timing),
-                'retry': self._config_to_dict(self.retry),  # v1.0.21新增
-                'hotkey': self._config_to_dict(self.hotkey),
-                'ui': self._config_to_dict(self.ui)
-            }
-            
-            with open(self.config_path, 'w', encoding='utf-8') as f:
-                yaml.dump(config_data, f, default_flow_style=False, 
-                         allow_unicode=True, indent=2)
+            with self._lock:
+                # 确保配置目录存在
+                self.config_path.parent.mkdir(parents=True, exist_ok=True)
+                
+                config_data = {name: self._config_to_dict(getattr(self._snapshot, name))
+                               for name in SECTION_TYPES}
+                
+                with open(self.config_path, 'w', encoding='utf-8') as f:
+                    yaml.dump(config_data, f, default_flow_style=False, 
+                             allow_unicode=True, indent=2)
+                # 自身写入的文件不再触发热更新
+                self._file_stamp = self._stat_file()
             
             print(f"配置保存成功: {self.config_path}")
             
         except Exception as e:
             print(f"配置保存失败: {e}")
     
-    def _update_config_from_dict(self, config_obj: object, data: Dict[str, Any]) -> None:
-        """从字典更新配置对象"""
-        for key, value in data.items():
-            if hasattr(config_obj, key):
-                setattr(config_obj, key, value)
-    
     def _config_to_dict(self, config_obj: object) -> Dict[str, Any]:
         """将配置对象转换为字典"""
         return {k: v for k, v in config_obj.__dict__.items() 
@@ -194,7 +702,7 @@ class FisherConfig:
     def update_hotkey(self, key_name: str, key_combination: str) -> None:
         """更新热键配置"""
         if hasattr(self.hotkey, key_name):
-            setattr(self.hotkey, key_name, key_combination)
+            self.update(hotkey={key_name: key_combination})
             self.save_config()
             print(f"热键 {key_name} 已更新为: {key_combination}")
         else:
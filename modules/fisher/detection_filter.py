@@ -0,0 +1,150 @@
+"""
+Fisher钓鱼模块检测结果时间滤波器
+位于检测器和状态机之间：按状态保存最近若干帧的置信度（预分配的NumPy环形缓冲区），
+只有某个状态在多帧中稳定出现时才输出，抑制单帧误检和状态2/3之间的闪烁
+
+滤波方式:
+- vote: 最近window帧中至少min_votes帧出现该状态 (k-of-n投票)
+- ema:  各状态置信度的指数滑动平均超过ema_enter
+
+滞回: 已输出的状态在得分降到退出阈值(vote: release_votes票 / ema: ema_exit)之前保持不变，
+除非另一状态的得分更高且达到进入阈值
+
+作者: AutoFish Team
+版本: v1.0
+创建时间: 2026-10-16
+"""
+
+from typing import Optional, Dict, Sequence, Any
+
+import numpy as np
+
+# 滤波方式
+METHOD_VOTE = "vote"
+METHOD_EMA = "ema"
+SUPPORTED_METHODS = (METHOD_VOTE, METHOD_EMA)
+
+
+class DetectionFilter:
+    """检测结果时间滤波器"""
+
+    def __init__(self, num_classes: int, config):
+        """
+        初始化滤波器
+
+        Args:
+            num_classes: 状态数量
+            config: 滤波配置对象 (SmoothingConfig)
+        """
+        self.num_classes = int(num_classes)
+        self.config = config
+        self.method = config.method if config.method in SUPPORTED_METHODS else METHOD_VOTE
+        self.window = max(1, int(config.window))
+
+        # 最近window帧各状态的置信度，未出现的状态为0
+        self._history = np.zeros((self.window, self.num_classes), dtype=np.float32)
+        self._pos = 0
+        self._ema = np.zeros(self.num_classes, dtype=np.float32)
+        self._row = np.zeros(self.num_classes, dtype=np.float32)
+        self._mask = np.zeros(self.num_classes, dtype=bool)
+
+        self.stable_state: Optional[int] = None  # 当前输出的稳定状态
+
+        # 统计信息
+        self.updates: int = 0  # 处理的检测次数
+        self.suppressed: int = 0  # 单帧检测结果与输出不一致（被滤除）的次数
+        self.switches: int = 0  # 输出状态变化次数
+
+    def reset(self) -> None:
+        """清空历史（新一轮钓鱼开始或中间不检测的阶段调用）"""
+        self._history.fill(0.0)
+        self._pos = 0
+        self._ema.fill(0.0)
+        self.stable_state = None
+
+    def update(self, result: Optional[Dict], classes: Optional[Sequence[int]] = None) -> Optional[int]:
+        """
+        加入一帧检测结果并返回稳定状态
+
+        Args:
+            result: 检测器返回的结果，含'scores'时使用各状态置信度，否则只使用最高分状态
+            classes: 本轮允许输出的状态编号，None表示全部
+
+        Returns:
+            int: 稳定状态编号，没有稳定状态时返回None
+        """
+        if not self.config.enabled:
+            return result['state'] if result else None
+
+        row = self._row
+        row.fill(0.0)
+        if result:
+            scores = result.get('scores')
+            if scores is not None:
+                row[:] = scores
+            elif 0 <= result['state'] < self.num_classes:
+                row[result['state']] = result['confidence']
+        row[row < self.config.min_confidence] = 0.0
+
+        self._history[self._pos] = row
+        self._pos = (self._pos + 1) % self.window
+        alpha = self.config.ema_alpha
+        self._ema *= (1.0 - alpha)
+        self._ema += alpha * row
+
+        if self.method == METHOD_VOTE:
+            score = np.count_nonzero(self._history, axis=0).astype(np.float32)
+            enter = float(self.config.min_votes)
+            leave = float(self.config.release_votes)
+        else:
+            score = self._ema
+            enter = self.config.ema_enter
+            leave = self.config.ema_exit
+
+        state = self._select(score, enter, leave, classes)
+
+        self.updates += 1
+        if result and result['state'] != state:
+            self.suppressed += 1
+        if state != self.stable_state:
+            self.switches += 1
+            self.stable_state = state
+        return state
+
+    def _select(self, score: np.ndarray, enter: float, leave: float,
+                classes: Optional[Sequence[int]]) -> Optional[int]:
+        """按进入/退出阈值选择稳定状态"""
+        mask = self._mask
+        if classes is None:
+            mask.fill(True)
+        else:
+            mask.fill(False)
+            for cls in classes:
+                if 0 <= cls < self.num_classes:
+                    mask[cls] = True
+        masked = np.where(mask, score, -1.0)
+        best = int(np.argmax(masked))
+
+        current = self.stable_state
+        if current is not None and mask[current] and score[current] >= leave:
+            # 滞回：另一状态得分更高且达到进入阈值时才切换
+            if best != current and masked[best] > score[current] and masked[best] >= enter:
+                return best
+            return current
+
+        return best if masked[best] >= enter else None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取滤波统计
+
+        Returns:
+            Dict: 处理次数、被滤除次数、输出状态变化次数和当前稳定状态
+        """
+        return {
+            'method': self.method,
+            'updates': self.updates,
+            'suppressed': self.suppressed,
+            'switches': self.switches,
+            'stable_state': self.stable_state
+        }
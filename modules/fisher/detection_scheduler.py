@@ -0,0 +1,160 @@
+"""
+Fisher钓鱼模块自适应检测调度器
+按各钓鱼阶段的帧预算安排检测节奏：扣除本轮截图+推理的实测耗时后再等待剩余时间，
+画面无变化时逐步放慢，状态转换后短时间内加快，以兼顾响应速度和CPU占用
+
+作者: AutoFish Team
+版本: v1.0
+创建时间: 2026-10-16
+"""
+
+import time
+from typing import Optional, Dict
+
+# 调度阶段
+PHASE_INITIAL = "initial"  # 等待初始状态
+PHASE_WAITING = "waiting"  # 等待上钩
+PHASE_HOOKED = "hooked"  # 鱼上钩，等待进入提线
+PHASE_PULLING = "pulling"  # 提线中
+PHASE_SUCCESS = "success"  # 钓鱼成功
+
+# 有效检测频率的平滑系数
+_RATE_EMA_ALPHA = 0.1
+
+
+class DetectionScheduler:
+    """自适应检测调度器"""
+
+    def __init__(self, model_config, scheduler_config, cancel_token=None):
+        """
+        初始化检测调度器
+
+        Args:
+            model_config: 模型配置对象 (ModelConfig)，提供各阶段检测间隔（帧预算）
+            scheduler_config: 调度配置对象 (SchedulerConfig)
+            cancel_token: 取消令牌 (CancelToken)，取消后等待立即返回，None表示不可中断
+        """
+        self.model_config = model_config
+        self.config = scheduler_config
+        self.cancel_token = cancel_token
+
+        self._cycle_start: Optional[float] = None  # 本轮检测开始时间
+        self._cycle_phase: Optional[str] = None  # 本轮检测所属阶段
+        self._backoff: float = 1.0  # 当前退避倍数
+        self._boost_until: float = 0.0  # 加速截止时间
+
+        # 各阶段检测周期的指数滑动平均(秒)
+        self._period_ema: Dict[str, float] = {}
+
+    def get_budget(self, phase: str) -> float:
+        """
+        获取阶段的帧预算（一轮检测的目标周期）
+
+        Args:
+            phase: 调度阶段
+
+        Returns:
+            float: 帧预算(秒)
+        """
+        budgets = {
+            PHASE_INITIAL: self.model_config.detection_interval_idle,
+            PHASE_WAITING: self.model_config.detection_interval_waiting,
+            PHASE_HOOKED: self.model_config.detection_interval_pulling,
+            PHASE_PULLING: self.model_config.detection_interval_pulling,
+            PHASE_SUCCESS: self.model_config.detection_interval_success,
+        }
+        return budgets.get(phase, self.model_config.detection_interval)
+
+    def begin(self, phase: str) -> None:
+        """
+        标记一轮检测开始（截图之前调用）
+
+        Args:
+            phase: 调度阶段
+        """
+        now = time.perf_counter()
+        if self._cycle_start is not None and self._cycle_phase == phase:
+            # 两轮开始时间之差即实际检测周期
+            period = now - self._cycle_start
+            previous = self._period_ema.get(phase)
+            self._period_ema[phase] = period if previous is None else (
+                previous + _RATE_EMA_ALPHA * (period - previous))
+        self._cycle_start = now
+        self._cycle_phase = phase
+
+    def notify_transition(self) -> None:
+        """状态转换后调用：清除退避，并在一段时间内按加速预算检测"""
+        self._backoff = 1.0
+        self._boost_until = time.perf_counter() + self.config.boost_duration
+
+    def wait(self, phase: str, unchanged: bool = False) -> float:
+        """
+        等待到下一轮检测
+
+        Args:
+            phase: 调度阶段
+            unchanged: 本轮画面是否未变化（帧差门控跳过了推理）
+
+        Returns:
+            float: 实际等待时间(秒)
+        """
+        budget = self.get_budget(phase)
+
+        if not self.config.enabled:
+            # 未启用时保持固定间隔
+            self._sleep(budget)
+            return budget
+
+        now = time.perf_counter()
+        if now < self._boost_until:
+            budget *= self.config.boost_factor
+        elif unchanged:
+            # 画面未变化：逐步放慢检测
+            self._backoff = min(self._backoff * self.config.backoff_factor, self.config.max_backoff)
+            budget *= self._backoff
+        else:
+            self._backoff = 1.0
+
+        # 扣除本轮截图+推理已经消耗的时间
+        elapsed = now - self._cycle_start if self._cycle_start is not None else 0.0
+        remaining = max(budget - elapsed, self.config.min_sleep)
+        self._sleep(remaining)
+        return remaining
+
+    def _sleep(self, seconds: float) -> None:
+        """等待指定时间，设置了取消令牌时可被中断"""
+        if self.cancel_token is not None:
+            self.cancel_token.wait(seconds)
+        else:
+            time.sleep(seconds)
+
+    def update_config(self, model_config, scheduler_config) -> None:
+        """
+        替换配置对象（配置热更新时调用，可在调度进行中调用，下一次等待即使用新的帧预算和调度参数）
+
+        Args:
+            model_config: 模型配置对象 (ModelConfig)
+            scheduler_config: 调度配置对象 (SchedulerConfig)
+        """
+        self.model_config = model_config
+        self.config = scheduler_config
+        if not scheduler_config.enabled:
+            self._backoff = 1.0
+            self._boost_until = 0.0
+
+    def reset(self) -> None:
+        """清空调度状态和频率统计"""
+        self._cycle_start = None
+        self._cycle_phase = None
+        self._backoff = 1.0
+        self._boost_until = 0.0
+        self._period_ema.clear()
+
+    def get_rates(self) -> Dict[str, float]:
+        """
+        获取各阶段的有效检测频率
+
+        Returns:
+            Dict[str, float]: 阶段到检测频率(Hz)的映射
+        """
+        return {phase: 1.0 / period for phase, period in self._period_ema.items() if period > 0}
@@ -0,0 +1,511 @@
+"""
+Fisher钓鱼模块本地检测服务
+常驻的检测服务进程持有唯一一份模型，钓鱼模块、桌面测试等工具作为客户端连接，
+无需各自加载torch/ultralytics和模型权重，启动几乎没有等待，内存中只有一份模型。
+
+传输方式:
+- 帧数据: 客户端创建共享内存段(multiprocessing.shared_memory)写入图像，服务端直接映射读取，不经过套接字拷贝
+- 控制消息: 本机TCP连接上的长度前缀JSON（4字节大端长度 + UTF-8 JSON），每个请求一个响应
+
+请求:
+    {"op": "info"}
+    {"op": "predict", "shm": 共享内存名, "items": [{"offset": 字节偏移, "shape": [h, w, 3]}, ...],
+     "conf": 置信度阈值, "classes": [[状态编号, ...] 或 null, ...]}
+响应:
+    {"ok": true, ...} / {"ok": false, "error": 错误信息}
+
+启动服务:
+    python -m modules.fisher.detection_service [--host 127.0.0.1] [--port 47631]
+
+作者: AutoFish Team
+版本: v1.0
+创建时间: 2026-10-16
+"""
+
+import json
+import socket
+import socketserver
+import struct
+import threading
+import time
+from multiprocessing import shared_memory
+from typing import Optional, Dict, Any, List, Sequence, Callable
+
+import numpy as np
+
+# 导入统一日志系统
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent))
+from logger import setup_logger
+
+from .inference_backend import InferenceBackend, Detections
+
+# 设置日志记录器
+logger = setup_logger('fisher_service')
+
+# 协议版本，服务端与客户端不一致时拒绝连接
+PROTOCOL_VERSION = 1
+
+# 消息长度前缀
+_HEADER = struct.Struct('>I')
+
+# 单条控制消息的最大长度（帧数据不经过套接字）
+MAX_MESSAGE_SIZE = 16 * 1024 * 1024
+
+
+def send_message(sock: socket.socket, message: Dict[str, Any]) -> None:
+    """发送一条长度前缀JSON消息"""
+    payload = json.dumps(message, ensure_ascii=False).encode('utf-8')
+    sock.sendall(_HEADER.pack(len(payload)) + payload)
+
+
+def _recv_exact(sock: socket.socket, size: int) -> Optional[bytes]:
+    """读取指定字节数，连接关闭时返回None"""
+    buffer = bytearray()
+    while len(buffer) < size:
+        chunk = sock.recv(size - len(buffer))
+        if not chunk:
+            return None
+        buffer.extend(chunk)
+    return bytes(buffer)
+
+
+def recv_message(sock: socket.socket) -> Optional[Dict[str, Any]]:
+    """
+    接收一条长度前缀JSON消息
+
+    Returns:
+        Dict: 消息内容，连接关闭时返回None
+    """
+    header = _recv_exact(sock, _HEADER.size)
+    if header is None:
+        return None
+    (size,) = _HEADER.unpack(header)
+    if size > MAX_MESSAGE_SIZE:
+        raise ValueError(f"消息过长: {size}字节")
+    payload = _recv_exact(sock, size)
+    if payload is None:
+        return None
+    return json.loads(payload.decode('utf-8'))
+
+
+def _attach_shared_memory(name: str) -> shared_memory.SharedMemory:
+    """
+    映射客户端创建的共享内存段
+    共享内存由客户端创建和删除；Python 3.13之前映射方也会被resource_tracker登记，
+    服务端退出时会误删客户端的共享内存，需要取消登记
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        shm = shared_memory.SharedMemory(name=name)
+        try:
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(shm._name, 'shared_memory')
+        except Exception:
+            pass
+        return shm
+
+
+def _close_shared_memory(shm: Optional[shared_memory.SharedMemory]) -> None:
+    """解除共享内存映射（仍有数组引用时忽略，由垃圾回收释放）"""
+    if shm is not None:
+        try:
+            shm.close()
+        except BufferError:
+            pass
+
+
+def _detections_to_dict(detections: Detections) -> Dict[str, Any]:
+    return {
+        'boxes': np.asarray(detections.boxes, dtype=np.float32).tolist(),
+        'confidences': np.asarray(detections.confidences, dtype=np.float32).tolist(),
+        'classes': np.asarray(detections.classes, dtype=np.int64).tolist()
+    }
+
+
+def _detections_from_dict(data: Dict[str, Any]) -> Detections:
+    return Detections(
+        boxes=np.asarray(data['boxes'], dtype=np.float32).reshape(-1, 4),
+        confidences=np.asarray(data['confidences'], dtype=np.float32),
+        classes=np.asarray(data['classes'], dtype=np.int64)
+    )
+
+
+# ---- 服务端 ----
+
+class _RequestHandler(socketserver.BaseRequestHandler):
+    """一个客户端连接"""
+
+    def handle(self) -> None:
+        server: DetectionServer = self.server.owner
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        server.add_clients(1)
+        shm: Optional[shared_memory.SharedMemory] = None
+        peer = f"{self.client_address[0]}:{self.client_address[1]}"
+        logger.info(f"客户端已连接: {peer}")
+        try:
+            while True:
+                request = recv_message(self.request)
+                if request is None:
+                    break
+                try:
+                    op = request.get('op')
+                    if op == 'info':
+                        response = dict(server.get_info(), ok=True)
+                    elif op == 'predict':
+                        # 客户端扩容时会换用新的共享内存段
+                        if shm is None or shm.name != request['shm']:
+                            _close_shared_memory(shm)
+                            shm = _attach_shared_memory(request['shm'])
+                        response = server.predict(shm, request)
+                    else:
+                        response = {'ok': False, 'error': f"未知请求: {op}"}
+                except Exception as e:
+                    response = {'ok': False, 'error': str(e)}
+                send_message(self.request, response)
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            _close_shared_memory(shm)
+            server.add_clients(-1)
+            logger.info(f"客户端已断开: {peer}")
+
+
+class _ThreadingServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class DetectionServer:
+    """检测服务端：持有推理后端，为各客户端连接执行推理"""
+
+    def __init__(self, backend: InferenceBackend, host: str = "127.0.0.1", port: int = 47631):
+        """
+        初始化检测服务端
+
+        Args:
+            backend: 已加载模型的推理后端
+            host: 监听地址（只应监听本机地址）
+            port: 监听端口
+        """
+        self.backend = backend
+        self.host = host
+        self.port = port
+        self.clients: int = 0  # 当前连接数
+        self.requests: int = 0  # 已处理的推理请求数
+        self._lock = threading.Lock()  # 后端不支持多线程调用时串行推理
+        self._stats_lock = threading.Lock()  # 保护连接数和请求数（各连接的处理线程并发更新）
+        self._server: Optional[_ThreadingServer] = None
+
+    def add_clients(self, delta: int) -> None:
+        """更新当前连接数（连接处理线程中调用）"""
+        with self._stats_lock:
+            self.clients += delta
+
+    def get_info(self) -> Dict[str, Any]:
+        """服务信息（客户端据此设置后端属性）"""
+        return dict(self.backend.get_info(), protocol=PROTOCOL_VERSION, clients=self.clients)
+
+    def predict(self, shm: shared_memory.SharedMemory, request: Dict[str, Any]) -> Dict[str, Any]:
+        """对共享内存中的各帧执行推理"""
+        images = [np.ndarray(tuple(item['shape']), dtype=np.uint8, buffer=shm.buf, offset=item['offset'])
+                  for item in request['items']]
+        start = time.perf_counter()
+        if self.backend.thread_safe:
+            results = self.backend.predict_batch(images, request['conf'], request.get('classes'))
+        else:
+            with self._lock:
+                results = self.backend.predict_batch(images, request['conf'], request.get('classes'))
+        infer_ms = (time.perf_counter() - start) * 1000
+        # 响应前释放对共享内存的引用，客户端随后可复用或删除该段
+        del images
+        with self._stats_lock:
+            self.requests += 1
+        return {'ok': True, 'results': [_detections_to_dict(d) for d in results], 'infer_ms': infer_ms}
+
+    def serve_forever(self) -> None:
+        """开始监听并处理请求（阻塞）"""
+        self._server = _ThreadingServer((self.host, self.port), _RequestHandler)
+        self._server.owner = self
+        logger.info(f"检测服务已启动: {self.host}:{self.port}, 推理后端 {self.backend.name} ({self.backend.device})")
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+
+    def shutdown(self) -> None:
+        """停止服务"""
+        if self._server is not None:
+            self._server.shutdown()
+
+
+# ---- 客户端 ----
+
+class RemoteBackend(InferenceBackend):
+    """
+    检测服务客户端推理后端
+    与本地推理后端接口相同；同一实例的请求串行发送（内部加锁），可在多个线程中调用
+    """
+
+    name = "service"
+    thread_safe = True
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 47631, timeout: float = 2.0,
+                 connect_timeout: float = 0.5):
+        """
+        连接检测服务
+
+        Args:
+            host: 服务地址
+            port: 服务端口
+            timeout: 单次请求超时时间(秒)
+            connect_timeout: 连接超时时间(秒)
+
+        Raises:
+            OSError: 服务未启动或连接失败
+            RuntimeError: 协议版本不一致
+        """
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self._lock = threading.Lock()
+        self._shm: Optional[shared_memory.SharedMemory] = None
+        self._sock: Optional[socket.socket] = None
+
+        info = self._connect()
+        super().__init__(info.get('model_path', ''), imgsz=info.get('imgsz', 640))
+        self.device = info.get('device', 'cpu')
+        self.remote_backend = info.get('backend')
+        self.last_infer_ms: float = 0.0  # 最近一次请求的服务端推理耗时
+
+    def _connect(self) -> Dict[str, Any]:
+        """建立连接并校验协议版本，返回服务信息"""
+        self._sock = socket.create_connection((self.host, self.port), timeout=self.connect_timeout)
+        self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._sock.settimeout(self.timeout)
+        info = self._request({'op': 'info'})
+        if info.get('protocol') != PROTOCOL_VERSION:
+            self._disconnect()
+            raise RuntimeError(f"检测服务协议版本不一致: 服务端{info.get('protocol')}, 客户端{PROTOCOL_VERSION}")
+        return info
+
+    def _disconnect(self) -> None:
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            except OSError:
+                pass
+            self._sock = None
+
+    def _request(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        发送请求并等待响应（调用方持有锁或在初始化中）
+        连接已断开时先重连一次；超时或断开后丢弃连接，避免迟到的响应错配到下一个请求
+        """
+        if self._sock is None:
+            self._connect()
+        try:
+            send_message(self._sock, message)
+            response = recv_message(self._sock)
+        except OSError:
+            self._disconnect()
+            raise
+        if response is None:
+            self._disconnect()
+            raise ConnectionError("检测服务连接已断开")
+        if not response.get('ok'):
+            raise RuntimeError(f"检测服务错误: {response.get('error')}")
+        return response
+
+    def _ensure_shared_memory(self, size: int) -> shared_memory.SharedMemory:
+        """获取至少size字节的共享内存段，不足时换用更大的新段"""
+        if self._shm is None or self._shm.size < size:
+            self._release_shared_memory()
+            self._shm = shared_memory.SharedMemory(create=True, size=max(size, 1 << 20) * 2)
+        return self._shm
+
+    def _release_shared_memory(self) -> None:
+        """
+        关闭并删除当前共享内存段，下次请求创建新段
+        （服务端已映射的段在其解除映射前仍然有效，不会读到新请求写入的帧）
+        """
+        if self._shm is not None:
+            _close_shared_memory(self._shm)
+            try:
+                self._shm.unlink()
+            except FileNotFoundError:
+                pass
+            self._shm = None
+
+    def predict(self, image: np.ndarray, conf: float,
+                classes: Optional[Sequence[int]] = None) -> Detections:
+        return self.predict_batch([image], conf, None if classes is None else [classes])[0]
+
+    def predict_batch(self, images: Sequence[np.ndarray], conf: float,
+                      classes: Optional[Sequence[Optional[Sequence[int]]]] = None) -> List[Detections]:
+        if len(images) == 0:
+            return []
+        with self._lock:
+            shm = self._ensure_shared_memory(sum(image.nbytes for image in images))
+            items = []
+            offset = 0
+            for image in images:
+                image = np.ascontiguousarray(image, dtype=np.uint8)
+                np.ndarray(image.shape, dtype=np.uint8, buffer=shm.buf, offset=offset)[...] = image
+                items.append({'offset': offset, 'shape': list(image.shape)})
+                offset += image.nbytes
+
+            try:
+                response = self._request({
+                    'op': 'predict', 'shm': shm.name, 'items': items, 'conf': float(conf),
+                    'classes': None if classes is None else [None if c is None else [int(v) for v in c]
+                                                             for c in classes]
+                })
+            except OSError:
+                # 超时或断开时服务端可能仍在读取这段共享内存，重连后改用新段，不覆盖其中的帧
+                self._release_shared_memory()
+                raise
+        self.last_infer_ms = response.get('infer_ms', 0.0)
+        return [_detections_from_dict(d) for d in response['results']]
+
+    def warmup(self, runs: int = 3) -> List[float]:
+        # 服务端加载模型时已预热，只测量一次往返延迟
+        return super().warmup(1) if runs else []
+
+    def get_info(self) -> Dict[str, Any]:
+        return dict(super().get_info(), service=f"{self.host}:{self.port}", remote_backend=self.remote_backend)
+
+    def close(self) -> None:
+        with self._lock:
+            self._disconnect()
+            self._release_shared_memory()
+
+
+class FailoverBackend(InferenceBackend):
+    """
+    检测服务客户端的故障转移代理：推理请求因连接断开或超时失败时重连重试一次，
+    仍然失败则在本进程加载模型，之后的推理都改用本地后端（共用本代理的会话检测器一并切换）
+    """
+
+    name = "service"
+    thread_safe = True
+
+    def __init__(self, remote: RemoteBackend, load_local: Callable[[], InferenceBackend]):
+        """
+        Args:
+            remote: 检测服务客户端后端
+            load_local: 在本进程加载模型的函数，返回线程安全的推理后端，失败时抛出异常
+        """
+        super().__init__(remote.model_path, imgsz=remote.imgsz)
+        self.device = remote.device
+        self.remote = remote
+        self.remote_backend = remote.remote_backend
+        self.backend: InferenceBackend = remote
+        self._load_local = load_local
+        self._switch_lock = threading.Lock()
+
+    def _call(self, method: str, *args):
+        """调用当前后端，检测服务请求失败时重连重试一次，仍失败则切换到本地后端"""
+        backend = self.backend
+        if backend is not self.remote:
+            return getattr(backend, method)(*args)
+        try:
+            return getattr(backend, method)(*args)
+        except OSError as e:
+            logger.warning("检测服务请求失败，重连后重试: %s", e)
+        try:
+            # 连接已断开，RemoteBackend在发送前自动重连
+            return getattr(backend, method)(*args)
+        except OSError as e:
+            logger.error("检测服务仍不可用，改为在本进程加载模型: %s", e)
+        return getattr(self._fail_over(), method)(*args)
+
+    def _fail_over(self) -> InferenceBackend:
+        """加载本地后端并关闭检测服务连接（多个线程同时失败时只加载一次）"""
+        with self._switch_lock:
+            if self.backend is self.remote:
+                local = self._load_local()
+                self.remote.close()
+                self.backend = local
+                self.name = local.name
+                self.device = local.device
+                self.model_path = local.model_path
+                logger.info("已切换到本地推理后端: %s, 计算设备: %s", local.name, local.device)
+        return self.backend
+
+    def predict(self, image: np.ndarray, conf: float,
+                classes: Optional[Sequence[int]] = None) -> Detections:
+        return self._call('predict', image, conf, classes)
+
+    def try_predict(self, image: np.ndarray, conf: float,
+                    classes: Optional[Sequence[int]] = None) -> Optional[Detections]:
+        return self._call('try_predict', image, conf, classes)
+
+    def predict_batch(self, images: Sequence[np.ndarray], conf: float,
+                      classes: Optional[Sequence[Optional[Sequence[int]]]] = None) -> List[Detections]:
+        return self._call('predict_batch', images, conf, classes)
+
+    def warmup(self, runs: int = 3) -> List[float]:
+        return self._call('warmup', runs)
+
+    def get_info(self) -> Dict[str, Any]:
+        return self.backend.get_info()
+
+    def close(self) -> None:
+        with self._switch_lock:
+            self.backend.close()
+            if self.backend is not self.remote:
+                self.remote.close()
+
+
+def connect_detection_service(config) -> Optional[RemoteBackend]:
+    """
+    按配置连接检测服务，服务未启动时返回None（调用方改为在本进程加载模型）
+
+    Args:
+        config: 检测服务配置 (ServiceConfig)
+
+    Returns:
+        RemoteBackend: 客户端后端，连接失败时返回None
+    """
+    try:
+        backend = RemoteBackend(config.host, config.port, timeout=config.request_timeout,
+                                connect_timeout=config.connect_timeout)
+        logger.info(f"已连接检测服务 {config.host}:{config.port} (服务端后端: {backend.remote_backend})")
+        return backend
+    except (OSError, RuntimeError) as e:
+        logger.info(f"检测服务不可用 ({config.host}:{config.port}): {e}")
+        return None
+
+
+def main():
+    """启动检测服务"""
+    import argparse
+    from .config import fisher_config
+
+    parser = argparse.ArgumentParser(description='Fisher本地检测服务')
+    parser.add_argument('--host', default=fisher_config.service.host, help='监听地址')
+    parser.add_argument('--port', type=int, default=fisher_config.service.port, help='监听端口')
+    args = parser.parse_args()
+
+    # 服务进程自身在本进程加载模型（不连接检测服务，也不修改全局配置）
+    from .model_detector import ModelDetector
+    model_detector = ModelDetector(use_service=False)
+    if not model_detector.is_initialized:
+        logger.error("模型加载失败，检测服务未启动")
+        sys.exit(1)
+
+    server = DetectionServer(model_detector.backend, args.host, args.port)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("检测服务已停止")
+    finally:
+        model_detector.cleanup()
+
+
+if __name__ == "__main__":
+    main()
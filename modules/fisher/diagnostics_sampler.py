@@ -0,0 +1,275 @@
+"""
+Fisher钓鱼模块检测诊断采样器
+提线阶段的低阈值诊断推理移出检测循环：检测线程推理后把本帧交给采样器（按采样间隔、且后台空闲时才拷贝），
+后台线程以较低优先级用低置信度阈值重新推理，按状态汇总候选结果并定期输出摘要。
+检测循环不再为诊断额外截图和推理，每轮最多一次推理。
+诊断推理共用检测器的模型，只在模型空闲时进行（检测线程正在推理时稍后重试，超时放弃本帧）。
+
+连续多次未检测到目标状态时改用更低的阈值，便于排查模型对当前画面完全无响应的情况。
+
+作者: AutoFish Team
+版本: v1.0
+创建时间: 2026-10-16
+"""
+
+import os
+import threading
+import time
+from typing import Optional, Sequence, Dict, Any, FrozenSet
+
+import numpy as np
+
+# 导入统一日志系统
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent))
+from logger import setup_logger
+
+from .config import fisher_config
+from .perf_stats import LatencyTracker
+
+# 设置日志记录器
+logger = setup_logger('fisher_diagnostics')
+
+# 模型被检测线程占用时的重试间隔(秒)
+_MODEL_BUSY_RETRY = 0.005
+
+
+def _lower_thread_priority() -> None:
+    """降低当前线程的调度优先级，失败时忽略（仅影响诊断线程）"""
+    try:
+        if os.name == 'nt':
+            import ctypes
+            kernel32 = ctypes.windll.kernel32
+            kernel32.SetThreadPriority(kernel32.GetCurrentThread(), -1)  # THREAD_PRIORITY_BELOW_NORMAL
+        elif hasattr(os, 'setpriority'):
+            # Linux上线程有独立的nice值
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 10)
+    except Exception:
+        pass
+
+
+class _ClassSummary:
+    """单个状态在一个汇总周期内的候选统计"""
+
+    __slots__ = ('hits', 'conf_sum', 'conf_max', 'below_threshold')
+
+    def __init__(self):
+        self.hits = 0  # 出现该状态的采样帧数
+        self.conf_sum = 0.0
+        self.conf_max = 0.0
+        self.below_threshold = 0  # 属于检测目标但置信度低于检测阈值（检测循环会漏掉）的次数
+
+    def add(self, confidence: float, threshold: float) -> None:
+        self.hits += 1
+        self.conf_sum += confidence
+        self.conf_max = max(self.conf_max, confidence)
+        if confidence < threshold:
+            self.below_threshold += 1
+
+
+class DiagnosticsSampler:
+    """检测诊断采样器"""
+
+    def __init__(self, detector, config):
+        """
+        初始化诊断采样器（start后才开始采样）
+
+        Args:
+            detector: 模型检测器，提供get_diagnostic_backend()和state_names
+            config: 诊断配置 DiagnosticsConfig
+        """
+        self.detector = detector
+        self.config = config
+
+        # 是否处于需要诊断的阶段（由钓鱼控制器按阶段设置）
+        self.active: bool = False
+
+        # 检测线程与诊断线程之间的单帧交接：诊断线程忙时不拷贝新帧
+        self._frame: Optional[np.ndarray] = None
+        self._frame_classes: FrozenSet[int] = frozenset()
+        self._frame_misses: int = 0
+        self._ready = threading.Event()
+        self._busy = False
+        self._last_sample: float = 0.0
+
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+
+        # 连续未检测到目标状态的次数（检测线程维护）
+        self.consecutive_misses: int = 0
+
+        # 汇总周期内的统计（诊断线程维护）
+        self._classes: Dict[int, _ClassSummary] = {}
+        self._samples = 0
+        self._empty = 0
+        self._deep = 0
+        self._period_start = time.monotonic()
+
+        # 累计统计
+        self.sampled: int = 0  # 已分析帧数
+        self.busy_skipped: int = 0  # 诊断线程忙而未采样的次数
+        self.model_busy_skipped: int = 0  # 模型一直被检测线程占用而放弃的采样帧数
+        self.analysis_latency = LatencyTracker(200)
+
+    @property
+    def is_running(self) -> bool:
+        """诊断线程是否在运行"""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        """启动诊断线程"""
+        if self.is_running or not self.config.enabled:
+            return
+        self._running = True
+        self._reset_period()
+        self.consecutive_misses = 0
+        self._thread = threading.Thread(target=self._worker, name="DiagnosticsSampler", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 2.0) -> None:
+        """停止诊断线程并输出最后一个周期的摘要"""
+        self.active = False
+        if not self.is_running:
+            return
+        self._running = False
+        self._ready.set()
+        self._thread.join(timeout=timeout)
+        self._thread = None
+        self._log_summary()
+
+    def offer(self, image: np.ndarray, classes: Optional[Sequence[int]], result: Optional[Dict]) -> bool:
+        """
+        检测线程推理后调用：记录命中情况，需要采样时拷贝本帧交给诊断线程（不阻塞、不推理）
+
+        Args:
+            image: 本轮推理使用的图像
+            classes: 本轮检测的状态编号
+            result: 本轮检测结果，未检测到时为None
+
+        Returns:
+            bool: 本帧是否被采样
+        """
+        if not self.active or not self._running:
+            return False
+
+        self.consecutive_misses = 0 if result else self.consecutive_misses + 1
+
+        now = time.monotonic()
+        if now - self._last_sample < self.config.sample_interval:
+            return False
+        if self._busy or self._ready.is_set():
+            self.busy_skipped += 1
+            return False
+
+        # 复用缓冲区，尺寸变化（如ROI调整）时才重新分配
+        if self._frame is None or self._frame.shape != image.shape:
+            self._frame = np.empty_like(image)
+        np.copyto(self._frame, image)
+        self._frame_classes = frozenset(classes) if classes else frozenset()
+        self._frame_misses = self.consecutive_misses
+        self._last_sample = now
+        self._ready.set()
+        return True
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取采样统计
+
+        Returns:
+            Dict: 已分析帧数、忙时跳过次数、连续未命中次数和诊断推理耗时统计(毫秒)
+        """
+        return {
+            'running': self.is_running,
+            'sampled': self.sampled,
+            'busy_skipped': self.busy_skipped,
+            'model_busy_skipped': self.model_busy_skipped,
+            'consecutive_misses': self.consecutive_misses,
+            'latency': self.analysis_latency.get_stats()
+        }
+
+    # ---- 诊断线程 ----
+
+    def _worker(self) -> None:
+        """诊断线程主循环"""
+        _lower_thread_priority()
+        while self._running:
+            if self._ready.wait(timeout=1.0) and self._running:
+                self._busy = True
+                self._ready.clear()
+                try:
+                    self._analyze(self._frame, self._frame_classes, self._frame_misses)
+                except Exception as e:
+                    logger.error(f"🔍 [调试] 💥 诊断推理异常: {e}")
+                finally:
+                    self._busy = False
+
+            if time.monotonic() - self._period_start >= self.config.summary_interval:
+                self._log_summary()
+
+    def _analyze(self, image: np.ndarray, allowed: FrozenSet[int], misses: int) -> None:
+        """对一帧做低阈值推理并计入汇总"""
+        backend = self.detector.get_diagnostic_backend()
+        if backend is None:
+            return
+
+        deep = misses >= self.config.deep_after_misses
+        conf = self.config.deep_conf if deep else self.config.conf
+        # 让出模型：检测线程推理期间不排队等锁，稍后重试，半个采样间隔内仍未空闲则放弃本帧
+        deadline = time.monotonic() + self.config.sample_interval / 2
+        while True:
+            start = time.perf_counter()
+            detections = backend.try_predict(image, conf)
+            if detections is not None:
+                break
+            if not self._running or time.monotonic() >= deadline:
+                self.model_busy_skipped += 1
+                return
+            time.sleep(_MODEL_BUSY_RETRY)
+        self.analysis_latency.record(time.perf_counter() - start)
+
+        self.sampled += 1
+        self._samples += 1
+        self._deep += int(deep)
+        if len(detections) == 0:
+            self._empty += 1
+            return
+
+        threshold = fisher_config.model.confidence_threshold
+        # 每帧每个状态只计一次（取最高置信度）
+        best: Dict[int, float] = {}
+        for cls, score in zip(detections.classes.tolist(), detections.confidences.tolist()):
+            if score > best.get(cls, -1.0):
+                best[cls] = score
+        for cls, score in best.items():
+            summary = self._classes.get(cls)
+            if summary is None:
+                summary = self._classes[cls] = _ClassSummary()
+            summary.add(score, threshold if cls in allowed else 0.0)
+
+    def _reset_period(self) -> None:
+        self._classes = {}
+        self._samples = 0
+        self._empty = 0
+        self._deep = 0
+        self._period_start = time.monotonic()
+
+    def _log_summary(self) -> None:
+        """输出本周期的诊断摘要并开始新周期"""
+        if self._samples == 0:
+            self._reset_period()
+            return
+
+        elapsed = time.monotonic() - self._period_start
+        latency = self.analysis_latency.get_stats()
+        logger.info(f"🔍 [调试] 诊断摘要 ({elapsed:.0f}秒): 采样 {self._samples} 帧 (低阈值 {self.config.conf}"
+                    f"{f', 深度 {self._deep} 帧' if self._deep else ''}), 无候选 {self._empty} 帧, "
+                    f"诊断推理 p50={latency['p50_ms']:.1f}ms, 忙时跳过 {self.busy_skipped} 次, "
+                    f"模型占用放弃 {self.model_busy_skipped} 次")
+        for cls in sorted(self._classes):
+            summary = self._classes[cls]
+            state_name = self.detector.state_names.get(cls, f"未知状态_{cls}")
+            logger.info(f"      状态{cls}({state_name}): 出现 {summary.hits}/{self._samples} 帧, "
+                        f"置信度 平均{summary.conf_sum / summary.hits:.3f} 最高{summary.conf_max:.3f}, "
+                        f"低于检测阈值 {summary.below_threshold} 次")
+        self._reset_period()
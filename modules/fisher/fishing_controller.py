@@ -3,11 +3,53 @@ Fisher钓鱼模块核心控制器
 实现钓鱼状态机逻辑和多线程协调，协调模型检测和输入控制
 
 作者: AutoFish Team
-版本: v1.0.24
+版本: v1.0.40
 创建时间: 2024-12-28
-更新时间: 2025-01-17
+更新时间: 2026-10-16
 
 修复历史:
+v1.0.40: 功能新增 - 检测阶段查询
+         - 新增is_detecting，多会话批量推理据此只等待正处于检测阶段的会话
+v1.0.39: 问题修复 - 多会话录制目录重名
+         - 录制目录同样附带会话名称，各会话录制不再互相覆盖
+v1.0.38: 问题修复 - 多会话遥测文件重名
+         - 控制器可指定会话名称，遥测文件名附带会话名称，同一秒开始的多个会话不再写入同一文件
+v1.0.37: 功能新增 - 配置热更新
+         - 订阅配置变化，检测间隔和调度参数修改保存后立即交给调度器，钓鱼进行中无需停止
+         - 每次开始钓鱼时按当前配置重建时间滤波器，诊断采样器和遥测改用当前配置
+v1.0.36: 功能新增 - 结构化遥测
+         - 每次检测、阶段转换、输入动作和每轮结果写入遥测文件，供离线统计
+v1.0.35: 日志优化 - 状态流转和动作日志改为参数形式，限频省略时不再拼接消息；停止时输出限频汇总
+v1.0.34: 日志优化 - 停止时输出异步日志队列统计（最大队列深度和丢弃条数）
+v1.0.33: 启动优化 - 延迟创建
+         - 全局控制器、检测器和输入控制器改为首次使用时创建，导入模块不再加载模型
+         - 开始钓鱼时等待后台模型加载完成
+v1.0.32: 功能新增 - 多会话
+         - 控制器可注入模型检测器，不再固定使用全局检测器，一个进程可为多个游戏窗口各创建一个控制器
+         - 多会话编排见multi_session.py
+v1.0.31: 功能优化 - 检测结果时间滤波
+         - 检测结果经时间滤波器(detection_filter.py)后再交给状态机，状态在多帧中稳定出现才生效
+         - 抑制状态2/3之间的单帧闪烁导致的反复暂停/恢复点击，清理时输出被滤除的检测次数
+v1.0.30: 性能优化 - 诊断推理移出检测循环
+         - 提线阶段的低阈值调试推理不再在检测循环中额外截图和推理，每轮最多一次推理
+         - 改由诊断采样器(diagnostics_sampler.py)复用检测循环已推理的帧，在后台低优先级线程分析并定期输出摘要
+v1.0.29: 功能优化 - 可中断等待
+         - 控制器、检测调度器和输入控制器的所有等待统一通过共享取消令牌(cancellation.py)
+         - 停止/紧急停止时取消令牌，暂停、抛竿长按、抛竿动画等等待立即返回，停止延迟不超过一次检测
+v1.0.28: 性能优化 - 统一输入执行器
+         - 按键循环不再单独创建线程，改由输入控制器的执行器调度，停止时立即弹起按住的键
+         - 清理时输出输入调度延迟 (p50/p95)
+v1.0.27: 功能新增 - 会话录制与回放
+         - 配置启用时钓鱼期间录制检测帧和检测结果(session_recorder.py)
+         - 控制器可注入输入控制器，回放测试(session_replay.py)时不操作真实键鼠
+v1.0.26: 重构 - 事件驱动状态机
+         - 手写的分阶段阻塞循环改为表驱动状态机(state_machine.py)，统一消费检测事件和定时器事件
+         - 状态流转验证和允许状态更新改由转换表表达，转换查找为O(1)，可离线测试
+         - 所有阶段共用一个检测循环，检测节奏由调度器集中控制
+v1.0.25: 性能优化 - 自适应检测调度
+         - 固定检测间隔改为按阶段帧预算调度，扣除截图+推理实测耗时后只等待剩余时间
+         - 画面未变化(帧差门控跳过推理)时逐步放慢检测，状态转换后短时间内加快
+         - FishingStatus新增各阶段有效检测频率detection_rates
 v1.0.24: 重大修复 - 状态转换死锁问题修复
          - 修复_handle_fish_hooked中状态1后无法转换到状态2/3的问题
          - 确保状态1检测后立即更新allowed_states，避免状态转换死锁
@@ -56,17 +98,25 @@ import time
 import threading
 from enum import Enum
 from typing import Optional, Callable, Dict, Any, List
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 # 导入统一日志系统
 import sys
 from pathlib import Path
 sys.path.append(str(Path(__file__).parent.parent))
-from logger import setup_logger
+from logger import setup_logger, get_logging_stats, flush_rate_limited, rate_limiter
 
 from .config import fisher_config
-from .model_detector import model_detector
-from .input_controller import input_controller
+from .model_detector import ModelDetector, get_model_detector
+from .input_controller import InputController, get_input_controller
+from .screen_capture import close_capture_session
+from .detection_scheduler import (DetectionScheduler, PHASE_INITIAL, PHASE_WAITING,
+                                  PHASE_HOOKED, PHASE_PULLING, PHASE_SUCCESS)
+from .state_machine import FishingStateMachine, Phase, Action, StepResult
+from .cancellation import CancelToken
+from .diagnostics_sampler import DiagnosticsSampler
+from .detection_filter import DetectionFilter
+from .telemetry import TelemetryWriter, ROUND_SUCCESS, ROUND_FAILED, ROUND_STOPPED
 
 # 设置日志记录器
 logger = setup_logger('fisher')
@@ -84,6 +134,38 @@ class FishingState(Enum):
     ERROR = "错误状态"
 
 
+# 提线阶段按键循环：依次长按a、d键1.5秒，每次间隔0.5秒
+KEY_CYCLE_KEYS = ('a', 'd')
+KEY_CYCLE_HOLD_TIME = 1.5
+KEY_CYCLE_GAP_TIME = 0.5
+
+
+# 状态机阶段对应的业务状态
+PHASE_FISHING_STATES: Dict[Phase, FishingState] = {
+    Phase.INITIAL: FishingState.WAITING_INITIAL,
+    Phase.WAITING_HOOK: FishingState.WAITING_HOOK,
+    Phase.HOOK_CONFIRMING: FishingState.WAITING_HOOK,
+    Phase.HOOKED: FishingState.FISH_HOOKED,
+    Phase.PULLING_NORMAL: FishingState.PULLING_NORMAL,
+    Phase.PULLING_HALFWAY: FishingState.PULLING_HALFWAY,
+    Phase.SUCCESS: FishingState.SUCCESS,
+    Phase.CASTING: FishingState.CASTING,
+    Phase.RECASTING: FishingState.CASTING,
+    Phase.FAILED: FishingState.ERROR,
+}
+
+# 状态机阶段对应的检测调度阶段（决定帧预算）
+PHASE_SCHEDULES: Dict[Phase, str] = {
+    Phase.INITIAL: PHASE_INITIAL,
+    Phase.WAITING_HOOK: PHASE_WAITING,
+    Phase.HOOK_CONFIRMING: PHASE_WAITING,
+    Phase.HOOKED: PHASE_HOOKED,
+    Phase.PULLING_NORMAL: PHASE_PULLING,
+    Phase.PULLING_HALFWAY: PHASE_PULLING,
+    Phase.SUCCESS: PHASE_SUCCESS,
+}
+
+
 @dataclass
 class FishingStatus:
     """钓鱼状态信息"""
@@ -93,15 +175,27 @@ class FishingStatus:
     round_count: int = 0  # 钓鱼轮数
     start_time: Optional[float] = None  # 开始时间
     error_message: str = ""  # 错误信息
+    detection_rates: Dict[str, float] = field(default_factory=dict)  # 各阶段有效检测频率(Hz)
     
 
 class FishingController:
     """钓鱼控制器"""
     
-    def __init__(self):
+    def __init__(self, input_ctrl: Optional[InputController] = None,
+                 detector: Optional[ModelDetector] = None, session_name: Optional[str] = None):
         """
         初始化钓鱼控制器
+        
+        Args:
+            input_ctrl: 输入控制器，None表示使用全局输入控制器（回放测试时传入不操作键鼠的替身）
+            detector: 模型检测器，None表示使用全局检测器（多会话时传入各窗口的会话检测器）
+            session_name: 会话名称（多会话时传入），用于区分各会话的遥测文件和录制目录
         """
+        self.session_name = session_name
+        self.input = input_ctrl if input_ctrl is not None else get_input_controller()
+        # 全局检测器可能仍在后台加载模型，开始钓鱼时再等待
+        self.detector = detector if detector is not None else get_model_detector(wait=False)
+        
         # 控制器状态
         self.status = FishingStatus()
         self.is_running = False  # 运行状态
@@ -111,23 +205,76 @@ class FishingController:
         self.main_thread: Optional[threading.Thread] = None  # 主控制线程
         self.thread_lock = threading.Lock()  # 线程锁
         
-        # 简单按键循环相关
-        self.key_cycle_thread: Optional[threading.Thread] = None  # 按键循环线程
-        self.key_cycle_stop = threading.Event()  # 按键循环停止事件
-        
         # 回调函数
         self.status_callback: Optional[Callable] = None  # 状态更新回调
         
-        # 超时管理
-        self.timeout_start: Optional[float] = None  # 超时开始时间
-        
-        # 状态流转验证 - 新增状态历史追踪
-        self.state_history: List[int] = []  # 状态历史记录
-        self.current_fishing_phase: str = "初始化"  # 当前钓鱼阶段
-        self.allowed_states: List[int] = [0, 1]  # 当前允许的状态
+        # 钓鱼流程状态机
+        self.machine = self._create_state_machine()
+        
+        # 停止令牌：停止时取消，控制器、调度器和输入控制器中的等待立即返回
+        self.stop_token = CancelToken()
+        self.input.set_cancel_token(self.stop_token)
+        
+        # 检测结果时间滤波器：状态稳定后才交给状态机
+        self.detection_filter = DetectionFilter(len(self.detector.state_names), fisher_config.smoothing)
+        
+        # 诊断采样器：提线阶段在后台分析检测帧
+        self.diagnostics = DiagnosticsSampler(self.detector, fisher_config.diagnostics)
+        
+        # 结构化遥测，以及本轮开始、开始等待上钩和上钩的时刻(monotonic)
+        self.telemetry = TelemetryWriter(fisher_config.telemetry)
+        self._round_started_at: Optional[float] = None
+        self._waiting_hook_at: Optional[float] = None
+        self._hooked_at: Optional[float] = None
+        
+        # 自适应检测调度器
+        self.scheduler = DetectionScheduler(fisher_config.model, fisher_config.scheduler,
+                                            cancel_token=self.stop_token)
+        fisher_config.add_listener(self._on_config_changed)
+        
+        # 状态机动作处理函数，返回False表示动作失败、停止钓鱼
+        self._action_handlers: Dict[Action, Callable[[Optional[float]], Optional[bool]]] = {
+            Action.START_CLICKING: lambda _: self.input.start_clicking(),
+            Action.RESUME_CLICKING: lambda _: self.input.resume_clicking(),
+            Action.PAUSE_CLICKING: lambda _: self.input.pause_clicking(),
+            Action.STOP_CLICKING: lambda _: self.input.stop_clicking(),
+            Action.START_KEY_CYCLE: lambda _: self.input.start_key_cycle(
+                KEY_CYCLE_KEYS, KEY_CYCLE_HOLD_TIME, KEY_CYCLE_GAP_TIME),
+            Action.STOP_KEY_CYCLE: lambda _: self.input.stop_key_cycle(),
+            Action.PRESS_SUCCESS_KEY: self._press_success_key,
+            Action.CAST_ROD: lambda _: self.input.cast_rod(),
+            Action.MOVE_MOUSE_AND_CAST: self._move_mouse_and_cast,
+            Action.HOLD: self._hold,
+            Action.COMPLETE_ROUND: self._complete_round,
+        }
         
         logger.info("钓鱼控制器初始化完成")
     
+    def _session_file_name(self) -> Optional[str]:
+        """本次钓鱼的输出文件名（按时间命名并附带会话名称），未指定会话名称时返回None使用默认命名"""
+        if not self.session_name:
+            return None
+        safe_name = ''.join(c if c.isalnum() or c in '-_' else '_' for c in self.session_name)
+        return f"{time.strftime('session_%Y%m%d_%H%M%S')}_{safe_name}"
+    
+    @staticmethod
+    def _create_state_machine() -> FishingStateMachine:
+        """按当前时间配置创建状态机"""
+        return FishingStateMachine(
+            FishingStateMachine.default_delays(fisher_config.timing),
+            max_success_attempts=fisher_config.timing.success_f_key_max_attempts
+        )
+    
+    def _on_config_changed(self, snapshot, changed) -> None:
+        """配置热更新回调（监视线程中调用）：检测间隔或调度参数变化时更新调度器"""
+        if 'model' in changed or 'scheduler' in changed:
+            self.scheduler.update_config(snapshot.model, snapshot.scheduler)
+            model = snapshot.model
+            logger.info("配置热更新: 检测间隔 空闲=%.3fs 等待=%.3fs 提线=%.3fs 成功=%.3fs 自适应调度=%s",
+                        model.detection_interval_idle, model.detection_interval_waiting,
+                        model.detection_interval_pulling, model.detection_interval_success,
+                        snapshot.scheduler.enabled)
+    
     def set_status_callback(self, callback: Callable[[FishingStatus], None]) -> None:
         """
         设置状态更新回调函数
@@ -137,142 +284,20 @@ class FishingController:
         """
         self.status_callback = callback
     
-    def _is_valid_state_transition(self, new_state: int) -> bool:
-        """
-        验证状态流转是否有效
-        根据钓鱼逻辑规则验证状态切换的合法性
-        
-        状态流转规则:
-        - 0(等待上钩) 必须在 1(鱼上钩) 之前
-        - 1 之前不一定有 0，但 1 之后必不可能有 0
-        - 2、3(提线中) 必在 1 之后，4(成功) 之前
-        - 2、3 之间顺序无所谓
-        - 4(成功) 必在 2、3 之后
-        
-        Args:
-            new_state: 新检测到的状态
-            
-        Returns:
-            bool: 状态流转是否有效
-        """
-        # 🔧 修复：状态4可以在提线阶段和钓鱼成功阶段出现
-        # 提线阶段：检测成功状态的出现
-        # 钓鱼成功阶段：检测成功状态的消失（用于判断是否可以抛竿）
-        if new_state == 4:
-            # 状态4可以在提线阶段和钓鱼成功阶段出现
-            if self.current_fishing_phase not in ["提线中", "钓鱼成功"]:
-                logger.warning(f"❌ 状态流转验证失败: 状态4只能在提线阶段或钓鱼成功阶段出现，当前阶段: {self.current_fishing_phase}")
-                logger.warning(f"   📚 状态历史: {self.state_history[-10:]}")
-                return False
-            
-            # 必须已经有提线状态(2或3)的历史记录
-            if not (2 in self.state_history or 3 in self.state_history):
-                logger.warning(f"❌ 状态流转验证失败: 状态4(成功)必须在状态2或3之后出现")
-                logger.warning(f"   📚 状态历史: {self.state_history[-10:]}")
-                return False
-        
-        # 检查是否在允许的状态列表中
-        if new_state not in self.allowed_states:
-            logger.warning(f"⚠️  状态流转验证失败: 状态{new_state}不在当前允许状态{self.allowed_states}中")
-            logger.warning(f"   📜 当前阶段: {self.current_fishing_phase}")
-            logger.warning(f"   📚 状态历史: {self.state_history[-10:]}")  # 只显示最近10个状态
-            return False
-        
-        # 检查状态历史中的逻辑约束
-        if self.state_history:
-            last_state = self.state_history[-1]
-            
-            # 规则1: 状态1之后不能再出现状态0
-            if new_state == 0 and 1 in self.state_history:
-                logger.warning(f"⚠️  状态流转验证失败: 检测到状态1后不应再出现状态0")
-                return False
-            
-            # 规则3: 状态2、3必须在状态1之后
-            if new_state in [2, 3] and 1 not in self.state_history:
-                logger.warning(f"⚠️  状态流转验证失败: 状态{new_state}必须在状态1之后出现")
-                return False
-        
-        return True
-    
-    def _update_allowed_states(self, current_state: int) -> None:
-        """
-        根据当前状态更新允许的下一个状态
-        
-        Args:
-            current_state: 当前确认的状态
-        """
-        if current_state == 0:  # 等待上钩状态
-            self.allowed_states = [0, 1]  # 可以继续等待或鱼上钩
-            self.current_fishing_phase = "等待上钩"
-            
-        elif current_state == 1:  # 鱼上钩状态
-            self.allowed_states = [1, 2, 3]  # 可以继续鱼上钩或进入提线
-            self.current_fishing_phase = "鱼上钩"
-            
-        elif current_state in [2, 3]:  # 提线中状态
-            self.allowed_states = [2, 3, 4]  # 可以在提线状态间切换或成功
-            self.current_fishing_phase = "提线中"
-            
-        elif current_state == 4:  # 钓鱼成功状态
-            self.allowed_states = [4]  # 只允许保持成功状态，直到抛竿
-            self.current_fishing_phase = "钓鱼成功"
-        
-        logger.info(f"🎯 状态流转更新: {self.current_fishing_phase} | 允许状态: {self.allowed_states}")
-    
-    def _reset_state_tracking(self) -> None:
-        """重置状态追踪，开始新一轮钓鱼"""
-        logger.info(f"🔍 [调试] 状态追踪重置前 - 历史状态: {self.state_history[-10:] if self.state_history else '无'}")
-        logger.info(f"🔍 [调试] 状态追踪重置前 - 当前阶段: {self.current_fishing_phase}")
-        logger.info(f"🔍 [调试] 状态追踪重置前 - 允许状态: {self.allowed_states}")
-        logger.info(f"🔍 [调试] 状态追踪重置前 - 当前检测状态: {self.status.current_detected_state}")
-        
-        self.state_history.clear()
-        self.current_fishing_phase = "初始化"
-        self.allowed_states = [0, 1]
-        
-        logger.info(f"🔄 状态追踪已重置，开始新一轮钓鱼")
-        logger.info(f"🔍 [调试] 状态追踪重置后 - 新阶段: {self.current_fishing_phase}")
-        logger.info(f"🔍 [调试] 状态追踪重置后 - 新允许状态: {self.allowed_states}")
-    
     def _update_status(self, state: Optional[FishingState] = None, 
                       detected_state: Optional[int] = None,
                       confidence: Optional[float] = None,
-                      error_message: Optional[str] = None,
-                      force_update: bool = False) -> None:
+                      error_message: Optional[str] = None) -> None:
         """
-        更新钓鱼状态，包含状态流转验证
+        更新钓鱼状态
         
         Args:
             state: 新的钓鱼状态
             detected_state: 检测到的状态编号
             confidence: 检测置信度
             error_message: 错误信息
-            force_update: 是否强制更新（跳过验证）
         """
         with self.thread_lock:
-            # 状态流转验证
-            if detected_state is not None and not force_update:
-                logger.debug(f"🔍 [状态验证] 尝试转换到状态{detected_state}, 当前阶段: {self.current_fishing_phase}")
-                
-                if not self._is_valid_state_transition(detected_state):
-                    logger.warning(f"❌ [状态验证] 拒绝无效状态流转: {detected_state}")
-                    logger.debug(f"   📋 当前允许状态: {self.allowed_states}")
-                    logger.debug(f"   🏷️ 当前阶段: {self.current_fishing_phase}")
-                    return  # 拒绝无效的状态更新
-                else:
-                    logger.debug(f"✅ [状态验证] 状态{detected_state}验证通过")
-                
-                # 记录有效状态到历史
-                self.state_history.append(detected_state)
-                
-                # 更新允许的状态
-                self._update_allowed_states(detected_state)
-                
-                # 限制状态历史长度，避免内存泄漏
-                if len(self.state_history) > 100:
-                    self.state_history = self.state_history[-50:]  # 保留最近50个状态
-            
-            # 更新状态信息
             if state is not None:
                 self.status.current_state = state
             if detected_state is not None:
@@ -289,633 +314,186 @@ class FishingController:
             except Exception as e:
                 logger.error(f"状态回调失败: {e}")
     
-    def _key_cycle_worker(self) -> None:
-        """
-        简单按键循环工作线程
-        循环执行：按a键1.5秒 → 等待0.5秒 → 按d键1.5秒 → 等待0.5秒
-        """
-        logger.info("按键循环线程启动")
-        
-        key_sequence = ['a', 'd']  # 按键序列：a键和d键
-        key_index = 0  # 当前按键索引
+    def _press_success_key(self, _value: Optional[float]) -> bool:
+        """按F键关闭钓鱼成功界面（失败时仅记录，由状态机决定是否重试）"""
+        if self.input.handle_success_key():
+            logger.info("✅ 按F键成功")
+        else:
+            logger.warning("⚠️ 按F键失败")
+        return True
+    
+    def _move_mouse_and_cast(self, _value: Optional[float]) -> bool:
+        """初始状态长时间未出现时移动鼠标并重新抛竿"""
+        move_direction = fisher_config.retry.mouse_move_direction
+        logger.info(f"⏰ 初始状态检测已达到 {fisher_config.timing.initial_mouse_move_timeout} 秒，"
+                    f"执行鼠标{move_direction}移动...")
+        if not self.input.move_mouse(move_direction):
+            logger.warning(f"⚠️ 鼠标{move_direction}移动失败，继续检测初始状态")
+            return True
         
-        while not self.key_cycle_stop.is_set():
-            try:
-                # 获取当前要按的键
-                current_key = key_sequence[key_index]
-                
-                logger.info(f"按键循环: 长按 {current_key} 键1.5秒")
-                
-                # 长按当前键1.5秒
-                if input_controller.press_key(current_key, 1.5):
-                    logger.info(f"按键 {current_key} 执行完成")
-                else:
-                    logger.info(f"按键 {current_key} 执行失败")
-                
-                # 等待0.5秒
-                if not self.key_cycle_stop.wait(timeout=0.5):
-                    # 切换到下一个键
-                    key_index = (key_index + 1) % len(key_sequence)
-                else:
-                    break
-                    
-            except Exception as e:
-                logger.error(f"按键循环异常: {e}")
-                time.sleep(0.5)
+        if not self.input.cast_rod():
+            if not self.stop_token.is_cancelled:
+                logger.error(f"❌ 鼠标{move_direction}移动后抛竿失败")
+            return False
         
-        logger.info("按键循环线程结束")
+        logger.info(f"✅ 鼠标{move_direction}移动后抛竿完成，继续等待初始状态检测")
+        # 等待抛竿动画完成
+        self.stop_token.wait(1.0)
+        return True
     
-    def _start_key_cycle(self) -> None:
-        """启动按键循环"""
-        if not self.key_cycle_thread or not self.key_cycle_thread.is_alive():
-            self.key_cycle_stop.clear()
-            self.key_cycle_thread = threading.Thread(target=self._key_cycle_worker, daemon=True)
-            self.key_cycle_thread.start()
-            logger.info("按键循环已启动")
+    def _hold(self, duration: Optional[float]) -> bool:
+        """暂停检测一段时间（如状态3暂停点击后等待耐力恢复）"""
+        logger.info(f"⏸️  暂停 {duration}秒...")
+        self.stop_token.wait(duration or 0.0)
+        return True
     
-    def _stop_key_cycle(self) -> None:
-        """停止按键循环"""
-        self.key_cycle_stop.set()
-        logger.info("按键循环已停止")
+    def _complete_round(self, _value: Optional[float]) -> bool:
+        """一轮钓鱼完成（抛竿成功后）计数"""
+        self.status.round_count += 1
+        logger.info(f"🎉 第 {self.status.round_count} 轮钓鱼完成")
+        self._end_round(ROUND_SUCCESS)
+        return True
     
-    def _wait_for_initial_state(self) -> bool:
-        """
-        等待初始状态 (状态0或1)
-        优化检测逻辑：如果检测到状态1，不立即确认，而是进入累计确认流程
-        新增：40秒未检测到状态时执行鼠标右移
-        
-        Returns:
-            bool: 是否成功检测到初始状态
-        """
-        logger.info("🔍 等待检测到初始状态 (0或1)...")
-        logger.info(f"🔍 [调试] 初始状态检测开始 - 当前业务状态: {self.status.current_state}")
-        logger.info(f"🔍 [调试] 初始状态检测开始 - 当前检测状态: {self.status.current_detected_state}")
-        logger.info(f"🔍 [调试] 初始状态检测开始 - 允许状态: {self.allowed_states}")
-        
-        timeout = fisher_config.timing.initial_timeout
-        mouse_move_timeout = fisher_config.timing.initial_mouse_move_timeout  # 40秒
-        detection_count = 0
-        mouse_moved = False  # 标记是否已执行鼠标右移
-        
-        logger.info(f"🔍 [调试] 初始状态配置 - 总超时: {timeout}s, 鼠标右移超时: {mouse_move_timeout}s")
-        
-        while not self.should_stop:
-            # 检查超时
-            elapsed = time.time() - self.timeout_start
-            if elapsed > timeout:
-                error_msg = f"初始状态检测超时 ({timeout}秒)"
-                logger.error(f"⏰ {error_msg}")
-                self._update_status(FishingState.ERROR, error_message=error_msg)
-                return False
-            
-            # 🆕 检查是否需要执行鼠标移动（40秒时）
-            if not mouse_moved and elapsed > mouse_move_timeout:
-                move_direction = fisher_config.retry.mouse_move_direction
-                logger.info(f"⏰ 初始状态检测已达到 {mouse_move_timeout} 秒，执行鼠标{move_direction}移动...")
-                if input_controller.move_mouse(move_direction):
-                    logger.info(f"✅ 鼠标{move_direction}移动完成，开始抛竿...")
-                    
-                    # 🆕 鼠标移动后抛竿
-                    if input_controller.cast_rod():
-                        logger.info(f"✅ 鼠标{move_direction}移动后抛竿完成，继续等待初始状态检测")
-                        # 注意：保持原有计时器，不重置，避免40秒后再次触发死循环
-                        # 等待抛竿动画完成
-                        time.sleep(1.0)
-                    else:
-                        logger.error(f"❌ 鼠标{move_direction}移动后抛竿失败")
-                        return False
-                else:
-                    logger.warning(f"⚠️ 鼠标{move_direction}移动失败，继续检测初始状态")
-                mouse_moved = True  # 标记已执行，避免重复执行
-            
-            detection_count += 1
-            if detection_count % 50 == 0:  # 每5秒输出一次进度
-                status_msg = f"🔍 初始状态检测中... 已尝试 {detection_count} 次，耗时 {elapsed:.1f}秒"
-                if mouse_moved:
-                    status_msg += f" (已在{mouse_move_timeout}秒时执行鼠标右移)"
-                logger.info(status_msg)
-            
-            # 检测当前允许的状态
-            result = model_detector.detect_multiple_states(self.allowed_states)
-            if result:
-                detected_state = result['state']
-                confidence = result['confidence']
-                
-                logger.info(f"✅ 检测到有效状态: {detected_state} (置信度: {confidence:.2f})")
-                logger.info(f"🔍 [调试] 初始状态检测成功 - 检测状态: {detected_state}, 允许状态: {self.allowed_states}")
-                self._update_status(detected_state=detected_state, confidence=confidence)
-                
-                if detected_state == 0:
-                    logger.info("📌 设置状态为：等待上钩")
-                    logger.info(f"🔍 [调试] 状态0处理 - 即将返回True进入等待上钩流程")
-                    self._update_status(FishingState.WAITING_HOOK)
-                    return True
-                elif detected_state == 1:
-                    logger.info("📌 检测到状态1，需要进行累计确认...")
-                    logger.info(f"🔍 [调试] 状态1处理 - 即将返回True进入累计确认流程")
-                    # 不立即确认状态1，让主循环调用_wait_for_hook()进行累计确认
-                    self._update_status(FishingState.WAITING_HOOK)  # 先设置为等待状态
-                    return True
-            else:
-                # 🔍 额外检测：看看是否检测到不允许的状态
-                all_states_result = model_detector.detect_multiple_states([0, 1, 2, 3, 4])
-                if all_states_result:
-                    detected_states = [state for state, detected in all_states_result.items() if detected]
-                    if detected_states:
-                        logger.warning(f"🔍 [调试] 检测到不允许的状态: {detected_states}, 当前允许: {self.allowed_states}")
-                        # 特别关注状态4的持续检测
-                        if 4 in detected_states:
-                            logger.warning(f"🔍 [调试] ⚠️ 检测到状态4但不在允许状态中！这可能是问题根源")
-                            logger.warning(f"🔍 [调试] 当前业务状态: {self.status.current_state}, 应该允许的状态: {self.allowed_states}")
-                else:
-                    if detection_count % 100 == 0:  # 每10秒输出一次
-                        logger.info(f"🔍 [调试] 当前未检测到任何状态（第{detection_count}次检测）")
-            
-            time.sleep(fisher_config.model.detection_interval)
-        
-        logger.info("🛑 初始状态检测被中断")
-        return False
+    def _track_round(self, phase: Phase) -> None:
+        """按阶段转换记录本轮的等待上钩和上钩时刻"""
+        if phase == Phase.WAITING_HOOK:
+            self._waiting_hook_at = time.monotonic()
+            self._hooked_at = None
+        elif phase == Phase.HOOKED and self._hooked_at is None:
+            self._hooked_at = time.monotonic()
+        elif phase == Phase.FAILED:
+            self._end_round(ROUND_FAILED)
     
-    def _wait_for_hook(self) -> bool:
-        """
-        等待鱼上钩 (状态1)
-        优化流程控制：需要累计识别到3次状态1才算有效，避免误判
-        
-        Returns:
-            bool: 是否成功检测到鱼上钩
-        """
-        logger.info("🎣 等待鱼上钩...")
-        detection_count = 0
-        state1_confirm_count = 0  # 状态1累计确认次数（局部变量，每轮钓鱼重新计数）
-        required_confirms = 3     # 需要累计确认的次数
-        
-        while not self.should_stop:
-            # 检查超时
-            elapsed = time.time() - self.timeout_start
-            if elapsed > fisher_config.timing.initial_timeout:
-                error_msg = f"等待上钩超时 ({fisher_config.timing.initial_timeout}秒)"
-                logger.error(f"⏰ {error_msg}")
-                self._update_status(FishingState.ERROR, error_message=error_msg)
-                return False
-            
-            detection_count += 1
-            if detection_count % 50 == 0:  # 每5秒输出一次进度
-                logger.info(f"🎣 等待鱼上钩中... 已尝试 {detection_count} 次，耗时 {elapsed:.1f}秒")
-                if state1_confirm_count > 0:
-                    logger.info(f"    📊 状态1累计确认: {state1_confirm_count}/{required_confirms} 次")
-            
-            # 检测当前允许的状态（通常是[0,1]或[1,2,3]）
-            result = model_detector.detect_multiple_states(self.allowed_states)
-            if result and result['state'] == 1:  # 只处理状态1的确认
-                confidence = result['confidence']
-                state1_confirm_count += 1
-                logger.info(f"🐟 检测到状态1 第{state1_confirm_count}次确认 (置信度: {confidence:.2f}) [{state1_confirm_count}/{required_confirms}]")
-                
-                # 更新状态（但不立即确认，等待累计确认）
-                self._update_status(detected_state=1, confidence=confidence)
-                
-                # 只有累计确认3次才算真正的鱼上钩
-                if state1_confirm_count >= required_confirms:
-                    logger.info(f"✅ 状态1已累计确认 {required_confirms} 次，确认鱼已上钩！")
-                    self._update_status(FishingState.FISH_HOOKED, detected_state=1, confidence=confidence)
-                    return True  # 修复：返回True让主循环处理，而不是直接调用处理流程
-                else:
-                    logger.info(f"⏳ 状态1需要再确认 {required_confirms - state1_confirm_count} 次")
-            
-            time.sleep(fisher_config.model.detection_interval)
-        
-        logger.info("🛑 等待鱼上钩被中断")
-        return False
+    def _end_round(self, outcome: str) -> None:
+        """记录一轮结束的遥测事件并开始计时下一轮"""
+        now = time.monotonic()
+        if self._round_started_at is None:
+            return
+        time_to_hook = None
+        if self._waiting_hook_at is not None and self._hooked_at is not None:
+            time_to_hook = self._hooked_at - self._waiting_hook_at
+        self.telemetry.round_end(self.status.round_count, outcome, now - self._round_started_at, time_to_hook)
+        self._round_started_at = now if outcome == ROUND_SUCCESS else None
+        self._waiting_hook_at = None
+        self._hooked_at = None
     
-    def _handle_fish_hooked(self) -> bool:
-        """
-        处理鱼上钩状态
-        新增：状态1超时重试机制 - 如果状态1持续3秒没有进入提线阶段，重新抛竿
-        
-        Returns:
-            bool: 是否成功处理
+    def _apply_step(self, step: StepResult) -> None:
         """
-        logger.info("🐟 开始处理鱼上钩状态...")
+        执行状态机单步输出：记录阶段转换、更新业务状态、依次执行动作
         
-        # 🔧 修复：确保状态1已经被正确记录和更新allowed_states
-        logger.info("🔧 [修复] 确保状态1状态转换正确...")
-        self._update_status(FishingState.FISH_HOOKED, detected_state=1, force_update=False)
-        logger.info(f"🔧 [修复] 状态1更新完成，当前允许状态: {self.allowed_states}")
-        
-        logger.info("🖱️  启动快速点击...")
-        
-        # 启动快速点击
-        if not input_controller.start_clicking():
-            logger.error("❌ 启动快速点击失败")
-            return False
-        
-        logger.info("✅ 快速点击已启动")
-        logger.info("🎯 进入提线阶段...")
-        
-        # 🆕 状态1超时检测：如果3秒内没有进入提线阶段，重新抛竿
-        state1_timeout = 3.0  # 状态1超时时间（秒）
-        state1_start_time = time.time()
-        
-        logger.info(f"🔍 开始检测提线状态，当前允许状态: {self.allowed_states}")
-        
-        while not self.should_stop:
-            # 🔧 修复：使用状态流转验证系统来检测状态2/3/4
-            # 检查是否已进入提线阶段（检测到状态2/3/4）
-            detected_result = model_detector.detect_states()
-            if detected_result and detected_result['state'] in [2, 3, 4]:
-                # 使用状态流转验证系统来验证和更新状态
-                if self._is_valid_state_transition(detected_result['state']):
-                    logger.info(f"✅ 检测到提线状态{detected_result['state']}，状态流转验证通过")
-                    # 更新状态（这会同时更新allowed_states）
-                    self._update_status(detected_state=detected_result['state'], 
-                                      confidence=detected_result['confidence'])
-                    break
-                else:
-                    logger.warning(f"⚠️ 检测到状态{detected_result['state']}但状态流转验证失败")
-            
-            # 检查状态1超时
-            elapsed = time.time() - state1_start_time
-            if elapsed > state1_timeout:
-                logger.warning(f"⚠️ 状态1持续{state1_timeout}秒未进入提线阶段，可能卡住了")
-                logger.warning("🔄 停止当前操作，重新抛竿（此轮不计数）")
-                
-                # 停止当前操作
-                input_controller.stop_clicking()
-                self._stop_key_cycle()
-                
-                # 执行重新抛竿
-                if self._handle_retry_casting():
-                    logger.info("✅ 重新抛竿成功，返回主循环重新开始")
-                    return "retry"  # 返回特殊值表示需要重试
-                else:
-                    logger.error("❌ 重新抛竿失败")
-                    return False
-            
-            # 短暂等待后继续检测
-            time.sleep(0.1)
-        
-        # 进入正常提线阶段
-        result = self._handle_pulling_phase()
-        
-        if result:
-            logger.info("✅ 提线阶段处理成功")
-        else:
-            logger.error("❌ 提线阶段处理失败")
-        
-        return result
+        Args:
+            step: 状态机处理结果
+        """
+        for old_phase, new_phase, reason in step.transitions:
+            logger.info("🎯 状态流转: %s → %s (触发: %s) | 检测状态: %s",
+                        old_phase.value, new_phase.value, reason, sorted(self.machine.detection_classes))
+            self.telemetry.transition(old_phase.value, new_phase.value, reason)
+            self._track_round(new_phase)
+            self.scheduler.notify_transition()
+        
+        if step.transitions:
+            phase = self.machine.phase
+            error_message = self.machine.error_message if phase == Phase.FAILED else None
+            self._update_status(PHASE_FISHING_STATES[phase], error_message=error_message)
+        
+        for effect in step.effects:
+            if self.should_stop or self.machine.is_failed:
+                return
+            logger.debug("▶️ 执行动作: %s", effect.action.value)
+            self.telemetry.input_action(effect.action.value, effect.value)
+            if self._action_handlers[effect.action](effect.value) is False:
+                if self.stop_token.is_cancelled:
+                    return  # 停止时被中断的动作不视为失败
+                error_msg = f"{effect.action.value}失败"
+                logger.error(f"❌ {error_msg}")
+                self._apply_step(self.machine.fail(error_msg, time.monotonic()))
+                return
     
-    def _handle_retry_casting(self) -> bool:
+    def _wait_next_detection(self, phase: str) -> None:
         """
-        处理重新抛竿操作（状态1超时时使用）
-        流程: 停止连续点击 → 重新抛竿
-        注意: 鼠标右移已移至初始状态检测阶段，此处不再执行
+        按阶段帧预算等待到下一轮检测，并更新有效检测频率
         
-        Returns:
-            bool: 是否成功重新抛竿
+        Args:
+            phase: 调度阶段
         """
-        logger.info("🎣 执行重新抛竿操作...")
-        
-        # 等待一下让之前的操作完全停止
-        time.sleep(0.5)
-        
-        # 执行抛竿
-        if input_controller.cast_rod():
-            logger.info("✅ 重新抛竿完成，准备重新开始钓鱼")
-            # 等待抛竿动画完成
-            time.sleep(1.0)
-            return True
-        else:
-            logger.error("❌ 重新抛竿失败")
-            return False
+        self.scheduler.wait(phase, unchanged=self.detector.last_detection_cached)
+        self.status.detection_rates = self.scheduler.get_rates()
     
-    def _handle_pulling_phase(self) -> bool:
-        """
-        处理提线阶段 (状态2和3的切换)
-        按键循环在第一次检测到状态2时激活
-        
-        Returns:
-            bool: 是否成功完成提线阶段
-        """
-        logger.info("🎯 进入提线阶段...")
-        
-        # 初始化状态检测
-        previous_detected_state = None
-        no_detection_count = 0  # 连续无检测次数
-        total_detection_count = 0  # 总检测次数
-        pulling_start = time.time()  # 用于统计时间，不用于超时
-        key_cycle_started = False  # 按键循环是否已启动标志
-        
-        logger.info(f"🔍 开始检测提线状态（状态2/3/4/5/6），无超时限制")
-        
-        while not self.should_stop:
-            
-            total_detection_count += 1
-            
-            # 检测当前允许的状态（提线阶段通常是[2, 3, 4]）
-            result = model_detector.detect_multiple_states(self.allowed_states)
-            
-            # 添加详细的调试检测 - 每100次输出一次详细信息（减少频率）
-            if total_detection_count % 100 == 0:
-                # 获取原始检测结果（不过滤目标状态）
-                try:
-                    # 先检查截图是否正常
-                    debug_image = model_detector.capture_screen()
-                    if debug_image is None:
-                        logger.error(f"🔍 [调试] ❌ 屏幕截图失败")
-                    else:
-                        logger.info(f"🔍 [调试] 📸 截图成功，尺寸: {debug_image.shape}")
-                        
-                        # 执行模型推理，使用更低的置信度阈值
-                        if model_detector.model is not None:
-                            raw_results = model_detector.model(debug_image, conf=0.1, verbose=False)
-                            
-                            if len(raw_results) > 0 and len(raw_results[0].boxes) > 0:
-                                boxes = raw_results[0].boxes
-                                confidences = boxes.conf.cpu().numpy()
-                                classes = boxes.cls.cpu().numpy().astype(int)
-                                
-                                logger.info(f"🔍 [调试] 🎯 检测到 {len(classes)} 个目标:")
-                                for i, (cls, conf) in enumerate(zip(classes, confidences)):
-                                    state_name = model_detector.state_names.get(cls, f"未知状态_{cls}")
-                                    target_marker = "🎉" if cls in [2, 3, 4] else "⚪"
-                                    thresh_marker = "✅" if conf >= fisher_config.model.confidence_threshold else "❌"
-                                    logger.info(f"      {target_marker} [{i+1}] 状态{cls}({state_name}) - 置信度:{conf:.3f} {thresh_marker}")
-                            else:
-                                logger.error(f"🔍 [调试] ❌ 模型推理无结果 (置信度阈值0.1)")
-                        else:
-                            logger.error(f"🔍 [调试] ❌ 模型对象为空")
-                            
-                        # 使用标准检测方法再次验证
-                        debug_result = model_detector.detect_states()
-                        if debug_result:
-                            logger.info(f"🔍 [调试] 🏆 最佳检测: 状态{debug_result['state']}({debug_result['state_name']}) - 置信度:{debug_result['confidence']:.3f}")
-                        else:
-                            logger.error(f"🔍 [调试] ❌ 标准检测方法也无结果")
-                            
-                except Exception as e:
-                    logger.error(f"🔍 [调试] 💥 调试检测异常: {e}")
-                    import traceback
-                    traceback.print_exc()
-            
-            if not result:
-                no_detection_count += 1
-                if no_detection_count % 500 == 0:  # 每50秒输出一次调试信息（减少频率）
-                    elapsed = time.time() - pulling_start
-                    logger.info(f"🔄 提线阶段无法检测到状态2/3/4，已尝试 {no_detection_count} 次，耗时 {elapsed:.1f}秒")
-                    logger.info(f"📊 检测统计：总检测 {total_detection_count} 次，成功率 {((total_detection_count-no_detection_count)/total_detection_count*100):.1f}%")
-                    
-                    # 输出当前实际检测到的状态 - 详细诊断
-                    logger.info(f"🔧 [详细诊断] 开始全面检测分析...")
-                    
-                    # 检测器状态检查
-                    logger.info(f"🔧 模型检测器状态: {'✅初始化完成' if model_detector.is_initialized else '❌未初始化'}")
-                    logger.info(f"🔧 模型对象状态: {'✅正常' if model_detector.model is not None else '❌空对象'}")
-                    
-                    # 屏幕截图检查
-                    diag_image = model_detector.capture_screen()
-                    if diag_image is None:
-                        logger.error(f"🔧 截图状态: ❌失败 - 可能是屏幕截图工具问题")
-                    else:
-                        logger.info(f"🔧 截图状态: ✅成功 - 尺寸:{diag_image.shape}")
-                        
-                        # 使用极低阈值检测所有可能的状态
-                        try:
-                            ultra_low_results = model_detector.model(diag_image, conf=0.01, verbose=False)
-                            if len(ultra_low_results) > 0 and len(ultra_low_results[0].boxes) > 0:
-                                boxes = ultra_low_results[0].boxes
-                                confidences = boxes.conf.cpu().numpy()
-                                classes = boxes.cls.cpu().numpy().astype(int)
-                                logger.info(f"🔧 超低阈值检测(0.01): 发现 {len(classes)} 个目标")
-                                for cls, conf in zip(classes, confidences):
-                                    state_name = model_detector.state_names.get(cls, f"未知状态_{cls}")
-                                    logger.info(f"      状态{cls}({state_name}) - 置信度:{conf:.4f}")
-                            else:
-                                logger.error(f"🔧 超低阈值检测(0.01): ❌无任何检测结果")
-                        except Exception as e:
-                            logger.error(f"🔧 超低阈值检测异常: {e}")
-                    
-                    # 标准检测
-                    current_detection = model_detector.detect_states()
-                    if current_detection:
-                        logger.info(f"📋 标准检测结果: 状态{current_detection['state']}({current_detection['state_name']}) - 置信度:{current_detection['confidence']:.3f}")
-                    else:
-                        logger.error(f"📋 标准检测结果: ❌无检测结果")
-                    
-                    logger.info(f"🔧 [详细诊断] 分析完毕")
-                        
-                # 临时修复：使用默认检测间隔或动态间隔
-                pulling_interval = getattr(fisher_config.model, 'detection_interval_pulling', 0.04)
-                time.sleep(pulling_interval)
-                continue
-            
-            # 重置无检测计数（但不重置总计数）
-            # no_detection_count = 0  # 保留累计，便于统计
-            
-            detected_state = result['state']
-            confidence = result['confidence']
-            
-            logger.info(f"✅ 提线阶段检测到状态: {detected_state} (置信度: {confidence:.2f})")
-            self._update_status(detected_state=detected_state, confidence=confidence)
-            
-            # 只有当状态发生变化时才进行处理，避免重复操作
-            if detected_state != previous_detected_state:
-                logger.info(f"🔄 状态变化: {previous_detected_state} → {detected_state}")
-                
-                if detected_state == 2:  # 提线中_耐力未到二分之一
-                    logger.info("🟢 状态2: 继续快速点击")
-                    self._update_status(FishingState.PULLING_NORMAL)
-                    input_controller.resume_clicking()
-                    
-                    # 🔧 修改：在第一次检测到状态2时启动按键循环
-                    if not key_cycle_started:
-                        logger.info("⌨️  第一次检测到状态2，启动按键循环（a/d键切换）...")
-                        self._start_key_cycle()
-                        key_cycle_started = True
-                    
-                elif detected_state == 3:  # 提线中_耐力已到二分之一
-                    logger.info("🟡 状态3: 暂停点击")
-                    self._update_status(FishingState.PULLING_HALFWAY)
-                    input_controller.pause_clicking()
-                    
-                    # 等待1秒后重新检测
-                    logger.info(f"⏸️  暂停 {fisher_config.timing.state3_pause_time}秒...")
-                    time.sleep(fisher_config.timing.state3_pause_time)
-                
-                elif detected_state == 4:  # 钓鱼成功状态_txt
-                    logger.info("🎉 检测到钓鱼成功状态！")
-                    
-                    # 停止点击和按键循环
-                    logger.info("🛑 停止点击和按键循环...")
-                    input_controller.stop_clicking()
-                    self._stop_key_cycle()
-                    
-                    logger.info("🏆 提线阶段成功完成，进入成功处理...")
-                    return self._handle_success()
-                
-                previous_detected_state = detected_state
-            else:
-                # 状态没有变化，输出简化日志
-                if total_detection_count % 1000 == 0:  # 每100秒输出一次状态保持信息（减少频率）
-                    elapsed = time.time() - pulling_start
-                    logger.info(f"🔄 状态保持: {detected_state}，已持续 {elapsed:.1f}秒")
-            
-            # 临时修复：使用默认检测间隔或动态间隔
-            pulling_interval = getattr(fisher_config.model, 'detection_interval_pulling', 0.04)
-            time.sleep(pulling_interval)
-        
-        logger.info("🛑 提线阶段被中断")
-        return False
+    def _wait_for_timer(self) -> None:
+        """当前阶段无需检测时，等待到下一个定时器到期"""
+        deadline = self.machine.next_deadline()
+        remaining = 0.1 if deadline is None else deadline - time.monotonic()
+        self.stop_token.wait(min(max(remaining, 0.0), 0.1))
     
-    def _handle_success(self) -> bool:
-        """
-        处理钓鱼成功状态
-        新流程：停止按键循环和点击 → 等待2.5秒 → 按F键 → 1秒后检查状态消失 → 重复最多3次
-        
-        Returns:
-            bool: 是否成功处理
+    def _log_progress(self, detection_count: int) -> None:
         """
-        logger.info("🎉 处理钓鱼成功状态...")
-        logger.info(f"🔍 [调试] 成功状态处理开始 - 当前业务状态: {self.status.current_state}")
-        logger.info(f"🔍 [调试] 成功状态处理开始 - 当前检测状态: {self.status.current_detected_state}")
-        self._update_status(FishingState.SUCCESS, detected_state=4)
-        
-        # 🆕 立即停止按键循环和连续点击
-        logger.info("🛑 停止按键循环和连续点击...")
-        self._stop_key_cycle()
-        input_controller.stop_clicking()
-        
-        # 获取配置参数
-        wait_time = fisher_config.timing.success_wait_time  # 2.5秒
-        check_interval = fisher_config.timing.success_f_key_interval  # 1秒
-        max_attempts = fisher_config.timing.success_f_key_max_attempts  # 3次
-        
-        logger.info(f"🔍 [调试] 成功状态配置 - 等待时间: {wait_time}s, 检查间隔: {check_interval}s, 最大尝试: {max_attempts}次")
-        
-        # 🆕 等待2.5秒后开始按F键流程
-        logger.info(f"⏳ 等待 {wait_time} 秒后开始按F键...")
-        time.sleep(wait_time)
-        
-        # 🆕 按F键重试循环，最多3次
-        for attempt in range(1, max_attempts + 1):
-            logger.info(f"🔄 按F键尝试 {attempt}/{max_attempts}")
-            
-            # 🔍 在按F键前检查当前状态
-            pre_f_result = model_detector.detect_specific_state(4)
-            logger.info(f"🔍 [调试] 按F键前检测状态4: {'存在' if pre_f_result else '不存在'}")
-            
-            # 按下F键
-            if input_controller.handle_success_key():
-                logger.info(f"✅ 第{attempt}次按F键成功")
-            else:
-                logger.warning(f"⚠️ 第{attempt}次按F键失败")
-            
-            # 等待1秒后检查状态是否消失
-            logger.info(f"⏳ 等待 {check_interval} 秒后检查成功状态是否消失...")
-            time.sleep(check_interval)
-            
-            # 检查状态4是否消失
-            result = model_detector.detect_specific_state(4)
-            logger.info(f"🔍 [调试] 按F键后检测状态4: {'存在' if result else '不存在'}")
-            
-            if not result:
-                logger.info(f"✅ 成功状态已消失（第{attempt}次尝试后），准备抛竿")
-                logger.info(f"🔍 [调试] 成功状态处理完成 - 即将返回True进入抛竿阶段")
-                return True  # 直接返回True，让上级调用者处理抛竿
-            else:
-                logger.info(f"⏳ 成功状态仍存在（第{attempt}次尝试后），继续下一次尝试...")
-                
-                # 🔍 额外检测：看看是否检测到其他状态
-                all_states_result = model_detector.detect_multiple_states([0, 1, 2, 3, 4])
-                if all_states_result:
-                    detected_states = [state for state, detected in all_states_result.items() if detected]
-                    logger.info(f"🔍 [调试] 当前检测到的所有状态: {detected_states}")
-                else:
-                    logger.info(f"🔍 [调试] 当前未检测到任何状态")
+        定期输出检测进度和运行统计
         
-        # 🆕 如果3次尝试后状态仍未消失，强制进入抛竿阶段
-        logger.warning(f"⚠️ 成功状态处理完成({max_attempts}次尝试)，强制进入抛竿阶段")
-        logger.warning(f"🔍 [调试] 强制完成 - 最终检测状态4: {'存在' if model_detector.detect_specific_state(4) else '不存在'}")
-        return True  # 返回True让流程继续，由上级调用者处理抛竿
+        Args:
+            detection_count: 累计检测次数
+        """
+        elapsed = time.time() - self.status.start_time if self.status.start_time else 0.0
+        gate_stats = self.detector.frame_gate.get_stats()
+        logger.info(f"🔍 {self.machine.phase.value}: 已检测 {detection_count} 次，运行 {elapsed:.1f}秒，"
+                    f"帧差门控跳过 {gate_stats['skipped']} 次/执行 {gate_stats['executed']} 次")
+        
+        # 后台截图帧龄和丢帧统计
+        capture_stats = self.detector.get_capture_stats()
+        if capture_stats and capture_stats['running']:
+            frame_age = capture_stats['latest_frame_age'] or 0.0
+            logger.info(f"🔍 [调试] 📷 后台截图: 最新帧龄 {frame_age * 1000:.0f}ms, "
+                        f"已截取 {capture_stats['produced']} 帧, 丢弃 {capture_stats['dropped']} 帧")
     
-    def _handle_casting(self) -> bool:
+    def _main_loop(self) -> None:
         """
-        处理抛竿状态
-        
-        Returns:
-            bool: 是否成功抛竿
+        主控制循环
+        单一检测循环驱动状态机：每轮先处理到期定时器，再按当前阶段的状态集合检测一次，
+        把检测结果交给状态机，执行其输出的动作，最后按调度器的帧预算等待
         """
-        logger.info("执行抛竿操作...")
-        self._update_status(FishingState.CASTING)
-        
-        # 执行抛竿
-        if input_controller.cast_rod():
-            logger.info("抛竿完成，准备下一轮钓鱼")
-            
-            # 等待抛竿动画完成
-            time.sleep(1.0)
-            
-            return True
-        else:
-            logger.error("抛竿失败")
-            return False
-    
-    def _main_loop(self) -> None:
-        """主控制循环"""
         logger.info("🚀 钓鱼主循环启动")
+        detection_count = 0
         
         try:
-            while not self.should_stop:
-                logger.info(f"📍 主循环开始新一轮，当前状态: {self.status.current_state}")
-                
-                # 重置状态追踪，开始新一轮钓鱼
-                self._reset_state_tracking()
-                
-                # 等待初始状态（状态0或1）
-                logger.info("🔍 开始等待初始状态...")
-                logger.info(f"🔍 [调试] 主循环 - 即将进入等待初始状态，当前检测状态: {self.status.current_detected_state}")
-                self._update_status(FishingState.WAITING_INITIAL, force_update=True)
-                self.timeout_start = time.time()
-                
-                if not self._wait_for_initial_state():
-                    logger.error("❌ 等待初始状态失败，退出主循环")
+            self._apply_step(self.machine.start_round(time.monotonic()))
+            
+            while not self.should_stop and not self.machine.is_failed:
+                # 定时器事件
+                self._apply_step(self.machine.poll_timers(time.monotonic()))
+                if self.should_stop or self.machine.is_failed:
                     break
                 
-                logger.info(f"✅ 初始状态检测完成，检测到状态: {self.status.current_detected_state}")
+                classes = self.machine.detection_classes
+                if not classes:
+                    # 抛竿等阶段不需要检测，之前的检测历史不再有效
+                    self.detection_filter.reset()
+                    self._wait_for_timer()
+                    continue
                 
-                # 无论检测到状态0还是状态1，都需要进行累计确认
-                logger.info("🎣 开始等待鱼上钩（需要累计确认）...")
-                if not self._wait_for_hook():
-                    logger.error("❌ 等待鱼上钩失败，退出主循环")
-                    break
-                
-                logger.info(f"✅ 鱼上钩确认完成，当前检测状态: {self.status.current_detected_state}")
+                # 检测事件
+                schedule_phase = PHASE_SCHEDULES[self.machine.phase]
+                self.scheduler.begin(schedule_phase)
+                self.diagnostics.active = self.machine.phase in (Phase.PULLING_NORMAL, Phase.PULLING_HALFWAY)
+                detect_start = time.perf_counter()
+                result = self.detector.detect_multiple_states(list(classes))
+                detect_ms = (time.perf_counter() - detect_start) * 1000
+                detection_count += 1
+                self.telemetry.detection(self.machine.phase.value,
+                                         result['state'] if result else -1,
+                                         result['confidence'] if result else 0.0,
+                                         detect_ms, self.detector.last_detection_cached)
                 
-                # 处理鱼上钩状态
-                if self.status.current_detected_state == 1:
-                    logger.info("🐟 开始处理鱼上钩状态...")
-                    fish_hooked_result = self._handle_fish_hooked()
-                    
-                    if fish_hooked_result == "retry":
-                        # 🆕 状态1超时重试：重新开始本轮，不计轮数
-                        logger.info("🔄 状态1超时，重新开始本轮钓鱼（不计轮数）")
-                        continue  # 回到主循环开始，重新开始这一轮
-                    elif not fish_hooked_result:
-                        logger.error("❌ 处理鱼上钩状态失败，退出主循环")
-                        break
-                    
-                    logger.info("✅ 鱼上钩状态处理完成")
-                else:
-                    logger.warning(f"⚠️  警告：期望状态1，但当前检测状态为: {self.status.current_detected_state}")
+                if result:
+                    self._update_status(detected_state=result['state'], confidence=result['confidence'])
+                stable_state = self.detection_filter.update(result, classes)
+                self._apply_step(self.machine.handle_detection(stable_state, time.monotonic()))
                 
-                # 抛竿并准备下一轮
-                logger.info("🎯 开始抛竿操作...")
-                if not self._handle_casting():
-                    logger.error("❌ 抛竿操作失败，退出主循环")
-                    break
+                if detection_count % 100 == 0:
+                    self._log_progress(detection_count)
                 
-                # 🔧 修复：在一轮钓鱼真正完成后才增加轮数计数
-                self.status.round_count += 1
-                logger.info(f"🎉 第 {self.status.round_count} 轮钓鱼完成")
+                self._wait_next_detection(schedule_phase)
+            
+            if self.machine.is_failed:
+                logger.error(f"❌ 钓鱼流程停止: {self.machine.error_message}")
         
         except Exception as e:
             error_msg = f"主循环异常: {e}"
@@ -926,6 +504,8 @@ class FishingController:
         
         finally:
             self._cleanup()
+            # 释放主循环线程持有的截图会话
+            close_capture_session()
             logger.info("🏁 钓鱼主循环结束")
     
     def start_fishing(self) -> bool:
@@ -939,30 +519,55 @@ class FishingController:
             logger.info("钓鱼已在运行中")
             return False
         
-        # 检查初始化状态
-        if not model_detector.is_initialized:
+        # 检查初始化状态（模型仍在后台加载时等待加载完成）
+        if not self.detector.ready.is_set():
+            logger.info("等待模型加载完成...")
+        if not self.detector.wait_until_ready():
             logger.error("模型检测器未初始化")
             return False
         
         logger.info("正在准备钓鱼环境...")
         
-        # 测试屏幕截图功能（新的MSS架构已无需重置）
-        logger.info("验证屏幕截图功能...")
-        
         # 测试屏幕截图功能
         logger.info("测试屏幕截图功能...")
-        test_image = model_detector.capture_screen()
+        test_image = self.detector.capture_screen()
         if test_image is None:
             logger.error("❌ 屏幕截图测试失败，无法启动钓鱼")
             return False
         logger.info("✅ 屏幕截图测试通过")
         
+        # 启动后台截图线程（配置启用时）
+        if self.detector.start_background_capture():
+            logger.info("✅ 后台截图线程已启动")
+        
+        # 开始录制会话（配置启用时）
+        if fisher_config.recording.enabled:
+            logger.info(f"📼 会话录制已启动: {self.detector.start_recording(name=self._session_file_name())}")
+        
+        # 启动诊断采样线程（配置启用时），使用当前配置快照中的诊断配置
+        self.diagnostics.config = fisher_config.diagnostics
+        self.diagnostics.start()
+        self.detector.diagnostics = self.diagnostics
+        
         # 重置状态
         self.status = FishingStatus()
         self.status.start_time = time.time()
+        self.scheduler.reset()
+        self.machine = self._create_state_machine()
+        self.detection_filter = DetectionFilter(len(self.detector.state_names), fisher_config.smoothing)
         self.should_stop = False
+        self.stop_token.reset()
         self.is_running = True
         
+        # 开始记录遥测事件（使用当前配置快照中的遥测配置）
+        self.telemetry.config = fisher_config.telemetry
+        telemetry_path = self.telemetry.start(self._session_file_name())
+        if telemetry_path:
+            logger.info(f"📊 遥测记录: {telemetry_path}")
+        self._round_started_at = time.monotonic()
+        self._waiting_hook_at = None
+        self._hooked_at = None
+        
         # 启动主线程
         self.main_thread = threading.Thread(target=self._main_loop, daemon=True)
         self.main_thread.start()
@@ -982,11 +587,14 @@ class FishingController:
             return False
         
         logger.info("正在停止钓鱼...")
+        stop_start = time.perf_counter()
         self.should_stop = True
+        self.stop_token.cancel()
         
-        # 等待主线程结束
+        # 等待主线程结束（等待均可中断，最多等到当前一次检测完成）
         if self.main_thread and self.main_thread.is_alive():
             self.main_thread.join(timeout=3.0)
+        logger.info(f"主循环已退出，停止耗时 {(time.perf_counter() - stop_start) * 1000:.0f}ms")
         
         self._cleanup()
         self.is_running = False
@@ -1000,16 +608,63 @@ class FishingController:
         logger.info("清理钓鱼控制器资源...")
         
         # 停止按键循环
-        self._stop_key_cycle()
+        self.input.stop_key_cycle()
         
         # 停止输入操作
-        input_controller.emergency_stop()
-        
-        # 等待按键循环线程结束
-        if self.key_cycle_thread and self.key_cycle_thread.is_alive():
-            self.key_cycle_thread.join(timeout=2.0)
-        
-        # 注意：新的MSS架构使用即用即释放模式，无需手动清理
+        self.input.emergency_stop()
+        
+        # 停止后台截图线程和会话录制
+        self.detector.stop_background_capture()
+        self.detector.stop_recording()
+        
+        # 未完成的一轮记为停止，写入剩余遥测事件
+        self._end_round(ROUND_STOPPED)
+        self.telemetry.stop()
+        
+        # 停止诊断采样（输出最后一个周期的摘要）
+        self.detector.diagnostics = None
+        self.diagnostics.stop()
+        
+        # 输出输入调度延迟（实际执行时刻相对计划时刻）
+        lateness = self.input.executor.lateness.get_stats()
+        if lateness['count']:
+            logger.info(f"⏱️ 输入调度延迟 (最近{lateness['count']}次): p50={lateness['p50_ms']:.1f}ms, "
+                        f"p95={lateness['p95_ms']:.1f}ms, max={lateness['max_ms']:.1f}ms")
+        
+        # 输出时间滤波统计
+        filter_stats = self.detection_filter.get_stats()
+        if filter_stats['updates']:
+            logger.info(f"🧹 时间滤波({filter_stats['method']}): 处理 {filter_stats['updates']} 次检测，"
+                        f"滤除 {filter_stats['suppressed']} 次，输出状态变化 {filter_stats['switches']} 次")
+        
+        # 输出本次运行的推理耗时分布，用于调整检测间隔
+        latency = self.detector.inference_latency.get_stats()
+        if latency['count']:
+            logger.info(f"⏱️ 推理耗时 (最近{latency['count']}次): p50={latency['p50_ms']:.1f}ms, "
+                        f"p95={latency['p95_ms']:.1f}ms, p99={latency['p99_ms']:.1f}ms")
+        
+        # 输出被限频省略的重复日志汇总
+        flush_rate_limited()
+        limit_stats = rate_limiter.get_stats()
+        if limit_stats['suppressed']:
+            logger.info(f"📝 重复日志限频: 累计省略 {limit_stats['suppressed']} 条 "
+                        f"({limit_stats['sites']}个调用位置, 周期{limit_stats['interval']:.0f}秒)")
+        
+        # 输出异步日志队列统计，队列曾写满说明日志量超过日志线程的写入能力
+        log_stats = get_logging_stats()
+        if log_stats['async']:
+            log = logger.warning if log_stats['dropped'] else logger.info
+            log(f"📝 日志队列: 最大深度 {log_stats['max_depth']}/{log_stats['capacity']}, "
+                f"已写入 {log_stats['enqueued']} 条, 丢弃 {log_stats['dropped']} 条")
+        
+        # 注意：截图会话属于各自线程，主循环线程的会话在主循环结束时释放
+    
+    @property
+    def is_detecting(self) -> bool:
+        """主循环是否处于需要检测的阶段（抛竿中、已停止或出错时为False）"""
+        return (self.is_running and not self.should_stop
+                and self.status.current_state not in (FishingState.STOPPED, FishingState.ERROR)
+                and bool(self.machine.detection_classes))
     
     def get_status(self) -> FishingStatus:
         """
@@ -1024,9 +679,32 @@ class FishingController:
         """紧急停止"""
         logger.info("执行紧急停止")
         self.should_stop = True
+        self.stop_token.cancel()
         self._cleanup()
         self.is_running = False
         self._update_status(FishingState.STOPPED, error_message="紧急停止")
 
-# 全局钓鱼控制器实例
-fishing_controller = FishingController() 
\ No newline at end of file
+# 全局钓鱼控制器实例（首次使用时创建）
+_fishing_controller: Optional[FishingController] = None
+_fishing_controller_lock = threading.Lock()
+
+
+def get_fishing_controller() -> FishingController:
+    """
+    获取全局钓鱼控制器（不等待模型加载）
+    
+    Returns:
+        FishingController: 全局钓鱼控制器
+    """
+    global _fishing_controller
+    with _fishing_controller_lock:
+        if _fishing_controller is None:
+            _fishing_controller = FishingController()
+    return _fishing_controller
+
+
+def __getattr__(name: str):
+    # 兼容 from .fishing_controller import fishing_controller
+    if name == 'fishing_controller':
+        return get_fishing_controller()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}") 
@@ -0,0 +1,151 @@
+"""
+Fisher钓鱼模块帧差门控
+在模型推理前比较新帧与上次推理帧的降采样灰度图，画面无明显变化时直接复用上次检测结果
+
+作者: AutoFish Team
+版本: v1.0
+创建时间: 2026-10-16
+"""
+
+import time
+from typing import Optional, Tuple, Dict, Any, Hashable
+
+import cv2
+import numpy as np
+
+
+class FrameChangeGate:
+    """
+    帧差门控
+
+    将图像缩小为宽度downsample_width的灰度缩略图（每个像素即一个区块的均值），
+    与上次实际推理帧的缩略图逐区块比较，最大区块差异低于阈值时视为画面未变化。
+    使用最大值而非全图均值，保证屏幕局部的小图标变化也能被识别。
+    """
+
+    def __init__(self, diff_threshold: float = 8.0, downsample_width: int = 64,
+                 max_skip_time: float = 1.0):
+        """
+        初始化帧差门控
+
+        Args:
+            diff_threshold: 区块灰度差异阈值 (0-255)，低于该值视为画面未变化
+            downsample_width: 缩略图宽度(像素)
+            max_skip_time: 最长复用时间(秒)，超过后强制重新推理
+        """
+        self.diff_threshold = diff_threshold
+        self.downsample_width = max(8, int(downsample_width))
+        self.max_skip_time = max_skip_time
+
+        # 上次推理帧信息
+        self._thumbnail: Optional[np.ndarray] = None  # 上次推理帧缩略图
+        self._key: Optional[Hashable] = None  # 上次推理的条件（截图区域等）
+        self._result: Optional[Dict] = None  # 上次推理结果
+        self._result_time: float = 0.0  # 上次推理时间
+        self._pending: Optional[np.ndarray] = None  # 本次待推理帧缩略图
+
+        # 统计信息
+        self.skipped: int = 0  # 跳过的推理次数
+        self.executed: int = 0  # 实际执行的推理次数
+        self.last_diff: float = 0.0  # 最近一次帧差
+
+    def _make_thumbnail(self, image: np.ndarray) -> np.ndarray:
+        """
+        生成降采样灰度缩略图
+
+        Args:
+            image: BGR格式图像
+
+        Returns:
+            np.ndarray: int16灰度缩略图（便于直接做差）
+        """
+        height, width = image.shape[:2]
+        thumb_width = min(self.downsample_width, width)
+        thumb_height = max(1, round(height * thumb_width / width))
+        small = cv2.resize(image, (thumb_width, thumb_height), interpolation=cv2.INTER_AREA)
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        return gray.astype(np.int16)
+
+    def check(self, image: np.ndarray, key: Hashable = None) -> Tuple[bool, Optional[Dict]]:
+        """
+        判断是否可以跳过推理
+
+        Args:
+            image: 待检测的BGR图像
+            key: 推理条件标识，条件不同时不复用结果
+
+        Returns:
+            Tuple: (是否跳过, 复用的检测结果)，跳过时结果为上次结果的副本（可能为None）
+        """
+        thumbnail = self._make_thumbnail(image)
+        self._pending = thumbnail
+
+        previous = self._thumbnail
+        if (previous is None or key != self._key or previous.shape != thumbnail.shape
+                or time.time() - self._result_time > self.max_skip_time):
+            return False, None
+
+        self.last_diff = float(np.abs(thumbnail - previous).max())
+        if self.last_diff >= self.diff_threshold:
+            return False, None
+
+        self.skipped += 1
+        if self._result is None:
+            return True, None
+        result = dict(self._result)
+        result['cached'] = True
+        return True, result
+
+    def update(self, result: Optional[Dict], key: Hashable = None) -> None:
+        """
+        记录本次实际推理的帧和结果
+
+        Args:
+            result: 推理结果
+            key: 推理条件标识
+        """
+        self.executed += 1
+        self._thumbnail = self._pending
+        self._pending = None
+        self._key = key
+        self._result = dict(result) if result else None
+        self._result_time = time.time()
+
+    def configure(self, diff_threshold: float, downsample_width: int, max_skip_time: float) -> None:
+        """
+        更新门控参数（配置热更新时调用，可在检测进行中调用）
+
+        缩略图宽度变化后，下一帧与上次推理帧的缩略图尺寸不同，check会直接判定需要推理
+
+        Args:
+            diff_threshold: 区块灰度差异阈值 (0-255)
+            downsample_width: 缩略图宽度(像素)
+            max_skip_time: 最长复用时间(秒)
+        """
+        self.diff_threshold = diff_threshold
+        self.downsample_width = max(8, int(downsample_width))
+        self.max_skip_time = max_skip_time
+
+    def reset(self) -> None:
+        """清空缓存的推理帧和结果"""
+        self._thumbnail = None
+        self._pending = None
+        self._key = None
+        self._result = None
+        self._result_time = 0.0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取门控统计信息
+
+        Returns:
+            Dict: 统计信息
+        """
+        total = self.skipped + self.executed
+        return {
+            'skipped': self.skipped,
+            'executed': self.executed,
+            'skip_rate': self.skipped / total if total else 0.0,
+            'last_diff': self.last_diff,
+            'diff_threshold': self.diff_threshold
+        }
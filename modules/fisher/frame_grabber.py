@@ -0,0 +1,273 @@
+"""
+Fisher钓鱼模块后台截图线程
+生产者线程持续截图到预分配的环形帧缓冲区，检测线程总是取用最新一帧而无需等待截图
+
+作者: AutoFish Team
+版本: v1.0
+创建时间: 2026-10-16
+"""
+
+import time
+import threading
+from dataclasses import dataclass
+from typing import Optional, Tuple, List, Callable, Dict
+
+import numpy as np
+
+# 导入统一日志系统
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent))
+from logger import setup_logger
+
+from .screen_capture import get_capture_session, close_capture_session
+
+# 设置日志记录器
+logger = setup_logger('fisher_capture')
+
+# 区域类型：(left, top, width, height)，屏幕坐标
+Region = Tuple[int, int, int, int]
+
+# 槽位写入中标记
+_WRITING = -1
+
+
+@dataclass
+class FrameInfo:
+    """帧信息"""
+    seq: int  # 帧序号（从1开始递增）
+    timestamp: float  # 截图完成时间 (time.time)
+    region: Optional[Region]  # 截图区域，None表示主显示器全屏
+    offset: Tuple[int, int]  # 图像左上角对应的屏幕坐标
+    roi: bool  # 截图区域是否由ROI管理器决定
+    age: float  # 取用时的帧龄(秒)
+    dropped: int  # 距上次取用之间被覆盖、未被取用的帧数
+    is_new: bool  # 是否为上次取用之后的新帧
+
+
+class FrameGrabber:
+    """
+    后台截图线程 + 最新帧环形缓冲区
+
+    单生产者/单消费者，无锁实现：
+    - 生产者写入前先把槽位序号标记为写入中，再检查该槽位是否被消费者占用；
+    - 消费者先声明占用槽位，再检查槽位序号是否仍是发布时的序号；
+    两者先写后读，至少有一方能看到对方的写入，保证消费者不会读到正在写入的帧。
+    """
+
+    def __init__(self, region_provider: Callable[[], Tuple[Optional[Region], bool]],
+                 target_fps: float = 30.0, ring_size: int = 3):
+        """
+        初始化后台截图线程
+
+        Args:
+            region_provider: 每帧调用，返回 (截图区域, 是否ROI区域)，区域为None表示全屏
+            target_fps: 目标截图帧率
+            ring_size: 环形缓冲区槽位数，至少为3（最新帧、消费者占用帧、写入帧各一个）
+        """
+        self.region_provider = region_provider
+        self.target_fps = max(1.0, float(target_fps))
+        self.ring_size = max(3, int(ring_size))
+
+        # 环形缓冲区
+        self._buffers: List[Optional[np.ndarray]] = [None] * self.ring_size  # 预分配帧缓冲区
+        self._slot_seq: List[int] = [0] * self.ring_size  # 各槽位当前帧序号
+        self._slot_meta: List[Optional[Tuple[float, Optional[Region], Tuple[int, int], bool]]] = \
+            [None] * self.ring_size  # 各槽位帧元数据 (时间, 区域, 偏移, 是否ROI)
+        self._latest: Optional[Tuple[int, int]] = None  # 最新已发布帧 (槽位, 序号)
+        self._claimed: Optional[int] = None  # 消费者占用的槽位
+
+        # 线程管理
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        self._first_frame = threading.Event()
+
+        # 统计信息
+        self.produced: int = 0  # 已截取帧数
+        self.consumed: int = 0  # 已取用帧数（不含重复取用）
+        self.dropped: int = 0  # 未被取用即被覆盖的帧数
+        self.errors: int = 0  # 截图失败次数
+        self.last_capture_time: float = 0.0  # 最近一次截图耗时(秒)
+        self._last_consumed_seq: int = 0
+
+    @property
+    def is_running(self) -> bool:
+        """后台截图线程是否在运行"""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        """启动后台截图线程"""
+        if self.is_running:
+            return
+
+        self._stop_event.clear()
+        self._first_frame.clear()
+        self._latest = None
+        self._claimed = None
+        self._last_consumed_seq = 0
+        self._thread = threading.Thread(target=self._run, name="FrameGrabber", daemon=True)
+        self._thread.start()
+        logger.info(f"后台截图线程已启动 (目标{self.target_fps:.0f}fps, {self.ring_size}个缓冲槽位)")
+
+    def stop(self, timeout: float = 1.0) -> None:
+        """
+        停止后台截图线程
+
+        Args:
+            timeout: 等待线程结束的超时时间(秒)
+        """
+        self._stop_event.set()
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout=timeout)
+        self._thread = None
+        self._latest = None
+        self._claimed = None
+        logger.info(f"后台截图线程已停止 (截图{self.produced}帧, 丢弃{self.dropped}帧, 失败{self.errors}次)")
+
+    def _pick_write_slot(self) -> int:
+        """
+        选择一个可写入的槽位并标记为写入中
+
+        Returns:
+            int: 槽位索引
+        """
+        latest = self._latest
+        latest_slot = latest[0] if latest else None
+        while True:
+            for slot in range(self.ring_size):
+                if slot == latest_slot or slot == self._claimed:
+                    continue
+                previous_seq = self._slot_seq[slot]
+                self._slot_seq[slot] = _WRITING
+                # 标记后再检查占用，避免与消费者声明占用发生竞争
+                if self._claimed == slot:
+                    self._slot_seq[slot] = previous_seq
+                    continue
+                return slot
+
+    def _run(self) -> None:
+        """后台截图线程主循环"""
+        session = get_capture_session()
+        interval = 1.0 / self.target_fps
+        seq = 0
+
+        try:
+            while not self._stop_event.is_set():
+                tick_start = time.perf_counter()
+
+                try:
+                    region, roi = self.region_provider()
+                    if region is None:
+                        monitor = session.get_monitor()
+                        offset = (monitor["left"], monitor["top"])
+                        height, width = monitor["height"], monitor["width"]
+                    else:
+                        offset = (region[0], region[1])
+                        height, width = region[3], region[2]
+
+                    slot = self._pick_write_slot()
+                    buffer = self._buffers[slot]
+                    if buffer is None or buffer.shape[:2] != (height, width):
+                        # 仅在截图区域变化时重新分配槽位缓冲区
+                        buffer = np.empty((height, width, 3), dtype=np.uint8)
+                        self._buffers[slot] = buffer
+
+                    session.grab(region, out=buffer)
+
+                    seq += 1
+                    self._slot_meta[slot] = (time.time(), region, offset, roi)
+                    self._slot_seq[slot] = seq
+                    self._latest = (slot, seq)  # 引用赋值为原子操作，完成发布
+                    self.produced += 1
+                    self.last_capture_time = time.perf_counter() - tick_start
+                    self._first_frame.set()
+
+                except Exception as e:
+                    self.errors += 1
+                    if self.errors % 50 == 1:
+                        logger.error(f"后台截图失败 (累计{self.errors}次): {e}")
+                    self._stop_event.wait(0.1)
+                    continue
+
+                # 按目标帧率节流
+                remaining = interval - (time.perf_counter() - tick_start)
+                if remaining > 0:
+                    self._stop_event.wait(remaining)
+        finally:
+            close_capture_session()
+
+    def acquire_latest(self, timeout: float = 1.0) -> Tuple[Optional[np.ndarray], Optional[FrameInfo]]:
+        """
+        取用最新一帧，不等待新的截图（仅在尚无任何帧时等待第一帧）
+        返回的图像在下次调用acquire_latest或release之前不会被覆盖
+
+        Args:
+            timeout: 等待第一帧的超时时间(秒)
+
+        Returns:
+            Tuple: (BGR图像, 帧信息)，没有可用帧时返回 (None, None)
+        """
+        if self._latest is None and not self._first_frame.wait(timeout):
+            return None, None
+
+        while True:
+            latest = self._latest
+            if latest is None:
+                return None, None
+
+            slot, seq = latest
+            self._claimed = slot
+            # 声明占用后再确认槽位未被生产者改写
+            if self._slot_seq[slot] == seq:
+                break
+
+        timestamp, region, offset, roi = self._slot_meta[slot]
+        is_new = seq > self._last_consumed_seq
+        dropped = 0
+        if is_new:
+            if self._last_consumed_seq:
+                dropped = seq - self._last_consumed_seq - 1
+            self.dropped += dropped
+            self.consumed += 1
+            self._last_consumed_seq = seq
+
+        info = FrameInfo(
+            seq=seq,
+            timestamp=timestamp,
+            region=region,
+            offset=offset,
+            roi=roi,
+            age=time.time() - timestamp,
+            dropped=dropped,
+            is_new=is_new
+        )
+        return self._buffers[slot], info
+
+    def release(self) -> None:
+        """释放消费者占用的槽位"""
+        self._claimed = None
+
+    def get_stats(self) -> Dict:
+        """
+        获取截图统计信息
+
+        Returns:
+            Dict: 统计信息
+        """
+        latest = self._latest
+        frame_age = None
+        if latest is not None:
+            meta = self._slot_meta[latest[0]]
+            if meta is not None:
+                frame_age = time.time() - meta[0]
+
+        return {
+            'running': self.is_running,
+            'target_fps': self.target_fps,
+            'produced': self.produced,
+            'consumed': self.consumed,
+            'dropped': self.dropped,
+            'errors': self.errors,
+            'latest_frame_age': frame_age,
+            'last_capture_ms': self.last_capture_time * 1000
+        }
@@ -0,0 +1,602 @@
+"""
+Fisher钓鱼模块推理后端
+提供可插拔的模型推理实现：ultralytics/PyTorch、ONNX Runtime 和 OpenVINO (CPU)
+ONNX模型随.pt模型自动导出（批大小为动态维度，支持多帧合并推理），并以.pt文件哈希判断是否需要重新导出
+
+作者: AutoFish Team
+版本: v1.0
+创建时间: 2026-10-16
+"""
+
+import os
+import json
+import time
+import hashlib
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Sequence, Tuple
+
+import numpy as np
+
+# 导入统一日志系统
+import sys
+sys.path.append(str(Path(__file__).parent.parent))
+from logger import setup_logger
+
+from .yolo_ops import LetterboxBuffer, decode_predictions, scale_boxes
+
+# 设置日志记录器
+logger = setup_logger('fisher_model')
+
+# 支持的推理后端
+BACKEND_ULTRALYTICS = "ultralytics"
+BACKEND_ONNX = "onnx"
+BACKEND_OPENVINO = "openvino"
+SUPPORTED_BACKENDS = (BACKEND_ULTRALYTICS, BACKEND_ONNX, BACKEND_OPENVINO)
+
+# 模型精度（int8为model_trainer量化生成的 <模型名>_int8.onnx）
+PRECISION_FP32 = "fp32"
+PRECISION_INT8 = "int8"
+
+
+@dataclass
+class Detections:
+    """单张图像的检测结果（原图坐标）"""
+    boxes: np.ndarray  # (N, 4) [x1, y1, x2, y2]
+    confidences: np.ndarray  # (N,) 置信度
+    classes: np.ndarray  # (N,) 类别编号
+
+    def __len__(self) -> int:
+        return len(self.confidences)
+
+    @classmethod
+    def empty(cls) -> 'Detections':
+        """无检测结果"""
+        return cls(np.empty((0, 4), dtype=np.float32), np.empty(0, dtype=np.float32),
+                   np.empty(0, dtype=np.int64))
+
+    def best_index(self) -> Optional[int]:
+        """
+        获取置信度最高的检测框索引
+
+        Returns:
+            int: 索引，无检测结果时返回None
+        """
+        if len(self.confidences) == 0:
+            return None
+        return int(np.argmax(self.confidences))
+
+
+def file_sha256(path: str) -> str:
+    """
+    计算文件SHA256哈希
+
+    Args:
+        path: 文件路径
+
+    Returns:
+        str: 十六进制哈希值
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def ensure_onnx_export(model_path: str, imgsz: int = 640) -> str:
+    """
+    确保.pt模型旁存在最新的ONNX导出文件
+    导出信息记录在 <模型名>.onnx.json 中，.pt文件哈希或输入尺寸变化、或旧导出不支持动态批大小时重新导出
+
+    Args:
+        model_path: .pt模型路径
+        imgsz: 导出的模型输入尺寸
+
+    Returns:
+        str: ONNX模型路径
+    """
+    source = Path(model_path)
+    onnx_path = source.with_suffix('.onnx')
+    meta_path = source.with_suffix('.onnx.json')
+    source_hash = file_sha256(str(source))
+
+    if onnx_path.exists() and meta_path.exists():
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            if (meta.get('source_sha256') == source_hash and meta.get('imgsz') == imgsz
+                    and meta.get('dynamic_batch')):
+                return str(onnx_path)
+        except (OSError, ValueError):
+            pass
+        logger.info(f"模型文件已变化，重新导出ONNX: {onnx_path.name}")
+    else:
+        logger.info(f"首次使用ONNX后端，正在导出模型: {onnx_path.name}")
+
+    from ultralytics import YOLO
+    # dynamic=True使批大小可变（输入尺寸仍固定为imgsz推理），多帧可合并为一次前向计算
+    exported = YOLO(str(source), verbose=False).export(format='onnx', imgsz=imgsz, dynamic=True, verbose=False)
+    if Path(exported).resolve() != onnx_path.resolve():
+        os.replace(exported, onnx_path)
+
+    with open(meta_path, 'w', encoding='utf-8') as f:
+        json.dump({'source': source.name, 'source_sha256': source_hash, 'imgsz': imgsz,
+                   'dynamic_batch': True}, f, indent=2)
+
+    logger.info(f"ONNX模型导出完成: {onnx_path}")
+    return str(onnx_path)
+
+
+def find_int8_model(model_path: str, imgsz: int = 640) -> Optional[str]:
+    """
+    查找与.pt模型对应的INT8量化模型
+    量化模型由 model_trainer 的 ModelQuantizer 生成，记录中的源模型哈希和输入尺寸须与当前模型一致
+
+    Args:
+        model_path: .pt模型路径
+        imgsz: 模型输入尺寸
+
+    Returns:
+        str: INT8 ONNX模型路径，不存在或已过期时返回None
+    """
+    source = Path(model_path)
+    int8_path = source.with_name(f"{source.stem}_int8.onnx")
+    meta_path = int8_path.with_suffix('.onnx.json')
+    if not int8_path.exists() or not meta_path.exists():
+        logger.warning(f"未找到INT8量化模型: {int8_path.name}，请先在模型训练模块中执行量化")
+        return None
+
+    try:
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"INT8量化模型记录读取失败: {e}")
+        return None
+
+    if meta.get('source_sha256') != file_sha256(str(source)) or meta.get('imgsz') != imgsz:
+        logger.warning(f"INT8量化模型与当前模型不一致（模型已重新训练或输入尺寸变化），请重新量化: {int8_path.name}")
+        return None
+    return str(int8_path)
+
+
+class InferenceBackend:
+    """推理后端基类"""
+
+    name = "base"
+    thread_safe = False  # 能否在多个线程中同时调用predict
+
+    def __init__(self, model_path: str, device: str = "auto", imgsz: int = 640,
+                 iou_threshold: float = 0.7, cpu_threads: int = 0):
+        """
+        初始化推理后端
+
+        Args:
+            model_path: 模型文件路径
+            device: 设备选择 auto/cpu/cuda
+            imgsz: 模型输入尺寸
+            iou_threshold: NMS IoU阈值
+            cpu_threads: CPU推理线程数，0表示自动
+        """
+        self.model_path = model_path
+        self.device = "cpu"
+        self.imgsz = imgsz
+        self.iou_threshold = iou_threshold
+        self.cpu_threads = cpu_threads
+
+    def predict(self, image: np.ndarray, conf: float,
+                classes: Optional[Sequence[int]] = None) -> Detections:
+        """
+        对单张BGR图像执行推理
+
+        Args:
+            image: BGR格式图像
+            conf: 置信度阈值
+            classes: 只检测的类别编号，None表示全部类别（在NMS之前过滤）
+
+        Returns:
+            Detections: 检测结果（原图坐标）
+        """
+        raise NotImplementedError
+
+    def try_predict(self, image: np.ndarray, conf: float,
+                    classes: Optional[Sequence[int]] = None) -> Optional[Detections]:
+        """
+        不等待的推理（低优先级调用方使用）：模型正被其他线程使用时返回None
+
+        Returns:
+            Detections: 检测结果，模型忙时返回None（本类直接推理，共享代理会检查占用）
+        """
+        return self.predict(image, conf, classes)
+
+    def predict_batch(self, images: Sequence[np.ndarray], conf: float,
+                      classes: Optional[Sequence[Optional[Sequence[int]]]] = None) -> List[Detections]:
+        """
+        对多张BGR图像执行推理（默认逐张推理，子类可合并为一次前向计算）
+
+        Args:
+            images: BGR格式图像列表
+            conf: 置信度阈值
+            classes: 每张图像只检测的类别编号，None表示全部图像都检测全部类别
+
+        Returns:
+            List[Detections]: 与images一一对应的检测结果
+        """
+        if classes is None:
+            classes = [None] * len(images)
+        return [self.predict(image, conf, image_classes) for image, image_classes in zip(images, classes)]
+
+    def warmup(self, runs: int = 3) -> List[float]:
+        """
+        以配置的输入尺寸执行若干次空白图像推理，触发延迟初始化（CUDA/MKL初始化、图优化、内存池扩容）
+
+        Args:
+            runs: 预热推理次数
+
+        Returns:
+            List[float]: 每次预热推理耗时(秒)
+        """
+        dummy = np.full((self.imgsz, self.imgsz, 3), 114, dtype=np.uint8)
+        timings = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            self.predict(dummy, 0.25)
+            timings.append(time.perf_counter() - start)
+        return timings
+
+    def get_info(self) -> Dict[str, Any]:
+        """
+        获取后端信息
+
+        Returns:
+            Dict: 后端信息
+        """
+        return {
+            'backend': self.name,
+            'device': self.device,
+            'model_path': self.model_path,
+            'imgsz': self.imgsz
+        }
+
+    def close(self) -> None:
+        """释放后端资源"""
+
+
+class UltralyticsBackend(InferenceBackend):
+    """ultralytics/PyTorch推理后端（原有推理路径）"""
+
+    name = BACKEND_ULTRALYTICS
+
+    def __init__(self, model_path: str, device: str = "auto", **kwargs):
+        super().__init__(model_path, device, **kwargs)
+        import torch
+        from ultralytics import YOLO
+
+        self.device = self._resolve_device(device, torch.cuda.is_available())
+
+        # 加载模型（禁用详细日志）
+        self.model = YOLO(model_path, verbose=False)
+        self.model.to(self.device)
+
+    @staticmethod
+    def _resolve_device(config_device: str, cuda_available: bool) -> str:
+        """
+        获取最佳计算设备
+
+        Args:
+            config_device: 配置的设备类型
+            cuda_available: CUDA是否可用
+
+        Returns:
+            str: 设备类型 (cuda/cpu)
+        """
+        config_device = config_device.lower()
+        if config_device == "auto":
+            return "cuda" if cuda_available else "cpu"
+        if config_device == "cuda":
+            if cuda_available:
+                return "cuda"
+            logger.warning("CUDA不可用，使用CPU")
+        return "cpu"
+
+    def predict(self, image: np.ndarray, conf: float,
+                classes: Optional[Sequence[int]] = None) -> Detections:
+        # 模型推理（禁用详细日志输出），类别过滤由ultralytics在NMS阶段完成
+        if classes is not None and len(classes) == 0:
+            return Detections.empty()
+        results = self.model(image, conf=conf, classes=list(classes) if classes is not None else None,
+                             verbose=False)
+        if len(results) == 0 or len(results[0].boxes) == 0:
+            return Detections.empty()
+
+        boxes = results[0].boxes
+        return Detections(
+            boxes=boxes.xyxy.cpu().numpy(),
+            confidences=boxes.conf.cpu().numpy(),
+            classes=boxes.cls.cpu().numpy().astype(int)
+        )
+
+    def predict_batch(self, images: Sequence[np.ndarray], conf: float,
+                      classes: Optional[Sequence[Optional[Sequence[int]]]] = None) -> List[Detections]:
+        # 图像列表由ultralytics合并为一个批次；各图像的类别集合不同时按并集推理后再逐项过滤（NMS按类别进行，结果一致）
+        if len(images) == 0:
+            return []
+        per_image = list(classes) if classes is not None else [None] * len(images)
+        union = None
+        if all(c is not None for c in per_image):
+            union = sorted(set().union(*per_image))
+            if not union:
+                return [Detections.empty() for _ in images]
+        results = self.model(list(images), conf=conf, classes=union, verbose=False)
+
+        detections = []
+        for result, image_classes in zip(results, per_image):
+            boxes = result.boxes
+            class_ids = boxes.cls.cpu().numpy().astype(int)
+            keep = slice(None) if image_classes is None else np.isin(class_ids, list(image_classes))
+            detections.append(Detections(boxes=boxes.xyxy.cpu().numpy()[keep],
+                                         confidences=boxes.conf.cpu().numpy()[keep],
+                                         classes=class_ids[keep]))
+        return detections
+
+    def close(self) -> None:
+        self.model = None
+
+
+class _NumpyPostprocessBackend(InferenceBackend):
+    """使用NumPy前后处理的推理后端公共部分"""
+
+    thread_safe = True  # 预处理缓冲区和推理请求按线程隔离
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # 预处理缓冲区按线程隔离，允许多个线程同时推理
+        self._local = threading.local()
+
+        self.max_batch: Optional[int] = None  # 模型支持的最大批大小，None表示不限（由子类按模型输入设置）
+
+    def _get_letterbox(self) -> LetterboxBuffer:
+        """获取当前线程的预处理缓冲区"""
+        letterbox = getattr(self._local, 'letterbox', None)
+        if letterbox is None:
+            letterbox = LetterboxBuffer(self.imgsz)
+            self._local.letterbox = letterbox
+        return letterbox
+
+    def _get_batch_buffers(self, size: int) -> Tuple[List[LetterboxBuffer], np.ndarray]:
+        """获取当前线程的批量预处理缓冲区（按需扩容）"""
+        buffers = getattr(self._local, 'batch_letterboxes', None)
+        if buffers is None or len(buffers) < size:
+            buffers = [LetterboxBuffer(self.imgsz) for _ in range(size)]
+            self._local.batch_letterboxes = buffers
+            self._local.batch_blob = np.empty((size, 3, self.imgsz, self.imgsz), dtype=np.float32)
+        return buffers, self._local.batch_blob
+
+    def _run(self, blob: np.ndarray) -> np.ndarray:
+        """
+        执行模型前向计算
+
+        Args:
+            blob: 输入张量 (1, 3, imgsz, imgsz)
+
+        Returns:
+            np.ndarray: 检测头原始输出 (1, 4 + 类别数, 候选数)
+        """
+        raise NotImplementedError
+
+    def predict(self, image: np.ndarray, conf: float,
+                classes: Optional[Sequence[int]] = None) -> Detections:
+        blob, ratio, pad = self._get_letterbox().preprocess(image)
+        output = self._run(blob)
+        boxes, confidences, class_ids = decode_predictions(output, conf, self.iou_threshold,
+                                                           classes=classes)
+        if len(boxes):
+            boxes = scale_boxes(boxes, ratio, pad, image.shape[:2])
+        return Detections(boxes, confidences, class_ids)
+
+    def predict_batch(self, images: Sequence[np.ndarray], conf: float,
+                      classes: Optional[Sequence[Optional[Sequence[int]]]] = None) -> List[Detections]:
+        # 各图像letterbox后写入同一个批量张量，一次前向计算；解码和NMS逐项进行
+        if self.max_batch == 1 or len(images) <= 1:
+            return super().predict_batch(images, conf, classes)
+        per_image = list(classes) if classes is not None else [None] * len(images)
+
+        detections = []
+        step = self.max_batch or len(images)
+        for start in range(0, len(images), step):
+            chunk = images[start:start + step]
+            buffers, blob = self._get_batch_buffers(len(chunk))
+            letterboxes = [buffers[i].preprocess(image, out=blob[i]) for i, image in enumerate(chunk)]
+            output = self._run(blob[:len(chunk)])
+            for i, (image, (_, ratio, pad)) in enumerate(zip(chunk, letterboxes)):
+                boxes, confidences, class_ids = decode_predictions(output[i:i + 1], conf, self.iou_threshold,
+                                                                   classes=per_image[start + i])
+                if len(boxes):
+                    boxes = scale_boxes(boxes, ratio, pad, image.shape[:2])
+                detections.append(Detections(boxes, confidences, class_ids))
+        return detections
+
+
+class OnnxRuntimeBackend(_NumpyPostprocessBackend):
+    """ONNX Runtime推理后端"""
+
+    name = BACKEND_ONNX
+
+    def __init__(self, model_path: str, device: str = "auto", **kwargs):
+        super().__init__(model_path, device, **kwargs)
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.inter_op_num_threads = 1
+        if self.cpu_threads > 0:
+            options.intra_op_num_threads = self.cpu_threads
+
+        providers = ['CPUExecutionProvider']
+        if device.lower() in ("auto", "cuda") and 'CUDAExecutionProvider' in ort.get_available_providers():
+            providers.insert(0, 'CUDAExecutionProvider')
+        elif device.lower() == "cuda":
+            logger.warning("onnxruntime未提供CUDA支持，使用CPU")
+
+        self.session = ort.InferenceSession(model_path, options, providers=providers)
+        self.device = "cuda" if self.session.get_providers()[0] == 'CUDAExecutionProvider' else "cpu"
+        self.input_name = self.session.get_inputs()[0].name
+
+        # 以模型实际输入尺寸为准；批大小维度固定时（如旧导出、量化模型）只能逐帧推理
+        input_shape = self.session.get_inputs()[0].shape
+        if isinstance(input_shape[-1], int):
+            self.imgsz = input_shape[-1]
+        if isinstance(input_shape[0], int):
+            self.max_batch = input_shape[0]
+
+    def _run(self, blob: np.ndarray) -> np.ndarray:
+        return self.session.run(None, {self.input_name: blob})[0]
+
+    def close(self) -> None:
+        self.session = None
+
+
+class OpenVinoBackend(_NumpyPostprocessBackend):
+    """OpenVINO CPU推理后端（直接读取导出的ONNX模型）"""
+
+    name = BACKEND_OPENVINO
+
+    def __init__(self, model_path: str, device: str = "auto", **kwargs):
+        super().__init__(model_path, device, **kwargs)
+        import openvino as ov
+
+        config = {"PERFORMANCE_HINT": "LATENCY"}
+        if self.cpu_threads > 0:
+            config["INFERENCE_NUM_THREADS"] = self.cpu_threads
+
+        core = ov.Core()
+        model = core.read_model(model_path)
+        input_shape = model.input(0).get_partial_shape()
+        if input_shape.is_static:
+            self.imgsz = int(input_shape[3].get_length())
+            self.max_batch = int(input_shape[0].get_length())
+        else:
+            # 动态导出：固定输入尺寸，只保留批大小为动态维度
+            model.reshape(ov.PartialShape([-1, 3, self.imgsz, self.imgsz]))
+
+        self.compiled_model = core.compile_model(model, "CPU", config)
+        self.output = self.compiled_model.output(0)
+
+    def _run(self, blob: np.ndarray) -> np.ndarray:
+        # 推理请求不是线程安全的，每个线程使用独立的请求
+        request = getattr(self._local, 'request', None)
+        if request is None:
+            request = self.compiled_model.create_infer_request()
+            self._local.request = request
+        return request.infer({0: blob})[self.output]
+
+    def close(self) -> None:
+        self.compiled_model = None
+
+
+class SerializedBackend(InferenceBackend):
+    """
+    非线程安全后端的共享代理：多个线程（多会话检测器、诊断采样器）共用同一个模型时，
+    所有推理经同一把锁串行执行
+    """
+
+    thread_safe = True
+
+    def __init__(self, backend: InferenceBackend):
+        super().__init__(backend.model_path, imgsz=backend.imgsz, iou_threshold=backend.iou_threshold,
+                         cpu_threads=backend.cpu_threads)
+        self.name = backend.name
+        self.device = backend.device
+        self.backend = backend
+        self._lock = threading.Lock()
+
+    def predict(self, image: np.ndarray, conf: float,
+                classes: Optional[Sequence[int]] = None) -> Detections:
+        with self._lock:
+            return self.backend.predict(image, conf, classes)
+
+    def try_predict(self, image: np.ndarray, conf: float,
+                    classes: Optional[Sequence[int]] = None) -> Optional[Detections]:
+        if not self._lock.acquire(blocking=False):
+            return None
+        try:
+            return self.backend.predict(image, conf, classes)
+        finally:
+            self._lock.release()
+
+    def predict_batch(self, images: Sequence[np.ndarray], conf: float,
+                      classes: Optional[Sequence[Optional[Sequence[int]]]] = None) -> List[Detections]:
+        with self._lock:
+            return self.backend.predict_batch(images, conf, classes)
+
+    def warmup(self, runs: int = 3) -> List[float]:
+        with self._lock:
+            return self.backend.warmup(runs)
+
+    def get_info(self) -> Dict[str, Any]:
+        return self.backend.get_info()
+
+    def close(self) -> None:
+        self.backend.close()
+
+
+def share_backend(backend: InferenceBackend) -> InferenceBackend:
+    """
+    返回可在多个线程中共用的后端：线程安全的后端原样返回，否则包装为串行代理
+
+    Args:
+        backend: 推理后端
+
+    Returns:
+        InferenceBackend: 线程安全的推理后端
+    """
+    return backend if backend.thread_safe else SerializedBackend(backend)
+
+
+def create_backend(backend: str, model_path: str, device: str = "auto", imgsz: int = 640,
+                   iou_threshold: float = 0.7, cpu_threads: int = 0,
+                   precision: str = PRECISION_FP32) -> InferenceBackend:
+    """
+    创建推理后端，ONNX/OpenVINO不可用时回退到ultralytics
+    precision为int8时使用量化模型（仅ONNX/OpenVINO后端），量化模型不可用时使用FP32导出模型
+
+    Args:
+        backend: 后端名称 ultralytics/onnx/openvino
+        model_path: .pt模型路径
+        device: 设备选择 auto/cpu/cuda
+        imgsz: 模型输入尺寸
+        iou_threshold: NMS IoU阈值
+        cpu_threads: CPU推理线程数，0表示自动
+        precision: 模型精度 fp32/int8
+
+    Returns:
+        InferenceBackend: 推理后端实例
+    """
+    backend = (backend or BACKEND_ULTRALYTICS).lower()
+    kwargs = {'imgsz': imgsz, 'iou_threshold': iou_threshold, 'cpu_threads': cpu_threads}
+
+    if backend not in SUPPORTED_BACKENDS:
+        logger.warning(f"不支持的推理后端: {backend}，使用{BACKEND_ULTRALYTICS}")
+        backend = BACKEND_ULTRALYTICS
+
+    precision = (precision or PRECISION_FP32).lower()
+    if precision == PRECISION_INT8 and backend == BACKEND_ULTRALYTICS:
+        logger.warning(f"INT8量化模型需要onnx或openvino推理后端，{BACKEND_ULTRALYTICS}后端使用FP32模型")
+
+    if backend in (BACKEND_ONNX, BACKEND_OPENVINO):
+        backend_class = OnnxRuntimeBackend if backend == BACKEND_ONNX else OpenVinoBackend
+        try:
+            onnx_path = None
+            if precision == PRECISION_INT8:
+                onnx_path = find_int8_model(model_path, imgsz)
+            if onnx_path is None:
+                onnx_path = ensure_onnx_export(model_path, imgsz)
+            return backend_class(onnx_path, device, **kwargs)
+        except ImportError as e:
+            logger.warning(f"{backend}推理后端依赖未安装 ({e})，回退到{BACKEND_ULTRALYTICS}")
+        except Exception as e:
+            logger.error(f"{backend}推理后端初始化失败: {e}，回退到{BACKEND_ULTRALYTICS}")
+
+    return UltralyticsBackend(model_path, device, **kwargs)
@@ -0,0 +1,258 @@
+"""
+Fisher钓鱼模块输入后端
+提供可插拔的底层键鼠操作实现：
+- windows: pyautogui/keyboard 按键点击 + Windows mouse_event API 相对移动（游戏兼容）
+- recording: 不操作键鼠，把每个按下/弹起/移动事件连同时间戳记入内存，
+             用于无桌面环境（如Linux CI、会话回放）下测量输入时序
+
+作者: AutoFish Team
+版本: v1.0
+创建时间: 2026-10-16
+"""
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional, List, Tuple, Any
+
+# 导入统一日志系统
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent))
+from logger import setup_logger
+
+# 设置日志记录器
+logger = setup_logger('fisher_input')
+
+# 支持的输入后端
+BACKEND_WINDOWS = "windows"
+BACKEND_RECORDING = "recording"
+SUPPORTED_INPUT_BACKENDS = (BACKEND_WINDOWS, BACKEND_RECORDING)
+
+# 输入事件类型
+EVENT_MOUSE_DOWN = "mouse_down"
+EVENT_MOUSE_UP = "mouse_up"
+EVENT_KEY_DOWN = "key_down"
+EVENT_KEY_UP = "key_up"
+EVENT_MOUSE_MOVE = "mouse_move"
+
+# 紧急停止时需要释放的按键
+RELEASE_KEYS = ('a', 'd', 'f')
+
+
+@dataclass(frozen=True)
+class InputEvent:
+    """录制的输入事件"""
+    timestamp: float  # 事件时刻 (time.perf_counter)
+    kind: str  # 事件类型
+    target: Any  # 鼠标按键名、键名或移动向量 (dx, dy)
+
+
+class InputBackend:
+    """输入后端基类"""
+
+    name = "base"
+
+    def mouse_down(self, button: str = 'left') -> None:
+        """按下鼠标按键"""
+        raise NotImplementedError
+
+    def mouse_up(self, button: str = 'left') -> None:
+        """弹起鼠标按键"""
+        raise NotImplementedError
+
+    def key_down(self, key: str) -> None:
+        """按下键盘按键"""
+        raise NotImplementedError
+
+    def key_up(self, key: str) -> None:
+        """弹起键盘按键"""
+        raise NotImplementedError
+
+    def move_relative(self, dx: int, dy: int) -> None:
+        """
+        相对移动鼠标（直接像素移动）
+
+        Args:
+            dx: X轴移动距离（像素）
+            dy: Y轴移动距离（像素）
+        """
+        raise NotImplementedError
+
+    def click(self, x: Optional[int] = None, y: Optional[int] = None, button: str = 'left') -> None:
+        """
+        单击鼠标按键，默认实现为按下后立即弹起（指定坐标时由子类先移动到该位置）
+
+        Args:
+            x: 点击x坐标，None表示当前位置
+            y: 点击y坐标，None表示当前位置
+            button: 鼠标按键
+        """
+        self.mouse_down(button)
+        self.mouse_up(button)
+
+    def release_all(self) -> None:
+        """释放所有可能处于按下状态的按键（紧急停止时调用），忽略单个按键的失败"""
+        for key in RELEASE_KEYS:
+            try:
+                self.key_up(key)
+            except Exception:
+                pass
+        try:
+            self.mouse_up('left')
+        except Exception:
+            pass
+
+
+class WindowsInputBackend(InputBackend):
+    """Windows键鼠后端（原有输入路径）"""
+
+    name = BACKEND_WINDOWS
+
+    # mouse_event相对移动标志
+    MOUSEEVENTF_MOVE = 0x0001
+
+    def __init__(self):
+        # 延迟导入：无图形界面环境中这些库导入即失败
+        import ctypes
+        import pyautogui
+        import keyboard
+
+        self._ctypes = ctypes
+        self._pyautogui = pyautogui
+        self._keyboard = keyboard
+
+        # 配置pyautogui
+        pyautogui.FAILSAFE = True  # 启用失效保护
+        pyautogui.PAUSE = 0.01  # 设置操作间隔
+
+    def mouse_down(self, button: str = 'left') -> None:
+        self._pyautogui.mouseDown(button=button)
+
+    def mouse_up(self, button: str = 'left') -> None:
+        self._pyautogui.mouseUp(button=button)
+
+    def key_down(self, key: str) -> None:
+        self._keyboard.press(key)
+
+    def key_up(self, key: str) -> None:
+        self._keyboard.release(key)
+
+    def move_relative(self, dx: int, dy: int) -> None:
+        # 使用mouse_event API（最兼容游戏锁定）
+        self._ctypes.windll.user32.mouse_event(self.MOUSEEVENTF_MOVE, dx, dy, 0, 0)
+
+    def click(self, x: Optional[int] = None, y: Optional[int] = None, button: str = 'left') -> None:
+        if x is not None and y is not None:
+            self._pyautogui.click(x, y, button=button)
+        else:
+            self._pyautogui.click(button=button)
+
+
+class RecordingInputBackend(InputBackend):
+    """
+    录制输入后端
+    不操作键鼠，每个事件记录为InputEvent，操作耗时为零，可在任意平台运行
+    """
+
+    name = BACKEND_RECORDING
+
+    def __init__(self, max_events: int = 100000):
+        """
+        初始化录制后端
+
+        Args:
+            max_events: 最多保留的事件数，超出后丢弃最早的一半
+        """
+        self.max_events = max(2, int(max_events))
+        self._events: List[InputEvent] = []
+        self._lock = threading.Lock()
+
+    def _record(self, kind: str, target: Any) -> None:
+        event = InputEvent(time.perf_counter(), kind, target)
+        with self._lock:
+            if len(self._events) >= self.max_events:
+                del self._events[:self.max_events // 2]
+            self._events.append(event)
+
+    def mouse_down(self, button: str = 'left') -> None:
+        self._record(EVENT_MOUSE_DOWN, button)
+
+    def mouse_up(self, button: str = 'left') -> None:
+        self._record(EVENT_MOUSE_UP, button)
+
+    def key_down(self, key: str) -> None:
+        self._record(EVENT_KEY_DOWN, key)
+
+    def key_up(self, key: str) -> None:
+        self._record(EVENT_KEY_UP, key)
+
+    def move_relative(self, dx: int, dy: int) -> None:
+        self._record(EVENT_MOUSE_MOVE, (dx, dy))
+
+    def get_events(self, kind: Optional[str] = None, since: Optional[float] = None) -> List[InputEvent]:
+        """
+        获取录制的事件
+
+        Args:
+            kind: 只返回该类型的事件，None表示全部
+            since: 只返回该时刻(perf_counter)及之后的事件
+
+        Returns:
+            List[InputEvent]: 按时间排序的事件列表
+        """
+        with self._lock:
+            events = list(self._events)
+        return [e for e in events
+                if (kind is None or e.kind == kind) and (since is None or e.timestamp >= since)]
+
+    def get_holds(self, down_kind: str = EVENT_MOUSE_DOWN,
+                  up_kind: str = EVENT_MOUSE_UP) -> List[Tuple[Any, float, float]]:
+        """
+        把按下/弹起事件配对为按住区间
+
+        Args:
+            down_kind: 按下事件类型
+            up_kind: 弹起事件类型
+
+        Returns:
+            List[Tuple]: (按键, 按下时刻, 按住时长秒)，未弹起的按下不计入
+        """
+        holds = []
+        pressed = {}
+        for event in self.get_events():
+            if event.kind == down_kind:
+                pressed.setdefault(event.target, event.timestamp)
+            elif event.kind == up_kind and event.target in pressed:
+                start = pressed.pop(event.target)
+                holds.append((event.target, start, event.timestamp - start))
+        return holds
+
+    def clear(self) -> None:
+        """清空录制的事件"""
+        with self._lock:
+            self._events.clear()
+
+
+def create_input_backend(backend: str = BACKEND_WINDOWS) -> InputBackend:
+    """
+    创建输入后端，Windows后端依赖不可用时回退到录制后端（键鼠操作不会生效）
+
+    Args:
+        backend: 后端名称 windows/recording
+
+    Returns:
+        InputBackend: 输入后端实例
+    """
+    backend = (backend or BACKEND_WINDOWS).lower()
+    if backend not in SUPPORTED_INPUT_BACKENDS:
+        logger.warning(f"不支持的输入后端: {backend}，使用{BACKEND_WINDOWS}")
+        backend = BACKEND_WINDOWS
+
+    if backend == BACKEND_WINDOWS:
+        try:
+            return WindowsInputBackend()
+        except Exception as e:
+            logger.error(f"{BACKEND_WINDOWS}输入后端不可用 ({e})，回退到{BACKEND_RECORDING}，键鼠操作不会生效")
+
+    return RecordingInputBackend()
@@ -1,23 +1,23 @@
 """
 Fisher钓鱼模块输入控制器
-负责鼠标点击和键盘按键操作，支持多线程安全操作
+负责鼠标点击和键盘按键操作，所有键鼠操作由输入执行器线程按计划时刻执行
 
 作者: AutoFish Team
-版本: v1.0.1
+版本: v1.0.6
 创建时间: 2024-12-28
-更新时间: 2025-01-17
+更新时间: 2026-10-16
 修复历史: v1.0.1 - 集成统一日志系统
+         v1.0.2 - 底层键鼠操作改为可插拔输入后端 (windows/recording)，无桌面环境可导入和测量输入时序
+         v1.0.3 - 点击、按键、长按和按键循环统一由单线程输入执行器调度，不再各自创建线程并sleep，
+                  停止和暂停立即生效并弹起按住的按键，新增调度延迟统计
+         v1.0.4 - 等待输入任务完成时响应共享取消令牌，令牌取消后立即取消全部输入任务并返回
+         v1.0.5 - 全局输入控制器改为首次使用时创建，导入模块时不再创建输入后端和执行器线程
+         v1.0.6 - 按键循环日志改为参数形式，限频省略时不再拼接消息
 """
 
-import time
 import random
 import threading
-from typing import Optional
-import pyautogui
-import keyboard
-import ctypes
-
-# Windows API用于游戏兼容的鼠标移动
+from typing import Optional, Sequence
 
 # 导入统一日志系统
 import sys
@@ -26,37 +26,51 @@ sys.path.append(str(Path(__file__).parent.parent))
 from logger import setup_logger
 
 from .config import fisher_config
+from .input_backend import InputBackend, create_input_backend
+from .cancellation import CancelToken
+from .input_executor import InputExecutor, InputHandle, InputSteps, DEVICE_MOUSE, DEVICE_KEY
 
 # 设置日志记录器
 logger = setup_logger('fisher_input')
 
+# 输入任务分组（按分组取消）
+GROUP_CLICK = "click"  # 快速点击
+GROUP_KEY = "key"  # 单次按键
+GROUP_HOLD = "hold"  # 鼠标长按（抛竿）
+GROUP_MOVE = "move"  # 鼠标移动
+GROUP_KEY_CYCLE = "key_cycle"  # 按键循环
+
 class InputController:
     """输入控制器"""
     
-    def __init__(self):
+    def __init__(self, backend: Optional[InputBackend] = None):
         """
         初始化输入控制器
+        
+        Args:
+            backend: 输入后端，None表示按配置创建
         """
-        # 鼠标点击线程相关
-        self.click_thread: Optional[threading.Thread] = None  # 点击线程
-        self.click_event = threading.Event()  # 点击控制事件
-        self.click_running = threading.Event()  # 点击运行状态
-        self.stop_clicking_event = threading.Event()  # 停止点击事件
+        self.backend = backend if backend is not None else create_input_backend(fisher_config.input.backend)
         
-        # 键盘按键线程相关
-        self.key_thread: Optional[threading.Thread] = None  # 按键线程
-        self.key_queue = []  # 按键队列
-        self.key_lock = threading.Lock()  # 按键锁
+        # 输入执行器（单线程执行全部键鼠操作）
+        self.executor = InputExecutor(self.backend)
         
-        # 配置pyautogui
-        pyautogui.FAILSAFE = True  # 启用失效保护
-        pyautogui.PAUSE = 0.01  # 设置操作间隔
+        # 快速点击状态
+        self.click_active: bool = False  # 点击已启动且未停止（暂停时仍为True）
+        self.click_running: bool = False  # 正在点击
+        self._click_count: int = 0  # 累计点击次数
         
-        logger.info("输入控制器初始化完成 - 使用Windows mouse_event API游戏兼容模式")
+        # 按键循环任务句柄
+        self._key_cycle_handle: Optional[InputHandle] = None
+        
+        # 取消令牌（由钓鱼控制器设置为共享令牌）
+        self.cancel_token = CancelToken()
+        
+        logger.info(f"输入控制器初始化完成 - 输入后端: {self.backend.name}")
     
-    def _move_mouse_windows_api(self, dx: int, dy: int) -> bool:
+    def _move_mouse_relative(self, dx: int, dy: int) -> bool:
         """
-        使用Windows mouse_event API移动鼠标（游戏兼容，直接像素移动）
+        相对移动鼠标（Windows后端使用mouse_event API，游戏兼容，直接像素移动）
         
         Args:
             dx: X轴移动距离（像素）
@@ -66,14 +80,12 @@ class InputController:
             bool: 是否成功移动
         """
         try:
-            # 使用mouse_event API（最兼容游戏锁定）
-            MOUSEEVENTF_MOVE = 0x0001
-            result = ctypes.windll.user32.mouse_event(MOUSEEVENTF_MOVE, dx, dy, 0, 0)
-            logger.debug(f"Windows mouse_event API移动: dx={dx}, dy={dy}")
+            self.backend.move_relative(dx, dy)
+            logger.debug(f"鼠标相对移动: dx={dx}, dy={dy}")
             return True
             
         except Exception as e:
-            logger.error(f"Windows API移动失败: {e}")
+            logger.error(f"鼠标相对移动失败: {e}")
             return False
     
     def move_mouse(self, direction: str = "right", distance_pixels: Optional[int] = None) -> bool:
@@ -121,18 +133,17 @@ class InputController:
             dx, dy = direction_vectors[direction]
             logger.info(f"计算移动向量: {direction} → dx={dx}, dy={dy}")
             
-            # 使用Windows mouse_event API移动鼠标
-            success = self._move_mouse_windows_api(dx, dy)
+            # 通过输入后端移动鼠标
+            success = self._move_mouse_relative(dx, dy)
             
             if success:
                 # 等待移动完成
-                move_delay = fisher_config.retry.mouse_move_delay
-                time.sleep(move_delay)
+                self._wait_steps(self._delay_steps(fisher_config.retry.mouse_move_delay), GROUP_MOVE)
                 
-                logger.info(f"🖱️  鼠标{direction}移动成功 (Windows API): {distance_pixels}px → dx={dx}, dy={dy}")
+                logger.info(f"🖱️  鼠标{direction}移动成功 ({self.backend.name}): {distance_pixels}px → dx={dx}, dy={dy}")
                 return True
             else:
-                logger.error(f"Windows API鼠标移动失败，方向: {direction}, 距离: {distance_pixels}px")
+                logger.error(f"鼠标移动失败，方向: {direction}, 距离: {distance_pixels}px")
                 return False
             
         except Exception as e:
@@ -151,61 +162,82 @@ class InputController:
         """
         return self.move_mouse("right", distance_pixels)
     
-    def _click_worker(self) -> None:
+    def set_cancel_token(self, token: CancelToken) -> None:
         """
-        鼠标点击工作线程
-        持续执行鼠标点击，直到收到停止信号
-        """
-        logger.info("鼠标点击线程启动")
+        设置共享取消令牌：令牌取消时立即取消全部输入任务，正在等待的输入操作随即返回
         
-        while not self.stop_clicking_event.is_set():
-            # 等待点击信号
-            if self.click_event.wait(timeout=0.1):
-                # 执行点击
-                try:
-                    # 生成随机时间参数
-                    press_time = random.uniform(
-                        fisher_config.timing.mouse_press_time_min,
-                        fisher_config.timing.mouse_press_time_max
-                    )
-                    release_time = random.uniform(
-                        fisher_config.timing.mouse_release_time_min,
-                        fisher_config.timing.mouse_release_time_max
-                    )
-                    click_interval = random.uniform(
-                        fisher_config.timing.click_interval_min,
-                        fisher_config.timing.click_interval_max
-                    )
-                    
-                    # 鼠标左键按下
-                    pyautogui.mouseDown(button='left')
-                    time.sleep(press_time)  # 按下持续时间
-                    
-                    # 鼠标左键弹起
-                    pyautogui.mouseUp(button='left')
-                    time.sleep(release_time)  # 弹起后短暂等待
-                    
-                    # 等待下次点击间隔
-                    time.sleep(click_interval)
-                    
-                    # 每100次点击输出一次时间统计（调试用）
-                    if hasattr(self, '_click_count'):
-                        self._click_count += 1
-                    else:
-                        self._click_count = 1
-                        
-                    if self._click_count % 100 == 0:
-                        logger.debug(f"🖱️  点击统计: 按下{press_time:.3f}s, 弹起等待{release_time:.3f}s, 间隔{click_interval:.3f}s")
-                    
-                except Exception as e:
-                    logger.error(f"鼠标点击失败: {e}")
-                    break
-            
-            # 检查是否暂停点击
-            if not self.click_running.is_set():
-                self.click_event.clear()
+        Args:
+            token: 取消令牌
+        """
+        self.cancel_token = token
+        token.add_callback(self._on_cancel)
+    
+    def _on_cancel(self) -> None:
+        """取消令牌回调：停止点击并取消全部输入任务（不等待执行线程）"""
+        self.click_active = False
+        self.click_running = False
+        self.executor.cancel(None, wait=False)
+    
+    def _run_now(self, steps: InputSteps, group: str) -> InputHandle:
+        """提交立即执行的输入任务"""
+        handle = self.executor.submit(steps, group)
+        # 提交前后令牌已被取消时，取消回调可能没有看到本任务
+        if self.cancel_token.is_cancelled:
+            self.executor.cancel(group, wait=False)
+        return handle
+    
+    def _wait_steps(self, steps: InputSteps, group: str) -> bool:
+        """
+        提交输入任务并等待执行完毕（任务被取消或令牌已取消时立即返回）
         
-        logger.info("鼠标点击线程结束")
+        Returns:
+            bool: 是否正常执行完毕
+        """
+        if self.cancel_token.is_cancelled:
+            steps.close()
+            return False
+        return self._run_now(steps, group).wait()
+    
+    @staticmethod
+    def _delay_steps(duration: float) -> InputSteps:
+        """只等待一段时间的输入任务（用于等待上一操作生效）"""
+        yield duration
+    
+    def _hold_steps(self, group: str, device: str, target: str, duration: float) -> InputSteps:
+        """按下 → 按住duration秒 → 弹起"""
+        self.executor.press(group, device, target)
+        yield duration
+        self.executor.release(device, target)
+    
+    def _click_once_steps(self, x: Optional[int], y: Optional[int]) -> InputSteps:
+        """单次点击任务"""
+        self.backend.click(x, y, 'left')
+        yield 0.0
+    
+    def _click_steps(self) -> InputSteps:
+        """
+        快速点击任务
+        持续执行鼠标点击，直到被取消（暂停或停止）
+        """
+        timing = fisher_config.timing
+        while True:
+            # 生成随机时间参数
+            press_time = random.uniform(timing.mouse_press_time_min, timing.mouse_press_time_max)
+            release_time = random.uniform(timing.mouse_release_time_min, timing.mouse_release_time_max)
+            click_interval = random.uniform(timing.click_interval_min, timing.click_interval_max)
+            
+            # 鼠标左键按下，按住press_time后弹起
+            self.executor.press(GROUP_CLICK, DEVICE_MOUSE, 'left')
+            yield press_time
+            self.executor.release(DEVICE_MOUSE, 'left')
+            
+            # 每100次点击输出一次时间统计（调试用）
+            self._click_count += 1
+            if self._click_count % 100 == 0:
+                logger.debug(f"🖱️  点击统计: 按下{press_time:.3f}s, 弹起等待{release_time:.3f}s, 间隔{click_interval:.3f}s")
+            
+            # 弹起后短暂等待，再等待下次点击间隔
+            yield release_time + click_interval
     
     def start_clicking(self) -> bool:
         """
@@ -215,20 +247,13 @@ class InputController:
             bool: 是否成功启动
         """
         try:
-            if self.click_thread and self.click_thread.is_alive():
-                logger.info("点击线程已在运行")
+            if self.click_running:
+                logger.info("快速点击已在运行")
                 return True
             
-            # 重置停止信号
-            self.stop_clicking_event.clear()
-            
-            # 创建并启动点击线程
-            self.click_thread = threading.Thread(target=self._click_worker, daemon=True)
-            self.click_thread.start()
-            
-            # 启动点击
-            self.click_running.set()
-            self.click_event.set()
+            self.click_active = True
+            self.click_running = True
+            self._run_now(self._click_steps(), GROUP_CLICK)
             
             logger.info("快速点击已启动")
             return True
@@ -238,32 +263,28 @@ class InputController:
             return False
     
     def pause_clicking(self) -> None:
-        """暂停点击"""
-        self.click_running.clear()
-        self.click_event.clear()
+        """暂停点击（立即弹起鼠标左键）"""
+        self.click_running = False
+        self.executor.cancel(GROUP_CLICK)
         logger.info("鼠标点击已暂停")
     
     def resume_clicking(self) -> None:
         """恢复点击"""
-        if self.click_thread and self.click_thread.is_alive():
-            self.click_running.set()
-            self.click_event.set()
+        if self.click_active:
+            if not self.click_running:
+                self.click_running = True
+                self._run_now(self._click_steps(), GROUP_CLICK)
             logger.info("鼠标点击已恢复")
         else:
-            logger.info("点击线程未运行，尝试重新启动")
+            logger.info("点击未启动，尝试重新启动")
             self.start_clicking()
     
     def stop_clicking(self) -> None:
-        """停止点击"""
+        """停止点击（返回后不会再有点击操作）"""
         try:
-            # 设置停止信号
-            self.stop_clicking_event.set()
-            self.click_event.clear()
-            self.click_running.clear()
-            
-            # 等待线程结束
-            if self.click_thread and self.click_thread.is_alive():
-                self.click_thread.join(timeout=2.0)
+            self.click_active = False
+            self.click_running = False
+            self.executor.cancel(GROUP_CLICK)
             
             logger.info("快速点击已停止")
             
@@ -277,29 +298,26 @@ class InputController:
         Returns:
             bool: 是否正在点击
         """
-        return (self.click_thread and 
-                self.click_thread.is_alive() and 
-                self.click_running.is_set())
+        return self.click_running
     
     def press_key(self, key: str, duration: Optional[float] = None) -> bool:
         """
-        按下指定按键
+        按下指定按键，按住duration秒后弹起，执行完毕后返回
         
         Args:
             key: 按键名称 ('a', 'd', 'f' 等)
             duration: 按键持续时间，None表示使用配置的默认时间
             
         Returns:
-            bool: 是否成功按键
+            bool: 是否成功按键（被取消时为False）
         """
         try:
             if duration is None:
                 duration = fisher_config.timing.key_press_time
             
-            # 按下按键
-            keyboard.press(key)
-            time.sleep(duration)
-            keyboard.release(key)
+            if not self._wait_steps(self._hold_steps(GROUP_KEY, DEVICE_KEY, key, duration), GROUP_KEY):
+                logger.info(f"按键 '{key}' 已取消")
+                return False
             
             logger.info(f"按键 '{key}' 持续 {duration:.2f}秒")
             return True
@@ -310,28 +328,59 @@ class InputController:
     
     def press_key_threaded(self, key: str, duration: Optional[float] = None) -> bool:
         """
-        在单独线程中按下指定按键
+        异步按下指定按键（由输入执行器执行，立即返回）
         
         Args:
             key: 按键名称
             duration: 按键持续时间
             
         Returns:
-            bool: 是否成功启动按键线程
+            bool: 是否成功提交按键
         """
         try:
-            def key_worker():
-                self.press_key(key, duration)
-            
-            key_thread = threading.Thread(target=key_worker, daemon=True)
-            key_thread.start()
-            
+            if duration is None:
+                duration = fisher_config.timing.key_press_time
+            self._run_now(self._hold_steps(GROUP_KEY, DEVICE_KEY, key, duration), GROUP_KEY)
             return True
             
         except Exception as e:
-            logger.error(f"启动按键线程失败: {e}")
+            logger.error(f"提交按键失败: {e}")
             return False
     
+    def _key_cycle_steps(self, keys: Sequence[str], hold_time: float, gap_time: float) -> InputSteps:
+        """按键循环任务：依次长按各键hold_time秒，每次间隔gap_time秒"""
+        index = 0
+        while True:
+            key = keys[index]
+            logger.info("按键循环: 长按 %s 键%s秒", key, hold_time)
+            self.executor.press(GROUP_KEY_CYCLE, DEVICE_KEY, key)
+            yield hold_time
+            self.executor.release(DEVICE_KEY, key)
+            yield gap_time
+            index = (index + 1) % len(keys)
+    
+    def start_key_cycle(self, keys: Sequence[str] = ('a', 'd'), hold_time: float = 1.5,
+                        gap_time: float = 0.5) -> None:
+        """
+        启动按键循环（已在运行时不重复启动）
+        循环执行：按第一个键hold_time秒 → 等待gap_time秒 → 按下一个键 …
+        
+        Args:
+            keys: 按键序列
+            hold_time: 每个键的长按时间(秒)
+            gap_time: 两次按键之间的等待时间(秒)
+        """
+        if self._key_cycle_handle is not None and not self._key_cycle_handle.done:
+            return
+        self._key_cycle_handle = self._run_now(self._key_cycle_steps(list(keys), hold_time, gap_time),
+                                               GROUP_KEY_CYCLE)
+        logger.info("按键循环已启动")
+    
+    def stop_key_cycle(self) -> None:
+        """停止按键循环（立即弹起正在长按的键）"""
+        self.executor.cancel(GROUP_KEY_CYCLE)
+        logger.info("按键循环已停止")
+    
     def left_click(self, x: Optional[int] = None, y: Optional[int] = None) -> bool:
         """
         单次鼠标左键点击
@@ -344,10 +393,8 @@ class InputController:
             bool: 是否成功点击
         """
         try:
-            if x is not None and y is not None:
-                pyautogui.click(x, y, button='left')
-            else:
-                pyautogui.click(button='left')
+            if not self._wait_steps(self._click_once_steps(x, y), GROUP_KEY):
+                return False
             
             logger.info(f"鼠标左键点击 ({x}, {y})")
             return True
@@ -370,10 +417,10 @@ class InputController:
             if duration is None:
                 duration = fisher_config.timing.cast_hold_time
             
-            # 按下鼠标左键
-            pyautogui.mouseDown(button='left')
-            time.sleep(duration)
-            pyautogui.mouseUp(button='left')
+            # 按下鼠标左键，按住duration秒后弹起
+            if not self._wait_steps(self._hold_steps(GROUP_HOLD, DEVICE_MOUSE, 'left', duration), GROUP_HOLD):
+                logger.info("鼠标左键长按已取消")
+                return False
             
             logger.info(f"鼠标左键长按 {duration:.2f}秒")
             return True
@@ -420,10 +467,9 @@ class InputController:
             if wait_time is None:
                 wait_time = fisher_config.timing.success_wait_time
             
-            # 等待指定时间
-            time.sleep(wait_time)
-            
-            # 按下f键
+            # 等待指定时间后按下f键
+            if not self._wait_steps(self._delay_steps(wait_time), GROUP_KEY):
+                return False
             return self.handle_success_key()
             
         except Exception as e:
@@ -448,37 +494,51 @@ class InputController:
             dict: 控制器状态信息
         """
         return {
+            'backend': self.backend.name,
             'clicking': self.is_clicking(),
-            'click_thread_alive': self.click_thread.is_alive() if self.click_thread else False,
-            'click_running': self.click_running.is_set(),
-            'stop_signal': self.stop_clicking_event.is_set()
+            'click_active': self.click_active,
+            'click_count': self._click_count,
+            'executor': self.executor.get_stats()
         }
     
     def emergency_stop(self) -> None:
         """紧急停止所有输入操作"""
         logger.warning("紧急停止所有输入操作")
         
-        # 停止鼠标点击
+        # 停止鼠标点击，取消全部输入任务（会弹起任务按住的按键）
         self.stop_clicking()
+        self.executor.cancel(None)
         
-        # 释放所有按键
-        try:
-            keyboard.release('a')
-            keyboard.release('d')
-            keyboard.release('f')
-        except:
-            pass
-        
-        # 释放鼠标按键
-        try:
-            pyautogui.mouseUp(button='left')
-        except:
-            pass
+        # 释放所有键盘和鼠标按键
+        self.backend.release_all()
     
     def cleanup(self) -> None:
         """清理资源"""
         logger.info("清理输入控制器资源")
         self.emergency_stop()
+        self.executor.shutdown()
+
+# 全局输入控制器实例（首次使用时创建）
+_input_controller: Optional[InputController] = None
+_input_controller_lock = threading.Lock()
+
+
+def get_input_controller() -> InputController:
+    """
+    获取全局输入控制器
+    
+    Returns:
+        InputController: 全局输入控制器
+    """
+    global _input_controller
+    with _input_controller_lock:
+        if _input_controller is None:
+            _input_controller = InputController()
+    return _input_controller
+
 
-# 全局输入控制器实例
-input_controller = InputController() 
\ No newline at end of file
+def __getattr__(name: str):
+    # 兼容 from .input_controller import input_controller
+    if name == 'input_controller':
+        return get_input_controller()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
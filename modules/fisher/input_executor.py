@@ -0,0 +1,305 @@
+"""
+Fisher钓鱼模块输入执行器
+所有键鼠操作由同一个执行线程按时间顺序执行：调用方把输入任务放入按计划时刻排序的优先队列，
+不再为点击、按键、按键循环各自创建线程并在其中sleep
+
+输入任务是一个生成器：每一步执行若干键鼠操作后yield到下一步的等待时间(秒)，结束时return。
+取消在执行线程中完成，最迟在当前一步结束后生效：移除该分组的待执行步骤，并立即弹起该分组仍按住的按键。
+
+作者: AutoFish Team
+版本: v1.0
+创建时间: 2026-10-16
+"""
+
+import heapq
+import itertools
+import threading
+import time
+from typing import Optional, Dict, Tuple, Iterator, List, Any
+
+# 导入统一日志系统
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent))
+from logger import setup_logger
+
+from .input_backend import InputBackend
+from .perf_stats import LatencyTracker
+
+# 设置日志记录器
+logger = setup_logger('fisher_input')
+
+# 任务优先级（计划时刻相同时数值小的先执行）
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+PRIORITY_LOW = 2
+
+# 输入设备
+DEVICE_MOUSE = "mouse"
+DEVICE_KEY = "key"
+
+# 输入任务：每一步yield到下一步的等待时间(秒)
+InputSteps = Iterator[float]
+
+
+class InputHandle:
+    """输入任务句柄，可等待任务执行完毕或被取消"""
+
+    def __init__(self):
+        self._done = threading.Event()
+        self.cancelled: bool = False  # 是否被取消（或执行出错）
+
+    @property
+    def done(self) -> bool:
+        """任务是否已结束（执行完毕或被取消）"""
+        return self._done.is_set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        等待任务结束
+
+        Args:
+            timeout: 超时时间(秒)，None表示一直等待
+
+        Returns:
+            bool: 任务是否正常执行完毕（超时或被取消时为False）
+        """
+        return self._done.wait(timeout) and not self.cancelled
+
+    def _finish(self, cancelled: bool = False) -> None:
+        self.cancelled = cancelled
+        self._done.set()
+
+
+class _Task:
+    """队列中的输入任务"""
+
+    __slots__ = ('group', 'steps', 'handle')
+
+    def __init__(self, group: Optional[str], steps: Optional[InputSteps], handle: InputHandle):
+        self.group = group  # 分组名，用于取消；取消指令的目标分组(None表示全部)
+        self.steps = steps  # 任务生成器，None表示取消指令
+        self.handle = handle
+
+
+class InputExecutor:
+    """单线程输入执行器"""
+
+    def __init__(self, backend: InputBackend, latency_window: int = 500):
+        """
+        初始化输入执行器（执行线程在首次提交任务时启动）
+
+        Args:
+            backend: 输入后端
+            latency_window: 调度延迟统计的滚动窗口大小
+        """
+        self.backend = backend
+        self._heap: List[Tuple[float, int, int, _Task]] = []  # (计划时刻, 优先级, 序号, 任务)
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+
+        # 仍处于按下状态的输入 (设备, 按键) → 所属分组
+        self._held: Dict[Tuple[str, str], Optional[str]] = {}
+
+        # 调度统计：每一步实际执行时刻相对计划时刻的延迟
+        self.lateness = LatencyTracker(latency_window)
+        self.executed: int = 0  # 已执行步数
+        self.cancelled: int = 0  # 被取消的任务数
+
+    # ---- 供任务在执行线程中调用的键鼠操作 ----
+
+    def press(self, group: Optional[str], device: str, target: str) -> None:
+        """
+        按下鼠标按键或键盘按键，并记录为该分组按住的输入
+
+        Args:
+            group: 任务分组
+            device: DEVICE_MOUSE / DEVICE_KEY
+            target: 鼠标按键名或键名
+        """
+        if device == DEVICE_MOUSE:
+            self.backend.mouse_down(target)
+        else:
+            self.backend.key_down(target)
+        self._held[(device, target)] = group
+
+    def release(self, device: str, target: str) -> None:
+        """
+        弹起鼠标按键或键盘按键
+
+        Args:
+            device: DEVICE_MOUSE / DEVICE_KEY
+            target: 鼠标按键名或键名
+        """
+        self._held.pop((device, target), None)
+        if device == DEVICE_MOUSE:
+            self.backend.mouse_up(target)
+        else:
+            self.backend.key_up(target)
+
+    def move(self, dx: int, dy: int) -> None:
+        """相对移动鼠标"""
+        self.backend.move_relative(dx, dy)
+
+    # ---- 调用方接口 ----
+
+    @property
+    def is_running(self) -> bool:
+        """执行线程是否在运行"""
+        return self._thread is not None and self._thread.is_alive()
+
+    def _ensure_started(self) -> None:
+        """启动执行线程（调用方持有锁）"""
+        if not self.is_running:
+            self._running = True
+            self._thread = threading.Thread(target=self._run, name="InputExecutor", daemon=True)
+            self._thread.start()
+
+    def submit(self, steps: InputSteps, group: Optional[str] = None, delay: float = 0.0,
+               priority: int = PRIORITY_NORMAL) -> InputHandle:
+        """
+        提交输入任务
+
+        Args:
+            steps: 任务生成器
+            group: 任务分组，取消时按分组匹配
+            delay: 首步延迟(秒)
+            priority: 优先级
+
+        Returns:
+            InputHandle: 任务句柄
+        """
+        handle = InputHandle()
+        with self._cond:
+            self._ensure_started()
+            heapq.heappush(self._heap, (time.perf_counter() + delay, priority, next(self._seq),
+                                        _Task(group, steps, handle)))
+            self._cond.notify()
+        return handle
+
+    def cancel(self, group: Optional[str] = None, wait: bool = True, timeout: float = 1.0) -> None:
+        """
+        取消分组的全部任务并弹起该分组按住的输入
+
+        Args:
+            group: 任务分组，None表示全部任务
+            wait: 是否等待取消在执行线程中完成（完成后不会再有该分组的键鼠操作）
+            timeout: 等待超时时间(秒)
+        """
+        if threading.current_thread() is self._thread:
+            with self._cond:
+                self._cancel_now(group)
+            return
+
+        handle = InputHandle()
+        with self._cond:
+            if not self.is_running:
+                return
+            heapq.heappush(self._heap, (float('-inf'), PRIORITY_HIGH, next(self._seq),
+                                        _Task(group, None, handle)))
+            self._cond.notify()
+        if wait:
+            handle.wait(timeout)
+
+    def shutdown(self, timeout: float = 1.0) -> None:
+        """取消全部任务并停止执行线程"""
+        if not self.is_running:
+            return
+        self.cancel(None, wait=True, timeout=timeout)
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+        self._thread.join(timeout=timeout)
+        self._thread = None
+
+    def pending(self, group: Optional[str] = None) -> int:
+        """
+        待执行的任务数
+
+        Args:
+            group: 任务分组，None表示全部
+
+        Returns:
+            int: 任务数
+        """
+        with self._cond:
+            return sum(1 for _, _, _, task in self._heap
+                       if task.steps is not None and (group is None or task.group == group))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取执行统计
+
+        Returns:
+            Dict: 已执行步数、取消任务数、待执行任务数和调度延迟统计(毫秒)
+        """
+        return {
+            'executed': self.executed,
+            'cancelled': self.cancelled,
+            'pending': self.pending(),
+            'lateness': self.lateness.get_stats()
+        }
+
+    # ---- 执行线程 ----
+
+    def _cancel_now(self, group: Optional[str]) -> None:
+        """在执行线程中取消任务并弹起按住的输入"""
+        kept = []
+        for entry in self._heap:
+            task = entry[3]
+            if task.steps is not None and (group is None or task.group == group):
+                task.steps.close()
+                task.handle._finish(cancelled=True)
+                self.cancelled += 1
+            else:
+                kept.append(entry)
+        heapq.heapify(kept)
+        self._heap[:] = kept
+
+        for (device, target), held_group in list(self._held.items()):
+            if group is None or held_group == group:
+                try:
+                    self.release(device, target)
+                except Exception as e:
+                    logger.error(f"取消输入时弹起{target}失败: {e}")
+
+    def _run(self) -> None:
+        """执行线程主循环"""
+        while True:
+            with self._cond:
+                while self._running:
+                    now = time.perf_counter()
+                    if self._heap and self._heap[0][0] <= now:
+                        break
+                    self._cond.wait(self._heap[0][0] - now if self._heap else None)
+                if not self._running:
+                    break
+                due, _, _, task = heapq.heappop(self._heap)
+
+                if task.steps is None:
+                    # 取消指令在持有锁时执行，保证与submit之间的顺序
+                    self._cancel_now(task.group)
+                    task.handle._finish()
+                    continue
+
+            started = time.perf_counter()
+            self.lateness.record(started - due)
+            try:
+                delay = next(task.steps)
+            except StopIteration:
+                task.handle._finish()
+                continue
+            except Exception as e:
+                logger.error(f"输入任务执行失败 ({task.group}): {e}")
+                with self._cond:
+                    self._cancel_now(task.group)
+                task.handle._finish(cancelled=True)
+                continue
+            self.executed += 1
+
+            with self._cond:
+                # 下一步相对本步实际执行时刻计时，保证按住时长不因调度延迟而缩短
+                heapq.heappush(self._heap, (started + max(0.0, delay), PRIORITY_NORMAL,
+                                            next(self._seq), task))
@@ -3,26 +3,33 @@ Fisher钓鱼模块主程序
 负责初始化和启动钓鱼模块
 
 作者: AutoFish Team
-版本: v1.0.1
+版本: v1.0.3
 创建时间: 2024-12-28
-更新时间: 2025-01-17
+更新时间: 2026-10-16
 修复历史: v1.0.1 - 集成统一日志系统
+         v1.0.2 - 模型改为在后台线程加载，界面立即显示；界面显示且模型就绪后输出启动耗时分解
+         v1.0.3 - 启动配置文件监视，修改config.yaml后无需重启
 """
 
 import sys
+import threading
 from pathlib import Path
 
 # 添加项目根目录到Python路径
 project_root = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(project_root))
 
-# 导入统一日志系统
-from modules.logger import setup_logger
+# 启动耗时统计（最先导入，作为计时起点）
+from modules.fisher.startup_timing import startup_profiler
 
-# 修复相对导入问题 - 使用绝对导入
-from modules.fisher.config import fisher_config
-from modules.fisher.model_detector import model_detector
-from modules.fisher.admin_utils import is_admin, check_and_elevate_privileges
+with startup_profiler.imports_phase("导入模块"):
+    # 导入统一日志系统
+    from modules.logger import setup_logger
+
+    # 修复相对导入问题 - 使用绝对导入
+    from modules.fisher.config import fisher_config
+    from modules.fisher.model_detector import get_model_detector
+    from modules.fisher.admin_utils import is_admin, check_and_elevate_privileges
 
 # 设置日志记录器
 logger = setup_logger('fisher_main')
@@ -40,20 +47,22 @@ def check_dependencies() -> bool:
     """
     logger.info("检查系统依赖...")
     
-    # 检查关键路径
+    # 检查关键路径（模型在后台加载，加载结果由界面显示）
     model_path = fisher_config.get_model_path()
-    if not Path(model_path).exists():
+    if not fisher_config.service.enabled and not Path(model_path).exists():
         logger.error("关键路径验证失败")
         return False
     
-    # 检查模型检测器初始化状态
-    if not model_detector.is_initialized:
-        logger.error("模型检测器初始化失败")
-        return False
-    
     logger.info("系统依赖检查通过")
     return True
 
+def log_startup_breakdown() -> None:
+    """等待模型就绪后输出启动耗时分解（后台线程）"""
+    get_model_detector(wait=False).ready.wait()
+    startup_profiler.mark("模型就绪")
+    startup_profiler.wait_for_mark("界面显示", timeout=30.0)
+    startup_profiler.log_breakdown(logger)
+
 def main():
     """主函数"""
     try:
@@ -76,15 +85,27 @@ def main():
         
         logger.info("启动Fisher钓鱼模块...")
         
+        # 模型在后台线程加载和预热，界面不等待
+        get_model_detector(wait=False).load_in_background()
+        
+        # 监视配置文件，修改保存后自动重新加载
+        fisher_config.start_watching()
+        threading.Thread(target=log_startup_breakdown, name="StartupReport", daemon=True).start()
+        
         # 优先使用美化UI，如果失败则回退到原UI
-        try:
-            from modules.fisher.ui_simple import fisher_ui
-            logger.info("使用美化UI界面")
-        except ImportError as e:
-            logger.warning(f"美化UI加载失败，回退到原UI: {e}")
-            from modules.fisher.ui import fisher_ui
+        with startup_profiler.imports_phase("导入界面"):
+            try:
+                from modules.fisher.ui_simple import fisher_ui
+                logger.info("使用美化UI界面")
+            except ImportError as e:
+                logger.warning(f"美化UI加载失败，回退到原UI: {e}")
+                from modules.fisher.ui import fisher_ui
         
         # 启动UI界面
+        with startup_profiler.phase("创建界面"):
+            fisher_ui.create_window()
+        # 进入事件循环后的首个回调时窗口已显示
+        fisher_ui.root.after(0, lambda: startup_profiler.mark("界面显示"))
         fisher_ui.run()
         
     except KeyboardInterrupt:
@@ -97,6 +118,7 @@ def main():
         if sys.stdout.isatty():
             input("按回车键退出...")
     finally:
+        fisher_config.stop_watching()
         logger.info("Fisher钓鱼模块已退出")
         # 确保程序彻底退出
         try:
@@ -3,20 +3,40 @@ Fisher钓鱼模块YOLO模型检测器
 负责加载YOLO模型并识别钓鱼状态0-3和6
 
 作者: AutoFish Team  
-版本: v1.0.1
+版本: v1.0.22
 创建时间: 2024-12-28
-更新时间: 2025-01-17
+更新时间: 2026-10-16
 修复历史: v1.0.1 - 集成统一日志系统
+         v1.0.2 - 屏幕截图改用线程持久会话和复用缓冲区，不再每帧创建MSS实例
+         v1.0.3 - 新增ROI模式，只截取并推理状态指示所在区域，检测框映射回屏幕坐标
+         v1.0.4 - 新增后台截图线程，检测时取用环形缓冲区中的最新帧，结果附带帧龄
+         v1.0.5 - 新增帧差门控，画面无明显变化时跳过推理并复用上次结果
+         v1.0.6 - 推理改为可插拔后端 (ultralytics/ONNX Runtime/OpenVINO)，新增detect_raw调试接口
+         v1.0.7 - 目标状态集合下推到推理后处理阶段，不再先取全类别最高分再丢弃
+         v1.0.8 - 初始化时执行预热推理，新增推理/检测耗时滚动统计 (p50/p95/p99)
+         v1.0.9 - 新增会话录制和回放帧源，检测帧可录制后在无显示器环境中回放
+         v1.0.10 - 推理后把本帧交给诊断采样器在后台做低阈值分析，检测循环不再为调试额外截图和推理
+         v1.0.11 - 检测结果附带各状态最高置信度，供时间滤波器按状态投票
+         v1.0.12 - 支持限定窗口区域和共用推理后端，多会话时每个窗口一个检测器、共用一份模型
+         v1.0.13 - 新增detect_batch批量检测接口，多帧合并为一次前向计算，逐帧最佳结果向量化选取
+         v1.0.14 - 配置启用时优先连接本地检测服务，服务未启动时在本进程加载模型
+         v1.0.15 - 全局检测器改为首次使用时创建，支持后台线程加载模型并提供就绪信号，界面无需等待模型加载
+         v1.0.16 - 后台截图帧过期日志改为参数形式，限频省略时不再拼接消息
+         v1.0.17 - 订阅配置热更新，帧差门控参数随配置文件修改立即生效；可指定不连接检测服务（服务进程自身使用）
+         v1.0.18 - 重新加载模型前关闭旧推理后端和诊断后端，不再泄漏推理会话和检测服务连接
+         v1.0.19 - 非线程安全的推理后端（ultralytics）包装为串行代理，多会话不合并推理时各会话检测线程不再并发调用同一模型
+         v1.0.20 - 后台诊断共用主推理后端（模型空闲时才推理），不再为诊断另外加载一份模型
+         v1.0.21 - 录制目录可附带会话名称并独占创建，多会话同一秒开始录制时不再共用目录、互相覆盖索引和分块文件
+         v1.0.22 - 检测服务请求断开或超时时重连重试一次，仍失败则在本进程加载模型继续检测，不再只在启动连接时回退
 """
 
-import cv2
-import torch
+import os
+import time
+import threading
 import numpy as np
-from typing import Optional, Tuple, List, Dict
+from typing import Optional, Tuple, List, Dict, Sequence
 from pathlib import Path
-import mss
 import logging
-from ultralytics import YOLO
 
 # 导入统一日志系统
 import sys
@@ -24,6 +44,18 @@ sys.path.append(str(Path(__file__).parent.parent))
 from logger import setup_logger
 
 from .config import fisher_config
+from .screen_capture import get_capture_session, close_capture_session
+from .roi_manager import RoiManager
+from .frame_grabber import FrameGrabber
+from .frame_gate import FrameChangeGate
+from .inference_backend import InferenceBackend, Detections, create_backend, share_backend
+from .perf_stats import LatencyTracker
+from .session_recorder import SessionRecorder
+from .detection_service import connect_detection_service, FailoverBackend
+from .startup_timing import startup_profiler
+
+# 屏幕区域 (left, top, width, height)
+Region = Tuple[int, int, int, int]
 
 # 禁用ultralytics的详细日志输出
 logging.getLogger('ultralytics').setLevel(logging.WARNING)
@@ -34,43 +66,167 @@ logger = setup_logger('fisher_model')
 class ModelDetector:
     """YOLO模型检测器"""
     
-    def __init__(self):
+    def __init__(self, window: Optional[Region] = None, backend: Optional[InferenceBackend] = None,
+                 defer_load: bool = False, use_service: bool = True):
         """
         初始化模型检测器
+        
+        Args:
+            window: 检测的窗口区域 (left, top, width, height)，None表示整个屏幕
+            backend: 共用的推理后端，None表示按配置加载模型（传入时不负责关闭）
+            defer_load: 是否推迟加载模型，由load_in_background()或wait_until_ready()加载
+            use_service: 配置启用检测服务时是否连接服务（检测服务进程自身传False，在本进程加载模型）
         """
-        self.model: Optional[YOLO] = None  # YOLO模型实例
+        self.backend: Optional[InferenceBackend] = None  # 推理后端实例
         self.device: str = "cpu"  # 计算设备
         self.is_initialized: bool = False  # 初始化状态
+        self.window: Optional[Region] = tuple(int(v) for v in window) if window else None
+        self._owns_backend: bool = backend is None  # 推理后端是否由本检测器创建和关闭
+        self.use_service: bool = use_service  # 是否允许连接检测服务
+        
+        # 模型加载完成（无论成功与否）时设置的就绪信号
+        self.ready = threading.Event()
+        self.load_time: float = 0.0  # 模型加载耗时(秒)，含预热
+        self._load_thread: Optional[threading.Thread] = None
+        self._load_lock = threading.Lock()
         
         # 状态名称映射
         self.state_names = fisher_config.get_state_names()
         
-        # 初始化模型
-        self._initialize_model()
+        # ROI区域管理器
+        self.roi_manager = RoiManager(fisher_config.roi, list(self.state_names.keys()))
+        
+        # 后台截图线程（按需创建）
+        self.frame_grabber: Optional[FrameGrabber] = None
+        
+        # 帧差门控
+        self.frame_gate = FrameChangeGate(
+            diff_threshold=fisher_config.gate.diff_threshold,
+            downsample_width=fisher_config.gate.downsample_width,
+            max_skip_time=fisher_config.gate.max_skip_time
+        )
+        fisher_config.add_listener(self._on_config_changed)
+        
+        # 推理耗时统计（仅模型推理）和检测耗时统计（含截图、门控）
+        self.inference_latency = LatencyTracker(fisher_config.model.latency_window)
+        self.detection_latency = LatencyTracker(fisher_config.model.latency_window)
+        self.batch_latency = LatencyTracker(fisher_config.model.latency_window)  # 批量检测每批耗时
+        self.batch_item_latency = LatencyTracker(fisher_config.model.latency_window)  # 批量检测平均每帧耗时
+        self.last_batch: Optional[Dict] = None  # 最近一次批量检测的帧数和耗时
+        self.warmup_times: List[float] = []  # 预热推理耗时(秒)
+        self.last_detection_cached: bool = False  # 最近一次检测是否因画面未变化而跳过推理
+        
+        # 回放帧源（设置后代替屏幕截图）和会话录制器（按需创建）
+        self.frame_source = None
+        self.recorder: Optional[SessionRecorder] = None
+        
+        # 诊断采样器（由钓鱼控制器设置），推理后把本帧交给它在后台分析
+        self.diagnostics = None
+        
+        # 初始化模型（共用后端时跳过加载）
+        if backend is not None:
+            self.backend = backend
+            self.device = backend.device
+            self.is_initialized = True
+            self.ready.set()
+        elif not defer_load:
+            self._load()
+    
+    def _on_config_changed(self, snapshot, changed) -> None:
+        """
+        配置热更新回调（监视线程中调用）：更新帧差门控参数
+        
+        置信度阈值、门控开关和帧龄上限在每次检测时从配置读取，替换快照后即生效；
+        模型路径、推理后端和ROI等在初始化时使用的配置需重启生效
+        """
+        if 'gate' in changed:
+            gate = snapshot.gate
+            self.frame_gate.configure(gate.diff_threshold, gate.downsample_width, gate.max_skip_time)
+            logger.info("配置热更新: 帧差门控 启用=%s 阈值=%.1f 缩略图宽度=%d 最长复用=%.2fs",
+                        gate.enabled, gate.diff_threshold, gate.downsample_width, gate.max_skip_time)
+        if 'model' in changed:
+            logger.info("配置热更新: 置信度阈值=%.2f", snapshot.model.confidence_threshold)
+    
+    def _load(self) -> bool:
+        """加载模型并设置就绪信号"""
+        start = time.perf_counter()
+        try:
+            return self._initialize_model()
+        finally:
+            self.load_time = time.perf_counter() - start
+            self.ready.set()
+    
+    def load_in_background(self) -> threading.Event:
+        """
+        在后台线程中加载模型（已加载或正在加载时不重复加载）
+        
+        Returns:
+            threading.Event: 就绪信号，加载完成后设置，成功与否见is_initialized
+        """
+        with self._load_lock:
+            if not self.ready.is_set() and self._load_thread is None:
+                self._load_thread = threading.Thread(target=self._load, name="ModelLoader", daemon=True)
+                self._load_thread.start()
+        return self.ready
+    
+    def wait_until_ready(self, timeout: Optional[float] = None) -> bool:
+        """
+        等待模型加载完成，尚未开始加载时在当前线程加载
+        
+        Args:
+            timeout: 最长等待时间(秒)，None表示一直等待
+            
+        Returns:
+            bool: 模型是否已成功初始化
+        """
+        with self._load_lock:
+            load_here = not self.ready.is_set() and self._load_thread is None
+            if load_here:
+                self._load_thread = threading.current_thread()
+        if load_here:
+            self._load()
+        else:
+            self.ready.wait(timeout)
+        return self.is_initialized
     
     def _initialize_model(self) -> bool:
         """
-        初始化YOLO模型
+        初始化YOLO模型，按配置创建推理后端
         
         Returns:
             bool: 初始化是否成功
         """
         try:
+            # 优先使用检测服务（模型由服务进程持有），检测中途服务不可用时自动改为本进程加载模型
+            if self.use_service and fisher_config.service.enabled:
+                remote = connect_detection_service(fisher_config.service)
+                if remote is not None:
+                    self.backend = FailoverBackend(remote, self._load_local_backend)
+                    self.device = remote.device
+                    self._warmup()
+                    logger.info(f"使用检测服务推理: {remote.remote_backend}, 计算设备: {self.device}")
+                    self.is_initialized = True
+                    return True
+                logger.warning("检测服务未启动，在本进程加载模型")
+            
             # 获取模型路径
             model_path = fisher_config.get_model_path()
             if not Path(model_path).exists():
                 logger.error(f"模型文件不存在: {model_path}")
                 return False
             
-            # 设置计算设备
-            self.device = self._get_device()
-            logger.info(f"使用计算设备: {self.device}")
+            # 创建推理后端（ONNX/OpenVINO不可用时自动回退到ultralytics）
+            # 非线程安全的后端包装为串行代理，会话检测器共用时推理自动串行
+            with startup_profiler.phase("模型加载"):
+                self.backend = share_backend(self._create_backend(model_path))
+            self.device = self.backend.device
+            logger.info(f"使用推理后端: {self.backend.name}, 计算设备: {self.device}")
             
-            # 加载模型（禁用详细日志）
-            self.model = YOLO(model_path, verbose=False)
-            self.model.to(self.device)
+            # 预热完成后才标记为已初始化，避免首批检测承担延迟初始化开销
+            with startup_profiler.phase("模型预热"):
+                self._warmup()
             
-            logger.info(f"模型加载成功: {model_path}")
+            logger.info(f"模型加载成功: {self.backend.model_path}")
             self.is_initialized = True
             return True
             
@@ -79,159 +235,472 @@ class ModelDetector:
             self.is_initialized = False
             return False
     
-    def _get_device(self) -> str:
+    @classmethod
+    def _load_local_backend(cls) -> InferenceBackend:
         """
-        获取最佳计算设备
+        在本进程加载模型并预热（检测服务中途不可用时调用）
         
         Returns:
-            str: 设备类型 (cuda/cpu)
-        """
-        config_device = fisher_config.model.device.lower()
-        
-        if config_device == "auto":
-            # 自动选择设备
-            if torch.cuda.is_available():
-                return "cuda"
-            else:
-                return "cpu"
-        elif config_device == "cuda":
-            if torch.cuda.is_available():
-                return "cuda"
-            else:
-                logger.warning("CUDA不可用，使用CPU")
-                return "cpu"
-        else:
-            return "cpu"
+            InferenceBackend: 线程安全的推理后端（非线程安全的后端包装为串行代理）
+            
+        Raises:
+            FileNotFoundError: 模型文件不存在
+        """
+        model_path = fisher_config.get_model_path()
+        if not Path(model_path).exists():
+            raise FileNotFoundError(f"模型文件不存在: {model_path}")
+        backend = share_backend(cls._create_backend(model_path))
+        backend.warmup(max(0, int(fisher_config.model.warmup_runs)))
+        return backend
+    
+    @staticmethod
+    def _create_backend(model_path: str) -> InferenceBackend:
+        """按模型配置创建推理后端"""
+        return create_backend(
+            fisher_config.model.backend,
+            model_path,
+            device=fisher_config.model.device,
+            imgsz=fisher_config.model.imgsz,
+            iou_threshold=fisher_config.model.iou_threshold,
+            cpu_threads=fisher_config.model.cpu_threads,
+            precision=fisher_config.model.precision
+        )
+    
+    def get_diagnostic_backend(self) -> Optional[InferenceBackend]:
+        """
+        获取后台诊断推理使用的后端：共用主后端，不另外加载模型
+        （非线程安全的后端已包装为串行代理，诊断线程应使用try_predict，模型空闲时才推理）
+        
+        Returns:
+            InferenceBackend: 推理后端，模型未初始化时返回None
+        """
+        return self.backend if self.is_initialized else None
     
-    def capture_screen(self, region: Optional[Tuple[int, int, int, int]] = None) -> Optional[np.ndarray]:
+    def create_session_detector(self, window: Optional[Region],
+                                backend: Optional[InferenceBackend] = None) -> 'ModelDetector':
+        """
+        为一个窗口创建会话检测器：共用本检测器已加载的模型，
+        截图、ROI学习、帧差门控、录制和耗时统计各自独立
+        
+        Args:
+            window: 窗口区域 (left, top, width, height)
+            backend: 会话使用的推理后端（如批量推理代理），None表示共用本检测器的后端（线程安全或已串行化）
+            
+        Returns:
+            ModelDetector: 会话检测器，本检测器未初始化时返回None
+        """
+        if not self.is_initialized:
+            logger.error("模型未初始化，无法创建会话检测器")
+            return None
+        return ModelDetector(window=window, backend=backend or self.backend)
+    
+    def _warmup(self) -> None:
+        """执行预热推理并重置耗时统计"""
+        runs = max(0, int(fisher_config.model.warmup_runs))
+        self.warmup_times = self.backend.warmup(runs) if runs else []
+        if self.warmup_times:
+            logger.info(f"模型预热完成: {runs}次，首次{self.warmup_times[0] * 1000:.1f}ms，"
+                        f"末次{self.warmup_times[-1] * 1000:.1f}ms")
+        self.inference_latency.reset()
+        self.detection_latency.reset()
+    
+    def capture_screen(self, region: Optional[Tuple[int, int, int, int]] = None,
+                       copy: bool = True) -> Optional[np.ndarray]:
         """
         截取屏幕图像
+        使用当前线程的持久截图会话，截图失败时会话自动失效并在重试时重建
         
         Args:
             region: 截取区域 (left, top, width, height)，None表示全屏
+            copy: 是否返回独立副本；为False时返回会话复用缓冲区，下次截图会覆盖
             
         Returns:
             np.ndarray: 截取的图像，BGR格式
         """
+        if self.frame_source is not None:
+            img = self.frame_source.peek()
+            if img is None:
+                return None
+            return img.copy() if copy else img
+        
         max_retries = 3  # 最大重试次数
+        session = get_capture_session()
         
         for attempt in range(max_retries):
-            # 每次都重新创建MSS对象，避免线程本地存储问题
-            screenshot_tool = None
             try:
-                # 创建新的MSS实例
-                screenshot_tool = mss.mss()
-                
-                if region:
-                    # 指定区域截图
-                    monitor = {
-                        "left": region[0],
-                        "top": region[1], 
-                        "width": region[2],
-                        "height": region[3]
-                    }
-                else:
-                    # 全屏截图
-                    monitor = screenshot_tool.monitors[1]  # 主显示器
-                
-                # 截取屏幕
-                screenshot = screenshot_tool.grab(monitor)
-                
-                # 转换为numpy数组
-                img = np.array(screenshot)
-                
-                # 转换颜色格式：BGRA -> BGR
-                if img.shape[2] == 4:
-                    img = cv2.cvtColor(img, cv2.COLOR_BGRA2BGR)
-                elif img.shape[2] == 3:
-                    img = cv2.cvtColor(img, cv2.COLOR_RGB2BGR)
-                
-                # 成功截图后立即关闭MSS对象
-                screenshot_tool.close()
-                return img
+                img = session.grab(region)
+                return img.copy() if copy else img
                 
             except Exception as e:
                 logger.error(f"屏幕截取失败 (尝试 {attempt + 1}/{max_retries}): {e}")
                 
-                # 确保关闭MSS对象
-                try:
-                    if screenshot_tool:
-                        screenshot_tool.close()
-                except:
-                    pass
-                
                 # 如果是最后一次尝试，返回None
                 if attempt == max_retries - 1:
                     logger.error("屏幕截取彻底失败，已重试所有次数")
                     return None
                 
-                # 短暂等待后重试
-                import time
+                # 短暂等待后重试（会话已失效，下次截图自动重建）
                 time.sleep(0.1)
         
         return None
     
     def detect_states(self, image: Optional[np.ndarray] = None, 
-                     region: Optional[Tuple[int, int, int, int]] = None) -> Optional[Dict]:
+                     region: Optional[Tuple[int, int, int, int]] = None,
+                     classes: Optional[Sequence[int]] = None) -> Optional[Dict]:
         """
         检测钓鱼状态
+        未指定图像和区域且启用ROI模式时，只截取各状态区域的并集进行推理
         
         Args:
             image: 输入图像，如果为None则自动截屏
             region: 截屏区域，仅在image为None时有效
+            classes: 只检测的状态编号，None表示全部状态（在模型后处理阶段过滤）
             
         Returns:
             Dict: 检测结果 {
                 'state': int,           # 检测到的状态编号
                 'confidence': float,    # 置信度
                 'state_name': str,      # 状态名称
-                'bbox': List[float]     # 边界框坐标 [x1, y1, x2, y2]
+                'bbox': List[float],    # 边界框坐标 [x1, y1, x2, y2]，自动截屏时为屏幕坐标
+                'scores': np.ndarray,   # 各状态的最高置信度 (未检测到的状态为0)
+                'frame_age': float,     # 图像帧龄(秒)，同步截图或传入图像时为0
+                'cached': bool          # 仅在画面无变化、复用上次结果时存在且为True
             }
         """
         if not self.is_initialized:
             logger.error("模型未初始化")
             return None
         
+        detect_start = time.perf_counter()
+        self.last_detection_cached = False
         try:
             # 获取图像
-            if image is None:
-                image = self.capture_screen(region)
-                if image is None:
+            offset = (0, 0)  # 图像左上角对应的屏幕坐标
+            use_roi = False  # 本次是否由ROI管理器决定截图区域
+            frame_age = 0.0  # 帧龄(秒)
+            gate_key = None  # 帧差门控条件，None表示本次不经过门控
+            acquired = image is None  # 图像是否由检测器自行获取（仅此时录制）
+            if acquired:
+                frame = self._acquire_frame(region)
+                if frame is None:
                     return None
+                image, offset, use_roi, frame_age = frame
+                
+                # 帧差门控：画面无明显变化时复用上次检测结果
+                if fisher_config.gate.enabled:
+                    gate_key = (offset, image.shape, None if classes is None else frozenset(classes))
+                    skipped, cached = self.frame_gate.check(image, gate_key)
+                    if skipped:
+                        self.last_detection_cached = True
+                        self._record_frame(image, offset, cached, frame_age)
+                        self._release_frame()
+                        if cached:
+                            cached['frame_age'] = frame_age
+                        self.detection_latency.record(time.perf_counter() - detect_start)
+                        return cached
             
-            # 模型推理（禁用详细日志输出）
-            results = self.model(image, conf=fisher_config.model.confidence_threshold, verbose=False)
+            result = self._infer(image, classes)
+            if acquired:
+                self._record_frame(image, offset, result, frame_age)
+            if self.diagnostics is not None:
+                self.diagnostics.offer(image, classes, result)
+            self._release_frame()
             
-            # 解析结果
-            if len(results) > 0 and len(results[0].boxes) > 0:
-                # 获取置信度最高的检测结果
-                boxes = results[0].boxes
-                confidences = boxes.conf.cpu().numpy()
-                classes = boxes.cls.cpu().numpy().astype(int)
-                bboxes = boxes.xyxy.cpu().numpy()
-                
-                # 找到置信度最高的结果
-                max_conf_idx = np.argmax(confidences)
-                best_class = classes[max_conf_idx]
-                best_conf = confidences[max_conf_idx]
-                best_bbox = bboxes[max_conf_idx].tolist()
-                
-                # 构造返回结果
-                result = {
-                    'state': best_class,
-                    'confidence': float(best_conf),
-                    'state_name': self.state_names.get(best_class, f"未知状态_{best_class}"),
-                    'bbox': best_bbox
-                }
-                
-                return result
+            # 检测框映射回屏幕坐标
+            if result and offset != (0, 0):
+                bbox = result['bbox']
+                result['bbox'] = [bbox[0] + offset[0], bbox[1] + offset[1],
+                                  bbox[2] + offset[0], bbox[3] + offset[1]]
             
-            return None
+            # 更新ROI学习历史
+            if use_roi:
+                if result:
+                    self.roi_manager.record_detection(result['state'], result['bbox'])
+                else:
+                    self.roi_manager.record_miss()
+            
+            if result:
+                result['frame_age'] = frame_age
+            
+            if gate_key is not None:
+                self.frame_gate.update(result, gate_key)
+            
+            self.detection_latency.record(time.perf_counter() - detect_start)
+            return result
             
         except Exception as e:
+            self._release_frame()
             logger.error(f"状态检测失败: {e}")
             return None
     
+    def _select_capture_region(self, region: Optional[Tuple[int, int, int, int]] = None
+                               ) -> Tuple[Optional[Tuple[int, int, int, int]], bool]:
+        """
+        确定本次截图区域
+        
+        Args:
+            region: 调用方指定的截屏区域，None表示由ROI管理器决定或全屏
+            
+        Returns:
+            Tuple: (截图区域, 是否由ROI管理器决定)，区域为None表示全屏
+        """
+        if region is None and self.roi_manager.enabled:
+            screen = self._get_screen()
+            return self.roi_manager.get_capture_region(screen) or self.window, True
+        return region if region is not None else self.window, False
+    
+    def _get_screen(self) -> Dict[str, int]:
+        """检测范围：窗口区域，未限定窗口时为整个屏幕（MSS显示器格式）"""
+        if self.window is not None:
+            left, top, width, height = self.window
+            return {"left": left, "top": top, "width": width, "height": height}
+        return get_capture_session().get_monitor()
+    
+    def _acquire_frame(self, region: Optional[Tuple[int, int, int, int]] = None
+                       ) -> Optional[Tuple[np.ndarray, Tuple[int, int], bool, float]]:
+        """
+        获取待检测的图像：优先取用后台截图线程的最新帧，否则同步截图
+        
+        Args:
+            region: 截屏区域，指定区域时总是同步截图
+            
+        Returns:
+            Tuple: (BGR图像, 屏幕坐标偏移, 是否ROI区域, 帧龄)，截图失败时返回None
+        """
+        if self.frame_source is not None:
+            return self.frame_source.acquire(region)
+        
+        if region is None and self.frame_grabber is not None and self.frame_grabber.is_running:
+            frame, info = self.frame_grabber.acquire_latest()
+            if frame is not None and info.age <= fisher_config.capture.max_frame_age:
+                return frame, info.offset, info.roi, info.age
+            self._release_frame()
+            if info is not None:
+                logger.debug("后台截图帧已过期 (%.3fs)，改为同步截图", info.age)
+        
+        capture_region, use_roi = self._select_capture_region(region)
+        image = self.capture_screen(capture_region, copy=False)
+        if image is None:
+            return None
+        
+        if capture_region is not None:
+            offset = (capture_region[0], capture_region[1])
+        else:
+            screen = self._get_screen()
+            offset = (screen["left"], screen["top"])
+        return image, offset, use_roi, 0.0
+    
+    def _release_frame(self) -> None:
+        """释放占用的后台截图帧"""
+        if self.frame_grabber is not None:
+            self.frame_grabber.release()
+    
+    def _record_frame(self, image: np.ndarray, offset: Tuple[int, int],
+                      result: Optional[Dict], frame_age: float) -> None:
+        """录制启用时保存本帧及检测结果（时间戳为截图时间）"""
+        if self.recorder is not None:
+            self.recorder.record(image, offset, result, time.time() - frame_age)
+    
+    def set_frame_source(self, frame_source) -> None:
+        """
+        设置回放帧源，设置后检测和截图都从帧源取图，不再截取屏幕
+        
+        Args:
+            frame_source: 帧源对象，需提供acquire(region)和peek()，None表示恢复屏幕截图
+        """
+        self.frame_source = frame_source
+        self.frame_gate.reset()
+    
+    def start_recording(self, output_dir: Optional[str] = None, name: Optional[str] = None) -> Optional[str]:
+        """
+        开始录制会话（检测帧和检测结果）
+        
+        Args:
+            output_dir: 录制目录，None表示在配置的录制根目录下新建子目录
+            name: 新建子目录的名称（多会话时附带会话名称），None表示按时间命名；已存在时追加序号
+            
+        Returns:
+            str: 录制目录，已在录制时返回当前录制目录
+        """
+        if self.recorder is not None and self.recorder.is_running:
+            return str(self.recorder.output_dir)
+        
+        config = fisher_config.recording
+        if output_dir is None:
+            root = config.output_dir
+            if not os.path.isabs(root):
+                root = str(Path(__file__).parent.parent.parent / root)
+            output_dir = self._create_recording_dir(root, name or time.strftime('session_%Y%m%d_%H%M%S'))
+        
+        self.recorder = SessionRecorder(output_dir, chunk_frames=config.chunk_frames,
+                                        jpeg_quality=config.jpeg_quality, max_queue=config.max_queue)
+        self.recorder.start()
+        return output_dir
+    
+    @staticmethod
+    def _create_recording_dir(root: str, name: str) -> str:
+        """在录制根目录下独占创建子目录，同名目录已存在（如其他会话同时开始录制）时追加序号"""
+        os.makedirs(root, exist_ok=True)
+        index = 1
+        while True:
+            path = os.path.join(root, name if index == 1 else f"{name}_{index}")
+            try:
+                os.mkdir(path)
+                return path
+            except FileExistsError:
+                index += 1
+    
+    def stop_recording(self) -> None:
+        """停止录制会话，等待已排队的帧写完"""
+        if self.recorder is not None:
+            self.recorder.stop()
+            self.recorder = None
+    
+    def start_background_capture(self) -> bool:
+        """
+        启动后台截图线程（需在配置中启用，设置了回放帧源时不启动）
+        
+        Returns:
+            bool: 后台截图线程是否在运行
+        """
+        if not fisher_config.capture.background_thread or self.frame_source is not None:
+            return False
+        
+        if self.frame_grabber is None:
+            self.frame_grabber = FrameGrabber(
+                self._select_capture_region,
+                target_fps=fisher_config.capture.target_fps,
+                ring_size=fisher_config.capture.ring_size
+            )
+        self.frame_grabber.start()
+        return True
+    
+    def stop_background_capture(self) -> None:
+        """停止后台截图线程"""
+        if self.frame_grabber is not None and self.frame_grabber.is_running:
+            self.frame_grabber.stop()
+    
+    def get_capture_stats(self) -> Optional[Dict]:
+        """
+        获取后台截图统计信息（帧龄、丢帧数等）
+        
+        Returns:
+            Dict: 统计信息，未启用后台截图时返回None
+        """
+        if self.frame_grabber is None:
+            return None
+        return self.frame_grabber.get_stats()
+    
+    def _infer(self, image: np.ndarray, classes: Optional[Sequence[int]] = None) -> Optional[Dict]:
+        """
+        对单张图像执行模型推理并选出置信度最高的结果
+        
+        Args:
+            image: BGR格式图像
+            classes: 只检测的状态编号，None表示全部状态
+            
+        Returns:
+            Dict: 检测结果（检测框为图像坐标），未检测到时返回None
+        """
+        infer_start = time.perf_counter()
+        detections = self.backend.predict(image, fisher_config.model.confidence_threshold, classes)
+        self.inference_latency.record(time.perf_counter() - infer_start)
+        
+        # 找到置信度最高的结果
+        best_index = detections.best_index()
+        if best_index is None:
+            return None
+        
+        # 各状态的最高置信度
+        scores = np.zeros(len(self.state_names), dtype=np.float32)
+        class_ids = detections.classes.astype(np.intp)
+        known = class_ids < len(scores)
+        np.maximum.at(scores, class_ids[known], detections.confidences[known])
+        return self._make_result(detections, best_index, scores)
+    
+    def _make_result(self, detections: Detections, index: int, scores: np.ndarray) -> Dict:
+        """由检测框构造检测结果"""
+        best_class = int(detections.classes[index])
+        return {
+            'state': best_class,
+            'confidence': float(detections.confidences[index]),
+            'state_name': self.state_names.get(best_class, f"未知状态_{best_class}"),
+            'bbox': detections.boxes[index].tolist(),
+            'scores': scores
+        }
+    
+    def detect_batch(self, frames: Sequence[np.ndarray],
+                     classes: Optional[Sequence[int]] = None) -> List[Optional[Dict]]:
+        """
+        批量检测：多帧（多个窗口或同一画面的多个ROI）合并为一次前向计算
+        不经过截图、帧差门控和ROI学习，检测框为各帧图像坐标
+        
+        Args:
+            frames: BGR格式图像列表
+            classes: 只检测的状态编号，None表示全部状态
+            
+        Returns:
+            List[Dict]: 与frames一一对应的检测结果（格式同detect_states），未检测到的帧为None；
+                        本批帧数和耗时见last_batch，耗时分布见batch_latency/batch_item_latency
+        """
+        count = len(frames)
+        if count == 0:
+            return []
+        if not self.is_initialized:
+            logger.error("模型未初始化")
+            return [None] * count
+        
+        start = time.perf_counter()
+        try:
+            batch = self.backend.predict_batch(frames, fisher_config.model.confidence_threshold,
+                                               None if classes is None else [classes] * count)
+        except Exception as e:
+            logger.error(f"批量检测失败: {e}")
+            return [None] * count
+        
+        # 逐帧最佳检测框和各状态最高置信度（所有帧的检测框拼接后向量化计算）
+        counts = np.fromiter((len(d) for d in batch), dtype=np.intp, count=count)
+        scores = np.zeros((count, len(self.state_names)), dtype=np.float32)
+        results: List[Optional[Dict]] = [None] * count
+        if counts.sum():
+            confidences = np.concatenate([d.confidences for d in batch])
+            class_ids = np.concatenate([d.classes for d in batch]).astype(np.intp)
+            frame_ids = np.repeat(np.arange(count), counts)
+            known = class_ids < scores.shape[1]
+            np.maximum.at(scores, (frame_ids[known], class_ids[known]), confidences[known])
+            
+            # 按(帧, 置信度降序)排序后，每帧的第一个即为该帧最佳检测框
+            order = np.lexsort((-confidences, frame_ids))
+            starts = np.cumsum(counts) - counts
+            for frame in np.flatnonzero(counts):
+                index = int(order[starts[frame]] - starts[frame])
+                results[frame] = self._make_result(batch[frame], index, scores[frame])
+        
+        elapsed = time.perf_counter() - start
+        self.batch_latency.record(elapsed)
+        self.batch_item_latency.record(elapsed / count)
+        self.last_batch = {'size': count, 'batch_ms': elapsed * 1000, 'item_ms': elapsed * 1000 / count}
+        return results
+    
+    def detect_raw(self, image: np.ndarray, conf: float) -> Optional[Detections]:
+        """
+        以指定置信度阈值执行推理并返回全部检测框（调试诊断用）
+        
+        Args:
+            image: BGR格式图像
+            conf: 置信度阈值
+            
+        Returns:
+            Detections: 全部检测结果，模型未初始化或推理失败时返回None
+        """
+        if not self.is_initialized:
+            return None
+        try:
+            return self.backend.predict(image, conf)
+        except Exception as e:
+            logger.error(f"原始检测失败: {e}")
+            return None
+    
     def detect_specific_state(self, target_state: int, 
                             image: Optional[np.ndarray] = None,
                             region: Optional[Tuple[int, int, int, int]] = None) -> bool:
@@ -246,7 +715,7 @@ class ModelDetector:
         Returns:
             bool: 是否检测到目标状态
         """
-        result = self.detect_states(image, region)
+        result = self.detect_states(image, region, classes=[target_state])
         if result:
             return result['state'] == target_state
         return False
@@ -265,7 +734,8 @@ class ModelDetector:
         Returns:
             Dict: 检测结果，如果检测到目标状态之一
         """
-        result = self.detect_states(image, region)
+        # 目标状态集合下推到模型后处理阶段，其他状态的高置信度结果不会掩盖目标状态
+        result = self.detect_states(image, region, classes=target_states)
         if result and result['state'] in target_states:
             return result
         return None
@@ -279,10 +749,22 @@ class ModelDetector:
         """
         return {
             'initialized': self.is_initialized,
-            'device': self.device,
-            'model_path': fisher_config.get_model_path() if self.is_initialized else None,
+            'window': list(self.window) if self.window else None,
+            'device': self.backend.device if self.backend is not None else self.device,
+            'backend': self.backend.name if self.is_initialized else None,
+            'model_path': self.backend.model_path if self.is_initialized else None,
             'confidence_threshold': fisher_config.model.confidence_threshold,
-            'state_names': self.state_names
+            'state_names': self.state_names,
+            'roi': self.roi_manager.get_info(),
+            'capture': self.get_capture_stats(),
+            'gate': self.frame_gate.get_stats(),
+            'warmup_ms': [t * 1000 for t in self.warmup_times],
+            'latency': {
+                'inference': self.inference_latency.get_stats(),
+                'detection': self.detection_latency.get_stats(),
+                'batch': self.batch_latency.get_stats(),
+                'batch_item': self.batch_item_latency.get_stats()
+            }
         }
     
     def reload_model(self) -> bool:
@@ -292,18 +774,59 @@ class ModelDetector:
         Returns:
             bool: 重新加载是否成功
         """
+        if not self._owns_backend:
+            logger.warning("会话检测器共用模型，请在主检测器上重新加载")
+            return False
         logger.info("正在重新加载模型...")
         self.is_initialized = False
+        self.frame_gate.reset()
+        # 先关闭旧后端（推理会话，或检测服务的连接和共享内存）
+        if self.backend is not None:
+            self.backend.close()
+            self.backend = None
         return self._initialize_model()
     
     def cleanup(self) -> None:
         """清理资源"""
         try:
-            if self.model:
-                del self.model
+            self.stop_background_capture()
+            self.stop_recording()
+            if self.backend and self._owns_backend:
+                self.backend.close()
+            self.backend = None
+            self.is_initialized = False
+            close_capture_session()
             logger.info("模型检测器资源清理完成")
         except Exception as e:
             logger.error(f"资源清理失败: {e}")
 
-# 全局模型检测器实例
-model_detector = ModelDetector() 
\ No newline at end of file
+# 全局模型检测器实例（首次使用时创建）
+_model_detector: Optional[ModelDetector] = None
+_model_detector_lock = threading.Lock()
+
+
+def get_model_detector(wait: bool = True) -> ModelDetector:
+    """
+    获取全局模型检测器
+    
+    Args:
+        wait: 是否等待模型加载完成（尚未开始加载时在当前线程加载）；
+              为False时立即返回，可配合load_in_background()和ready信号使用
+        
+    Returns:
+        ModelDetector: 全局模型检测器
+    """
+    global _model_detector
+    with _model_detector_lock:
+        if _model_detector is None:
+            _model_detector = ModelDetector(defer_load=True)
+    if wait:
+        _model_detector.wait_until_ready()
+    return _model_detector
+
+
+def __getattr__(name: str):
+    # 兼容 from .model_detector import model_detector：首次访问时创建并加载
+    if name == 'model_detector':
+        return get_model_detector()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}") 
\ No newline at end of file
@@ -0,0 +1,388 @@
+"""
+Fisher钓鱼模块多会话编排
+一个进程同时驱动多个游戏窗口：每个窗口一个钓鱼会话（控制器 + 会话检测器 + 输入控制器），
+所有会话共用同一份已加载的模型。
+
+批量推理: 各会话检测线程的推理请求交给批量推理器，由其推理线程在一个节拍内收集各会话的帧，
+合并为一次predict_batch调用；所有活跃会话都已提交或等待超过max_wait时立即执行，
+不在检测阶段的会话（如抛竿中）不会拖慢其他会话。
+
+注意: Windows输入后端把键鼠事件发送到前台窗口，多个窗口同时需要按键时会互相干扰，
+每个会话的输入控制器只保证各自的按键时序。
+
+作者: AutoFish Team
+版本: v1.0
+创建时间: 2026-10-16
+"""
+
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Optional, Dict, List, Sequence, Any, Deque
+
+import numpy as np
+
+# 导入统一日志系统
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent))
+from logger import setup_logger
+
+from .config import fisher_config
+from .inference_backend import InferenceBackend, Detections
+from .input_backend import create_input_backend
+from .input_controller import InputController
+from .model_detector import ModelDetector, Region, get_model_detector
+from .fishing_controller import FishingController, FishingStatus
+from .perf_stats import LatencyTracker
+
+# 设置日志记录器
+logger = setup_logger('fisher_sessions')
+
+
+class _InferRequest:
+    """批量推理器队列中的一次推理请求"""
+
+    __slots__ = ('image', 'conf', 'classes', 'done', 'result', 'error')
+
+    def __init__(self, image: np.ndarray, conf: float, classes: Optional[Sequence[int]]):
+        self.image = image
+        self.conf = conf
+        self.classes = classes
+        self.done = threading.Event()
+        self.result: Optional[Detections] = None
+        self.error: Optional[Exception] = None
+
+
+class BatchedInference:
+    """
+    批量推理器
+    多个会话线程提交的单帧推理请求在推理线程中合并为predict_batch调用，
+    调用方线程阻塞等待自己的结果
+    """
+
+    def __init__(self, backend: InferenceBackend, max_batch: int = 8, max_wait: float = 0.005):
+        """
+        初始化批量推理器（推理线程在首次提交时启动）
+
+        Args:
+            backend: 共用的推理后端
+            max_batch: 单次合并的最大帧数
+            max_wait: 收到首个请求后等待其他会话提交的最长时间(秒)
+        """
+        self.backend = backend
+        self.max_batch = max(1, int(max_batch))
+        self.max_wait = max(0.0, float(max_wait))
+        self.clients: int = 0  # 处于检测阶段的会话数，全部提交后不再等待（由set_clients更新）
+
+        self._pending: Deque[_InferRequest] = deque()
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+
+        # 统计信息
+        self.batches: int = 0  # 执行的批次数
+        self.items: int = 0  # 推理的帧数
+        self.batch_latency = LatencyTracker(500)
+
+    @property
+    def is_running(self) -> bool:
+        """推理线程是否在运行（推理线程退出前在持有锁时清除自身引用）"""
+        return self._thread is not None and self._thread.is_alive()
+
+    def predict(self, image: np.ndarray, conf: float,
+                classes: Optional[Sequence[int]] = None) -> Detections:
+        """
+        提交单帧推理并等待结果（在会话检测线程中调用）
+
+        Args:
+            image: BGR格式图像（推理完成前不会被修改）
+            conf: 置信度阈值
+            classes: 只检测的类别编号
+
+        Returns:
+            Detections: 检测结果
+        """
+        request = _InferRequest(image, conf, classes)
+        with self._cond:
+            # 停止中但尚未退出的推理线程看到_running恢复后继续处理，不另起线程
+            self._running = True
+            if not self.is_running:
+                self._thread = threading.Thread(target=self._run, name="BatchedInference", daemon=True)
+                self._thread.start()
+            self._pending.append(request)
+            self._cond.notify_all()
+        request.done.wait()
+        if request.error is not None:
+            raise request.error
+        return request.result
+
+    def shutdown(self, timeout: float = 2.0) -> None:
+        """
+        停止推理线程（未处理的请求以错误返回）
+
+        等待超时时推理线程在完成当前批次后自行退出，退出前不会再启动新的推理线程
+        """
+        with self._cond:
+            if not self._running:
+                return
+            self._running = False
+            self._cond.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout=timeout)
+        with self._cond:
+            if self._running:
+                return  # 停止期间又有新请求提交，推理线程继续处理
+            while self._pending:
+                request = self._pending.popleft()
+                request.error = RuntimeError("批量推理器已停止")
+                request.done.set()
+
+    def set_clients(self, count: int) -> None:
+        """
+        更新处于检测阶段的会话数（会话进入或离开检测阶段时调用）
+        正在等待凑批的推理线程立即按新会话数重新判断，离开的会话不会让当前批次等满max_wait
+        """
+        with self._cond:
+            self.clients = max(0, int(count))
+            self._cond.notify_all()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取批量推理统计
+
+        Returns:
+            Dict: 批次数、帧数、平均批大小和单批耗时统计(毫秒)
+        """
+        return {
+            'batches': self.batches,
+            'items': self.items,
+            'mean_batch_size': self.items / self.batches if self.batches else 0.0,
+            'latency': self.batch_latency.get_stats()
+        }
+
+    def _collect(self) -> List[_InferRequest]:
+        """等待并取出一个批次的请求（持有锁时调用）"""
+        while self._running and not self._pending:
+            self._cond.wait()
+        if not self._running:
+            return []
+
+        # 收到首个请求后等待其他会话在同一节拍内提交
+        deadline = time.perf_counter() + self.max_wait
+        while (self._running and len(self._pending) < min(max(1, self.clients), self.max_batch)):
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            self._cond.wait(remaining)
+
+        batch = []
+        while self._pending and len(batch) < self.max_batch:
+            batch.append(self._pending.popleft())
+        return batch
+
+    def _run(self) -> None:
+        """推理线程主循环"""
+        while True:
+            with self._cond:
+                batch = self._collect()
+                if not batch:
+                    if self._thread is threading.current_thread():
+                        self._thread = None
+                    return
+
+            # 置信度阈值不同的请求（如诊断推理）分别合并
+            groups: Dict[float, List[_InferRequest]] = {}
+            for request in batch:
+                groups.setdefault(request.conf, []).append(request)
+
+            start = time.perf_counter()
+            for conf, requests in groups.items():
+                try:
+                    results = self.backend.predict_batch([r.image for r in requests], conf,
+                                                         [r.classes for r in requests])
+                    for request, result in zip(requests, results):
+                        request.result = result
+                except Exception as e:
+                    for request in requests:
+                        request.error = e
+                for request in requests:
+                    request.done.set()
+            self.batch_latency.record(time.perf_counter() - start)
+            self.batches += 1
+            self.items += len(batch)
+
+
+class _BatchedBackend(InferenceBackend):
+    """会话检测器使用的推理后端代理，推理请求转交批量推理器"""
+
+    thread_safe = True
+
+    def __init__(self, batcher: BatchedInference):
+        backend = batcher.backend
+        super().__init__(backend.model_path, imgsz=backend.imgsz, iou_threshold=backend.iou_threshold,
+                         cpu_threads=backend.cpu_threads)
+        self.name = backend.name
+        self.device = backend.device
+        self.batcher = batcher
+
+    def predict(self, image: np.ndarray, conf: float,
+                classes: Optional[Sequence[int]] = None) -> Detections:
+        return self.batcher.predict(image, conf, classes)
+
+
+@dataclass
+class FishingSession:
+    """一个游戏窗口的钓鱼会话"""
+    name: str
+    window: Optional[Region]
+    detector: ModelDetector
+    input: InputController
+    controller: FishingController
+
+
+class SessionOrchestrator:
+    """多会话编排器"""
+
+    def __init__(self, detector: Optional[ModelDetector] = None, config=None):
+        """
+        初始化多会话编排器
+
+        Args:
+            detector: 已加载模型的检测器（各会话共用其模型），None表示使用全局检测器
+            config: 多会话配置 (SessionsConfig)，None表示使用全局配置
+        """
+        self.detector = detector if detector is not None else get_model_detector()
+        self.config = config if config is not None else fisher_config.sessions
+        self.sessions: Dict[str, FishingSession] = {}
+
+        self.batcher: Optional[BatchedInference] = None
+        if self.config.batch_inference and self.detector.is_initialized:
+            self.batcher = BatchedInference(self.detector.backend, max_batch=self.config.max_batch,
+                                            max_wait=self.config.max_wait)
+
+    @classmethod
+    def from_config(cls, detector: Optional[ModelDetector] = None) -> 'SessionOrchestrator':
+        """
+        按配置中的窗口列表创建编排器和各会话
+
+        Returns:
+            SessionOrchestrator: 编排器
+        """
+        orchestrator = cls(detector)
+        for index, window in enumerate(orchestrator.config.windows):
+            orchestrator.add_session(f"窗口{index + 1}", window)
+        return orchestrator
+
+    def add_session(self, name: str, window: Optional[Region],
+                    input_ctrl: Optional[InputController] = None) -> Optional[FishingSession]:
+        """
+        添加一个窗口会话
+
+        Args:
+            name: 会话名称
+            window: 窗口区域 (left, top, width, height)
+            input_ctrl: 输入控制器，None表示按配置新建
+
+        Returns:
+            FishingSession: 新建的会话，名称重复或模型未初始化时返回None
+            （会话控制器的状态回调由编排器使用，用于统计处于检测阶段的会话）
+        """
+        if name in self.sessions:
+            logger.error(f"会话名称重复: {name}")
+            return None
+
+        backend = _BatchedBackend(self.batcher) if self.batcher is not None else None
+        detector = self.detector.create_session_detector(window, backend)
+        if detector is None:
+            return None
+        if input_ctrl is None:
+            input_ctrl = InputController(create_input_backend(fisher_config.input.backend))
+
+        session = FishingSession(name, detector.window, detector, input_ctrl,
+                                 FishingController(input_ctrl=input_ctrl, detector=detector, session_name=name))
+        session.controller.set_status_callback(self._on_session_status)
+        self.sessions[name] = session
+        logger.info(f"已添加会话 {name}: 窗口区域 {list(detector.window) if detector.window else '全屏'}")
+        return session
+
+    def _update_clients(self) -> None:
+        """按各会话当前阶段重新统计批量推理需要等待的会话数"""
+        if self.batcher is not None:
+            self.batcher.set_clients(sum(1 for s in self.sessions.values() if s.controller.is_detecting))
+
+    def _on_session_status(self, _status: FishingStatus) -> None:
+        """会话状态变化（阶段转换、停止、出错）时在该会话的线程中调用"""
+        self._update_clients()
+
+    def start_all(self) -> int:
+        """
+        启动所有会话
+
+        Returns:
+            int: 成功启动的会话数
+        """
+        started = 0
+        for session in self.sessions.values():
+            if session.controller.start_fishing():
+                started += 1
+            else:
+                logger.error(f"会话 {session.name} 启动失败")
+        self._update_clients()
+        logger.info(f"已启动 {started}/{len(self.sessions)} 个会话")
+        return started
+
+    def stop_all(self) -> None:
+        """停止所有会话（先统一取消，再逐个等待退出）"""
+        for session in self.sessions.values():
+            if session.controller.is_running:
+                session.controller.stop_token.cancel()
+        for session in self.sessions.values():
+            if session.controller.is_running:
+                session.controller.stop_fishing()
+        self._update_clients()
+
+    def emergency_stop_all(self) -> None:
+        """紧急停止所有会话"""
+        for session in self.sessions.values():
+            session.controller.emergency_stop()
+        self._update_clients()
+
+    def get_status(self) -> Dict[str, FishingStatus]:
+        """
+        获取各会话的钓鱼状态
+
+        Returns:
+            Dict: 会话名称 → 钓鱼状态
+        """
+        return {name: session.controller.get_status() for name, session in self.sessions.items()}
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取批量推理和各会话的检测耗时统计
+
+        Returns:
+            Dict: 批量推理统计和各会话的检测耗时(毫秒)
+        """
+        return {
+            'batch': self.batcher.get_stats() if self.batcher is not None else None,
+            'sessions': {name: session.detector.detection_latency.get_stats()
+                         for name, session in self.sessions.items()}
+        }
+
+    def cleanup(self) -> None:
+        """停止所有会话并释放会话资源（共用的模型由主检测器负责释放）"""
+        self.stop_all()
+        for session in self.sessions.values():
+            session.input.cleanup()
+            session.detector.cleanup()
+        if self.batcher is not None:
+            stats = self.batcher.get_stats()
+            if stats['batches']:
+                logger.info(f"批量推理: {stats['batches']}批 {stats['items']}帧, "
+                            f"平均批大小 {stats['mean_batch_size']:.2f}, "
+                            f"单批耗时 p50={stats['latency']['p50_ms']:.1f}ms")
+            self.batcher.shutdown()
+        self.sessions.clear()
@@ -0,0 +1,92 @@
+"""
+Fisher钓鱼模块性能统计
+滚动窗口耗时统计，提供p50/p95/p99分位数和耗时分布直方图，用于按实测数据设置检测间隔
+
+作者: AutoFish Team
+版本: v1.0
+创建时间: 2026-10-16
+"""
+
+import threading
+from typing import Dict, Any
+
+import numpy as np
+
+# 直方图区间边界(毫秒)，最后一个区间为 >= 250ms
+HISTOGRAM_EDGES_MS = (0, 5, 10, 20, 30, 50, 75, 100, 150, 250, float('inf'))
+
+
+class LatencyTracker:
+    """
+    滚动窗口耗时统计
+
+    最近window次耗时保存在预分配的环形数组中，记录时不分配内存；
+    分位数和直方图只在查询时计算。
+    """
+
+    def __init__(self, window: int = 500):
+        """
+        初始化耗时统计
+
+        Args:
+            window: 滚动窗口大小（保留最近的记录数）
+        """
+        self.window = max(1, int(window))
+        self._samples = np.zeros(self.window, dtype=np.float64)  # 耗时(毫秒)
+        self._index: int = 0  # 下一次写入位置
+        self._count: int = 0  # 窗口内有效记录数
+        self.total: int = 0  # 累计记录次数
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        """
+        记录一次耗时
+
+        Args:
+            seconds: 耗时(秒)
+        """
+        with self._lock:
+            self._samples[self._index] = seconds * 1000
+            self._index = (self._index + 1) % self.window
+            self._count = min(self._count + 1, self.window)
+            self.total += 1
+
+    def reset(self) -> None:
+        """清空统计"""
+        with self._lock:
+            self._index = 0
+            self._count = 0
+            self.total = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取窗口内的耗时统计
+
+        Returns:
+            Dict: 统计信息（单位毫秒），尚无记录时分位数为None
+        """
+        with self._lock:
+            samples = self._samples[:self._count].copy()
+            total = self.total
+
+        if len(samples) == 0:
+            return {'count': 0, 'total': total, 'mean_ms': None, 'p50_ms': None,
+                    'p95_ms': None, 'p99_ms': None, 'max_ms': None, 'histogram': {}}
+
+        p50, p95, p99 = np.percentile(samples, (50, 95, 99))
+        counts, _ = np.histogram(samples, bins=HISTOGRAM_EDGES_MS)
+        histogram = {}
+        for low, high, count in zip(HISTOGRAM_EDGES_MS[:-1], HISTOGRAM_EDGES_MS[1:], counts):
+            label = f"{low:g}-{high:g}ms" if high != float('inf') else f">={low:g}ms"
+            histogram[label] = int(count)
+
+        return {
+            'count': len(samples),
+            'total': total,
+            'mean_ms': float(samples.mean()),
+            'p50_ms': float(p50),
+            'p95_ms': float(p95),
+            'p99_ms': float(p99),
+            'max_ms': float(samples.max()),
+            'histogram': histogram
+        }
@@ -0,0 +1,207 @@
+"""
+Fisher钓鱼模块ROI区域管理器
+负责加载或学习各状态指示所在的屏幕区域，计算需要截取的区域并集
+
+作者: AutoFish Team
+版本: v1.0
+创建时间: 2026-10-16
+"""
+
+from collections import deque
+from typing import Optional, Tuple, List, Dict, Deque
+
+import numpy as np
+
+# 导入统一日志系统
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent))
+from logger import setup_logger
+
+# 设置日志记录器
+logger = setup_logger('fisher_model')
+
+# 区域类型：(left, top, width, height)，屏幕坐标
+Region = Tuple[int, int, int, int]
+
+
+class RoiManager:
+    """ROI区域管理器"""
+
+    def __init__(self, roi_config, states: List[int]):
+        """
+        初始化ROI区域管理器
+
+        Args:
+            roi_config: ROI配置对象 (RoiConfig)
+            states: 需要覆盖的全部状态编号
+        """
+        self.config = roi_config
+        self.states = list(states)
+
+        # 各状态历史检测框 (屏幕坐标 x1, y1, x2, y2)
+        self.bbox_history: Dict[int, Deque[Tuple[float, float, float, float]]] = {}
+
+        # 学习到的区域 {状态编号: (left, top, width, height)}
+        self.learned_regions: Dict[int, Region] = {}
+
+        # ROI内连续未检测到的次数
+        self.miss_count: int = 0
+        # 距上次全屏截图的ROI截图次数
+        self.frames_since_full: int = 0
+
+        # 统计信息
+        self.roi_frames: int = 0  # ROI截图次数
+        self.full_frames: int = 0  # 全屏截图次数
+
+    @property
+    def enabled(self) -> bool:
+        """是否启用ROI模式"""
+        return bool(self.config.enabled)
+
+    def get_configured_regions(self) -> Dict[int, Region]:
+        """
+        获取配置文件中的固定区域
+
+        Returns:
+            Dict[int, Region]: 状态编号到区域的映射
+        """
+        regions = {}
+        for state, region in (self.config.regions or {}).items():
+            try:
+                left, top, width, height = (int(v) for v in region)
+            except (TypeError, ValueError):
+                logger.warning(f"ROI区域配置无效，已忽略: 状态{state} → {region}")
+                continue
+            if width > 0 and height > 0:
+                regions[int(state)] = (left, top, width, height)
+        return regions
+
+    def get_state_regions(self) -> Dict[int, Region]:
+        """
+        获取当前生效的各状态区域（固定配置优先于学习结果）
+
+        Returns:
+            Dict[int, Region]: 状态编号到区域的映射
+        """
+        regions = {}
+        if self.config.learn_from_history:
+            regions.update(self.learned_regions)
+        regions.update(self.get_configured_regions())
+        return regions
+
+    def get_capture_region(self, screen: Dict[str, int]) -> Optional[Region]:
+        """
+        计算本次需要截取的区域（所有状态区域的并集，裁剪到屏幕范围内）
+
+        Args:
+            screen: 屏幕范围，MSS显示器格式 {"left", "top", "width", "height"}
+
+        Returns:
+            Region: 截取区域，None表示需要全屏截图
+        """
+        if not self.enabled:
+            return None
+
+        regions = self.get_state_regions()
+        interval = max(1, self.config.full_frame_interval)
+        has_missing_states = any(state not in regions for state in self.states)
+
+        # 以下情况执行全屏检测：尚无任何区域；连续未检测到（可能位置变化）；
+        # 仍有状态区域未知时定期全屏，以便学习这些状态的位置
+        if (not regions
+                or (self.miss_count and self.miss_count % interval == 0)
+                or (has_missing_states and self.frames_since_full >= interval)):
+            return self._use_full_frame()
+
+        boxes = np.array([(l, t, l + w, t + h) for l, t, w, h in regions.values()], dtype=np.int64)
+        screen_x1, screen_y1 = screen["left"], screen["top"]
+        screen_x2, screen_y2 = screen_x1 + screen["width"], screen_y1 + screen["height"]
+
+        x1 = max(int(boxes[:, 0].min()), screen_x1)
+        y1 = max(int(boxes[:, 1].min()), screen_y1)
+        x2 = min(int(boxes[:, 2].max()), screen_x2)
+        y2 = min(int(boxes[:, 3].max()), screen_y2)
+        if x2 <= x1 or y2 <= y1:
+            return self._use_full_frame()
+
+        self.roi_frames += 1
+        self.frames_since_full += 1
+        return (x1, y1, x2 - x1, y2 - y1)
+
+    def _use_full_frame(self) -> None:
+        """记录一次全屏截图并返回None"""
+        self.full_frames += 1
+        self.frames_since_full = 0
+        return None
+
+    def record_detection(self, state: int, bbox: List[float]) -> None:
+        """
+        记录一次检测结果，用于学习区域
+
+        Args:
+            state: 检测到的状态编号
+            bbox: 屏幕坐标检测框 [x1, y1, x2, y2]
+        """
+        self.miss_count = 0
+        if not self.config.learn_from_history:
+            return
+
+        history = self.bbox_history.get(state)
+        if history is None:
+            history = deque(maxlen=max(1, self.config.history_size))
+            self.bbox_history[state] = history
+        history.append(tuple(bbox))
+
+        if len(history) >= self.config.min_samples:
+            self._update_learned_region(state)
+
+    def record_miss(self) -> None:
+        """记录一次未检测到任何状态"""
+        self.miss_count += 1
+
+    def _update_learned_region(self, state: int) -> None:
+        """
+        根据历史检测框更新某个状态的学习区域
+
+        Args:
+            state: 状态编号
+        """
+        boxes = np.asarray(self.bbox_history[state], dtype=np.float64)
+        padding = self.config.padding
+        x1 = int(np.floor(boxes[:, 0].min())) - padding
+        y1 = int(np.floor(boxes[:, 1].min())) - padding
+        x2 = int(np.ceil(boxes[:, 2].max())) + padding
+        y2 = int(np.ceil(boxes[:, 3].max())) + padding
+        region = (x1, y1, x2 - x1, y2 - y1)
+
+        previous = self.learned_regions.get(state)
+        if region != previous:
+            self.learned_regions[state] = region
+            if previous is None:
+                logger.info(f"📐 ROI学习到状态{state}区域: {list(region)} "
+                            f"(样本{len(boxes)}个，可写入config.yaml的roi.regions固定使用)")
+            else:
+                logger.debug("📐 ROI状态%s区域更新: %s → %s", state, list(previous), list(region))
+
+    def reset(self) -> None:
+        """清空学习结果和历史记录"""
+        self.bbox_history.clear()
+        self.learned_regions.clear()
+        self.miss_count = 0
+        self.frames_since_full = 0
+
+    def get_info(self) -> Dict:
+        """
+        获取ROI状态信息
+
+        Returns:
+            Dict: ROI状态信息
+        """
+        return {
+            'enabled': self.enabled,
+            'regions': {state: list(region) for state, region in self.get_state_regions().items()},
+            'roi_frames': self.roi_frames,
+            'full_frames': self.full_frames,
+            'miss_count': self.miss_count
+        }
@@ -0,0 +1,201 @@
+"""
+Fisher钓鱼模块屏幕截图会话
+为每个线程维护一个持久的MSS截图会话，复用输出缓冲区，避免每帧重复创建截图工具和分配内存
+
+作者: AutoFish Team
+版本: v1.0
+创建时间: 2026-10-16
+"""
+
+import sys
+import time
+import threading
+from typing import Optional, Tuple
+
+import cv2
+import mss
+import numpy as np
+
+# 导入统一日志系统
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent))
+from logger import setup_logger
+
+# 设置日志记录器
+logger = setup_logger('fisher_capture')
+
+# 显示器配置检查间隔(秒)，避免每帧都查询系统显示参数
+DISPLAY_CHECK_INTERVAL = 1.0
+
+
+def _display_signature() -> Optional[Tuple[int, ...]]:
+    """
+    获取当前显示器配置签名，用于检测分辨率/显示器变化
+
+    Returns:
+        Tuple: 虚拟屏幕几何参数，非Windows平台返回None（不做检查）
+    """
+    if sys.platform != 'win32':
+        return None
+
+    try:
+        import ctypes
+        user32 = ctypes.windll.user32
+        # SM_XVIRTUALSCREEN, SM_YVIRTUALSCREEN, SM_CXVIRTUALSCREEN, SM_CYVIRTUALSCREEN, SM_CMONITORS
+        return tuple(user32.GetSystemMetrics(index) for index in (76, 77, 78, 79, 80))
+    except Exception:
+        return None
+
+
+class CaptureSession:
+    """
+    持久屏幕截图会话
+
+    MSS实例依赖线程本地资源（DC/XImage），因此每个线程各自持有一个会话。
+    会话只在截图出错或显示器配置变化时失效重建。
+    """
+
+    def __init__(self):
+        """初始化截图会话"""
+        self._sct: Optional[mss.base.MSSBase] = None  # MSS截图工具实例
+        self._buffer: Optional[np.ndarray] = None  # 复用的BGR输出缓冲区
+        self._display_signature: Optional[Tuple[int, ...]] = None  # 显示器配置签名
+        self._last_display_check: float = 0.0  # 上次检查显示器配置的时间
+
+        # 统计信息
+        self.frame_count: int = 0  # 已截取帧数
+        self.reset_count: int = 0  # 会话重建次数
+
+    def _open(self) -> None:
+        """创建MSS实例并记录显示器配置"""
+        self._sct = mss.mss()
+        self._display_signature = _display_signature()
+        self._last_display_check = time.time()
+        self.reset_count += 1
+        logger.debug(f"截图会话已创建 (第{self.reset_count}次)")
+
+    def invalidate(self) -> None:
+        """使会话失效，下次截图时重新创建"""
+        if self._sct is not None:
+            try:
+                self._sct.close()
+            except Exception:
+                pass
+        self._sct = None
+        self._buffer = None
+
+    def _check_display_change(self) -> None:
+        """定期检查显示器配置，变化时使会话失效"""
+        now = time.time()
+        if now - self._last_display_check < DISPLAY_CHECK_INTERVAL:
+            return
+
+        self._last_display_check = now
+        signature = _display_signature()
+        if signature != self._display_signature:
+            logger.info(f"检测到显示器配置变化: {self._display_signature} → {signature}，重建截图会话")
+            self.invalidate()
+
+    def get_monitor(self, region: Optional[Tuple[int, int, int, int]] = None) -> dict:
+        """
+        获取截图区域描述
+
+        Args:
+            region: 截取区域 (left, top, width, height)，None表示主显示器全屏
+
+        Returns:
+            dict: MSS格式的区域描述
+        """
+        if self._sct is None:
+            self._open()
+
+        if region:
+            return {
+                "left": region[0],
+                "top": region[1],
+                "width": region[2],
+                "height": region[3]
+            }
+        return self._sct.monitors[1]  # 主显示器
+
+    def _get_buffer(self, height: int, width: int) -> np.ndarray:
+        """
+        获取指定尺寸的输出缓冲区，尺寸变化时重新分配
+
+        Args:
+            height: 图像高度
+            width: 图像宽度
+
+        Returns:
+            np.ndarray: BGR输出缓冲区
+        """
+        if self._buffer is None or self._buffer.shape[:2] != (height, width):
+            self._buffer = np.empty((height, width, 3), dtype=np.uint8)
+        return self._buffer
+
+    def grab(self, region: Optional[Tuple[int, int, int, int]] = None,
+             out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        截取屏幕图像
+
+        注意：未指定out时返回的是会话内部缓冲区，下一次截图会覆盖其内容，
+        需要长期持有的调用方应自行复制。
+
+        Args:
+            region: 截取区域 (left, top, width, height)，None表示全屏
+            out: 调用方提供的输出缓冲区，尺寸必须与截图区域一致
+
+        Returns:
+            np.ndarray: BGR格式图像
+        """
+        self._check_display_change()
+        monitor = self.get_monitor(region)
+
+        try:
+            screenshot = self._sct.grab(monitor)
+        except Exception:
+            # 截图失败时会话可能已损坏，使其失效后由调用方决定是否重试
+            self.invalidate()
+            raise
+
+        height, width = screenshot.height, screenshot.width
+        # 直接引用MSS的原始BGRA内存，避免np.array产生额外拷贝
+        bgra = np.frombuffer(screenshot.raw, dtype=np.uint8).reshape(height, width, 4)
+
+        if out is None:
+            out = self._get_buffer(height, width)
+
+        # 转换颜色格式：BGRA -> BGR，直接写入预分配缓冲区
+        cv2.cvtColor(bgra, cv2.COLOR_BGRA2BGR, dst=out)
+        self.frame_count += 1
+        return out
+
+    def close(self) -> None:
+        """关闭会话并释放资源"""
+        self.invalidate()
+
+
+# 线程本地截图会话存储
+_thread_local = threading.local()
+
+
+def get_capture_session() -> CaptureSession:
+    """
+    获取当前线程的截图会话，不存在时自动创建
+
+    Returns:
+        CaptureSession: 当前线程的截图会话
+    """
+    session = getattr(_thread_local, 'session', None)
+    if session is None:
+        session = CaptureSession()
+        _thread_local.session = session
+    return session
+
+
+def close_capture_session() -> None:
+    """关闭当前线程的截图会话"""
+    session = getattr(_thread_local, 'session', None)
+    if session is not None:
+        session.close()
+        _thread_local.session = None
@@ -0,0 +1,256 @@
+"""
+Fisher钓鱼模块会话录制
+将钓鱼过程中的检测帧及检测结果保存为紧凑的录制文件，供离线回放和性能分析使用
+
+录制目录格式:
+    meta.json          录制信息（版本、帧数、分块大小、JPEG质量）
+    index.jsonl        每帧一行索引：序号、时间戳、所在分块、分块内偏移和长度、屏幕偏移、检测结果
+    chunk_00000.bin    JPEG压缩帧顺序拼接而成的分块文件，每块最多chunk_frames帧
+
+作者: AutoFish Team
+版本: v1.0
+创建时间: 2026-10-16
+"""
+
+import json
+import queue
+import threading
+import time
+from pathlib import Path
+from typing import Optional, Tuple, List, Dict, Any, Iterator
+
+import cv2
+import numpy as np
+
+# 导入统一日志系统
+import sys
+sys.path.append(str(Path(__file__).parent.parent))
+from logger import setup_logger
+
+# 设置日志记录器
+logger = setup_logger('fisher_recorder')
+
+# 录制格式版本
+FORMAT_VERSION = 1
+
+INDEX_FILE = "index.jsonl"
+META_FILE = "meta.json"
+
+
+def _chunk_name(chunk: int) -> str:
+    """分块文件名"""
+    return f"chunk_{chunk:05d}.bin"
+
+
+class SessionRecorder:
+    """
+    会话录制器
+
+    检测线程只负责拷贝帧并放入队列，JPEG编码和写文件在独立线程中完成；
+    队列满时丢弃新帧并计数，不阻塞检测。
+    """
+
+    def __init__(self, output_dir: str, chunk_frames: int = 300, jpeg_quality: int = 80,
+                 max_queue: int = 64):
+        """
+        初始化会话录制器
+
+        Args:
+            output_dir: 录制目录（不存在时自动创建）
+            chunk_frames: 每个分块文件的最大帧数
+            jpeg_quality: JPEG压缩质量 (1-100)
+            max_queue: 待写入帧队列长度
+        """
+        self.output_dir = Path(output_dir)
+        self.chunk_frames = max(1, int(chunk_frames))
+        self.jpeg_quality = int(jpeg_quality)
+
+        self._queue: "queue.Queue[Optional[Tuple]]" = queue.Queue(maxsize=max(1, int(max_queue)))
+        self._thread: Optional[threading.Thread] = None
+
+        # 统计信息
+        self.recorded: int = 0  # 已写入帧数
+        self.dropped: int = 0  # 队列满被丢弃的帧数
+        self.bytes_written: int = 0  # 已写入的帧数据字节数
+
+    @property
+    def is_running(self) -> bool:
+        """录制线程是否在运行"""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        """开始录制"""
+        if self.is_running:
+            return
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self._thread = threading.Thread(target=self._writer, name="SessionRecorder", daemon=True)
+        self._thread.start()
+        logger.info(f"开始录制会话: {self.output_dir}")
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """
+        停止录制，等待队列中的帧写完
+
+        Args:
+            timeout: 等待写入线程结束的超时时间(秒)
+        """
+        if not self.is_running:
+            return
+        self._queue.put(None)
+        self._thread.join(timeout=timeout)
+        self._thread = None
+        logger.info(f"会话录制结束: {self.recorded}帧, {self.bytes_written / (1024 * 1024):.1f}MB, "
+                    f"丢弃{self.dropped}帧 → {self.output_dir}")
+
+    def record(self, image: np.ndarray, origin: Tuple[int, int], result: Optional[Dict],
+               timestamp: Optional[float] = None) -> bool:
+        """
+        记录一帧及其检测结果（图像会被拷贝，调用后可立即复用缓冲区）
+
+        Args:
+            image: BGR格式图像
+            origin: 图像左上角对应的屏幕坐标
+            result: 检测结果，未检测到时为None
+            timestamp: 截图时间 (time.time)，默认为当前时间
+
+        Returns:
+            bool: 是否已放入写入队列
+        """
+        if not self.is_running:
+            return False
+
+        detection = None
+        if result:
+            detection = {'state': result['state'], 'confidence': round(float(result['confidence']), 4),
+                         'cached': bool(result.get('cached', False))}
+        item = (image.copy(), (int(origin[0]), int(origin[1])), detection,
+                time.time() if timestamp is None else timestamp)
+        try:
+            self._queue.put_nowait(item)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def _writer(self) -> None:
+        """写入线程：JPEG编码并追加到分块文件和索引"""
+        encode_params = [int(cv2.IMWRITE_JPEG_QUALITY), self.jpeg_quality]
+        chunk, chunk_count, chunk_file = 0, 0, None
+        index_file = open(self.output_dir / INDEX_FILE, 'w', encoding='utf-8')
+
+        try:
+            while True:
+                item = self._queue.get()
+                if item is None:
+                    break
+
+                image, origin, detection, timestamp = item
+                ok, encoded = cv2.imencode('.jpg', image, encode_params)
+                if not ok:
+                    self.dropped += 1
+                    continue
+
+                if chunk_file is None or chunk_count >= self.chunk_frames:
+                    if chunk_file is not None:
+                        chunk_file.close()
+                        chunk += 1
+                    chunk_file = open(self.output_dir / _chunk_name(chunk), 'wb')
+                    chunk_count = 0
+
+                offset = chunk_file.tell()
+                data = encoded.tobytes()
+                chunk_file.write(data)
+                chunk_count += 1
+
+                entry = {'seq': self.recorded, 't': timestamp, 'chunk': chunk, 'offset': offset,
+                         'size': len(data), 'origin': list(origin), 'detection': detection}
+                index_file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                self.recorded += 1
+                self.bytes_written += len(data)
+        except Exception as e:
+            logger.error(f"会话录制写入失败: {e}")
+        finally:
+            if chunk_file is not None:
+                chunk_file.close()
+            index_file.close()
+            self._write_meta()
+
+    def _write_meta(self) -> None:
+        """写入录制信息"""
+        meta = {
+            'version': FORMAT_VERSION,
+            'created': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'frame_count': self.recorded,
+            'dropped': self.dropped,
+            'chunk_frames': self.chunk_frames,
+            'jpeg_quality': self.jpeg_quality
+        }
+        with open(self.output_dir / META_FILE, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, indent=2, ensure_ascii=False)
+
+
+class SessionReader:
+    """会话录制读取器，按索引随机读取帧"""
+
+    def __init__(self, session_dir: str):
+        """
+        初始化读取器
+
+        Args:
+            session_dir: 录制目录
+        """
+        self.session_dir = Path(session_dir)
+        index_path = self.session_dir / INDEX_FILE
+        if not index_path.exists():
+            raise FileNotFoundError(f"录制索引不存在: {index_path}")
+
+        self.entries: List[Dict[str, Any]] = []
+        with open(index_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    try:
+                        self.entries.append(json.loads(line))
+                    except ValueError:
+                        break  # 录制中断时最后一行可能不完整
+
+        self.timestamps = np.array([entry['t'] for entry in self.entries], dtype=np.float64)
+        self._chunk_files: Dict[int, Any] = {}
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    @property
+    def duration(self) -> float:
+        """录制时长(秒)"""
+        return float(self.timestamps[-1] - self.timestamps[0]) if len(self.timestamps) else 0.0
+
+    def read_frame(self, index: int) -> Tuple[np.ndarray, Dict[str, Any]]:
+        """
+        读取一帧
+
+        Args:
+            index: 帧索引
+
+        Returns:
+            Tuple: (BGR图像, 索引条目)
+        """
+        entry = self.entries[index]
+        chunk_file = self._chunk_files.get(entry['chunk'])
+        if chunk_file is None:
+            chunk_file = open(self.session_dir / _chunk_name(entry['chunk']), 'rb')
+            self._chunk_files[entry['chunk']] = chunk_file
+
+        chunk_file.seek(entry['offset'])
+        data = np.frombuffer(chunk_file.read(entry['size']), dtype=np.uint8)
+        return cv2.imdecode(data, cv2.IMREAD_COLOR), entry
+
+    def __iter__(self) -> Iterator[Tuple[np.ndarray, Dict[str, Any]]]:
+        for index in range(len(self.entries)):
+            yield self.read_frame(index)
+
+    def close(self) -> None:
+        """关闭分块文件"""
+        for chunk_file in self._chunk_files.values():
+            chunk_file.close()
+        self._chunk_files.clear()
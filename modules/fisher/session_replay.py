@@ -0,0 +1,343 @@
+"""
+Fisher钓鱼模块会话回放
+把录制的会话帧作为检测器帧源重新送入检测流程，由钓鱼控制器驱动，键鼠操作经录制输入后端记录而不实际执行，
+用于在无显示器的Linux机器上复现真实会话，测量每轮从状态变化到第一个输入动作的延迟
+
+回放模式:
+- 实时：按录制时间轴播放，检测时取用当前时刻对应的帧，与真实运行时的帧节奏一致
+- 尽快：每次检测取下一帧，不跳帧也不等待，回放速度只受检测循环限制
+
+作者: AutoFish Team
+版本: v1.0
+创建时间: 2026-10-16
+"""
+
+import threading
+import time
+from typing import Optional, Tuple, List, Dict, Any
+
+import numpy as np
+
+# 导入统一日志系统
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent))
+from logger import setup_logger
+
+from .session_recorder import SessionReader
+from .input_backend import RecordingInputBackend
+from .input_controller import InputController
+from .perf_stats import LatencyTracker
+
+# 设置日志记录器
+logger = setup_logger('fisher_replay')
+
+# 不计入反应延迟的输入动作：按键循环持续按A/D键，与单次状态变化无关；紧急停止为回放结束时的清理
+IGNORED_ACTIONS = ('press_key', 'emergency_stop')
+
+# 钓鱼成功状态编号，状态从成功切换到其他状态视为新一轮开始
+SUCCESS_STATE = 4
+
+
+class ReplayFrameSource:
+    """录制会话帧源，供ModelDetector.set_frame_source使用"""
+
+    def __init__(self, reader: SessionReader, realtime: bool = True):
+        """
+        初始化回放帧源
+
+        Args:
+            reader: 会话录制读取器
+            realtime: True按录制时间轴实时回放，False每次检测取下一帧
+        """
+        if len(reader) == 0:
+            raise ValueError(f"录制会话没有帧: {reader.session_dir}")
+
+        self.reader = reader
+        self.realtime = realtime
+        self._offsets = reader.timestamps - reader.timestamps[0]  # 各帧相对录制开始的时间(秒)
+        self._lock = threading.Lock()
+        self._start: Optional[float] = None  # 回放开始时间 (perf_counter)
+        self._next_index: int = 0  # 尽快模式下一帧
+        self._index: int = -1  # 最近取用的帧
+        self._cached: Tuple[int, Optional[np.ndarray], Optional[Dict]] = (-1, None, None)
+
+        # 尽快模式下各帧首次取用时间，用于计算状态变化时刻
+        self.served_at: Dict[int, float] = {}
+        self.served: int = 0  # 取用次数
+        self.finished: bool = False  # 是否已播放完毕
+
+    def start(self) -> None:
+        """开始回放（实时模式从此刻开始计时）"""
+        with self._lock:
+            self._start = time.perf_counter()
+            self._next_index = 0
+            self._index = -1
+            self.served_at.clear()
+            self.served = 0
+            self.finished = False
+
+    def frame_time(self, index: int) -> Optional[float]:
+        """
+        帧在回放时间轴上出现的时刻
+
+        Args:
+            index: 帧索引
+
+        Returns:
+            float: perf_counter时刻，尽快模式下该帧未被取用时为None
+        """
+        if self.realtime:
+            return self._start + float(self._offsets[index])
+        return self.served_at.get(index)
+
+    def _current_index(self, advance: bool) -> int:
+        """当前应取用的帧索引，播放完毕时返回-1"""
+        if self._start is None:
+            self._start = time.perf_counter()
+
+        if self.realtime:
+            elapsed = time.perf_counter() - self._start
+            if elapsed > self._offsets[-1]:
+                self.finished = True
+                return -1
+            return int(np.searchsorted(self._offsets, elapsed, side='right')) - 1
+
+        if not advance:
+            return min(self._next_index, len(self._offsets) - 1)
+        if self._next_index >= len(self._offsets):
+            self.finished = True
+            return -1
+        index = self._next_index
+        self._next_index += 1
+        self.served_at.setdefault(index, time.perf_counter())
+        return index
+
+    def _load(self, index: int) -> Tuple[np.ndarray, Dict]:
+        """解码帧（同一帧只解码一次）"""
+        if self._cached[0] != index:
+            image, entry = self.reader.read_frame(index)
+            self._cached = (index, image, entry)
+        return self._cached[1], self._cached[2]
+
+    def acquire(self, region=None) -> Optional[Tuple[np.ndarray, Tuple[int, int], bool, float]]:
+        """
+        取用当前帧（与ModelDetector._acquire_frame返回格式一致）
+
+        Args:
+            region: 截屏区域，回放时忽略，总是返回录制的原始区域
+
+        Returns:
+            Tuple: (BGR图像, 屏幕坐标偏移, 是否ROI区域, 帧龄)，播放完毕时返回None
+        """
+        with self._lock:
+            index = self._current_index(advance=True)
+            if index < 0:
+                return None
+            image, entry = self._load(index)
+            self._index = index
+            self.served += 1
+            age = 0.0
+            if self.realtime:
+                age = max(0.0, time.perf_counter() - self.frame_time(index))
+        return image, tuple(entry['origin']), False, age
+
+    def peek(self) -> Optional[np.ndarray]:
+        """
+        查看当前帧但不推进回放（供截图测试和调试截图使用）
+
+        Returns:
+            np.ndarray: BGR图像，播放完毕时返回None
+        """
+        with self._lock:
+            index = self._current_index(advance=False)
+            if index < 0:
+                return None
+            return self._load(index)[0]
+
+
+class ReplayInput(InputController):
+    """
+    回放用输入控制器
+    使用录制输入后端，不操作键鼠；除底层按键事件外，还按调用时刻记录控制器发出的每个输入动作
+    """
+
+    def __init__(self):
+        """初始化回放输入控制器"""
+        super().__init__(RecordingInputBackend())
+        self.actions: List[Tuple[float, str]] = []  # (perf_counter时刻, 动作名)
+        self._actions_lock = threading.Lock()
+
+    def _record(self, name: str) -> None:
+        with self._actions_lock:
+            self.actions.append((time.perf_counter(), name))
+
+    def start_clicking(self) -> bool:
+        self._record('start_clicking')
+        return super().start_clicking()
+
+    def resume_clicking(self) -> None:
+        self._record('resume_clicking')
+        super().resume_clicking()
+
+    def pause_clicking(self) -> None:
+        self._record('pause_clicking')
+        super().pause_clicking()
+
+    def stop_clicking(self) -> None:
+        self._record('stop_clicking')
+        super().stop_clicking()
+
+    def press_key(self, key: str, duration: Optional[float] = None) -> bool:
+        self._record('press_key')
+        return super().press_key(key, duration)
+
+    def start_key_cycle(self, *args, **kwargs) -> None:
+        self._record('start_key_cycle')
+        super().start_key_cycle(*args, **kwargs)
+
+    def stop_key_cycle(self) -> None:
+        self._record('stop_key_cycle')
+        super().stop_key_cycle()
+
+    def handle_success_key(self) -> bool:
+        self._record('handle_success_key')
+        return super().handle_success_key()
+
+    def move_mouse(self, direction: str = "right", distance_pixels: Optional[int] = None) -> bool:
+        self._record('move_mouse')
+        return super().move_mouse(direction, distance_pixels)
+
+    def cast_rod(self) -> bool:
+        self._record('cast_rod')
+        return super().cast_rod()
+
+    def emergency_stop(self) -> None:
+        self._record('emergency_stop')
+        super().emergency_stop()
+
+
+def find_state_changes(reader: SessionReader) -> List[Dict[str, Any]]:
+    """
+    从录制的检测结果中找出状态变化（未检测到的帧不视为状态变化）
+
+    Args:
+        reader: 会话录制读取器
+
+    Returns:
+        List[Dict]: 状态变化列表 {'index', 'round', 'from', 'to'}，轮次从1开始
+    """
+    changes = []
+    previous = None
+    round_index = 1
+    for index, entry in enumerate(reader.entries):
+        detection = entry.get('detection')
+        if not detection:
+            continue
+        state = detection['state']
+        if previous is not None and state != previous:
+            if previous == SUCCESS_STATE:
+                round_index += 1
+            changes.append({'index': index, 'round': round_index, 'from': previous, 'to': state})
+        previous = state
+    return changes
+
+
+def build_report(source: ReplayFrameSource, replay_input: ReplayInput,
+                 changes: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    计算每次状态变化到第一个输入动作的延迟
+    只在下一次状态变化之前出现的动作计入，否则视为该次变化没有触发动作
+
+    Args:
+        source: 回放帧源
+        replay_input: 输入替身
+        changes: find_state_changes的结果
+
+    Returns:
+        Dict: 回放报告
+    """
+    actions = [(t, name) for t, name in replay_input.actions if name not in IGNORED_ACTIONS]
+    action_times = np.array([t for t, _ in actions], dtype=np.float64)
+
+    events = []
+    overall = LatencyTracker(max(1, len(changes)))
+    by_transition: Dict[str, LatencyTracker] = {}
+    for i, change in enumerate(changes):
+        start = source.frame_time(change['index'])
+        if start is None:
+            continue  # 尽快模式下回放提前结束，该帧未被取用
+        end = source.frame_time(changes[i + 1]['index']) if i + 1 < len(changes) else None
+
+        event = {'round': change['round'], 'transition': f"{change['from']}→{change['to']}",
+                 'latency_ms': None, 'action': None}
+        position = int(np.searchsorted(action_times, start, side='left'))
+        if position < len(actions) and (end is None or action_times[position] < end):
+            latency = action_times[position] - start
+            event['latency_ms'] = float(latency * 1000)
+            event['action'] = actions[position][1]
+            overall.record(latency)
+            by_transition.setdefault(event['transition'], LatencyTracker(len(changes))).record(latency)
+        events.append(event)
+
+    return {
+        'mode': 'realtime' if source.realtime else 'fast',
+        'frames': len(source.reader),
+        'frames_served': source.served,
+        'recorded_duration': source.reader.duration,
+        'rounds': max((e['round'] for e in events), default=0),
+        'events': events,
+        'latency': overall.get_stats(),
+        'latency_by_transition': {k: v.get_stats() for k, v in by_transition.items()}
+    }
+
+
+def run_replay(session_dir: str, realtime: bool = True, timeout: Optional[float] = None) -> Dict[str, Any]:
+    """
+    回放录制会话：检测器从录制帧取图，钓鱼控制器照常运行，输入动作只记录不执行
+
+    Args:
+        session_dir: 录制目录
+        realtime: True实时回放，False尽快回放
+        timeout: 最长回放时间(秒)，None表示播放完毕为止
+
+    Returns:
+        Dict: 回放报告（见build_report），附带控制器完成的轮数和检测耗时统计
+    """
+    # 延迟导入：导入时会加载模型
+    from .model_detector import model_detector
+    from .fishing_controller import FishingController
+
+    reader = SessionReader(session_dir)
+    source = ReplayFrameSource(reader, realtime=realtime)
+    replay_input = ReplayInput()
+    controller = FishingController(input_ctrl=replay_input)
+    changes = find_state_changes(reader)
+
+    logger.info(f"回放会话: {session_dir} ({len(reader)}帧, {reader.duration:.1f}s, "
+                f"{len(changes)}次状态变化, {'实时' if realtime else '尽快'}模式)")
+
+    model_detector.set_frame_source(source)
+    model_detector.detection_latency.reset()
+    try:
+        source.start()
+        if not controller.start_fishing():
+            raise RuntimeError("钓鱼控制器启动失败")
+
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        while not source.finished and controller.is_running:
+            if deadline is not None and time.perf_counter() > deadline:
+                logger.warning(f"回放超时 ({timeout}s)，提前结束")
+                break
+            time.sleep(0.05)
+    finally:
+        if controller.is_running:
+            controller.stop_fishing()
+        model_detector.set_frame_source(None)
+        reader.close()
+
+    report = build_report(source, replay_input, changes)
+    report['completed_rounds'] = controller.status.round_count
+    report['detection'] = model_detector.detection_latency.get_stats()
+    report['input_events'] = len(replay_input.backend.get_events())
+    return report
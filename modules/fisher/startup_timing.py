@@ -0,0 +1,161 @@
+"""
+Fisher钓鱼模块启动耗时统计
+记录启动各阶段耗时（导入、配置、界面、模型加载和预热），界面显示且模型就绪后输出一次耗时分解。
+
+导入耗时: 导入计时器在统计期间包装builtins.__import__和importlib.import_module（包的延迟导出使用后者），
+按顶层包汇总首次导入的自身耗时（不含其导入的其他包，口径与 python -X importtime 的self列一致），
+用于找出拖慢启动的依赖。后台线程中的导入（如加载模型时导入torch）计入该线程所在阶段，不在此统计。
+
+作者: AutoFish Team
+版本: v1.0
+创建时间: 2026-10-16
+"""
+
+import builtins
+import importlib
+import importlib.util
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Tuple, Optional, Iterator
+
+
+class ImportTimer:
+    """
+    导入耗时计时器（统计期间替换builtins.__import__和importlib.import_module，
+    只统计进入计时的线程，其他线程的导入直接放行）
+    """
+
+    def __init__(self):
+        self.self_times: Dict[str, float] = {}  # 顶层包 → 首次导入的自身耗时(秒)
+        self.total_time: float = 0.0  # 统计期间新导入模块的总耗时(秒)
+        self._stack: List[List[float]] = []  # 正在导入的模块: [开始时间, 子模块耗时]
+        self._original = None
+        self._original_import_module = None
+        self._thread_id: Optional[int] = None
+
+    def __enter__(self) -> 'ImportTimer':
+        self._thread_id = threading.get_ident()
+        self._original = builtins.__import__
+        self._original_import_module = importlib.import_module
+        builtins.__import__ = self._import
+        importlib.import_module = self._import_module
+        return self
+
+    def __exit__(self, *exc) -> None:
+        builtins.__import__ = self._original
+        importlib.import_module = self._original_import_module
+        self._original = None
+        self._original_import_module = None
+
+    def _import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        # 已导入的模块和相对导入不计时（相对导入的模块名需要解析包名，统一归入调用方）
+        if level != 0 or name in sys.modules or threading.get_ident() != self._thread_id:
+            return self._original(name, globals, locals, fromlist, level)
+        return self._timed(name, self._original, name, globals, locals, fromlist, level)
+
+    def _import_module(self, name, package=None):
+        # import_module的相对模块名可直接按package解析，按解析后的顶层包计时
+        absolute = importlib.util.resolve_name(name, package) if name.startswith('.') else name
+        if absolute in sys.modules or threading.get_ident() != self._thread_id:
+            return self._original_import_module(name, package)
+        return self._timed(absolute, self._original_import_module, name, package)
+
+    def _timed(self, name, func, *args):
+        """执行一次首次导入，记录自身耗时（扣除其间嵌套导入的耗时）"""
+        frame = [time.perf_counter(), 0.0]
+        self._stack.append(frame)
+        try:
+            return func(*args)
+        finally:
+            self._stack.pop()
+            elapsed = time.perf_counter() - frame[0]
+            package = name.partition('.')[0]
+            self.self_times[package] = self.self_times.get(package, 0.0) + elapsed - frame[1]
+            if self._stack:
+                self._stack[-1][1] += elapsed
+            else:
+                self.total_time += elapsed
+
+    def top(self, count: int = 8) -> List[Tuple[str, float]]:
+        """
+        获取自身耗时最长的顶层包
+
+        Returns:
+            List: (包名, 耗时秒) 列表，按耗时降序
+        """
+        return sorted(self.self_times.items(), key=lambda item: item[1], reverse=True)[:count]
+
+
+class StartupProfiler:
+    """启动耗时统计"""
+
+    def __init__(self):
+        self.start_time = time.perf_counter()
+        self.phases: List[Tuple[str, float]] = []  # (阶段名称, 耗时秒)，按完成顺序
+        self.marks: Dict[str, float] = {}  # 时间点名称 → 距启动的秒数
+        self.imports: Optional[ImportTimer] = None
+        self._lock = threading.Condition()  # 保护阶段和时间点记录，记录时间点时通知等待方
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """统计一个启动阶段的耗时（可在后台线程中使用）"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_phase(name, time.perf_counter() - start)
+
+    @contextmanager
+    def imports_phase(self, name: str) -> Iterator[None]:
+        """统计一个导入阶段的耗时，并按顶层包记录本线程的导入耗时"""
+        timer = self.imports or ImportTimer()
+        self.imports = timer
+        with self.phase(name), timer:
+            yield
+
+    def add_phase(self, name: str, seconds: float) -> None:
+        with self._lock:
+            self.phases.append((name, seconds))
+
+    def mark(self, name: str) -> float:
+        """
+        记录一个时间点（如界面首次显示、模型就绪）
+
+        Returns:
+            float: 距启动的秒数
+        """
+        elapsed = time.perf_counter() - self.start_time
+        with self._lock:
+            self.marks.setdefault(name, elapsed)
+            self._lock.notify_all()
+        return elapsed
+
+    def wait_for_mark(self, name: str, timeout: Optional[float] = None) -> bool:
+        """
+        等待某个时间点被记录
+
+        Returns:
+            bool: 是否已记录（超时返回False）
+        """
+        with self._lock:
+            return self._lock.wait_for(lambda: name in self.marks, timeout)
+
+    def log_breakdown(self, logger) -> None:
+        """输出启动耗时分解"""
+        with self._lock:
+            phases = list(self.phases)
+            marks = sorted(self.marks.items(), key=lambda item: item[1])
+        logger.info("启动耗时分解:")
+        for name, seconds in phases:
+            logger.info(f"  {name:<12} {seconds * 1000:8.1f}ms")
+        for name, seconds in marks:
+            logger.info(f"  @{name:<11} {seconds * 1000:8.1f}ms (距启动)")
+        if self.imports is not None and self.imports.self_times:
+            top = ", ".join(f"{package} {seconds * 1000:.0f}ms" for package, seconds in self.imports.top())
+            logger.info(f"  导入耗时最长的包: {top}")
+
+
+# 全局启动耗时统计（创建时刻即启动计时起点）
+startup_profiler = StartupProfiler()
@@ -0,0 +1,352 @@
+"""
+Fisher钓鱼模块事件驱动状态机
+以转换表描述钓鱼流程：消费检测事件和定时器事件，输出需要执行的动作。
+状态机本身不截图、不推理、不操作键鼠，时间由调用方传入，可离线回放和测试。
+
+状态流转规则（由转换表保证，无需历史记录校验）:
+- 0(等待上钩) 只能出现在 1(鱼上钩) 之前
+- 1 首次出现后进入确认阶段，之后再累计确认 HOOK_CONFIRMATIONS 次才算真正上钩（共 HOOK_CONFIRMATIONS+1 次，与原实现一致）
+- 2、3(提线中) 只能在上钩之后出现，两者之间可任意切换
+- 4(成功) 只能在 2、3 之后出现
+
+作者: AutoFish Team
+版本: v1.0
+创建时间: 2026-10-16
+"""
+
+from collections import namedtuple
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Optional, Tuple, Dict, List
+
+
+class Phase(Enum):
+    """钓鱼流程阶段"""
+    INITIAL = "等待初始状态"
+    WAITING_HOOK = "等待上钩"
+    HOOK_CONFIRMING = "确认上钩"
+    HOOKED = "鱼上钩"
+    PULLING_NORMAL = "提线中_耐力未到二分之一"
+    PULLING_HALFWAY = "提线中_耐力已到二分之一"
+    SUCCESS = "钓鱼成功"
+    CASTING = "抛竿"
+    RECASTING = "重新抛竿"
+    FAILED = "失败"
+
+
+class Action(Enum):
+    """状态机输出的动作"""
+    START_CLICKING = "启动快速点击"
+    RESUME_CLICKING = "恢复点击"
+    PAUSE_CLICKING = "暂停点击"
+    STOP_CLICKING = "停止点击"
+    START_KEY_CYCLE = "启动按键循环"
+    STOP_KEY_CYCLE = "停止按键循环"
+    PRESS_SUCCESS_KEY = "按F键"
+    CAST_ROD = "抛竿"
+    MOVE_MOUSE_AND_CAST = "移动鼠标并抛竿"
+    HOLD = "暂停检测"
+    COMPLETE_ROUND = "完成一轮"
+
+
+# 定时器名称
+TIMER_ROUND_TIMEOUT = "round_timeout"  # 初始状态/等待上钩超时
+TIMER_MOUSE_MOVE = "mouse_move"  # 初始状态检测一段时间后移动鼠标重新抛竿
+TIMER_HOOK_TIMEOUT = "hook_timeout"  # 上钩后未进入提线的超时
+TIMER_SUCCESS_KEY = "success_key"  # 成功后首次按F键
+TIMER_SUCCESS_CHECK = "success_check"  # 按F键后检查成功状态是否消失
+TIMER_RECAST = "recast"  # 重新抛竿前等待操作停止
+TIMER_CAST_DONE = "cast_done"  # 抛竿动画完成
+
+# 由 success_check 定时器派生的事件
+EVENT_SUCCESS_CLEARED = "success_cleared"  # 成功状态已消失
+EVENT_SUCCESS_RETRY = "success_retry"  # 成功状态仍存在，再按一次F键
+EVENT_SUCCESS_EXHAUSTED = "success_exhausted"  # 已达最大按键次数
+
+# 需要累计确认的状态1次数
+HOOK_CONFIRMATIONS = 3
+
+# 上钩后未进入提线阶段的超时时间(秒)
+HOOK_TIMEOUT = 3.0
+
+# 抛竿前等待时间(秒)
+RECAST_DELAY = 0.5
+
+# 抛竿动画时间(秒)
+CAST_ANIMATION_TIME = 1.0
+
+
+@dataclass(frozen=True)
+class Transition:
+    """转换表条目"""
+    target: Optional[Phase] = None  # 目标阶段，None表示停留在当前阶段（不触发进入动作）
+    actions: Tuple[Tuple[Action, Optional[str]], ...] = ()  # (动作, 参数名)，参数名在delays中查找
+    timers: Tuple[str, ...] = ()  # 额外启动的定时器
+    confirm: int = 1  # 本阶段内累计出现次数达到该值才触发
+
+
+# 状态机单步输出的动作及参数（HOLD的参数为暂停秒数）
+Effect = namedtuple('Effect', ['action', 'value'])
+
+
+# 各阶段需要检测的状态（作为类别过滤下推到模型推理），空元组表示该阶段不检测
+PHASE_CLASSES: Dict[Phase, Tuple[int, ...]] = {
+    Phase.INITIAL: (0, 1),
+    Phase.WAITING_HOOK: (0, 1),
+    Phase.HOOK_CONFIRMING: (1, 2, 3),
+    Phase.HOOKED: (1, 2, 3),
+    Phase.PULLING_NORMAL: (2, 3, 4),
+    Phase.PULLING_HALFWAY: (2, 3, 4),
+    Phase.SUCCESS: (4,),
+    Phase.CASTING: (),
+    Phase.RECASTING: (),
+    Phase.FAILED: (),
+}
+
+# 进入阶段时执行的动作
+PHASE_ENTRY_ACTIONS: Dict[Phase, Tuple[Tuple[Action, Optional[str]], ...]] = {
+    Phase.HOOKED: ((Action.START_CLICKING, None),),
+    Phase.SUCCESS: ((Action.STOP_KEY_CYCLE, None), (Action.STOP_CLICKING, None)),
+    Phase.CASTING: ((Action.CAST_ROD, None),),
+    Phase.RECASTING: ((Action.STOP_CLICKING, None), (Action.STOP_KEY_CYCLE, None)),
+}
+
+# 进入阶段时启动的定时器
+PHASE_ENTRY_TIMERS: Dict[Phase, Tuple[str, ...]] = {
+    Phase.INITIAL: (TIMER_ROUND_TIMEOUT, TIMER_MOUSE_MOVE),
+    Phase.HOOKED: (TIMER_HOOK_TIMEOUT,),
+    Phase.SUCCESS: (TIMER_SUCCESS_KEY,),
+    Phase.CASTING: (TIMER_CAST_DONE,),
+    Phase.RECASTING: (TIMER_RECAST,),
+}
+
+_TO_PULLING_NORMAL = Transition(Phase.PULLING_NORMAL,
+                                ((Action.RESUME_CLICKING, None), (Action.START_KEY_CYCLE, None)))
+_TO_PULLING_HALFWAY = Transition(Phase.PULLING_HALFWAY,
+                                 ((Action.PAUSE_CLICKING, None), (Action.HOLD, 'state3_pause')))
+
+# 检测事件转换表 (阶段, 检测到的状态) → 转换；表中没有的组合忽略
+DETECTION_TRANSITIONS: Dict[Tuple[Phase, int], Transition] = {
+    (Phase.INITIAL, 0): Transition(Phase.WAITING_HOOK),
+    (Phase.INITIAL, 1): Transition(Phase.HOOK_CONFIRMING),
+    (Phase.WAITING_HOOK, 1): Transition(Phase.HOOK_CONFIRMING),
+    (Phase.HOOK_CONFIRMING, 1): Transition(Phase.HOOKED, confirm=HOOK_CONFIRMATIONS),
+    (Phase.HOOKED, 2): _TO_PULLING_NORMAL,
+    (Phase.HOOKED, 3): _TO_PULLING_HALFWAY,
+    (Phase.PULLING_NORMAL, 3): _TO_PULLING_HALFWAY,
+    (Phase.PULLING_NORMAL, 4): Transition(Phase.SUCCESS),
+    (Phase.PULLING_HALFWAY, 2): _TO_PULLING_NORMAL,
+    (Phase.PULLING_HALFWAY, 4): Transition(Phase.SUCCESS),
+}
+
+# 定时器事件转换表 (阶段, 定时器/派生事件) → 转换；表中没有的组合丢弃（定时器已过期）
+TIMER_TRANSITIONS: Dict[Tuple[Phase, str], Transition] = {
+    (Phase.INITIAL, TIMER_ROUND_TIMEOUT): Transition(Phase.FAILED),
+    (Phase.WAITING_HOOK, TIMER_ROUND_TIMEOUT): Transition(Phase.FAILED),
+    (Phase.HOOK_CONFIRMING, TIMER_ROUND_TIMEOUT): Transition(Phase.FAILED),
+    (Phase.INITIAL, TIMER_MOUSE_MOVE): Transition(actions=((Action.MOVE_MOUSE_AND_CAST, None),)),
+    (Phase.HOOKED, TIMER_HOOK_TIMEOUT): Transition(Phase.RECASTING),
+    (Phase.SUCCESS, TIMER_SUCCESS_KEY): Transition(actions=((Action.PRESS_SUCCESS_KEY, None),),
+                                                   timers=(TIMER_SUCCESS_CHECK,)),
+    (Phase.SUCCESS, EVENT_SUCCESS_RETRY): Transition(actions=((Action.PRESS_SUCCESS_KEY, None),),
+                                                     timers=(TIMER_SUCCESS_CHECK,)),
+    (Phase.SUCCESS, EVENT_SUCCESS_CLEARED): Transition(Phase.CASTING),
+    (Phase.SUCCESS, EVENT_SUCCESS_EXHAUSTED): Transition(Phase.CASTING),
+    (Phase.RECASTING, TIMER_RECAST): Transition(actions=((Action.CAST_ROD, None),),
+                                                timers=(TIMER_CAST_DONE,)),
+    (Phase.RECASTING, TIMER_CAST_DONE): Transition(Phase.INITIAL),
+    (Phase.CASTING, TIMER_CAST_DONE): Transition(Phase.INITIAL, ((Action.COMPLETE_ROUND, None),)),
+}
+
+
+@dataclass
+class StepResult:
+    """状态机单步处理结果"""
+    effects: List[Effect] = field(default_factory=list)  # 需要执行的动作
+    transitions: List[Tuple[Phase, Phase, str]] = field(default_factory=list)  # (原阶段, 新阶段, 触发原因)
+
+
+class FishingStateMachine:
+    """钓鱼流程状态机"""
+
+    def __init__(self, delays: Dict[str, float], max_success_attempts: int = 3):
+        """
+        初始化状态机
+
+        Args:
+            delays: 定时器和暂停时长(秒)，键为定时器名称或HOLD参数名
+            max_success_attempts: 成功后按F键的最大次数
+        """
+        self.delays = dict(delays)
+        self.max_success_attempts = max_success_attempts
+
+        self.phase: Phase = Phase.INITIAL
+        self.error_message: str = ""
+        self._deadlines: Dict[str, float] = {}  # 定时器名称 → 到期时间
+        self._hits: Dict[int, int] = {}  # 本阶段内各状态累计出现次数
+        self._success_visible: bool = True  # 最近一次检测是否仍能看到成功状态
+        self._success_attempts: int = 0  # 已按F键次数
+
+    @staticmethod
+    def default_delays(timing_config) -> Dict[str, float]:
+        """
+        根据时间配置生成定时器时长
+
+        Args:
+            timing_config: 时间配置对象 (TimingConfig)
+
+        Returns:
+            Dict[str, float]: 定时器和暂停时长
+        """
+        return {
+            TIMER_ROUND_TIMEOUT: timing_config.initial_timeout,
+            TIMER_MOUSE_MOVE: timing_config.initial_mouse_move_timeout,
+            TIMER_HOOK_TIMEOUT: HOOK_TIMEOUT,
+            TIMER_SUCCESS_KEY: timing_config.success_wait_time,
+            TIMER_SUCCESS_CHECK: timing_config.success_f_key_interval,
+            TIMER_RECAST: RECAST_DELAY,
+            TIMER_CAST_DONE: CAST_ANIMATION_TIME,
+            'state3_pause': timing_config.state3_pause_time,
+        }
+
+    @property
+    def detection_classes(self) -> Tuple[int, ...]:
+        """当前阶段需要检测的状态"""
+        return PHASE_CLASSES[self.phase]
+
+    @property
+    def is_failed(self) -> bool:
+        """状态机是否已失败停止"""
+        return self.phase == Phase.FAILED
+
+    def start_round(self, now: float) -> StepResult:
+        """
+        开始新一轮钓鱼
+
+        Args:
+            now: 当前时间(秒，单调时钟)
+
+        Returns:
+            StepResult: 处理结果
+        """
+        result = StepResult()
+        self._deadlines.clear()
+        self._enter(Phase.INITIAL, now, "开始新一轮", result)
+        return result
+
+    def next_deadline(self) -> Optional[float]:
+        """最近一个定时器的到期时间，没有定时器时返回None"""
+        return min(self._deadlines.values()) if self._deadlines else None
+
+    def handle_detection(self, state: Optional[int], now: float) -> StepResult:
+        """
+        处理一次检测结果
+
+        Args:
+            state: 检测到的状态编号，未检测到时为None
+            now: 检测时间(秒，单调时钟)
+
+        Returns:
+            StepResult: 处理结果
+        """
+        result = StepResult()
+        if self.phase == Phase.SUCCESS:
+            self._success_visible = state == 4
+        if state is None:
+            return result
+
+        transition = DETECTION_TRANSITIONS.get((self.phase, state))
+        if transition is None:
+            return result
+
+        hits = self._hits.get(state, 0) + 1
+        self._hits[state] = hits
+        if hits >= transition.confirm:
+            self._apply(transition, now, f"状态{state}", result)
+        return result
+
+    def poll_timers(self, now: float) -> StepResult:
+        """
+        处理所有已到期的定时器
+
+        Args:
+            now: 当前时间(秒，单调时钟)
+
+        Returns:
+            StepResult: 处理结果
+        """
+        result = StepResult()
+        while True:
+            due = [name for name, deadline in self._deadlines.items() if deadline <= now]
+            if not due:
+                return result
+            name = min(due, key=self._deadlines.get)
+            del self._deadlines[name]
+
+            event = self._resolve_timer_event(name)
+            transition = TIMER_TRANSITIONS.get((self.phase, event))
+            if transition is None:
+                continue  # 定时器所属阶段已结束
+            if transition.target == Phase.FAILED:
+                self.error_message = f"{self.phase.value}超时 ({self.delays.get(name, 0):.0f}秒)"
+            self._apply(transition, now, event, result)
+
+    def fail(self, message: str, now: float) -> StepResult:
+        """
+        动作执行失败时停止状态机
+
+        Args:
+            message: 错误信息
+            now: 当前时间(秒，单调时钟)
+
+        Returns:
+            StepResult: 处理结果
+        """
+        result = StepResult()
+        self.error_message = message
+        self._enter(Phase.FAILED, now, message, result)
+        return result
+
+    def _resolve_timer_event(self, name: str) -> str:
+        """将成功检查定时器转换为派生事件"""
+        if name != TIMER_SUCCESS_CHECK:
+            return name
+        if not self._success_visible:
+            return EVENT_SUCCESS_CLEARED
+        if self._success_attempts >= self.max_success_attempts:
+            return EVENT_SUCCESS_EXHAUSTED
+        return EVENT_SUCCESS_RETRY
+
+    def _apply(self, transition: Transition, now: float, reason: str, result: StepResult) -> None:
+        """执行转换：转换动作 → 进入新阶段 → 额外定时器"""
+        for action, param in transition.actions:
+            self._emit(action, param, result)
+        if transition.target is not None:
+            self._enter(transition.target, now, reason, result)
+        for timer in transition.timers:
+            self._deadlines[timer] = now + self.delays.get(timer, 0.0)
+
+    def _enter(self, phase: Phase, now: float, reason: str, result: StepResult) -> None:
+        """进入新阶段"""
+        result.transitions.append((self.phase, phase, reason))
+        self.phase = phase
+        self._hits.clear()
+        if phase == Phase.FAILED:
+            self._deadlines.clear()
+            return
+
+        if phase == Phase.SUCCESS:
+            self._success_visible = True
+            self._success_attempts = 0
+
+        for action, param in PHASE_ENTRY_ACTIONS.get(phase, ()):
+            self._emit(action, param, result)
+        for timer in PHASE_ENTRY_TIMERS.get(phase, ()):
+            self._deadlines[timer] = now + self.delays.get(timer, 0.0)
+
+    def _emit(self, action: Action, param: Optional[str], result: StepResult) -> None:
+        """输出动作"""
+        if action == Action.PRESS_SUCCESS_KEY:
+            self._success_attempts += 1
+        value = self.delays.get(param, 0.0) if param else None
+        result.effects.append(Effect(action, value))
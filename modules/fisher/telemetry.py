@@ -0,0 +1,419 @@
+"""
+Fisher钓鱼模块结构化遥测
+与文本日志并行记录结构化事件，供离线统计（每小时轮数、上钩耗时分布、检测耗时分位数等），
+不再需要从中文日志中匹配文本。
+
+事件类型:
+- detection:  每次检测的阶段、检测状态（未检测到为-1）、置信度、检测耗时、是否复用上次结果
+- transition: 阶段转换（原阶段、新阶段、触发原因）
+- input:      状态机输出的输入动作及参数
+- round:      每轮结束（轮次、结果、本轮耗时、等待上钩到上钩的耗时）
+
+文件格式（列式分批，每个会话一个 .ftl 文件）:
+    文件头 b'FTL1'，之后为若干批次；每批: 4字节小端头长度 + JSON头 + 各列连续的原始数组字节。
+    JSON头含事件类型、条数、各列名称和dtype；字符串列按类别编码为uint16，头中附带截至本批的完整类别表。
+检测线程只把事件元组追加到内存缓冲区，写入线程按flush_interval把缓冲区转为列数组后追加到文件，
+文件在每批后刷新，进程异常退出最多丢失一个周期的事件（末尾不完整的批次读取时忽略）。
+文件以独占方式创建，多会话同时开始时重名的文件自动加序号，不会互相覆盖；读取目录时跳过损坏的文件。
+
+作者: AutoFish Team
+版本: v1.0
+创建时间: 2026-10-16
+"""
+
+import json
+import struct
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, Dict, List, Tuple, Any, Union
+
+import numpy as np
+
+# 导入统一日志系统
+import sys
+sys.path.append(str(Path(__file__).parent.parent))
+from logger import setup_logger
+
+# 设置日志记录器
+logger = setup_logger('fisher_telemetry')
+
+FILE_MAGIC = b'FTL1'
+FILE_SUFFIX = '.ftl'
+_HEADER_LEN = struct.Struct('<I')
+_MAX_NAME_ATTEMPTS = 100  # 同名遥测文件已存在时最多尝试的序号
+
+# 类别编码列的dtype标记
+CATEGORY = 'cat'
+_CATEGORY_DTYPE = np.dtype('<u2')
+
+# 事件类型 → 列定义 (列名, dtype)
+SCHEMAS: Dict[str, Tuple[Tuple[str, str], ...]] = {
+    'detection': (('time', '<f8'), ('phase', CATEGORY), ('state', '<i2'), ('confidence', '<f4'),
+                  ('latency_ms', '<f4'), ('cached', 'u1')),
+    'transition': (('time', '<f8'), ('from_phase', CATEGORY), ('to_phase', CATEGORY), ('reason', CATEGORY)),
+    'input': (('time', '<f8'), ('action', CATEGORY), ('value', '<f4')),
+    'round': (('time', '<f8'), ('round', '<i4'), ('outcome', CATEGORY), ('duration_s', '<f4'),
+              ('time_to_hook_s', '<f4')),
+}
+
+# 轮次结果
+ROUND_SUCCESS = "success"
+ROUND_FAILED = "failed"
+ROUND_STOPPED = "stopped"
+
+
+class TelemetryWriter:
+    """遥测事件写入器"""
+
+    def __init__(self, config):
+        """
+        初始化写入器（start后才开始记录）
+
+        Args:
+            config: 遥测配置 (TelemetryConfig)
+        """
+        self.config = config
+        self.path: Optional[Path] = None
+
+        self._buffers: Dict[str, List[tuple]] = {name: [] for name in SCHEMAS}
+        self._lock = threading.Lock()
+        self._categories: Dict[Tuple[str, str], Dict[str, int]] = {}
+        self._file = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.active: bool = False  # 是否在记录（未启动或已停止时记录调用直接返回）
+
+        # 统计信息
+        self.events: Dict[str, int] = {name: 0 for name in SCHEMAS}
+        self.batches: int = 0
+        self.bytes_written: int = 0
+
+    @property
+    def is_running(self) -> bool:
+        """写入线程是否在运行"""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, name: Optional[str] = None) -> Optional[str]:
+        """
+        新建遥测文件并启动写入线程
+
+        Args:
+            name: 文件名（不含扩展名），None表示按时间命名；文件已存在时追加序号
+
+        Returns:
+            str: 遥测文件路径，未启用或创建失败时返回None
+        """
+        if not self.config.enabled or self.is_running:
+            return None
+        output_dir = Path(self.config.output_dir)
+        stem = name or datetime.now().strftime('session_%Y%m%d_%H%M%S')
+        try:
+            output_dir.mkdir(parents=True, exist_ok=True)
+            self._file = None
+            for index in range(1, _MAX_NAME_ATTEMPTS + 1):
+                self.path = output_dir / f"{stem if index == 1 else f'{stem}_{index}'}{FILE_SUFFIX}"
+                try:
+                    self._file = open(self.path, 'xb')
+                    break
+                except FileExistsError:
+                    continue
+            if self._file is None:
+                raise FileExistsError(f"遥测文件已存在: {output_dir / stem}{FILE_SUFFIX}")
+            self._file.write(FILE_MAGIC)
+        except OSError as e:
+            logger.error(f"遥测文件创建失败: {e}")
+            return None
+
+        self._categories = {}
+        for buffer in self._buffers.values():
+            buffer.clear()
+        self._stop.clear()
+        self.active = True
+        self._thread = threading.Thread(target=self._run, name="TelemetryWriter", daemon=True)
+        self._thread.start()
+        return str(self.path)
+
+    def stop(self, timeout: float = 2.0) -> None:
+        """写入剩余事件并关闭文件"""
+        self.active = False
+        if not self.is_running:
+            return
+        self._stop.set()
+        self._thread.join(timeout=timeout)
+        self._thread = None
+        logger.info(f"遥测记录结束: {self.path} (检测{self.events['detection']}条, "
+                    f"阶段转换{self.events['transition']}条, 轮次{self.events['round']}条, "
+                    f"{self.bytes_written / 1024:.0f}KB)")
+
+    # ---- 事件记录（在检测线程中调用，只追加元组） ----
+
+    def detection(self, phase: str, state: int, confidence: float, latency_ms: float, cached: bool) -> None:
+        """记录一次检测（未检测到时state为-1、confidence为0）"""
+        if self.active:
+            with self._lock:
+                self._buffers['detection'].append((time.time(), phase, state, confidence, latency_ms, cached))
+
+    def transition(self, from_phase: str, to_phase: str, reason: str) -> None:
+        """记录一次阶段转换"""
+        if self.active:
+            with self._lock:
+                self._buffers['transition'].append((time.time(), from_phase, to_phase, reason))
+
+    def input_action(self, action: str, value: Optional[float] = None) -> None:
+        """记录一个输入动作（无参数时value为NaN）"""
+        if self.active:
+            with self._lock:
+                self._buffers['input'].append((time.time(), action, np.nan if value is None else value))
+
+    def round_end(self, round_index: int, outcome: str, duration: Optional[float],
+                  time_to_hook: Optional[float]) -> None:
+        """记录一轮结束（未知的耗时为NaN）"""
+        if self.active:
+            with self._lock:
+                self._buffers['round'].append((time.time(), round_index, outcome,
+                                               np.nan if duration is None else duration,
+                                               np.nan if time_to_hook is None else time_to_hook))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取写入统计
+
+        Returns:
+            Dict: 文件路径、各类事件数、批次数和写入字节数
+        """
+        return {
+            'path': str(self.path) if self.path else None,
+            'events': dict(self.events),
+            'batches': self.batches,
+            'bytes': self.bytes_written
+        }
+
+    # ---- 写入线程 ----
+
+    def _run(self) -> None:
+        """写入线程主循环"""
+        try:
+            while not self._stop.wait(self.config.flush_interval):
+                self._flush()
+            self._flush()
+        except Exception as e:
+            self.active = False
+            logger.error(f"遥测写入失败: {e}")
+        finally:
+            self._file.close()
+            self._file = None
+
+    def _flush(self) -> None:
+        """把缓冲区中的事件按类型写成列式批次"""
+        with self._lock:
+            pending = {name: rows for name, rows in self._buffers.items() if rows}
+            for name in pending:
+                self._buffers[name] = []
+        if not pending:
+            return
+        for name, rows in pending.items():
+            self._write_batch(name, rows)
+            self.events[name] += len(rows)
+        self._file.flush()
+
+    def _write_batch(self, event_type: str, rows: List[tuple]) -> None:
+        """写入一个批次"""
+        columns = []
+        arrays = []
+        for (column, dtype), values in zip(SCHEMAS[event_type], zip(*rows)):
+            if dtype == CATEGORY:
+                mapping = self._categories.setdefault((event_type, column), {})
+                array = np.fromiter((mapping.setdefault(v, len(mapping)) for v in values),
+                                    dtype=_CATEGORY_DTYPE, count=len(rows))
+                columns.append({'name': column, 'dtype': CATEGORY, 'categories': list(mapping)})
+            else:
+                array = np.asarray(values, dtype=dtype)
+                columns.append({'name': column, 'dtype': dtype})
+            arrays.append(array)
+
+        header = json.dumps({'type': event_type, 'count': len(rows), 'columns': columns},
+                            ensure_ascii=False).encode('utf-8')
+        self._file.write(_HEADER_LEN.pack(len(header)))
+        self._file.write(header)
+        for array in arrays:
+            self._file.write(array.tobytes())
+        self.batches += 1
+        self.bytes_written += _HEADER_LEN.size + len(header) + sum(a.nbytes for a in arrays)
+
+
+# ---- 读取 ----
+
+def _telemetry_files(path: Union[str, Path]) -> List[Path]:
+    path = Path(path)
+    if path.is_dir():
+        return sorted(path.glob(f"*{FILE_SUFFIX}"))
+    return [path]
+
+
+def _read_file(path: Path, parts: Dict[str, Dict[str, List[np.ndarray]]],
+               categories: Dict[Tuple[str, str], List[str]]) -> None:
+    """
+    读取一个遥测文件的全部批次，各列数组追加到parts（类别列暂存编码）
+
+    整个文件解析成功后才合并到parts和categories，损坏的文件不会留下部分数据
+
+    Raises:
+        ValueError: 不是遥测文件或文件内容损坏
+    """
+    data = path.read_bytes()
+    if data[:len(FILE_MAGIC)] != FILE_MAGIC:
+        raise ValueError(f"不是遥测文件: {path}")
+
+    offset = len(FILE_MAGIC)
+    file_categories: Dict[Tuple[str, str], List[str]] = {}
+    file_codes: List[Tuple[str, str, np.ndarray]] = []
+    file_arrays: List[Tuple[str, str, np.ndarray]] = []
+    while offset + _HEADER_LEN.size <= len(data):
+        (header_len,) = _HEADER_LEN.unpack_from(data, offset)
+        header_end = offset + _HEADER_LEN.size + header_len
+        if header_end > len(data):
+            break
+        header = json.loads(data[offset + _HEADER_LEN.size:header_end])
+        count = header['count']
+        size = sum(count * (_CATEGORY_DTYPE.itemsize if c['dtype'] == CATEGORY else np.dtype(c['dtype']).itemsize)
+                   for c in header['columns'])
+        if header_end + size > len(data):
+            break  # 写入中断的末尾批次
+
+        event_type = header['type']
+        position = header_end
+        for column in header['columns']:
+            dtype = _CATEGORY_DTYPE if column['dtype'] == CATEGORY else np.dtype(column['dtype'])
+            array = np.frombuffer(data, dtype=dtype, count=count, offset=position)
+            position += array.nbytes
+            if column['dtype'] == CATEGORY:
+                file_categories[(event_type, column['name'])] = column['categories']
+                file_codes.append((event_type, column['name'], array))
+            else:
+                file_arrays.append((event_type, column['name'], array))
+        offset = position
+
+    # 检查类别编码都在类别表范围内（内容损坏时编码可能越界）
+    for event_type, column, codes in file_codes:
+        if len(codes) and int(codes.max()) >= len(file_categories[(event_type, column)]):
+            raise ValueError(f"类别编码越界: {event_type}.{column}")
+
+    # 类别表只增不减，按文件内最终的类别表映射到跨文件的统一类别表
+    remaps = {}
+    for key, names in file_categories.items():
+        merged = categories.setdefault(key, [])
+        index = {name: i for i, name in enumerate(merged)}
+        for name in names:
+            if name not in index:
+                index[name] = len(merged)
+                merged.append(name)
+        remaps[key] = np.array([index[name] for name in names], dtype=_CATEGORY_DTYPE)
+    for event_type, column, array in file_arrays:
+        parts.setdefault(event_type, {}).setdefault(column, []).append(array)
+    for event_type, column, codes in file_codes:
+        parts.setdefault(event_type, {}).setdefault(column, []).append(remaps[(event_type, column)][codes])
+
+
+def load_telemetry(path: Union[str, Path], decode: bool = True) -> Dict[str, Dict[str, np.ndarray]]:
+    """
+    读取遥测文件（或目录下的全部遥测文件）为NumPy列数组
+
+    Args:
+        path: 遥测文件或目录
+        decode: 是否把类别列还原为字符串数组；为False时返回编码，类别表在'categories'键下
+
+    Returns:
+        Dict: 事件类型 → {列名: 数组}，没有该类事件时不含该键（损坏的文件记录警告后跳过）
+    """
+    parts: Dict[str, Dict[str, List[np.ndarray]]] = {}
+    categories: Dict[Tuple[str, str], List[str]] = {}
+    for file_path in _telemetry_files(path):
+        try:
+            _read_file(file_path, parts, categories)
+        except (ValueError, KeyError, TypeError, struct.error) as e:
+            logger.warning(f"跳过损坏的遥测文件 {file_path}: {e}")
+
+    tables: Dict[str, Dict[str, Any]] = {}
+    for event_type, columns in parts.items():
+        table = {}
+        for column, arrays in columns.items():
+            array = np.concatenate(arrays) if len(arrays) > 1 else arrays[0].copy()
+            key = (event_type, column)
+            if decode and key in categories:
+                array = np.asarray(categories[key], dtype=object)[array]
+            table[column] = array
+        tables[event_type] = table
+    if not decode:
+        tables['categories'] = {f"{t}.{c}": names for (t, c), names in categories.items()}
+    return tables
+
+
+def load_telemetry_frames(path: Union[str, Path]) -> Dict[str, Any]:
+    """
+    读取遥测文件为pandas DataFrame（类别列为Categorical，时间列为UTC时间）
+
+    Args:
+        path: 遥测文件或目录
+
+    Returns:
+        Dict: 事件类型 → DataFrame
+    """
+    import pandas as pd
+
+    tables = load_telemetry(path, decode=False)
+    categories = tables.pop('categories')
+    frames = {}
+    for event_type, table in tables.items():
+        columns = {}
+        for column, array in table.items():
+            names = categories.get(f"{event_type}.{column}")
+            if names is not None:
+                columns[column] = pd.Categorical.from_codes(array.astype(np.int32), categories=names)
+            elif column == 'time':
+                columns[column] = pd.to_datetime(array, unit='s')
+            else:
+                columns[column] = array
+        frames[event_type] = pd.DataFrame(columns)
+    return frames
+
+
+def summarize_telemetry(tables: Dict[str, Dict[str, np.ndarray]]) -> Dict[str, Any]:
+    """
+    计算常用统计：每小时轮数、成功率、上钩耗时分布和检测耗时分位数
+
+    Args:
+        tables: load_telemetry()的结果
+
+    Returns:
+        Dict: 统计结果，耗时单位为秒/毫秒（见键名）
+    """
+    def percentiles(values):
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return None
+        p50, p90, p99 = np.percentile(values, (50, 90, 99))
+        return {'count': int(len(values)), 'mean': float(values.mean()),
+                'p50': float(p50), 'p90': float(p90), 'p99': float(p99)}
+
+    summary: Dict[str, Any] = {}
+    detections = tables.get('detection')
+    if detections:
+        times = detections['time']
+        live = detections['cached'] == 0
+        summary['detections'] = int(len(times))
+        summary['hit_rate'] = float(np.mean(detections['state'] >= 0)) if len(times) else None
+        summary['detection_latency_ms'] = percentiles(detections['latency_ms'][live].astype(np.float64))
+
+    rounds = tables.get('round')
+    if rounds and len(rounds['time']):
+        success = rounds['outcome'] == ROUND_SUCCESS
+        start = rounds['time'][0] - np.nan_to_num(rounds['duration_s'][0])
+        hours = max(rounds['time'][-1] - start, 1.0) / 3600
+        summary['rounds'] = int(len(success))
+        summary['success_rounds'] = int(success.sum())
+        summary['rounds_per_hour'] = float(success.sum() / hours)
+        summary['round_duration_s'] = percentiles(rounds['duration_s'][success].astype(np.float64))
+        summary['time_to_hook_s'] = percentiles(rounds['time_to_hook_s'].astype(np.float64))
+    return summary
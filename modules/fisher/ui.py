@@ -3,8 +3,11 @@ Fisher钓鱼模块UI界面
 包含主控制界面、状态显示窗口和设置对话框
 
 作者: AutoFish Team
-版本: v1.0
+版本: v1.0.2
 创建时间: 2024-12-28
+更新时间: 2026-10-16
+修复历史: v1.0.1 - 钓鱼控制器和模型检测器改为首次使用时获取，模型在后台加载时界面不再等待
+         v1.0.2 - 设置保存改为通过配置更新接口整体替换配置，不再直接修改正在使用的配置对象
 """
 
 import tkinter as tk
@@ -13,8 +16,8 @@ import threading
 from typing import Optional, Dict, Any
 
 from .config import fisher_config
-from .fishing_controller import fishing_controller, FishingStatus, FishingState
-from .model_detector import model_detector
+from .fishing_controller import get_fishing_controller, FishingStatus, FishingState
+from .model_detector import get_model_detector
 from .hotkey_manager import hotkey_manager
 
 
@@ -195,7 +198,7 @@ class SettingsDialog:
         info_group.pack(fill=tk.X, pady=(0, 10))
         
         # 模型信息
-        model_info = model_detector.get_detection_info()
+        model_info = get_model_detector(wait=False).get_detection_info()
         model_status = "已加载" if model_info['initialized'] else "未加载"
         ttk.Label(info_group, text=f"模型状态: {model_status}").pack(anchor=tk.W)
         
@@ -223,10 +226,14 @@ class SettingsDialog:
         """保存设置"""
         try:
             # 更新配置
-            fisher_config.ui.show_status_window = self.show_status_var.get()
-            fisher_config.hotkey.start_fishing = self.start_hotkey_var.get()
-            fisher_config.hotkey.stop_fishing = self.stop_hotkey_var.get()
-            fisher_config.hotkey.emergency_stop = self.emergency_hotkey_var.get()
+            fisher_config.update(
+                ui={'show_status_window': self.show_status_var.get()},
+                hotkey={
+                    'start_fishing': self.start_hotkey_var.get(),
+                    'stop_fishing': self.stop_hotkey_var.get(),
+                    'emergency_stop': self.emergency_hotkey_var.get()
+                }
+            )
             
             # 保存到文件
             fisher_config.save_config()
@@ -240,7 +247,7 @@ class SettingsDialog:
     def _test_settings(self) -> None:
         """测试设置"""
         # 测试模型状态
-        model_ok = model_detector.is_initialized
+        model_ok = get_model_detector(wait=False).is_initialized
         
         if model_ok:
             messagebox.showinfo("测试", "系统组件工作正常")
@@ -307,7 +314,7 @@ class FisherUI:
         self.status_window.create_window(self.root)
         
         # 设置钓鱼控制器回调
-        fishing_controller.set_status_callback(self._on_status_update)
+        get_fishing_controller().set_status_callback(self._on_status_update)
         
         # 设置热键管理器回调并启动热键监听
         hotkey_manager.set_callbacks(
@@ -391,7 +398,9 @@ class FisherUI:
         
         # 初始状态信息
         self._append_status("Fisher钓鱼模块已启动 v1.0.12")
-        self._append_status(f"模型状态: {'已加载' if model_detector.is_initialized else '未加载'}")
+        detector = get_model_detector(wait=False)
+        model_status = '已加载' if detector.is_initialized else ('未加载' if detector.ready.is_set() else '加载中')
+        self._append_status(f"模型状态: {model_status}")
         self._append_status("点击'开始钓鱼'开始自动钓鱼")
     
     def _append_status(self, message: str) -> None:
@@ -437,7 +446,7 @@ class FisherUI:
         
         # 在单独线程中启动钓鱼
         def start_thread():
-            if fishing_controller.start_fishing():
+            if get_fishing_controller().start_fishing():
                 self.root.after(0, self._on_fishing_started)
             else:
                 self.root.after(0, lambda: self._append_status("钓鱼启动失败"))
@@ -453,7 +462,7 @@ class FisherUI:
         
         # 在单独线程中停止钓鱼
         def stop_thread():
-            if fishing_controller.stop_fishing():
+            if get_fishing_controller().stop_fishing():
                 self.root.after(0, self._on_fishing_stopped)
             else:
                 self.root.after(0, lambda: self._append_status("钓鱼停止失败"))
@@ -480,7 +489,7 @@ class FisherUI:
         self._append_status("🚨 紧急停止！")
         
         # 停止钓鱼控制器
-        fishing_controller.emergency_stop()
+        get_fishing_controller().emergency_stop()
         
         # 更新UI状态
         self.is_running = False
@@ -569,7 +578,7 @@ class FisherUI:
         """窗口关闭事件"""
         if self.is_running:
             if messagebox.askokcancel("退出", "钓鱼正在运行中，确定要退出吗？"):
-                fishing_controller.emergency_stop()
+                get_fishing_controller().emergency_stop()
                 self.root.quit()
         else:
             self.root.quit()
@@ -594,7 +603,7 @@ class FisherUI:
         
         # 停止钓鱼
         if self.is_running:
-            fishing_controller.emergency_stop()
+            get_fishing_controller().emergency_stop()
         
         # 销毁状态窗口
         if self.status_window:
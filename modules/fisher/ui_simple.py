@@ -3,11 +3,16 @@ Fisher钓鱼模块UI界面 - 简单美化版本
 在现有功能基础上进行界面美化，不添加新功能
 
 作者: AutoFish Team
-版本: v1.0.25
+版本: v1.0.27
 创建时间: 2025-01-17
-更新时间: 2025-01-17
+更新时间: 2026-10-16
 
 修复历史:
+v1.0.27: 设置保存改为通过配置更新接口整体替换配置，不再直接修改正在使用的配置对象
+         退出清理时只在钓鱼进行中紧急停止控制器，不再调用不存在的cleanup导致热键和状态窗口未清理
+v1.0.26: 启动优化 - 界面先显示，模型在后台加载
+         - 钓鱼控制器和模型检测器改为首次使用时获取，导入界面模块不再加载模型
+         - 模型加载期间显示"加载中"，加载完成后在日志区显示结果和耗时
 v1.0.25: UI显示优化 - 等待初始状态时隐藏成功状态检测结果
          - 等待初始状态时如果检测到状态4，不显示检测结果
          - 避免"等待初始状态|检测:钓鱼成功状态"的混淆显示
@@ -21,8 +26,8 @@ import threading
 from typing import Optional, Dict, Any
 
 from .config import fisher_config
-from .fishing_controller import fishing_controller, FishingStatus, FishingState
-from .model_detector import model_detector
+from .fishing_controller import get_fishing_controller, FishingStatus, FishingState
+from .model_detector import get_model_detector
 from .hotkey_manager import hotkey_manager
 
 
@@ -275,7 +280,7 @@ class SettingsDialog:
         info_content.pack(fill=tk.X, padx=15, pady=10)
         
         # 模型状态
-        model_info = model_detector.get_detection_info()
+        model_info = get_model_detector(wait=False).get_detection_info()
         model_status = "✅ 已加载" if model_info['initialized'] else "❌ 未加载"
         
         tk.Label(
@@ -355,10 +360,18 @@ class SettingsDialog:
     
     def _save_settings(self) -> None:
         # 保存设置逻辑（与原版相同）
-        fisher_config.ui.show_status_window = self.show_status_var.get()
-        fisher_config.hotkey.start_fishing = self.start_hotkey_var.get()
-        fisher_config.hotkey.stop_fishing = self.stop_hotkey_var.get()
-        fisher_config.hotkey.emergency_stop = self.emergency_hotkey_var.get()
+        try:
+            fisher_config.update(
+                ui={'show_status_window': self.show_status_var.get()},
+                hotkey={
+                    'start_fishing': self.start_hotkey_var.get(),
+                    'stop_fishing': self.stop_hotkey_var.get(),
+                    'emergency_stop': self.emergency_hotkey_var.get()
+                }
+            )
+        except ValueError as e:
+            messagebox.showerror("错误", f"设置无效: {e}")
+            return
         
         # 保存到配置文件
         fisher_config.save_config()
@@ -421,7 +434,7 @@ class FisherUI:
         self.status_window.create_window(self.root)
         
         # 设置钓鱼控制器状态更新回调
-        fishing_controller.set_status_callback(self._on_status_update)
+        get_fishing_controller().set_status_callback(self._on_status_update)
         
         # 启动热键监听
         try:
@@ -611,12 +624,28 @@ class FisherUI:
         
         # 初始状态信息
         self._append_status("🎉 Fisher钓鱼模块已启动 v1.0.14")
-        model_status = "✅ 已加载" if model_detector.is_initialized else "❌ 未加载"
+        detector = get_model_detector(wait=False)
+        if detector.ready.is_set():
+            model_status = "✅ 已加载" if detector.is_initialized else "❌ 未加载"
+        else:
+            model_status = "⏳ 加载中..."
+            self.root.after(200, self._poll_model_ready)
         self._append_status(f"🤖 模型状态: {model_status}")
         self._append_status("💡 点击'开始钓鱼'开始自动钓鱼")
         self._append_status(f"⌨️ 热键: {fisher_config.hotkey.start_fishing}=开始/停止, {fisher_config.hotkey.emergency_stop}=紧急停止")
         self._append_status("📌 提示: 点击左上角📌按钮可设置窗口置顶，在游戏中也能看到日志")
     
+    def _poll_model_ready(self) -> None:
+        """模型后台加载期间定期检查就绪信号（在界面线程中执行）"""
+        detector = get_model_detector(wait=False)
+        if not detector.ready.is_set():
+            self.root.after(200, self._poll_model_ready)
+            return
+        if detector.is_initialized:
+            self._append_status(f"✅ 模型加载完成 ({detector.load_time:.1f}秒)")
+        else:
+            self._append_status("❌ 模型加载失败，请查看日志")
+    
     def _add_hover_effect(self, button, normal_color):
         """添加按钮悬停效果"""
         def on_enter(e):
@@ -678,7 +707,7 @@ class FisherUI:
         self._append_status("🚀 正在启动钓鱼...")
         
         def start_thread():
-            if fishing_controller.start_fishing():
+            if get_fishing_controller().start_fishing():
                 self.root.after(0, self._on_fishing_started)
             else:
                 self.root.after(0, lambda: self._append_status("❌ 钓鱼启动失败"))
@@ -692,7 +721,7 @@ class FisherUI:
         self._append_status("⏹ 正在停止钓鱼...")
         
         def stop_thread():
-            if fishing_controller.stop_fishing():
+            if get_fishing_controller().stop_fishing():
                 self.root.after(0, self._on_fishing_stopped)
             else:
                 self.root.after(0, lambda: self._append_status("❌ 钓鱼停止失败"))
@@ -709,7 +738,7 @@ class FisherUI:
     
     def _emergency_stop(self) -> None:
         self._append_status("🚨 紧急停止！")
-        fishing_controller.emergency_stop()
+        get_fishing_controller().emergency_stop()
         
         self.is_running = False
         self.start_button.config(state=tk.NORMAL)
@@ -798,7 +827,7 @@ class FisherUI:
     def _on_closing(self) -> None:
         if self.is_running:
             if messagebox.askokcancel("退出", "钓鱼正在运行中，确定要退出吗？"):
-                fishing_controller.stop_fishing()
+                get_fishing_controller().stop_fishing()
                 self.cleanup()
                 self.root.destroy()
         else:
@@ -813,8 +842,9 @@ class FisherUI:
     
     def cleanup(self) -> None:
         try:
-            if hasattr(fishing_controller, 'cleanup'):
-                fishing_controller.cleanup()
+            # 与原UI相同：钓鱼进行中时紧急停止（未开始钓鱼时不创建控制器）
+            if self.is_running:
+                get_fishing_controller().emergency_stop()
             
             if hasattr(hotkey_manager, 'cleanup'):
                 hotkey_manager.cleanup()
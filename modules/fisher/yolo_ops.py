@@ -0,0 +1,186 @@
+"""
+Fisher钓鱼模块YOLO前后处理
+使用NumPy向量化实现letterbox缩放、输出解码、NMS和坐标还原，供ONNX Runtime/OpenVINO推理后端使用
+
+作者: AutoFish Team
+版本: v1.0
+创建时间: 2026-10-16
+"""
+
+from typing import Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+# 类别感知NMS时各类别检测框的坐标偏移量（大于任何图像尺寸即可）
+MAX_WH = 7680
+
+# letterbox填充颜色（与ultralytics一致）
+PAD_COLOR = 114
+
+
+class LetterboxBuffer:
+    """
+    letterbox预处理缓冲区
+    复用画布和输入张量内存，避免每次推理重新分配
+    """
+
+    def __init__(self, imgsz: int = 640):
+        """
+        初始化预处理缓冲区
+
+        Args:
+            imgsz: 模型输入尺寸（正方形边长）
+        """
+        self.imgsz = imgsz
+        self.canvas = np.full((imgsz, imgsz, 3), PAD_COLOR, dtype=np.uint8)  # BGR画布
+        self.blob = np.empty((1, 3, imgsz, imgsz), dtype=np.float32)  # NCHW输入张量
+        self._content: Optional[Tuple[int, int, int, int]] = None  # 上次图像内容区域 (x, y, w, h)
+
+    def preprocess(self, image: np.ndarray, out: Optional[np.ndarray] = None
+                   ) -> Tuple[np.ndarray, float, Tuple[float, float]]:
+        """
+        letterbox缩放并转换为模型输入张量
+
+        Args:
+            image: BGR格式图像
+            out: 写入的目标张量 (3, H, W)，如批量输入张量中的一项；None表示写入本缓冲区的张量
+
+        Returns:
+            Tuple: (输入张量 1x3xHxW float32 RGB 0-1（指定out时为out）, 缩放比例, (左侧填充, 顶部填充))
+        """
+        height, width = image.shape[:2]
+        ratio = min(self.imgsz / height, self.imgsz / width)
+        new_width, new_height = int(round(width * ratio)), int(round(height * ratio))
+        pad_x = (self.imgsz - new_width) / 2
+        pad_y = (self.imgsz - new_height) / 2
+        left, top = int(round(pad_x - 0.1)), int(round(pad_y - 0.1))
+
+        content = (left, top, new_width, new_height)
+        if content != self._content:
+            # 图像尺寸变化时才需要重新填充边框
+            self.canvas.fill(PAD_COLOR)
+            self._content = content
+
+        target = self.canvas[top:top + new_height, left:left + new_width]
+        if (new_width, new_height) == (width, height):
+            target[...] = image
+        else:
+            cv2.resize(image, (new_width, new_height), dst=target, interpolation=cv2.INTER_LINEAR)
+
+        # BGR→RGB、HWC→CHW、归一化，直接写入预分配张量
+        np.multiply(self.canvas[..., ::-1].transpose(2, 0, 1), 1.0 / 255.0,
+                    out=self.blob[0] if out is None else out, casting='unsafe')
+        return (self.blob if out is None else out), ratio, (left, top)
+
+
+def xywh_to_xyxy(boxes: np.ndarray) -> np.ndarray:
+    """
+    中心点格式转换为角点格式
+
+    Args:
+        boxes: (N, 4) [cx, cy, w, h]
+
+    Returns:
+        np.ndarray: (N, 4) [x1, y1, x2, y2]
+    """
+    half = boxes[:, 2:4] / 2
+    return np.concatenate((boxes[:, 0:2] - half, boxes[:, 0:2] + half), axis=1)
+
+
+def nms(boxes: np.ndarray, scores: np.ndarray, iou_threshold: float, max_det: int = 300) -> np.ndarray:
+    """
+    非极大值抑制（每轮对剩余候选框向量化计算IoU）
+
+    Args:
+        boxes: (N, 4) [x1, y1, x2, y2]
+        scores: (N,) 置信度
+        iou_threshold: IoU阈值
+        max_det: 最多保留的检测框数量
+
+    Returns:
+        np.ndarray: 保留的检测框索引
+    """
+    x1, y1, x2, y2 = boxes[:, 0], boxes[:, 1], boxes[:, 2], boxes[:, 3]
+    areas = (x2 - x1) * (y2 - y1)
+    order = scores.argsort()[::-1]
+
+    keep = []
+    while order.size > 0 and len(keep) < max_det:
+        index = order[0]
+        keep.append(index)
+        rest = order[1:]
+
+        inter_w = np.clip(np.minimum(x2[index], x2[rest]) - np.maximum(x1[index], x1[rest]), 0, None)
+        inter_h = np.clip(np.minimum(y2[index], y2[rest]) - np.maximum(y1[index], y1[rest]), 0, None)
+        inter = inter_w * inter_h
+        iou = inter / (areas[index] + areas[rest] - inter + 1e-7)
+        order = rest[iou <= iou_threshold]
+
+    return np.asarray(keep, dtype=np.int64)
+
+
+def decode_predictions(output: np.ndarray, conf_threshold: float, iou_threshold: float,
+                       max_det: int = 300, classes: Optional[Sequence[int]] = None
+                       ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    解码YOLOv8/YOLO11检测头输出并执行类别感知NMS
+
+    Args:
+        output: 模型输出，形状 (1, 4 + 类别数, 候选数)（批量输出按项切片 output[i:i + 1]）
+        conf_threshold: 置信度阈值
+        iou_threshold: NMS IoU阈值
+        max_det: 最多保留的检测框数量
+        classes: 只保留的类别编号，None表示全部类别；
+                 过滤在取最高分类别之前进行，未选中类别的高分不会掩盖选中类别
+
+    Returns:
+        Tuple: (检测框 (N, 4) xyxy 输入张量坐标, 置信度 (N,), 类别 (N,))
+    """
+    class_scores = output[0, 4:]  # (类别数, 候选数)，按行连续存储
+    class_ids = None
+    if classes is not None:
+        class_ids = np.asarray(sorted(set(classes)), dtype=np.int64)
+        class_ids = class_ids[(class_ids >= 0) & (class_ids < len(class_scores))]
+        class_scores = class_scores[class_ids]
+
+    if len(class_scores) == 0:
+        return (np.empty((0, 4), dtype=np.float32), np.empty(0, dtype=np.float32),
+                np.empty(0, dtype=np.int64))
+
+    best = class_scores.argmax(axis=0)
+    confidences = np.take_along_axis(class_scores, best[None], axis=0)[0]
+
+    mask = confidences >= conf_threshold
+    if not mask.any():
+        return (np.empty((0, 4), dtype=np.float32), np.empty(0, dtype=np.float32),
+                np.empty(0, dtype=np.int64))
+
+    boxes = xywh_to_xyxy(output[0, :4, mask])  # 两个高级索引被切片隔开，结果维度为 (N, 4)
+    confidences = confidences[mask]
+    classes = best[mask] if class_ids is None else class_ids[best[mask]]
+
+    # 按类别偏移检测框，使不同类别之间互不抑制
+    keep = nms(boxes + (classes[:, None] * MAX_WH), confidences, iou_threshold, max_det)
+    return boxes[keep], confidences[keep], classes[keep]
+
+
+def scale_boxes(boxes: np.ndarray, ratio: float, pad: Tuple[float, float],
+                image_shape: Tuple[int, int]) -> np.ndarray:
+    """
+    将输入张量坐标还原为原图坐标
+
+    Args:
+        boxes: (N, 4) 输入张量坐标 [x1, y1, x2, y2]
+        ratio: letterbox缩放比例
+        pad: (左侧填充, 顶部填充)
+        image_shape: 原图 (高, 宽)
+
+    Returns:
+        np.ndarray: (N, 4) 原图坐标
+    """
+    scaled = (boxes - np.array([pad[0], pad[1], pad[0], pad[1]], dtype=boxes.dtype)) / ratio
+    height, width = image_shape
+    np.clip(scaled[:, 0::2], 0, width, out=scaled[:, 0::2])
+    np.clip(scaled[:, 1::2], 0, height, out=scaled[:, 1::2])
+    return scaled
@@ -3,14 +3,46 @@
 """
 日志系统模块
 为整个项目提供统一的日志管理功能
+
+异步输出: 日志记录器只挂一个队列处理器，调用方线程只做消息格式化和入队，
+文件和控制台写入由唯一的日志线程完成，检测等热循环不再同步等待磁盘和控制台I/O。
+队列满时丢弃DEBUG/INFO记录并计数，WARNING及以上短暂等待入队；
+设置环境变量 AUTOFISH_SYNC_LOG=1 可恢复同步输出（便于调试崩溃前的最后几行日志）。
+
+限频: 热循环中反复出现的日志按调用位置和消息模板限频，每个周期只输出前几条，
+周期结束后的下一条附带被省略的次数；被省略的记录不做消息格式化（使用 logger.info("...%s", value)
+形式传参时连参数拼接也省去）。fisher模块的日志记录器默认启用，WARNING以上级别不限频。
+
+读取: read_log_file从文件末尾按块反向读取最后N行，不读整个文件；
+query_log_file按时间范围和最低级别查询日志记录，使用旁路索引文件（<日志文件>.idx，
+记录每条日志的时间、级别和文件偏移，文件增长时增量更新），只读取命中的记录。
 """
 
+import atexit
 import logging
 import os
+import queue
+import struct
 import sys
+import threading
+import time
 from datetime import datetime
 from pathlib import Path
-from logging.handlers import RotatingFileHandler
+from typing import Dict, List, Any, Optional, Union
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
+
+# 日志队列容量（记录条数）
+LOG_QUEUE_SIZE = 10000
+# WARNING及以上记录在队列满时的最长等待时间(秒)
+LOG_BLOCK_TIMEOUT = 0.5
+# 是否异步输出
+ASYNC_LOGGING = os.environ.get('AUTOFISH_SYNC_LOG', '') not in ('1', 'true', 'True')
+# 限频周期(秒)和每个周期内输出的条数（同一位置的正常日志如每轮几次状态流转不受影响，
+# 只有检测闪烁等每秒数十条的情况被省略）
+RATE_LIMIT_INTERVAL = 5.0
+RATE_LIMIT_BURST = 10
+# 默认启用限频的日志记录器名称前缀
+RATE_LIMITED_PREFIXES = ('fisher',)
 
 class ColoredFormatter(logging.Formatter):
     """彩色日志格式化器"""
@@ -37,29 +69,223 @@ class ColoredFormatter(logging.Formatter):
         
         return formatted
 
-def setup_logger(name: str, log_level: str = 'INFO') -> logging.Logger:
-    """
-    设置日志记录器
+class _ConsoleFilter(logging.Filter):
+    """为控制台记录添加标记"""
     
-    Args:
-        name: 日志记录器名称
-        log_level: 日志级别 (DEBUG, INFO, WARNING, ERROR, CRITICAL)
+    def filter(self, record):
+        record.is_console = True
+        return True
+
+class _RoutingHandler(logging.Handler):
+    """日志线程使用的分发处理器：按记录器名称交给该记录器的文件和控制台处理器"""
+    
+    def __init__(self):
+        super().__init__()
+        self.routes: Dict[str, List[logging.Handler]] = {}
+    
+    def add_route(self, name: str, handlers: List[logging.Handler]) -> None:
+        self.routes[name] = handlers
+    
+    def emit(self, record):
+        for handler in self.routes.get(record.name, ()):
+            if record.levelno >= handler.level:
+                handler.handle(record)
+
+_exception_formatter = logging.Formatter()
+
+class _DroppingQueueHandler(QueueHandler):
+    """有界队列处理器：队列满时丢弃低级别记录并计数"""
+    
+    def __init__(self, log_queue: queue.Queue, stats: Dict[str, int]):
+        super().__init__(log_queue)
+        self.stats = stats
+    
+    def prepare(self, record):
+        # 记录器只挂本处理器，直接在原记录上合并参数（不复制、不做完整格式化），
+        # 异常堆栈在调用方线程转为文本，日志线程的格式化器会附加exc_text
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = _exception_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+    
+    def enqueue(self, record):
+        try:
+            if record.levelno >= logging.WARNING:
+                self.queue.put(record, timeout=LOG_BLOCK_TIMEOUT)
+            else:
+                self.queue.put_nowait(record)
+        except queue.Full:
+            self.stats['dropped'] += 1
+            return
+        self.stats['enqueued'] += 1
+        depth = self.queue.qsize()
+        if depth > self.stats['max_depth']:
+            self.stats['max_depth'] = depth
+
+class _LogListener(QueueListener):
+    """日志线程：队列满时也能送达结束标记"""
+    
+    def enqueue_sentinel(self):
+        self.queue.put(self._sentinel)
+
+# 全局日志队列和日志线程（首次设置记录器时创建）
+_log_queue: Optional[queue.Queue] = None
+_log_router: Optional[_RoutingHandler] = None
+_log_listener: Optional[_LogListener] = None
+_log_lock = threading.Lock()
+_log_stats: Dict[str, int] = {'enqueued': 0, 'dropped': 0, 'max_depth': 0}
+
+def _ensure_listener() -> _RoutingHandler:
+    """创建日志队列并启动日志线程（调用方持有_log_lock）"""
+    global _log_queue, _log_router, _log_listener
+    if _log_listener is None:
+        _log_queue = queue.Queue(LOG_QUEUE_SIZE)
+        _log_router = _RoutingHandler()
+        _log_listener = _LogListener(_log_queue, _log_router)
+        _log_listener.start()
+        atexit.register(shutdown_logging)
+    return _log_router
+
+def shutdown_logging() -> None:
+    """输出限频汇总后停止日志线程，写完队列中的全部记录（程序退出时自动调用）"""
+    global _log_listener
+    rate_limiter.flush()
+    with _log_lock:
+        listener, _log_listener = _log_listener, None
+    if listener is not None:
+        listener.stop()
+
+def get_logging_stats() -> Dict[str, Any]:
+    """
+    获取异步日志统计
     
     Returns:
-        配置好的日志记录器
+        Dict: 是否异步、队列容量、当前队列深度、最大队列深度、入队数和丢弃数
+    """
+    return {
+        'async': ASYNC_LOGGING,
+        'capacity': LOG_QUEUE_SIZE,
+        'queue_depth': _log_queue.qsize() if _log_queue is not None else 0,
+        'max_depth': _log_stats['max_depth'],
+        'enqueued': _log_stats['enqueued'],
+        'dropped': _log_stats['dropped']
+    }
+
+class _RepeatState:
+    """一个调用位置在当前限频周期内的计数"""
+    
+    __slots__ = ('window_start', 'emitted', 'suppressed', 'last_record')
+    
+    def __init__(self, now: float):
+        self.window_start = now
+        self.emitted = 0
+        self.suppressed = 0
+        self.last_record: Optional[logging.LogRecord] = None
+
+class RateLimitFilter(logging.Filter):
+    """
+    限频过滤器（挂在日志记录器上，在调用方线程中、消息格式化之前执行）
+    按 (文件, 行号, 消息模板) 计数：f-string日志的模板随内容变化，由调用位置区分；
+    %参数日志同一位置的不同模板分别计数
     """
+    
+    def __init__(self, interval: float = RATE_LIMIT_INTERVAL, burst: int = RATE_LIMIT_BURST,
+                 max_level: int = logging.WARNING):
+        """
+        初始化限频过滤器
+        
+        Args:
+            interval: 限频周期(秒)
+            burst: 每个周期内输出的条数
+            max_level: 限频的最高级别，更高级别的记录全部输出
+        """
+        super().__init__()
+        self.interval = interval
+        self.burst = max(1, int(burst))
+        self.max_level = max_level
+        self.total_suppressed = 0  # 累计省略的记录数
+        self._entries: Dict[tuple, _RepeatState] = {}
+        self._lock = threading.Lock()
+    
+    def filter(self, record):
+        if record.levelno > self.max_level:
+            return True
+        
+        key = (record.pathname, record.lineno, record.msg if record.args else None)
+        now = record.created
+        repeated = 0
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = _RepeatState(now)
+            elif now - entry.window_start >= self.interval:
+                repeated, elapsed = entry.suppressed, now - entry.window_start
+                entry.window_start = now
+                entry.emitted = 0
+                entry.suppressed = 0
+                entry.last_record = None
+            
+            if entry.emitted >= self.burst:
+                entry.suppressed += 1
+                entry.last_record = record
+                self.total_suppressed += 1
+                return False
+            entry.emitted += 1
+        
+        if repeated:
+            record.msg = f"{record.msg}（前{elapsed:.0f}秒内另有 {repeated} 条重复已省略）"
+        return True
+    
+    def flush(self) -> int:
+        """
+        输出各调用位置尚未汇总的省略次数（以最后一条被省略的记录为内容）
+        
+        Returns:
+            int: 输出的汇总条数
+        """
+        with self._lock:
+            pending = [entry for entry in self._entries.values() if entry.suppressed]
+            summaries = []
+            for entry in pending:
+                summaries.append((entry.last_record, entry.suppressed, entry.last_record.created - entry.window_start))
+                entry.suppressed = 0
+                entry.last_record = None
+        
+        for record, repeated, elapsed in summaries:
+            summary = logging.makeLogRecord(dict(
+                record.__dict__, args=None,
+                msg=f"{record.getMessage()}（{elapsed:.0f}秒内重复 {repeated} 条已省略，此为最后一条）"))
+            logging.getLogger(record.name).callHandlers(summary)
+        return len(summaries)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取限频统计
+        
+        Returns:
+            Dict: 限频周期、调用位置数和累计省略条数
+        """
+        return {
+            'interval': self.interval,
+            'sites': len(self._entries),
+            'suppressed': self.total_suppressed
+        }
+
+# 全局限频过滤器（各日志记录器共用，调用位置不同互不影响）
+rate_limiter = RateLimitFilter()
+
+def flush_rate_limited() -> int:
+    """输出被限频省略的日志汇总，返回汇总条数"""
+    return rate_limiter.flush()
+
+def _create_handlers(name: str, log_level: str) -> List[logging.Handler]:
+    """创建日志记录器的文件和控制台处理器"""
     # 创建日志目录
     log_dir = Path('logs')
     log_dir.mkdir(exist_ok=True)
     
-    # 创建日志记录器
-    logger = logging.getLogger(name)
-    logger.setLevel(getattr(logging, log_level.upper()))
-    
-    # 避免重复添加处理器
-    if logger.handlers:
-        return logger
-    
     # 创建格式化器
     file_formatter = logging.Formatter(
         '%(asctime)s - %(name)s - %(levelname)s - %(funcName)s:%(lineno)d - %(message)s',
@@ -87,17 +313,44 @@ def setup_logger(name: str, log_level: str = 'INFO') -> logging.Logger:
     console_handler.setLevel(getattr(logging, log_level.upper()))
     console_handler.setFormatter(console_formatter)
     
-    # 为控制台记录添加标记
-    class ConsoleFilter(logging.Filter):
-        def filter(self, record):
-            record.is_console = True
-            return True
+    console_handler.addFilter(_ConsoleFilter())
+    
+    return [file_handler, console_handler]
+
+def setup_logger(name: str, log_level: str = 'INFO', rate_limit: Optional[bool] = None) -> logging.Logger:
+    """
+    设置日志记录器
     
-    console_handler.addFilter(ConsoleFilter())
+    Args:
+        name: 日志记录器名称
+        log_level: 日志级别 (DEBUG, INFO, WARNING, ERROR, CRITICAL)
+        rate_limit: 是否对重复日志限频，None表示按名称前缀决定（fisher模块默认启用）
     
-    # 添加处理器到日志记录器
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
+    Returns:
+        配置好的日志记录器
+    """
+    # 创建日志记录器
+    logger = logging.getLogger(name)
+    logger.setLevel(getattr(logging, log_level.upper()))
+    
+    # 避免重复添加处理器
+    if logger.handlers:
+        return logger
+    
+    handlers = _create_handlers(name, log_level)
+    if ASYNC_LOGGING:
+        # 文件和控制台处理器由日志线程持有，记录器只负责入队
+        with _log_lock:
+            _ensure_listener().add_route(name, handlers)
+            logger.addHandler(_DroppingQueueHandler(_log_queue, _log_stats))
+    else:
+        for handler in handlers:
+            logger.addHandler(handler)
+    
+    if rate_limit is None:
+        rate_limit = name.startswith(RATE_LIMITED_PREFIXES)
+    if rate_limit:
+        logger.addFilter(rate_limiter)
     
     # 防止日志向上传播
     logger.propagate = False
@@ -131,25 +384,214 @@ def get_log_files() -> list:
     
     return log_files
 
+# 反向读取日志时每次读取的块大小（字节）
+TAIL_BLOCK_SIZE = 64 * 1024
+
+def _split_lines(data: bytes) -> List[str]:
+    """把字节数据解码并按换行拆分，保留行尾换行符（与文本模式readlines一致）"""
+    text = data.decode('utf-8', errors='replace').replace('\r\n', '\n')
+    parts = text.split('\n')
+    result = [part + '\n' for part in parts[:-1]]
+    if parts[-1]:
+        result.append(parts[-1])
+    return result
+
 def read_log_file(file_path: str, lines: int = 100) -> list:
     """
-    读取日志文件的最后几行
+    读取日志文件的最后几行（从文件末尾按块反向读取，耗时与文件大小无关）
     
     Args:
         file_path: 日志文件路径
-        lines: 读取的行数
+        lines: 读取的行数，0或负数时与原实现相同（0返回整个文件）
     
     Returns:
         日志行列表
     """
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            all_lines = f.readlines()
-            # 返回最后的lines行
+        if lines <= 0:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                all_lines = f.readlines()
             return all_lines[-lines:] if len(all_lines) > lines else all_lines
+        
+        with open(file_path, 'rb') as f:
+            position = f.seek(0, os.SEEK_END)
+            blocks = []
+            newlines = 0
+            # 读到lines+1个换行符，保证最后lines行完整
+            while position > 0 and newlines <= lines:
+                size = min(TAIL_BLOCK_SIZE, position)
+                position -= size
+                f.seek(position)
+                block = f.read(size)
+                blocks.append(block)
+                newlines += block.count(b'\n')
+        
+        all_lines = _split_lines(b''.join(reversed(blocks)))
+        if position > 0:
+            all_lines = all_lines[1:]  # 第一行可能只读到后半段
+        # 返回最后的lines行
+        return all_lines[-lines:] if len(all_lines) > lines else all_lines
     except Exception as e:
         return [f"读取日志文件失败: {str(e)}"]
 
+# 旁路索引文件: 文件头 + 每条日志记录一个条目 (时间, 文件偏移, 级别)
+LOG_INDEX_SUFFIX = '.idx'
+_LOG_INDEX_MAGIC = b'LIDX'
+_LOG_INDEX_VERSION = 1
+_LOG_INDEX_HEADER = struct.Struct('<4sIQQ32s')  # 标识, 版本, 已索引字节数, 条目数, 日志文件开头32字节
+_LOG_LEVELS = {b'DEBUG': 10, b'INFO': 20, b'WARNING': 30, b'ERROR': 40, b'CRITICAL': 50}
+
+def _log_index_dtype():
+    import numpy as np
+    return np.dtype([('time', '<f8'), ('offset', '<u8'), ('level', 'u1')])
+
+def _parse_record_start(line: bytes, minute_cache: Dict[bytes, float]):
+    """
+    解析日志文件中一条记录的首行（"%Y-%m-%d %H:%M:%S - 名称 - 级别 - ..."）
+    
+    Returns:
+        (时间戳, 级别)，不是记录首行（如异常堆栈的续行）时返回None
+    """
+    if len(line) < 26 or line[19:22] != b' - ' or line[4:5] != b'-':
+        return None
+    minute = line[:16]
+    base = minute_cache.get(minute)
+    if base is None:
+        try:
+            base = time.mktime(time.strptime(minute.decode('ascii'), '%Y-%m-%d %H:%M'))
+        except (ValueError, UnicodeDecodeError):
+            return None
+        minute_cache[minute] = base
+    try:
+        seconds = int(line[17:19])
+    except ValueError:
+        return None
+    fields = line[22:].split(b' - ', 2)
+    level = _LOG_LEVELS.get(fields[1]) if len(fields) == 3 else None
+    if level is None:
+        return None
+    return base + seconds, level
+
+def build_log_index(file_path: str):
+    """
+    建立或增量更新日志文件的旁路索引
+    日志文件只在末尾追加时只解析新增部分；文件被滚动替换（开头内容变化或变小）时重建
+    
+    Args:
+        file_path: 日志文件路径
+    
+    Returns:
+        np.ndarray: 索引条目（字段 time/offset/level），以及已索引到的文件偏移
+    """
+    import numpy as np
+    dtype = _log_index_dtype()
+    path = Path(file_path)
+    index_path = path.with_name(path.name + LOG_INDEX_SUFFIX)
+    
+    with open(path, 'rb') as f:
+        head = f.read(32).ljust(32, b'\0')
+        size = f.seek(0, os.SEEK_END)
+        
+        indexed, count = 0, 0
+        if index_path.exists():
+            try:
+                with open(index_path, 'rb') as idx:
+                    magic, version, indexed, count, indexed_head = _LOG_INDEX_HEADER.unpack(
+                        idx.read(_LOG_INDEX_HEADER.size))
+                if (magic != _LOG_INDEX_MAGIC or version != _LOG_INDEX_VERSION or indexed_head != head
+                        or indexed > size or index_path.stat().st_size < _LOG_INDEX_HEADER.size + count * dtype.itemsize):
+                    indexed, count = 0, 0
+            except (OSError, struct.error):
+                indexed, count = 0, 0
+        
+        # 解析新增的完整行
+        previous = indexed
+        new_entries = []
+        if indexed < size:
+            f.seek(indexed)
+            offset = indexed
+            minute_cache: Dict[bytes, float] = {}
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break  # 正在写入的行，下次再索引
+                parsed = _parse_record_start(line, minute_cache)
+                if parsed is not None:
+                    new_entries.append((parsed[0], offset, parsed[1]))
+                offset += len(line)
+            indexed = offset
+    
+    # 先追加条目再更新文件头，中途退出时文件头仍指向有效的旧条目
+    if count == 0 or indexed != previous:
+        with open(index_path, 'wb' if count == 0 else 'r+b') as idx:
+            idx.seek(_LOG_INDEX_HEADER.size + count * dtype.itemsize)
+            if new_entries:
+                idx.write(np.array(new_entries, dtype=dtype).tobytes())
+            idx.truncate()
+            count += len(new_entries)
+            idx.seek(0)
+            idx.write(_LOG_INDEX_HEADER.pack(_LOG_INDEX_MAGIC, _LOG_INDEX_VERSION, indexed, count, head))
+    
+    entries = np.fromfile(index_path, dtype=dtype, count=count, offset=_LOG_INDEX_HEADER.size)
+    return entries, indexed
+
+def query_log_file(file_path: str, since: Union[datetime, float, None] = None,
+                   until: Union[datetime, float, None] = None, min_level: Union[str, int, None] = None,
+                   limit: Optional[int] = None) -> list:
+    """
+    按时间范围和最低级别查询日志记录（如最近一小时的错误）
+    先增量更新旁路索引，按时间二分查找范围、按级别筛选后只读取命中的记录
+    
+    Args:
+        file_path: 日志文件路径
+        since: 起始时间（含），datetime或时间戳，None表示不限
+        until: 结束时间（含），datetime或时间戳，None表示不限
+        min_level: 最低级别，如 'ERROR' 或 logging.ERROR，None表示全部
+        limit: 最多返回的记录数（取最新的），None表示全部
+    
+    Returns:
+        日志记录列表，每条记录含其续行（如异常堆栈）
+    
+    Raises:
+        ValueError: 未知的日志级别名称
+    """
+    import numpy as np
+    level = None
+    if isinstance(min_level, str):
+        level = _LOG_LEVELS.get(min_level.upper().encode('ascii', 'replace'))
+        if level is None:
+            names = ', '.join(name.decode() for name in _LOG_LEVELS)
+            raise ValueError(f"未知的日志级别: {min_level!r}，可选: {names}")
+    elif min_level is not None:
+        level = int(min_level)
+    
+    try:
+        entries, indexed = build_log_index(file_path)
+    except Exception as e:
+        return [f"读取日志文件失败: {str(e)}"]
+    
+    times = entries['time']
+    # 日志按写入顺序追加，时间列非递减（同一秒内的记录时间相同）
+    lo = 0 if since is None else int(np.searchsorted(times, _to_timestamp(since), side='left'))
+    hi = len(times) if until is None else int(np.searchsorted(times, _to_timestamp(until), side='right'))
+    selected = np.arange(lo, hi)
+    if level is not None:
+        selected = selected[entries['level'][lo:hi] >= level]
+    if limit is not None:
+        selected = selected[-limit:] if limit > 0 else selected[:0]
+    
+    offsets = entries['offset']
+    records = []
+    with open(file_path, 'rb') as f:
+        for i in selected:
+            start = int(offsets[i])
+            end = int(offsets[i + 1]) if i + 1 < len(offsets) else indexed
+            f.seek(start)
+            records.append(''.join(_split_lines(f.read(end - start))))
+    return records
+
+def _to_timestamp(value: Union[datetime, float]) -> float:
+    return value.timestamp() if isinstance(value, datetime) else float(value)
+
 def cleanup_old_logs(days: int = 30):
     """
     清理旧的日志文件
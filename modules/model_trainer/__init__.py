@@ -15,6 +15,7 @@ AutoFish 模型训练模块 v2.2
 - HybridTrainer: 图像+文本混合训练
 - TrainingMonitor: 训练进度监控界面
 - ModelValidator: 模型验证和评估
+- ModelQuantizer: 模型INT8量化和量化效果评估
 - DesktopTester: 桌面实时测试工具
 """
 
@@ -28,13 +29,15 @@ try:
     from .training_monitor import TrainingMonitorApp
     from .model_validator import ModelValidator
     from .desktop_tester import DesktopTesterApp
+    from .model_quantizer import ModelQuantizer
     
     __all__ = [
         'DataProcessor',
         'YOLOTrainer', 
         'TrainingMonitorApp',
         'ModelValidator',
-        'DesktopTesterApp'
+        'DesktopTesterApp',
+        'ModelQuantizer'
     ]
 except ImportError as e:
     # 如果某些依赖不可用，只导入可用的组件
@@ -76,6 +76,10 @@ def main():
                 if sys.argv[1] == "--pipeline":
                     # 使用命令行模式运行训练流程
                     return run_pipeline_mode()
+                elif sys.argv[1] == "--quantize":
+                    # 对训练好的模型执行INT8量化
+                    model_path = sys.argv[2] if len(sys.argv) > 2 else "runs/fishing_model_latest.pt"
+                    return run_quantize_mode(model_path)
                 elif sys.argv[1] == "--help":
                     print_help()
                     return True
@@ -166,6 +170,36 @@ def run_pipeline_mode():
         print(f"命令行训练失败: {str(e)}")
         return False
 
+def run_quantize_mode(model_path: str):
+    """运行INT8量化模式"""
+    try:
+        from modules.model_trainer.model_quantizer import ModelQuantizer
+        
+        logger.info(f"启动INT8量化模式: {model_path}")
+        print(f"开始INT8量化: {model_path}")
+        
+        quantizer = ModelQuantizer()
+        report = quantizer.quantize_and_evaluate(model_path)
+        if not report:
+            print("INT8量化失败")
+            return False
+        
+        delta = report['delta']
+        print("=" * 50)
+        print("量化完成!")
+        print(f"INT8模型: {report['int8']['model_path']}")
+        print(f"mAP@0.5 变化: {delta['map50']:+.4f}")
+        print(f"mAP@0.5:0.95 变化: {delta['map50_95']:+.4f}")
+        print(f"平均推理耗时变化: {delta['avg_inference_time_ms']:+.1f}ms (加速 {delta['speedup']:.2f}x)")
+        print("在 modules/fisher/config.yaml 中设置 model.backend: onnx 和 model.precision: int8 即可使用")
+        print("=" * 50)
+        return True
+        
+    except Exception as e:
+        logger.error(f"INT8量化模式失败: {str(e)}")
+        print(f"INT8量化失败: {str(e)}")
+        return False
+
 def print_help():
     """打印帮助信息"""
     print("AutoFish 模型训练模块")
@@ -173,6 +207,7 @@ def print_help():
     print("用法:")
     print("  python -m modules.model_trainer.main           # 启动GUI界面")
     print("  python -m modules.model_trainer.main --pipeline # 命令行训练模式")
+    print("  python -m modules.model_trainer.main --quantize [模型路径] # INT8量化并对比精度/耗时")
     print("  python -m modules.model_trainer.main --help     # 显示帮助")
     print()
     print("训练流程:")
@@ -0,0 +1,324 @@
+"""
+模型量化器
+负责将训练好的YOLO模型导出为ONNX并进行静态INT8训练后量化，
+使用验证集图片做校准，并通过ModelValidator对比量化前后的精度与推理耗时
+"""
+
+import os
+import sys
+import json
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import cv2
+import numpy as np
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from modules.logger import setup_logger, LogContext
+from modules.fisher.inference_backend import file_sha256
+
+try:
+    from ultralytics import YOLO
+    ULTRALYTICS_AVAILABLE = True
+except ImportError:
+    ULTRALYTICS_AVAILABLE = False
+
+try:
+    import onnx
+    from onnxruntime.quantization import (CalibrationDataReader, CalibrationMethod, QuantFormat,
+                                          QuantType, quantize_static)
+    ONNXRUNTIME_AVAILABLE = True
+except ImportError:
+    CalibrationDataReader = object
+    ONNXRUNTIME_AVAILABLE = False
+
+# 量化模型文件名后缀（fisher模块按此约定查找量化模型）
+INT8_SUFFIX = "_int8"
+
+# 检测头中不参与量化的算子：检测框坐标(0~imgsz)与类别分数(0~1)在输出前拼接为同一张量，
+# 共用一组量化参数会使类别分数几乎全部丢失，因此检测头的解码部分保持浮点计算
+HEAD_FLOAT_OPS = {"Concat", "Mul", "Add", "Sub", "Div", "Sigmoid", "Softmax",
+                  "Split", "Slice", "Reshape", "Transpose"}
+
+
+def letterbox_blob(image: np.ndarray, imgsz: int) -> np.ndarray:
+    """
+    letterbox缩放并转换为模型输入张量（与ultralytics及fisher推理后端的预处理一致）
+
+    Args:
+        image: BGR格式图像
+        imgsz: 模型输入尺寸
+
+    Returns:
+        np.ndarray: 输入张量 1x3xHxW float32 RGB 0-1
+    """
+    height, width = image.shape[:2]
+    ratio = min(imgsz / height, imgsz / width)
+    new_width, new_height = int(round(width * ratio)), int(round(height * ratio))
+    left = int(round((imgsz - new_width) / 2 - 0.1))
+    top = int(round((imgsz - new_height) / 2 - 0.1))
+
+    canvas = np.full((imgsz, imgsz, 3), 114, dtype=np.uint8)
+    canvas[top:top + new_height, left:left + new_width] = cv2.resize(
+        image, (new_width, new_height), interpolation=cv2.INTER_LINEAR)
+
+    blob = canvas[..., ::-1].transpose(2, 0, 1).astype(np.float32) / 255.0
+    return np.ascontiguousarray(blob[None])
+
+
+class ImageCalibrationReader(CalibrationDataReader):
+    """校准数据读取器 - 逐张读取验证集图片并预处理为模型输入"""
+
+    def __init__(self, image_files: List[Path], input_name: str, imgsz: int):
+        """
+        初始化校准数据读取器
+
+        Args:
+            image_files: 校准图片列表
+            input_name: 模型输入名称
+            imgsz: 模型输入尺寸
+        """
+        self.image_files = list(image_files)
+        self.input_name = input_name
+        self.imgsz = imgsz
+        self._iterator = iter(self.image_files)
+
+    def get_next(self) -> Optional[Dict[str, np.ndarray]]:
+        for image_file in self._iterator:
+            image = cv2.imread(str(image_file))
+            if image is None:
+                continue
+            return {self.input_name: letterbox_blob(image, self.imgsz)}
+        return None
+
+    def rewind(self) -> None:
+        self._iterator = iter(self.image_files)
+
+
+class ModelQuantizer:
+    """模型量化器 - 负责ONNX导出、INT8静态量化和量化效果评估"""
+
+    def __init__(self, data_dir: str = "data"):
+        """
+        初始化模型量化器
+
+        Args:
+            data_dir: 数据目录路径
+        """
+        self.data_dir = Path(data_dir)
+        self.logger = setup_logger('ModelQuantizer')
+
+        # 检查依赖
+        if not ULTRALYTICS_AVAILABLE:
+            self.logger.error("Ultralytics YOLO库未安装，请执行: pip install ultralytics")
+            raise ImportError("需要安装ultralytics库")
+        if not ONNXRUNTIME_AVAILABLE:
+            self.logger.error("ONNX Runtime未安装，请执行: pip install onnxruntime onnx")
+            raise ImportError("需要安装onnxruntime和onnx库")
+
+    def get_calibration_images(self, max_images: int = 200) -> List[Path]:
+        """
+        获取校准图片（验证集，由DataProcessor.prepare_detection_data生成）
+
+        Args:
+            max_images: 最多使用的图片数量
+
+        Returns:
+            List[Path]: 图片路径列表
+        """
+        val_dir = self.data_dir / "val" / "images"
+        if not val_dir.exists():
+            self.logger.error(f"验证集目录不存在: {val_dir}")
+            return []
+
+        image_files = sorted(p for p in val_dir.iterdir()
+                             if p.suffix.lower() in ('.jpg', '.jpeg', '.png', '.bmp'))
+        if len(image_files) > max_images:
+            # 均匀抽样，覆盖各类别的图片
+            indices = np.linspace(0, len(image_files) - 1, max_images).astype(int)
+            image_files = [image_files[i] for i in indices]
+        return image_files
+
+    def export_onnx(self, model_path: str, imgsz: int = 640) -> str:
+        """
+        导出FP32 ONNX模型（同时写入导出记录，fisher模块可直接复用）
+        与fisher模块的导出参数一致（动态批大小），两者共用同一个 <模型名>.onnx，互不触发重新导出
+
+        Args:
+            model_path: .pt模型路径
+            imgsz: 模型输入尺寸
+
+        Returns:
+            str: ONNX模型路径
+        """
+        source = Path(model_path)
+        onnx_path = source.with_suffix('.onnx')
+
+        exported = YOLO(str(source)).export(format='onnx', imgsz=imgsz, dynamic=True, verbose=False)
+        if Path(exported).resolve() != onnx_path.resolve():
+            os.replace(exported, onnx_path)
+
+        self._write_meta(onnx_path, {'source': source.name, 'source_sha256': file_sha256(str(source)),
+                                     'imgsz': imgsz, 'dynamic_batch': True})
+        self.logger.info(f"FP32 ONNX模型导出完成: {onnx_path}")
+        return str(onnx_path)
+
+    def _get_head_nodes_to_exclude(self, onnx_path: str) -> List[str]:
+        """
+        获取检测头解码部分的节点名称（保持浮点计算）
+
+        Args:
+            onnx_path: FP32 ONNX模型路径
+
+        Returns:
+            List[str]: 不量化的节点名称
+        """
+        graph = onnx.load(onnx_path).graph
+        output_name = graph.output[0].name
+        producer = next((node for node in graph.node if output_name in node.output), None)
+        if producer is None or not producer.name.startswith('/'):
+            return []
+
+        # ultralytics导出的节点名形如 /model.22/Concat_5，取检测头模块前缀
+        head_prefix = '/'.join(producer.name.split('/')[:2]) + '/'
+        return [node.name for node in graph.node
+                if node.name.startswith(head_prefix)
+                and (node.op_type in HEAD_FLOAT_OPS or '/dfl/' in node.name)]
+
+    def quantize(self, model_path: str, imgsz: int = 640, calibration_images: int = 200,
+                 per_channel: bool = True) -> Optional[str]:
+        """
+        对模型执行静态INT8训练后量化
+
+        Args:
+            model_path: .pt模型路径
+            imgsz: 模型输入尺寸
+            calibration_images: 校准图片数量
+            per_channel: 权重是否按通道量化
+
+        Returns:
+            str: INT8 ONNX模型路径，失败返回None
+        """
+        try:
+            with LogContext(self.logger, f"INT8量化 {model_path}"):
+                source = Path(model_path)
+                if not source.exists():
+                    self.logger.error(f"模型文件不存在: {model_path}")
+                    return None
+
+                image_files = self.get_calibration_images(calibration_images)
+                if not image_files:
+                    self.logger.error("没有找到校准图片，请先执行数据预处理")
+                    return None
+
+                fp32_path = self.export_onnx(model_path, imgsz)
+                int8_path = source.with_name(f"{source.stem}{INT8_SUFFIX}.onnx")
+
+                input_name = onnx.load(fp32_path).graph.input[0].name
+                reader = ImageCalibrationReader(image_files, input_name, imgsz)
+                nodes_to_exclude = self._get_head_nodes_to_exclude(fp32_path)
+
+                self.logger.info(f"开始校准，共 {len(image_files)} 张图片，"
+                                 f"检测头 {len(nodes_to_exclude)} 个节点保持浮点")
+                quantize_static(
+                    fp32_path,
+                    str(int8_path),
+                    reader,
+                    quant_format=QuantFormat.QDQ,
+                    activation_type=QuantType.QUInt8,
+                    weight_type=QuantType.QInt8,
+                    per_channel=per_channel,
+                    calibrate_method=CalibrationMethod.MinMax,
+                    nodes_to_exclude=nodes_to_exclude
+                )
+
+                self._write_meta(int8_path, {
+                    'source': source.name,
+                    'source_sha256': file_sha256(str(source)),
+                    'imgsz': imgsz,
+                    'precision': 'int8',
+                    'calibration_images': len(image_files),
+                    'per_channel': per_channel
+                })
+
+                fp32_size = Path(fp32_path).stat().st_size / (1024 * 1024)
+                int8_size = int8_path.stat().st_size / (1024 * 1024)
+                self.logger.info(f"INT8量化完成: {int8_path} ({fp32_size:.1f}MB -> {int8_size:.1f}MB)")
+                return str(int8_path)
+
+        except Exception as e:
+            self.logger.error(f"INT8量化失败: {str(e)}")
+            return None
+
+    def evaluate(self, fp32_path: str, int8_path: str, test_images: int = 100) -> Dict:
+        """
+        对比量化前后的精度和推理耗时
+
+        Args:
+            fp32_path: FP32 ONNX模型路径
+            int8_path: INT8 ONNX模型路径
+            test_images: 基准测试图片数量
+
+        Returns:
+            Dict: 对比结果
+        """
+        from modules.model_trainer.model_validator import ModelValidator
+
+        validator = ModelValidator(str(self.data_dir))
+        report = {}
+        for name, path in (('fp32', fp32_path), ('int8', int8_path)):
+            report[name] = {
+                'model_path': path,
+                'metrics': validator.validate_model(path),
+                'benchmark': validator.benchmark_model(path, test_images)
+            }
+
+        fp32, int8 = report['fp32'], report['int8']
+        fp32_time = fp32['benchmark'].get('avg_inference_time', 0.0)
+        int8_time = int8['benchmark'].get('avg_inference_time', 0.0)
+        report['delta'] = {
+            'map50': int8['metrics'].get('map50', 0.0) - fp32['metrics'].get('map50', 0.0),
+            'map50_95': int8['metrics'].get('map50_95', 0.0) - fp32['metrics'].get('map50_95', 0.0),
+            'avg_inference_time_ms': (int8_time - fp32_time) * 1000,
+            'speedup': fp32_time / int8_time if int8_time > 0 else 0.0
+        }
+
+        delta = report['delta']
+        self.logger.info(f"量化对比: mAP@0.5 {delta['map50']:+.4f}, mAP@0.5:0.95 {delta['map50_95']:+.4f}, "
+                         f"推理耗时 {delta['avg_inference_time_ms']:+.1f}ms (加速 {delta['speedup']:.2f}x)")
+        return report
+
+    def quantize_and_evaluate(self, model_path: str, imgsz: int = 640, calibration_images: int = 200,
+                              test_images: int = 100) -> Dict:
+        """
+        量化模型并生成对比报告（报告写入 <模型名>_int8.report.json）
+
+        Args:
+            model_path: .pt模型路径
+            imgsz: 模型输入尺寸
+            calibration_images: 校准图片数量
+            test_images: 基准测试图片数量
+
+        Returns:
+            Dict: 对比结果，量化失败返回空字典
+        """
+        int8_path = self.quantize(model_path, imgsz, calibration_images)
+        if not int8_path:
+            return {}
+
+        fp32_path = str(Path(model_path).with_suffix('.onnx'))
+        report = self.evaluate(fp32_path, int8_path, test_images)
+
+        report_path = Path(int8_path).with_suffix('.report.json')
+        with open(report_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False, default=float)
+        self.logger.info(f"量化报告已保存: {report_path}")
+        return report
+
+    @staticmethod
+    def _write_meta(onnx_path: Path, meta: Dict) -> None:
+        """写入ONNX模型旁的导出记录 <模型名>.onnx.json"""
+        with open(Path(onnx_path).with_suffix('.onnx.json'), 'w', encoding='utf-8') as f:
+            json.dump(meta, f, indent=2)
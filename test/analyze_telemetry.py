@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+遥测统计
+读取钓鱼时记录的遥测文件（config.yaml的telemetry配置，默认 logs/telemetry/），输出：
+- 轮数、成功轮数、每小时成功轮数、每轮耗时分布
+- 等待上钩到上钩的耗时分布
+- 检测次数、命中率和检测耗时分位数（不含画面未变化而复用结果的检测）
+
+用法:
+    python test/analyze_telemetry.py logs/telemetry
+    python test/analyze_telemetry.py logs/telemetry/session_20261016_220000.ftl --json summary.json
+
+依赖：
+pip install numpy （--pandas 需要 pandas）
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+from modules.fisher.telemetry import load_telemetry, load_telemetry_frames, summarize_telemetry
+
+
+def format_dist(dist, unit, scale=1.0):
+    """格式化分布统计"""
+    if not dist:
+        return "-"
+    return (f"n={dist['count']}  平均{dist['mean'] * scale:.2f}{unit}  p50={dist['p50'] * scale:.2f}{unit}  "
+            f"p90={dist['p90'] * scale:.2f}{unit}  p99={dist['p99'] * scale:.2f}{unit}")
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='遥测统计')
+    parser.add_argument('path', help='遥测文件或目录')
+    parser.add_argument('--json', default=None, help='把统计结果写入JSON文件')
+    parser.add_argument('--pandas', action='store_true', help='同时读取为DataFrame并输出各表概要')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    tables = load_telemetry(args.path)
+    load_seconds = time.perf_counter() - start
+    events = sum(len(table['time']) for table in tables.values())
+    print(f"读取 {events} 条事件，耗时 {load_seconds:.2f}秒")
+
+    summary = summarize_telemetry(tables)
+    if 'rounds' in summary:
+        print(f"轮数: {summary['rounds']}  成功: {summary['success_rounds']}  "
+              f"每小时成功轮数: {summary['rounds_per_hour']:.1f}")
+        print(f"每轮耗时:   {format_dist(summary['round_duration_s'], 's')}")
+        print(f"上钩耗时:   {format_dist(summary['time_to_hook_s'], 's')}")
+    if 'detections' in summary:
+        print(f"检测次数: {summary['detections']}  命中率: {summary['hit_rate']:.1%}")
+        print(f"检测耗时:   {format_dist(summary['detection_latency_ms'], 'ms')}")
+
+    if args.pandas:
+        for event_type, frame in load_telemetry_frames(args.path).items():
+            print(f"\n[{event_type}] {len(frame)}行")
+            print(frame.head())
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+        print(f"\n统计结果已写入: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+批量推理基准测试
+在录制帧上对比逐帧推理（每帧一次backend.predict）与批量推理（detect_batch，多帧一次前向计算）的吞吐量：
+- 每种批大小输出每批耗时、平均每帧耗时和每秒帧数，以及相对逐帧推理的加速比
+- 校验批量推理与逐帧推理的最佳检测结果一致
+
+推理后端、线程数等取自config.yaml的model配置，可用 --backend/--threads 覆盖；
+批量推理需要ONNX导出支持动态批大小（新版导出默认支持，固定批大小的模型会退化为逐帧推理）。
+
+用法:
+    python test/bench_batch_inference.py --backend onnx
+    python test/bench_batch_inference.py --frames data/val/images --batch-sizes 1 2 4 8 --threads 1
+
+依赖：
+pip install numpy opencv-python onnxruntime ultralytics
+"""
+
+import os
+import sys
+import time
+import argparse
+from pathlib import Path
+
+import cv2
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+from modules.fisher.config import fisher_config
+
+
+def load_frames(frames_dir, max_frames):
+    """读取录制帧"""
+    image_files = sorted(p for p in Path(frames_dir).iterdir()
+                         if p.suffix.lower() in ('.jpg', '.jpeg', '.png', '.bmp'))[:max_frames]
+    frames = [cv2.imread(str(f)) for f in image_files]
+    return [f for f in frames if f is not None]
+
+
+def run_sequential(detector, frames, repeat):
+    """逐帧推理，返回(每帧耗时ms, 各帧最佳状态)"""
+    threshold = fisher_config.model.confidence_threshold
+    states = []
+    start = time.perf_counter()
+    for _ in range(repeat):
+        states = []
+        for frame in frames:
+            detections = detector.backend.predict(frame, threshold)
+            best = detections.best_index()
+            states.append(None if best is None else int(detections.classes[best]))
+    return (time.perf_counter() - start) * 1000 / (repeat * len(frames)), states
+
+
+def run_batched(detector, frames, batch_size, repeat):
+    """按批大小批量推理，返回(每批耗时统计, 每帧耗时ms, 各帧最佳状态)"""
+    detector.batch_latency.reset()
+    states = []
+    start = time.perf_counter()
+    for _ in range(repeat):
+        states = []
+        for i in range(0, len(frames), batch_size):
+            results = detector.detect_batch(frames[i:i + batch_size])
+            states.extend(None if r is None else r['state'] for r in results)
+    per_item = (time.perf_counter() - start) * 1000 / (repeat * len(frames))
+    return detector.batch_latency.get_stats(), per_item, states
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='批量推理基准测试')
+    parser.add_argument('--frames', default='data/val/images', help='录制帧目录')
+    parser.add_argument('--max-frames', type=int, default=64, help='最多使用的帧数')
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 2, 4, 8], help='测试的批大小')
+    parser.add_argument('--repeat', type=int, default=3, help='重复次数')
+    parser.add_argument('--backend', default=None, help='推理后端 ultralytics/onnx/openvino，默认取配置')
+    parser.add_argument('--threads', type=int, default=None, help='CPU推理线程数，默认取配置')
+    args = parser.parse_args()
+
+    overrides = {}
+    if args.backend:
+        overrides['backend'] = args.backend
+    if args.threads is not None:
+        overrides['cpu_threads'] = args.threads
+    fisher_config.update(model=overrides)
+
+    frames = load_frames(args.frames, args.max_frames)
+    if not frames:
+        print(f"没有找到录制帧: {args.frames}")
+        return
+
+    from modules.fisher.model_detector import model_detector  # 首次访问时按覆盖后的配置加载模型
+    if not model_detector.is_initialized:
+        print("模型加载失败")
+        return
+
+    backend = model_detector.backend
+    print(f"推理后端: {backend.name}  设备: {backend.device}  帧数: {len(frames)}  重复: {args.repeat}  "
+          f"模型批大小上限: {getattr(backend, 'max_batch', None) or '动态'}")
+
+    sequential_ms, reference = run_sequential(model_detector, frames, args.repeat)
+    print(f"\n{'方式':<12}{'每批p50 ms':>12}{'每批p95 ms':>12}{'每帧 ms':>10}{'帧/秒':>10}{'加速比':>8}  结果一致")
+    print(f"{'逐帧':<12}{'-':>12}{'-':>12}{sequential_ms:>10.2f}{1000 / sequential_ms:>10.1f}{1.0:>8.2f}  -")
+
+    for batch_size in args.batch_sizes:
+        batch_stats, per_item, states = run_batched(model_detector, frames, batch_size, args.repeat)
+        match = sum(a == b for a, b in zip(states, reference))
+        print(f"{f'批大小{batch_size}':<12}{batch_stats['p50_ms']:>12.2f}{batch_stats['p95_ms']:>12.2f}"
+              f"{per_item:>10.2f}{1000 / per_item:>10.1f}{sequential_ms / per_item:>8.2f}  "
+              f"{match}/{len(reference)}")
+
+    model_detector.cleanup()
+
+
+if __name__ == "__main__":
+    main()
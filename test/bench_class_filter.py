@@ -0,0 +1,141 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+分阶段类别过滤基准测试
+在录制的游戏画面上对比两种后处理方式的耗时和结果：
+- 旧版：全类别解码+NMS，取最高分结果后若不在允许状态中则丢弃
+- 新版：允许状态集合下推到解码阶段，只对允许的类别取最高分并做NMS
+
+模型前向计算对两种方式相同，每帧只运行一次并缓存输出，仅对后处理计时。
+
+用法:
+    python test/bench_class_filter.py --model runs/fishing_model_latest.onnx
+    python test/bench_class_filter.py --model runs/fishing_model_latest.onnx --frames data/val/images --repeat 20
+
+依赖：
+pip install onnxruntime opencv-python numpy
+"""
+
+import os
+import sys
+import time
+import argparse
+from pathlib import Path
+
+import cv2
+import numpy as np
+import onnxruntime as ort
+
+# 直接从模块目录导入前后处理函数，避免触发fisher包初始化（加载模型）
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(PROJECT_ROOT, 'modules', 'fisher'))
+from yolo_ops import LetterboxBuffer, decode_predictions
+
+# 各钓鱼阶段检测的状态（与state_machine.PHASE_CLASSES一致）
+PHASES = {
+    '等待上钩': [0, 1],
+    '鱼上钩': [1, 2, 3],
+    '提线中': [2, 3, 4],
+    '钓鱼成功': [4],
+}
+
+
+def load_outputs(model_path, frames_dir, max_frames):
+    """
+    对录制帧运行一次模型前向计算并缓存原始输出
+
+    Args:
+        model_path: ONNX模型路径
+        frames_dir: 录制帧目录
+        max_frames: 最多使用的帧数
+
+    Returns:
+        list: 检测头原始输出列表
+    """
+    session = ort.InferenceSession(model_path, providers=['CPUExecutionProvider'])
+    input_meta = session.get_inputs()[0]
+    letterbox = LetterboxBuffer(input_meta.shape[-1] if isinstance(input_meta.shape[-1], int) else 640)
+
+    image_files = sorted(p for p in Path(frames_dir).iterdir()
+                         if p.suffix.lower() in ('.jpg', '.jpeg', '.png', '.bmp'))[:max_frames]
+    outputs = []
+    for image_file in image_files:
+        image = cv2.imread(str(image_file))
+        if image is None:
+            continue
+        blob, _, _ = letterbox.preprocess(image)
+        outputs.append(session.run(None, {input_meta.name: blob})[0])
+    return outputs
+
+
+def legacy_postprocess(output, allowed, conf, iou):
+    """旧版：全类别后处理，最高分状态不在允许集合中时丢弃"""
+    boxes, confidences, classes = decode_predictions(output, conf, iou)
+    if len(confidences) == 0:
+        return None
+    best = int(classes[np.argmax(confidences)])
+    return best if best in allowed else None
+
+
+def filtered_postprocess(output, allowed, conf, iou):
+    """新版：允许状态集合下推到解码阶段"""
+    boxes, confidences, classes = decode_predictions(output, conf, iou, classes=allowed)
+    if len(confidences) == 0:
+        return None
+    return int(classes[np.argmax(confidences)])
+
+
+def time_postprocess(func, outputs, allowed, conf, iou, repeat):
+    """
+    对全部帧执行后处理并计时
+
+    Returns:
+        tuple: (每帧耗时列表(ms), 检测结果列表)
+    """
+    times = []
+    results = []
+    for output in outputs:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            result = func(output, allowed, conf, iou)
+        times.append((time.perf_counter() - start) / repeat * 1000)
+        results.append(result)
+    return times, results
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='分阶段类别过滤基准测试')
+    parser.add_argument('--model', default='runs/fishing_model_latest.onnx', help='ONNX模型路径')
+    parser.add_argument('--frames', default='data/val/images', help='录制帧目录')
+    parser.add_argument('--max-frames', type=int, default=200, help='最多使用的帧数')
+    parser.add_argument('--conf', type=float, default=0.5, help='置信度阈值')
+    parser.add_argument('--iou', type=float, default=0.7, help='NMS IoU阈值')
+    parser.add_argument('--repeat', type=int, default=10, help='每帧后处理重复次数')
+    args = parser.parse_args()
+
+    outputs = load_outputs(args.model, args.frames, args.max_frames)
+    if not outputs:
+        print(f"没有找到录制帧: {args.frames}")
+        return
+
+    print(f"模型: {args.model}  帧数: {len(outputs)}  每帧重复: {args.repeat}")
+    print(f"{'阶段':<10}{'允许状态':<12}{'旧版ms':>10}{'新版ms':>10}{'新版p95':>10}"
+          f"{'旧版命中':>10}{'新版命中':>10}{'被掩盖':>8}")
+    for phase, allowed in PHASES.items():
+        legacy_times, legacy_results = time_postprocess(
+            legacy_postprocess, outputs, allowed, args.conf, args.iou, args.repeat)
+        filtered_times, filtered_results = time_postprocess(
+            filtered_postprocess, outputs, allowed, args.conf, args.iou, args.repeat)
+
+        legacy_hits = sum(r is not None for r in legacy_results)
+        filtered_hits = sum(r is not None for r in filtered_results)
+        # 旧版因其他状态分数更高而丢弃、但实际存在允许状态的帧数
+        masked = sum(a is None and b is not None for a, b in zip(legacy_results, filtered_results))
+
+        print(f"{phase:<10}{str(allowed):<12}{np.mean(legacy_times):>10.3f}{np.mean(filtered_times):>10.3f}"
+              f"{np.percentile(filtered_times, 95):>10.3f}{legacy_hits:>10}{filtered_hits:>10}{masked:>8}")
+
+
+if __name__ == "__main__":
+    main()
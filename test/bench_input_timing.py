@@ -0,0 +1,142 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+输入时序基准测试
+使用录制输入后端（不操作键鼠，可在无桌面的Linux上运行）测量输入控制器的实际时序：
+- start_clicking: 调用到第一次鼠标按下的延迟、stop_clicking返回耗时
+- 快速点击: 按下时长和点击周期与配置范围的对比
+- press_key / cast_rod: 调用到按下的延迟、实际按住时长与配置时长的误差
+- 输入执行器调度延迟（每一步实际执行时刻相对计划时刻）
+
+用法:
+    python test/bench_input_timing.py
+    python test/bench_input_timing.py --trials 20 --click-seconds 10
+
+依赖：
+pip install numpy pyyaml
+"""
+
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+from modules.fisher.config import fisher_config
+from modules.fisher.input_backend import RecordingInputBackend, EVENT_MOUSE_DOWN, EVENT_KEY_DOWN
+from modules.fisher.input_controller import InputController
+
+
+def summarize(name, values_ms, expected=None):
+    """输出一组耗时(毫秒)的统计"""
+    values = np.asarray(values_ms, dtype=np.float64)
+    if len(values) == 0:
+        print(f"{name:<28}{'(无数据)':>10}")
+        return
+    p50, p95 = np.percentile(values, (50, 95))
+    line = f"{name:<28}{len(values):>6}{values.mean():>10.2f}{p50:>10.2f}{p95:>10.2f}{values.max():>10.2f}"
+    if expected is not None:
+        line += f"   期望 {expected}"
+    print(line)
+
+
+def bench_click_start(controller, backend, trials):
+    """start_clicking到第一次按下的延迟，以及stop_clicking耗时"""
+    start_latency, stop_time = [], []
+    for _ in range(trials):
+        backend.clear()
+        start = time.perf_counter()
+        controller.start_clicking()
+        while not backend.get_events(EVENT_MOUSE_DOWN):
+            time.sleep(0.0005)
+        start_latency.append((backend.get_events(EVENT_MOUSE_DOWN)[0].timestamp - start) * 1000)
+
+        stop = time.perf_counter()
+        controller.stop_clicking()
+        stop_time.append((time.perf_counter() - stop) * 1000)
+    return start_latency, stop_time
+
+
+def bench_clicking(controller, backend, seconds):
+    """持续点击一段时间，返回按下时长和点击周期(毫秒)"""
+    backend.clear()
+    controller.start_clicking()
+    time.sleep(seconds)
+    controller.stop_clicking()
+
+    holds = [hold * 1000 for _, _, hold in backend.get_holds()]
+    downs = np.array([e.timestamp for e in backend.get_events(EVENT_MOUSE_DOWN)])
+    periods = np.diff(downs) * 1000 if len(downs) > 1 else []
+    return holds, periods
+
+
+def bench_press(controller, backend, trials, func, down_kind, expected_hold):
+    """调用到按下的延迟，以及按住时长误差(毫秒)"""
+    latency, error = [], []
+    for _ in range(trials):
+        backend.clear()
+        start = time.perf_counter()
+        func()
+        downs = backend.get_events(down_kind)
+        if downs:
+            latency.append((downs[0].timestamp - start) * 1000)
+        kind_up = down_kind.replace('down', 'up')
+        for _, _, hold in backend.get_holds(down_kind, kind_up):
+            error.append((hold - expected_hold) * 1000)
+    return latency, error
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='输入时序基准测试')
+    parser.add_argument('--trials', type=int, default=10, help='每项测量次数')
+    parser.add_argument('--click-seconds', type=float, default=5.0, help='持续点击测量时长(秒)')
+    parser.add_argument('--key-duration', type=float, default=0.2, help='press_key测量使用的按键时长(秒)')
+    parser.add_argument('--cast-duration', type=float, default=0.3, help='cast_rod测量使用的长按时长(秒)')
+    args = parser.parse_args()
+
+    timing = fisher_config.timing
+    backend = RecordingInputBackend()
+    controller = InputController(backend)
+
+    print(f"{'项目(ms)':<28}{'次数':>6}{'平均':>10}{'p50':>10}{'p95':>10}{'max':>10}")
+
+    start_latency, stop_time = bench_click_start(controller, backend, args.trials)
+    summarize("start_clicking→首次按下", start_latency)
+    summarize("stop_clicking耗时", stop_time)
+
+    holds, periods = bench_clicking(controller, backend, args.click_seconds)
+    summarize("点击按下时长", holds,
+              f"{timing.mouse_press_time_min * 1000:.0f}-{timing.mouse_press_time_max * 1000:.0f}")
+    period_min = timing.mouse_press_time_min + timing.mouse_release_time_min + timing.click_interval_min
+    period_max = timing.mouse_press_time_max + timing.mouse_release_time_max + timing.click_interval_max
+    summarize("点击周期", periods, f"{period_min * 1000:.0f}-{period_max * 1000:.0f}")
+
+    latency, error = bench_press(controller, backend, args.trials,
+                                 lambda: controller.press_key('a', args.key_duration),
+                                 EVENT_KEY_DOWN, args.key_duration)
+    summarize("press_key→按下", latency)
+    summarize("press_key按住时长误差", error, "0")
+
+    timing_cast = timing.cast_hold_time
+    timing.cast_hold_time = args.cast_duration
+    try:
+        latency, error = bench_press(controller, backend, args.trials, controller.cast_rod,
+                                     EVENT_MOUSE_DOWN, args.cast_duration)
+    finally:
+        timing.cast_hold_time = timing_cast
+    summarize("cast_rod→按下", latency)
+    summarize("cast_rod按住时长误差", error, "0")
+
+    stats = controller.executor.get_stats()
+    lateness = stats['lateness']
+    print(f"\n输入执行器: 执行{stats['executed']}步, 取消{stats['cancelled']}个任务, "
+          f"调度延迟 p50={lateness['p50_ms']:.2f}ms p95={lateness['p95_ms']:.2f}ms max={lateness['max_ms']:.2f}ms")
+    controller.cleanup()
+
+
+if __name__ == "__main__":
+    main()
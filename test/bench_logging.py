@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+日志开销基准测试
+对比同步输出（记录器直接挂文件和控制台处理器，原实现）与异步输出（队列处理器 + 日志线程）
+在调用方线程中每次logger.info的耗时：
+- 每次调用耗时的平均值、p50、p99和最大值(微秒)
+- 异步输出写完队列中全部记录的耗时、最大队列深度和丢弃条数
+
+日志写入临时目录，控制台输出重定向到空设备（保留写控制台的系统调用开销）。
+
+用法:
+    python test/bench_logging.py
+    python test/bench_logging.py --calls 50000 --rate 0
+    python test/bench_logging.py --rate 200     # 模拟提线阶段每秒200条
+
+依赖：
+pip install numpy
+"""
+
+import os
+import sys
+import time
+import logging
+import argparse
+import tempfile
+
+import numpy as np
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+from modules import logger as log_module
+
+
+def make_logger(name, use_async):
+    """创建测试记录器（与setup_logger相同的处理器）"""
+    logger = logging.getLogger(name)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    handlers = log_module._create_handlers(name, 'INFO')
+    if use_async:
+        with log_module._log_lock:
+            log_module._ensure_listener().add_route(name, handlers)
+        logger.addHandler(log_module._DroppingQueueHandler(log_module._log_queue, log_module._log_stats))
+    else:
+        for handler in handlers:
+            logger.addHandler(handler)
+    return logger
+
+
+def run(logger, calls, rate):
+    """调用logger.info，返回每次调用耗时(微秒)"""
+    interval = 1.0 / rate if rate > 0 else 0.0
+    costs = np.empty(calls, dtype=np.float64)
+    next_time = time.perf_counter()
+    for i in range(calls):
+        start = time.perf_counter()
+        logger.info(f"🎯 提线中 | 检测: 状态{i % 4}  置信度 {0.5 + (i % 50) / 100:.3f}  帧龄 {i % 17}ms")
+        costs[i] = (time.perf_counter() - start) * 1e6
+        if interval:
+            next_time += interval
+            delay = next_time - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+    return costs
+
+
+def report(name, costs):
+    p50, p99 = np.percentile(costs, (50, 99))
+    print(f"{name:<10}{len(costs):>8}{costs.mean():>10.1f}{p50:>10.1f}{p99:>10.1f}{costs.max():>12.1f}")
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='日志开销基准测试')
+    parser.add_argument('--calls', type=int, default=20000, help='每种方式的调用次数')
+    parser.add_argument('--rate', type=float, default=0, help='每秒调用次数，0表示不限速')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='bench_logging_')
+    os.chdir(workdir)
+    stdout = sys.stdout
+    sys.stdout = open(os.devnull, 'w', encoding='utf-8')  # 控制台处理器创建时绑定空设备
+    try:
+        sync_logger = make_logger('bench_sync', use_async=False)
+        async_logger = make_logger('bench_async', use_async=True)
+    finally:
+        sys.stdout = stdout
+
+    print(f"日志目录: {workdir}  调用次数: {args.calls}  限速: {args.rate or '不限'}")
+    print(f"{'方式':<10}{'次数':>8}{'平均us':>10}{'p50 us':>10}{'p99 us':>10}{'最大 us':>12}")
+    report('同步', run(sync_logger, args.calls, args.rate))
+    report('异步', run(async_logger, args.calls, args.rate))
+
+    start = time.perf_counter()
+    depth = log_module._log_queue.qsize()
+    log_module.shutdown_logging()
+    stats = log_module.get_logging_stats()
+    print(f"\n异步输出: 结束时队列 {depth} 条，写完耗时 {(time.perf_counter() - start) * 1000:.1f}ms，"
+          f"最大队列深度 {stats['max_depth']}/{stats['capacity']}，丢弃 {stats['dropped']} 条")
+
+
+if __name__ == "__main__":
+    main()
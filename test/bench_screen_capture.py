@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+屏幕截图性能基准测试
+对比旧版“每帧创建MSS实例”截图方式与持久截图会话(CaptureSession)的帧率和每帧内存分配
+
+用法:
+    python test/bench_screen_capture.py --frames 200
+    python test/bench_screen_capture.py --region 0 0 800 600
+
+依赖：
+pip install mss opencv-python numpy
+"""
+
+import os
+import sys
+import time
+import argparse
+import tracemalloc
+
+import cv2
+import mss
+import numpy as np
+
+# 直接从模块目录导入截图会话，避免触发fisher包初始化（加载模型）
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(PROJECT_ROOT, 'modules', 'fisher'))
+from screen_capture import CaptureSession
+
+
+def legacy_capture(region=None):
+    """旧版截图实现：每帧创建并关闭MSS实例，np.array拷贝后再转换颜色"""
+    screenshot_tool = mss.mss()
+    try:
+        if region:
+            monitor = {"left": region[0], "top": region[1], "width": region[2], "height": region[3]}
+        else:
+            monitor = screenshot_tool.monitors[1]
+        img = np.array(screenshot_tool.grab(monitor))
+        return cv2.cvtColor(img, cv2.COLOR_BGRA2BGR)
+    finally:
+        screenshot_tool.close()
+
+
+def run_benchmark(name, capture_func, frames, warmup=5):
+    """
+    执行单项基准测试
+
+    Args:
+        name: 测试名称
+        capture_func: 截图函数
+        frames: 测试帧数
+        warmup: 预热帧数
+
+    Returns:
+        dict: 测试结果
+    """
+    for _ in range(warmup):
+        capture_func()
+
+    # 帧率测试（不开启tracemalloc，避免影响计时）
+    start = time.perf_counter()
+    for _ in range(frames):
+        capture_func()
+    elapsed = time.perf_counter() - start
+
+    # 内存分配测试：统计每帧峰值分配字节数和新增内存块数
+    tracemalloc.start()
+    peak_bytes = []
+    block_deltas = []
+    for _ in range(frames):
+        tracemalloc.reset_peak()
+        current_before, _ = tracemalloc.get_traced_memory()
+        blocks_before = sys.getallocatedblocks()
+        capture_func()
+        _, peak = tracemalloc.get_traced_memory()
+        peak_bytes.append(peak - current_before)
+        block_deltas.append(sys.getallocatedblocks() - blocks_before)
+    tracemalloc.stop()
+
+    return {
+        'name': name,
+        'fps': frames / elapsed,
+        'ms_per_frame': elapsed / frames * 1000,
+        'alloc_kb_per_frame': float(np.mean(peak_bytes)) / 1024,
+        'blocks_per_frame': float(np.mean(block_deltas)),
+    }
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='屏幕截图性能基准测试')
+    parser.add_argument('--frames', type=int, default=200, help='每项测试的帧数')
+    parser.add_argument('--region', type=int, nargs=4, metavar=('LEFT', 'TOP', 'WIDTH', 'HEIGHT'),
+                        help='截图区域，默认主显示器全屏')
+    args = parser.parse_args()
+
+    region = tuple(args.region) if args.region else None
+    session = CaptureSession()
+
+    results = [
+        run_benchmark('legacy (每帧新建MSS)', lambda: legacy_capture(region), args.frames),
+        run_benchmark('session (复用缓冲区)', lambda: session.grab(region), args.frames),
+        run_benchmark('session (返回副本)', lambda: session.grab(region).copy(), args.frames),
+    ]
+    session.close()
+
+    print(f"截图区域: {region or '主显示器全屏'}  测试帧数: {args.frames}")
+    print(f"{'方式':<24}{'FPS':>10}{'ms/帧':>10}{'KB分配/帧':>14}{'内存块/帧':>12}")
+    for result in results:
+        print(f"{result['name']:<24}{result['fps']:>10.1f}{result['ms_per_frame']:>10.2f}"
+              f"{result['alloc_kb_per_frame']:>14.1f}{result['blocks_per_frame']:>12.1f}")
+
+    baseline = results[0]['fps']
+    for result in results[1:]:
+        print(f"{result['name']} 相对旧版加速: {result['fps'] / baseline:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+停止延迟测试
+验证停止钓鱼时所有等待都能被中断，停止延迟不超过一次检测：
+- 动作测试（无需模型和桌面）：录制输入后端上分别执行抛竿长按、暂停等待、按F键、移动鼠标并抛竿等
+  阻塞动作，执行中途取消停止令牌，测量动作返回耗时
+- 回放测试（需要模型和录制会话，可选）：回放录制会话运行完整钓鱼流程，随机时刻调用stop_fishing测量耗时
+
+上限为最长的阶段检测间隔（一次检测周期），回放测试额外加上推理耗时p99；超过上限时以非零状态退出
+
+用法:
+    python test/bench_stop_latency.py
+    python test/bench_stop_latency.py --session recordings/session_20261016_120000 --trials 5
+
+依赖：
+pip install numpy pyyaml opencv-python
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import threading
+
+import numpy as np
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+from modules.fisher.config import fisher_config
+from modules.fisher.input_backend import RecordingInputBackend
+from modules.fisher.input_controller import InputController
+from modules.fisher.fishing_controller import FishingController
+from modules.fisher.state_machine import Action
+
+
+def detection_tick():
+    """一次检测周期上限：各阶段检测间隔中的最大值(秒)"""
+    model = fisher_config.model
+    return max(model.detection_interval, model.detection_interval_idle, model.detection_interval_waiting,
+               model.detection_interval_pulling, model.detection_interval_success)
+
+
+def measure_action(controller, action, value, cancel_after):
+    """
+    在线程中执行一个阻塞动作，cancel_after秒后取消停止令牌
+
+    Returns:
+        float: 取消到动作返回的耗时(秒)
+    """
+    controller.stop_token.reset()
+    thread = threading.Thread(target=controller._action_handlers[action], args=(value,), daemon=True)
+    thread.start()
+    time.sleep(cancel_after)
+    start = time.perf_counter()
+    controller.stop_token.cancel()
+    thread.join(timeout=10.0)
+    return time.perf_counter() - start
+
+
+def bench_actions(trials, bound):
+    """阻塞动作的停止延迟"""
+    controller = FishingController(input_ctrl=InputController(RecordingInputBackend()))
+    timing = fisher_config.timing
+    actions = [
+        ('抛竿长按', Action.CAST_ROD, None),
+        ('暂停等待', Action.HOLD, 5.0),
+        ('按F键', Action.PRESS_SUCCESS_KEY, None),
+        ('移动鼠标并抛竿', Action.MOVE_MOUSE_AND_CAST, None),
+    ]
+
+    failed = False
+    print(f"{'动作':<14}{'次数':>6}{'p50 ms':>10}{'max ms':>10}{'上限 ms':>10}  结果")
+    for name, action, value in actions:
+        latencies = []
+        for _ in range(trials):
+            # 在按住/等待期间的随机时刻取消
+            latencies.append(measure_action(controller, action, value,
+                                            random.uniform(0.05, min(timing.cast_hold_time, 1.0))))
+        latencies = np.array(latencies) * 1000
+        ok = latencies.max() <= bound * 1000
+        failed |= not ok
+        print(f"{name:<14}{len(latencies):>6}{np.median(latencies):>10.1f}{latencies.max():>10.1f}"
+              f"{bound * 1000:>10.0f}  {'通过' if ok else '超出上限'}")
+    controller.input.cleanup()
+    return not failed
+
+
+def bench_replay(session_dir, trials, bound):
+    """回放录制会话，随机时刻停止钓鱼的延迟"""
+    from modules.fisher.model_detector import model_detector
+    from modules.fisher.session_recorder import SessionReader
+    from modules.fisher.session_replay import ReplayFrameSource, ReplayInput
+
+    reader = SessionReader(session_dir)
+    source = ReplayFrameSource(reader, realtime=True)
+    controller = FishingController(input_ctrl=ReplayInput())
+    model_detector.set_frame_source(source)
+
+    latencies = []
+    try:
+        for _ in range(trials):
+            source.start()
+            if not controller.start_fishing():
+                print("钓鱼控制器启动失败（模型未加载？）")
+                return False
+            time.sleep(random.uniform(0.5, max(0.6, min(reader.duration, 10.0))))
+            start = time.perf_counter()
+            controller.stop_fishing()
+            latencies.append(time.perf_counter() - start)
+    finally:
+        model_detector.set_frame_source(None)
+        reader.close()
+
+    inference_p99 = model_detector.inference_latency.get_stats()['p99_ms'] or 0.0
+    limit = bound * 1000 + inference_p99
+    latencies = np.array(latencies) * 1000
+    ok = latencies.max() <= limit
+    print(f"{'回放stop_fishing':<14}{len(latencies):>6}{np.median(latencies):>10.1f}{latencies.max():>10.1f}"
+          f"{limit:>10.0f}  {'通过' if ok else '超出上限'}")
+    return ok
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='停止延迟测试')
+    parser.add_argument('--trials', type=int, default=5, help='每项测量次数')
+    parser.add_argument('--session', default=None, help='录制目录（指定时追加回放测试，需要模型）')
+    args = parser.parse_args()
+
+    bound = detection_tick()
+    ok = bench_actions(args.trials, bound)
+    if args.session:
+        ok = bench_replay(args.session, args.trials, bound) and ok
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
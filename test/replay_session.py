@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+录制会话回放测试
+在无显示器环境中回放录制的钓鱼会话：检测器从录制帧取图，钓鱼控制器照常运行，
+键鼠操作只记录不执行，输出每轮从状态变化到第一个输入动作的延迟
+
+录制方法: 在config.yaml中设置 recording.enabled: true 后正常钓鱼，录制保存在 recordings/ 下
+
+用法:
+    python test/replay_session.py recordings/session_20261016_120000
+    python test/replay_session.py recordings/session_20261016_120000 --fast --json report.json
+
+依赖：
+pip install opencv-python numpy （及所配置推理后端的依赖）
+"""
+
+import os
+import sys
+import json
+import argparse
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+from modules.fisher.session_replay import run_replay
+
+
+def format_ms(value):
+    """格式化毫秒值，None显示为-"""
+    return f"{value:.1f}" if value is not None else "-"
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='录制会话回放测试')
+    parser.add_argument('session', help='录制目录')
+    parser.add_argument('--fast', action='store_true', help='尽快回放（每次检测取下一帧，不按录制时间轴）')
+    parser.add_argument('--timeout', type=float, default=None, help='最长回放时间(秒)')
+    parser.add_argument('--json', default=None, help='把完整报告写入JSON文件')
+    args = parser.parse_args()
+
+    report = run_replay(args.session, realtime=not args.fast, timeout=args.timeout)
+
+    print(f"模式: {report['mode']}  录制帧数: {report['frames']}  取用帧数: {report['frames_served']}  "
+          f"录制时长: {report['recorded_duration']:.1f}s  完成轮数: {report['completed_rounds']}")
+    print(f"{'轮次':<6}{'状态变化':<10}{'延迟ms':>10}  {'首个动作'}")
+    for event in report['events']:
+        print(f"{event['round']:<6}{event['transition']:<10}{format_ms(event['latency_ms']):>10}  "
+              f"{event['action'] or '(无动作)'}")
+
+    print(f"\n{'状态变化':<10}{'次数':>6}{'p50':>10}{'p95':>10}{'max':>10}")
+    for transition, stats in sorted(report['latency_by_transition'].items()):
+        print(f"{transition:<10}{stats['count']:>6}{format_ms(stats['p50_ms']):>10}"
+              f"{format_ms(stats['p95_ms']):>10}{format_ms(stats['max_ms']):>10}")
+    overall = report['latency']
+    print(f"{'全部':<10}{overall['count']:>6}{format_ms(overall['p50_ms']):>10}"
+          f"{format_ms(overall['p95_ms']):>10}{format_ms(overall['max_ms']):>10}")
+
+    detection = report['detection']
+    print(f"\n检测耗时: p50={format_ms(detection['p50_ms'])}ms  p95={format_ms(detection['p95_ms'])}ms")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"报告已保存: {args.json}")
+
+
+if __name__ == "__main__":
+    main()